@@ -27,6 +27,10 @@ fogbench
  [IN]   -O --occurrences The number of occurrences of the template (default: 1)
  [IN]   -P --port        The Fledge port. Default depends on payload and protocol
  [IN]   -S --statistic   The type of statistics to collect
+        -C --concurrency The number of concurrent senders of the load mode
+        -R --rate        The target readings per second of the load mode (default: as fast as answered)
+        -D --duration    The seconds the load mode sends readings for
+        -B --batch       The readings per message of the load mode (default: 1)
 
  Example:
 
@@ -42,9 +46,11 @@ fogbench
    * Read those objects
    * Send those to CoAP or HTTP south plugin server, on specific host and port
 
- .. todo::
+ With any of -C, -R or -D, fogbench runs in load mode: the readings are generated from the template as they are
+ sent, with no sample file, by a number of concurrent senders, and the achieved rate and the latency histogram are
+ reported. E.g. 5000 readings per second for 60 seconds, in HTTP posts of 50 readings, by 8 senders:
 
-   * Try generators
+     $ ./fogbench -t template.json -p http -C 8 -R 5000 -D 60 -B 50
 
 """
 import sys
@@ -62,6 +68,7 @@ from aiocoap import *
 from cbor2 import dumps
 
 from .exceptions import *
+from .load import run_load
 
 __author__ = "Praveen Garg"
 __copyright__ = "Copyright (c) 2017 OSIsoft, LLC"
@@ -109,6 +116,18 @@ def parse_template_and_prepare_json(_template_file,
             _write_readings_to_file(_write_to_file, r)
 
 
+def generate_readings(_template_file, _occurrences=None):
+    """Yields the readings of the template, _occurrences times or without end"""
+    with open(_template_file) as data_file:
+        data = json.load(data_file)
+
+    supported_format_types = ["number", "enum"]
+    occurrence = 0
+    while _occurrences is None or occurrence < _occurrences:
+        yield from _prepare_sensor_reading(data, supported_format_types)
+        occurrence += 1
+
+
 def _write_readings_to_file(to_file, r):
         with open(to_file, 'a') as the_file:
             json.dump(r, the_file)
@@ -320,6 +339,15 @@ parser.add_argument('-i', '--interval', default=0, help='The interval in seconds
 parser.add_argument('-S', '--statistics', default='total', choices=['total'], help='The type of statistics to collect '
                                                                                    '(default: total)')
 
+parser.add_argument('-C', '--concurrency', type=int, help='The number of concurrent senders of the load mode '
+                                                          '(default: 1)')
+parser.add_argument('-R', '--rate', type=float, help='The target readings per second of the load mode (default: as '
+                                                     'fast as the server answers)')
+parser.add_argument('-D', '--duration', type=float, help='The seconds the load mode sends readings for (default: '
+                                                         'the occurrences and iterations of the template)')
+parser.add_argument('-B', '--batch', type=int, default=1, help='The readings per message of the load mode, HTTP '
+                                                               'posts a JSON array (default: 1)')
+
 namespace = parser.parse_args(sys.argv[1:])
 infile = '{0}'.format(namespace.template if namespace.template else '')
 statistics_file = os.path.join(os.path.dirname(__file__), "out/{}".format(namespace.output)) if namespace.output else None
@@ -343,11 +371,25 @@ default_port = 6683 if arg_payload_protocol == 'http' else 5683
 arg_port = int(namespace.port) if namespace.port else default_port
 
 check_server(arg_payload_protocol)
-sample_file = os.path.join("/tmp", "fledge_running_sample.{}".format(os.getpid()))
-parse_template_and_prepare_json(_template_file=infile, _write_to_file=sample_file, _occurrences=arg_occurrences)
-read_out_file(_file=sample_file, _keep=keep_the_file, _iterations=arg_iterations, _interval=arg_interval,
-              send_to=arg_payload_protocol)
-get_statistics(_stats_type=arg_stats_type, _out_file=statistics_file)
+if namespace.concurrency or namespace.rate or namespace.duration:
+    arg_concurrency = namespace.concurrency if namespace.concurrency else 1
+    arg_batch = namespace.batch if namespace.batch > 0 else 1
+    # Without a duration, the load sends the occurrences of the template once per iteration
+    readings = generate_readings(infile, None if namespace.duration else arg_occurrences * arg_iterations)
+    stats = run_load(readings, send_to=arg_payload_protocol, host=arg_host, port=arg_port,
+                     duration=namespace.duration, rate=namespace.rate, concurrency=arg_concurrency, batch=arg_batch)
+    stat = stats.report(rate=namespace.rate, concurrency=arg_concurrency, batch=arg_batch)
+    if statistics_file:
+        with open(statistics_file, 'w') as f:
+            f.write(stat)
+    else:
+        print(stat)
+else:
+    sample_file = os.path.join("/tmp", "fledge_running_sample.{}".format(os.getpid()))
+    parse_template_and_prepare_json(_template_file=infile, _write_to_file=sample_file, _occurrences=arg_occurrences)
+    read_out_file(_file=sample_file, _keep=keep_the_file, _iterations=arg_iterations, _interval=arg_interval,
+                  send_to=arg_payload_protocol)
+    get_statistics(_stats_type=arg_stats_type, _out_file=statistics_file)
 
 # TODO: Change below per local_timestamp() values
 """ Expected output from given template
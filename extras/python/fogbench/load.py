@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+"""The fogbench load module sends readings with concurrent senders
+
+A number of async senders share one CoAP context or one HTTP session and send the readings of a generator, so that
+the readings are never written to a file nor held in memory all at once.
+
+With a target rate the load is open-loop: the n-th message is due at start + n * batch / rate, whether or not the
+previous messages were answered, and its latency is measured from the time it was due, so that a slow server shows
+in the latency rather than in a lower rate of requests. Without a rate the load is closed-loop: every sender sends
+its next message as soon as the previous one is answered.
+"""
+
+import bisect
+import itertools
+import json
+import time
+
+import asyncio
+import aiohttp
+from aiocoap import Context, Message, POST
+from cbor2 import dumps
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+HISTOGRAM_BOUNDS = [0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5]
+"""Upper bounds, in seconds, of the buckets of the latency histogram; the last bucket has no upper bound"""
+
+
+class LoadStatistics(object):
+    """Latencies and counts of the messages sent by the senders"""
+
+    def __init__(self):
+        self.latencies = []
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.messages = 0
+        self.readings = 0
+        self.errors = 0
+        self.start = None
+        self.end = None
+
+    def add(self, latency, readings, sent):
+        self.latencies.append(latency)
+        self.histogram[bisect.bisect_left(HISTOGRAM_BOUNDS, latency)] += 1
+        if sent:
+            self.messages += 1
+            self.readings += readings
+        else:
+            self.errors += 1
+
+    def percentile(self, p):
+        ordered = sorted(self.latencies)
+        return ordered[max(0, int(len(ordered) * p / 100 + 0.5) - 1)] if ordered else 0
+
+    def report(self, rate=None, concurrency=1, batch=1):
+        elapsed = self.end - self.start
+        stat = u"Load Statistics:\n"
+        stat += u"\nMode: {}, {} senders, {} readings per message".format(
+            "open-loop at {} readings/second".format(rate) if rate else "closed-loop", concurrency, batch)
+        stat += u"\nDuration: {:.3f} seconds\n".format(elapsed)
+        stat += u"\nMessages Sent:   {}".format(self.messages)
+        stat += u"\nReadings Sent:   {}".format(self.readings)
+        stat += u"\nMessages Failed: {}\n".format(self.errors)
+        stat += u"\nAchieved messages/second: {:.1f}".format(self.messages / elapsed if elapsed else 0)
+        stat += u"\nAchieved readings/second: {:.1f}\n".format(self.readings / elapsed if elapsed else 0)
+        stat += u"\nLatency (ms): p50 {:.3f}  p90 {:.3f}  p99 {:.3f}  p99.9 {:.3f}  max {:.3f}\n".format(
+            *[self.percentile(p) * 1000 for p in (50, 90, 99, 99.9, 100)])
+        stat += u"\nLatency Histogram (ms):"
+        total = len(self.latencies) or 1
+        lower = 0
+        for bound, count in zip(HISTOGRAM_BOUNDS + [None], self.histogram):
+            label = "{:>7g} - {:<7g}".format(lower * 1000, bound * 1000) if bound else "{:>7g} -        ".format(
+                lower * 1000)
+            stat += u"\n  {} {:>9}  {}".format(label, count, "#" * int(50 * count / total)).rstrip()
+            lower = bound
+        return stat
+
+
+class CoapSender(object):
+    """Sends one reading per message to the CoAP south plugin, over one client context"""
+
+    def __init__(self, host, port):
+        self._host = host
+        self._port = port
+        self._context = None
+
+    async def open(self):
+        self._context = await Context.create_client_context()
+
+    async def close(self):
+        await self._context.shutdown()
+
+    async def send(self, readings):
+        sent = True
+        for reading in readings:
+            request = Message(payload=dumps(reading), code=POST)
+            request.opt.uri_host = self._host
+            request.opt.uri_port = self._port
+            request.opt.uri_path = ("other", "sensor-values")
+            response = await self._context.request(request).response
+            sent = sent and response.code.is_successful()
+        return sent
+
+
+class HttpSender(object):
+    """Posts the readings of a message as a JSON array to the HTTP south plugin, over one session"""
+
+    def __init__(self, host, port, concurrency):
+        self._url = 'http://{}:{}/sensor-reading'.format(host, port)
+        self._concurrency = concurrency
+        self._session = None
+
+    async def open(self):
+        self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self._concurrency))
+
+    async def close(self):
+        await self._session.close()
+
+    async def send(self, readings):
+        async with self._session.post(self._url, data=json.dumps(readings),
+                                      headers={'content-type': 'application/json'}) as resp:
+            await resp.read()
+            return resp.status < 400
+
+
+async def _send_load(sender, readings, stats, duration, rate, concurrency, batch):
+    interval = batch / rate if rate else 0
+    stop_time = stats.start + duration if duration else None
+    # The senders share the counter, so that every message number is sent once
+    counter = itertools.count()
+
+    async def send_messages():
+        for n in counter:
+            due = stats.start + n * interval if rate else time.perf_counter()
+            if stop_time is not None and due >= stop_time:
+                return
+            if rate:
+                await asyncio.sleep(due - time.perf_counter())
+            message = list(itertools.islice(readings, batch))
+            if not message:
+                return
+            try:
+                sent = await sender.send(message)
+            except Exception as ex:
+                print("Error: ", str(ex))
+                sent = False
+            stats.add(time.perf_counter() - due, len(message), sent)
+
+    await asyncio.gather(*[send_messages() for _ in range(concurrency)])
+
+
+def run_load(readings, send_to='coap', host='localhost', port=5683, duration=None, rate=None, concurrency=1,
+             batch=1):
+    """Sends the readings of the generator with concurrent senders and returns the statistics of the load
+
+    Args:
+        readings: generator of the readings to send, the load ends when it is exhausted
+        send_to: 'coap' or 'http'; CoAP messages carry one reading each, the batch is sent as consecutive messages
+        host, port: the south plugin server
+        duration: seconds to send for, None to send all the readings
+        rate: target readings per second (open-loop), None to send as fast as the server answers (closed-loop)
+        concurrency: number of senders
+        batch: number of readings per message
+    """
+    sender = HttpSender(host, port, concurrency) if send_to == 'http' else CoapSender(host, port)
+    stats = LoadStatistics()
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(sender.open())
+    try:
+        stats.start = time.perf_counter()
+        loop.run_until_complete(_send_load(sender, readings, stats, duration, rate, concurrency, batch))
+        stats.end = time.perf_counter()
+    finally:
+        loop.run_until_complete(sender.close())
+    return stats
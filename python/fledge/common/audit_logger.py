@@ -4,6 +4,10 @@
 # See: http://fledge.readthedocs.io/
 # FLEDGE_END
 
+import asyncio
+import datetime
+import json
+
 from fledge.common.storage_client.payload_builder import PayloadBuilder
 from fledge.common.storage_client.storage_client import StorageClientAsync
 from fledge.common.storage_client.exceptions import StorageServerError
@@ -18,6 +22,15 @@ __version__ = "${VERSION}"
 
 _logger = logger.setup(__name__)
 
+_FLUSH_INTERVAL = 5
+""" Seconds between the flushes of the buffered entries """
+
+_FLUSH_SIZE = 100
+""" Number of buffered entries that triggers a flush """
+
+_MAX_BUFFERED = 10000
+""" Entries kept while the storage service is not reachable, the older ones are dropped """
+
 
 class AuditLoggerSingleton(object):
     """ AuditLoggerSingleton
@@ -45,6 +58,17 @@ class AuditLogger(AuditLoggerSingleton):
     _storage = None
     """ The storage client we should use to talk to the storage service """
 
+    _buffer = None
+    """ The entries waiting for a flush, None when the entries are not buffered """
+
+    _coalesced = None
+    """ (code, log) of the failures in the buffer: their entry, the repeated failures are counted in it """
+
+    _flush_task = None
+    _size_flush_task = None
+    _flush_interval = _FLUSH_INTERVAL
+    _flush_size = _FLUSH_SIZE
+
     def __init__(self, storage=None):
         AuditLoggerSingleton.__init__(self)
         if self._storage is None:
@@ -52,7 +76,86 @@ class AuditLogger(AuditLoggerSingleton):
                 raise TypeError('Must be a valid Storage object')
             self._storage = storage
 
+    def start_buffering(self, flush_interval=_FLUSH_INTERVAL, flush_size=_FLUSH_SIZE):
+        """ Buffers the entries, that are written in a single insert every flush_interval seconds or once there
+        are flush_size of them
+
+        The failures that are repeated before the flush, with the same code and log, are coalesced into a single
+        entry, whose log has the number of times it was repeated. stop_buffering must be awaited before the process
+        exits, not to lose the buffered entries.
+        """
+        self._flush_interval = flush_interval
+        self._flush_size = flush_size
+        if self._buffer is None:
+            self._buffer = []
+            self._coalesced = {}
+            self._flush_task = asyncio.ensure_future(self._flush_periodically())
+
+    async def stop_buffering(self):
+        """ Flushes the buffered entries, the next entries are written one at a time """
+        if self._buffer is None:
+            return
+        self._flush_task.cancel()
+        self._flush_task = None
+        if self._size_flush_task is not None:
+            # Its entries are back in the buffer if it fails
+            await self._size_flush_task
+            self._size_flush_task = None
+        await self.flush()
+        self._buffer = None
+        self._coalesced = None
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """ Writes the buffered entries in a single insert; they are kept for the next flush if it fails """
+        if not self._buffer:
+            return
+        entries, self._buffer = self._buffer, []
+        self._coalesced = {}
+        inserts = []
+        for entry in entries:
+            row = {"code": entry["code"], "level": entry["level"], "ts": entry["ts"]}
+            if entry["count"] > 1:
+                row["log"] = dict(entry["log"] or {}, repeated=entry["count"])
+            elif entry["log"] is not None:
+                row["log"] = entry["log"]
+            inserts.append(row)
+        try:
+            await self._storage.insert_into_tbl("log", {"inserts": inserts})
+        except (StorageServerError, Exception) as ex:
+            _logger.exception("Failed to log %d audit trail entries: %s", len(entries), str(ex))
+            if self._buffer is not None:
+                self._buffer[:0] = entries[-_MAX_BUFFERED:]
+                del self._buffer[:-_MAX_BUFFERED]
+
+    def _buffer_entry(self, level, code, log):
+        key = None
+        if level == self._failure and (log is None or isinstance(log, dict)):
+            key = (code, json.dumps(log, sort_keys=True, default=str))
+            entry = self._coalesced.get(key)
+            if entry is not None:
+                entry["count"] += 1
+                return
+        # The time of the entry, in UTC as the default of the ts column, to which the entries that are not buffered
+        # are left, with an explicit offset not to be read in the time zone of the storage: the entries are sorted by
+        # ts. The offset is +HH:MM, the form both SQLite and PostgreSQL read
+        ts = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f+00:00')
+        entry = {"code": code, "level": level, "log": log, "ts": ts, "count": 1}
+        self._buffer.append(entry)
+        if key is not None:
+            self._coalesced[key] = entry
+        # The buffer may hold more than flush_size entries, once a failed flush has put its entries back
+        if len(self._buffer) >= self._flush_size and (self._size_flush_task is None or self._size_flush_task.done()):
+            self._size_flush_task = asyncio.ensure_future(self.flush())
+
     async def _log(self, level, code, log):
+        if self._buffer is not None:
+            self._buffer_entry(level, code, log)
+            return
         try:
             if log is None:
                 payload = PayloadBuilder().INSERT(code=code, level=level).payload()
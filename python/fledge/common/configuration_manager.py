@@ -16,8 +16,9 @@ import os
 from math import *
 import collections
 import ast
+import functools
 
-from fledge.common.storage_client.payload_builder import PayloadBuilder
+from fledge.common.storage_client.payload_builder import PayloadBuilder, PayloadTemplate, Slot
 from fledge.common.storage_client.storage_client import StorageClientAsync
 from fledge.common.storage_client.exceptions import StorageServerError
 from fledge.common.storage_client.utils import Utils
@@ -32,13 +33,112 @@ __version__ = "${VERSION}"
 
 _logger = logger.setup(__name__)
 
+_CATEGORY_BY_KEY = PayloadTemplate(PayloadBuilder().SELECT("key", "description", "value", "display_name", "ts")
+                                   .ALIAS("return", ("ts", 'timestamp'))
+                                   .FORMAT("return", ("ts", "YYYY-MM-DD HH24:MI:SS.MS"))
+                                   .WHERE(["key", "=", Slot("key")]).LIMIT(1))
+_CATEGORY_VALUE_BY_KEY = PayloadTemplate(PayloadBuilder().SELECT("value").WHERE(["key", "=", Slot("key")]))
+
 # MAKE UPPER_CASE
 _valid_type_strings = sorted(['boolean', 'integer', 'float', 'string', 'IPv4', 'IPv6', 'X509 certificate', 'password',
                               'JSON', 'URL', 'enumeration', 'script', 'code'])
 _optional_items = sorted(['readonly', 'order', 'length', 'maximum', 'minimum', 'rule', 'deprecated', 'displayName',
                           'validity', 'mandatory'])
 RESERVED_CATG = ['South', 'North', 'General', 'Advanced', 'Utilities', 'rest_api', 'Security', 'service', 'SCHEDULER',
-                 'SMNTR', 'PURGE_READ', 'Notifications']
+                 'SMNTR', 'PURGE_READ', 'Notifications', 'LOGGING']
+
+
+def _str_to_bool(item_val):
+    return item_val.lower() in ("true", "false")
+
+
+def _str_to_int(item_val):
+    try:
+        _value = int(item_val)
+    except ValueError:
+        return False
+    else:
+        return True
+
+
+def _str_to_float(item_val):
+    try:
+        _value = float(item_val)
+    except ValueError:
+        return False
+    else:
+        return True
+
+
+def _str_to_ipaddress(item_val):
+    try:
+        return ipaddress.ip_address(item_val)
+    except ValueError:
+        return False
+
+
+def _is_json(item_val):
+    if isinstance(item_val, dict):
+        return True
+    return Utils.is_json(item_val)
+
+
+def _is_url(item_val):
+    try:
+        result = urlparse(item_val)
+        return True if all([result.scheme, result.netloc]) else False
+    except:
+        return False
+
+
+def _is_string(item_val):
+    return isinstance(item_val, str)
+
+
+# TODO: Not implemented for password and X509 certificate type
+_TYPE_VALIDATORS = {'boolean': _str_to_bool, 'integer': _str_to_int, 'float': _str_to_float, 'JSON': _is_json,
+                    'IPv4': _str_to_ipaddress, 'IPv6': _str_to_ipaddress, 'URL': _is_url, 'string': _is_string}
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_rule(expression):
+    """The code of a rule with a value substituted, compiled once for the values that come again"""
+    return compile(expression, '<rule>', 'eval')
+
+
+class ItemValidator(object):
+    """Validator of the new values of a config item, compiled from the item definition
+
+    The type check and the enumeration options are resolved once. The value is substituted in the rule text, as it
+    always was, and the code of the rule is cached for each value.
+    """
+
+    __slots__ = ['signature', 'type', 'options', 'mandatory', '_check_type', '_rule']
+
+    def __init__(self, item_val, signature=None):
+        self.signature = self.make_signature(item_val) if signature is None else signature
+        self.type = item_val['type']
+        self.options = frozenset(item_val['options']) if self.type == 'enumeration' else None
+        self.mandatory = item_val.get('mandatory') == 'true'
+        self._check_type = _TYPE_VALIDATORS.get(self.type)
+        self._rule = item_val.get('rule')
+
+    @staticmethod
+    def make_signature(item_val):
+        """The entries of an item definition the validator is compiled from"""
+        options = item_val.get('options')
+        return (item_val.get('type'), tuple(options) if isinstance(options, list) else options,
+                item_val.get('mandatory'), item_val.get('rule'))
+
+    def check_type(self, value):
+        """Same as ConfigurationManager._validate_type_value for the item type"""
+        return None if self._check_type is None else self._check_type(value)
+
+    def check_rule(self, value):
+        """False if the value breaks the rule of the item"""
+        if not self._rule:
+            return True
+        return eval(_compile_rule(self._rule.replace("value", value))) is not False
 
 
 class ConfigurationCache(object):
@@ -145,6 +245,7 @@ class ConfigurationManager(ConfigurationManagerSingleton):
     _storage = None
     _registered_interests = None
     _cacheManager = None
+    _validators = None
 
     def __init__(self, storage=None):
         ConfigurationManagerSingleton.__init__(self)
@@ -156,6 +257,8 @@ class ConfigurationManager(ConfigurationManagerSingleton):
             self._registered_interests = {}
         if self._cacheManager is None:
             self._cacheManager = ConfigurationCache()
+        if self._validators is None:
+            self._validators = {}
 
     async def _run_callbacks(self, category_name):
         callbacks = self._registered_interests.get(category_name)
@@ -363,9 +466,7 @@ class ConfigurationManager(ConfigurationManagerSingleton):
 
     async def _read_category(self, cat_name):
         # SELECT configuration.key, configuration.description, configuration.value, configuration.display_name, configuration.ts FROM configuration
-        payload = PayloadBuilder().SELECT("key", "description", "value", "display_name", "ts") \
-            .ALIAS("return", ("ts", 'timestamp')) \
-            .FORMAT("return", ("ts", "YYYY-MM-DD HH24:MI:SS.MS")).WHERE(["key", "=", cat_name]).LIMIT(1).payload()
+        payload = _CATEGORY_BY_KEY.fill(key=cat_name)
         result = await self._storage.query_tbl_with_payload('configuration', payload)
         return result['rows'][0] if result['rows'] else None
 
@@ -415,7 +516,7 @@ class ConfigurationManager(ConfigurationManagerSingleton):
     async def _read_category_val(self, category_name):
         # SELECT configuration.key, configuration.description, configuration.value,
         # configuration.ts FROM configuration WHERE configuration.key = :key_1
-        payload = PayloadBuilder().SELECT("value").WHERE(["key", "=", category_name]).payload()
+        payload = _CATEGORY_VALUE_BY_KEY.fill(key=category_name)
         results = await self._storage.query_tbl_with_payload('configuration', payload)
         for row in results['rows']:
             return row['value']
@@ -488,12 +589,11 @@ class ConfigurationManager(ConfigurationManagerSingleton):
             for item_name, new_val in config_item_list.items():
                 if item_name not in cat_info:
                     raise KeyError('{} config item not found'.format(item_name))
+                validator = self._get_item_validator(category_name, item_name, cat_info[item_name])
                 # Evaluate new_val as per rule if defined
-                if 'rule' in cat_info[item_name]:
-                    rule = cat_info[item_name]['rule'].replace("value", new_val)
-                    if eval(rule) is False:
-                        raise ValueError('The value of {} is not valid, please supply a valid value'.format(item_name))
-                if cat_info[item_name]['type'] == 'JSON':
+                if validator.check_rule(new_val) is False:
+                    raise ValueError('The value of {} is not valid, please supply a valid value'.format(item_name))
+                if validator.type == 'JSON':
                     if isinstance(new_val, dict):
                         pass
                     elif not isinstance(new_val, str):
@@ -501,18 +601,17 @@ class ConfigurationManager(ConfigurationManagerSingleton):
                 elif not isinstance(new_val, str):
                     raise TypeError('new value should be of type string')
 
-                if cat_info[item_name]['type'] == 'enumeration':
+                if validator.type == 'enumeration':
                     if new_val == '':
                         raise ValueError('entry_val cannot be empty')
-                    if new_val not in cat_info[item_name]['options']:
+                    if new_val not in validator.options:
                         raise ValueError('new value does not exist in options enum')
                 else:
-                    if self._validate_type_value(cat_info[item_name]['type'], new_val) is False:
+                    if validator.check_type(new_val) is False:
                         raise TypeError('Unrecognized value name for item_name {}'.format(item_name))
 
-                if 'mandatory' in cat_info[item_name]:
-                    if cat_info[item_name]['mandatory'] == 'true' and not len(new_val.strip()):
-                        raise ValueError("A value must be given for {}".format(item_name))
+                if validator.mandatory and not len(new_val.strip()):
+                    raise ValueError("A value must be given for {}".format(item_name))
                 old_value = cat_info[item_name]['value']
                 new_val = self._clean(cat_info[item_name]['type'], new_val)
                 # Validations on the basis of optional attributes
@@ -732,24 +831,22 @@ class ConfigurationManager(ConfigurationManagerSingleton):
                 if storage_value_entry == new_value_entry:
                     return
 
+            validator = self._get_item_validator(category_name, item_name, storage_value_entry)
             # Special case for enumeration field type handling
-            if storage_value_entry['type'] == 'enumeration':
+            if validator.type == 'enumeration':
                 if new_value_entry == '':
                     raise ValueError('entry_val cannot be empty')
-                if new_value_entry not in storage_value_entry['options']:
+                if new_value_entry not in validator.options:
                     raise ValueError('new value does not exist in options enum')
             else:
-                if self._validate_type_value(storage_value_entry['type'], new_value_entry) is False:
+                if validator.check_type(new_value_entry) is False:
                     raise TypeError('Unrecognized value name for item_name {}'.format(item_name))
-            if 'mandatory' in storage_value_entry:
-                if storage_value_entry['mandatory'] == 'true' and not len(new_value_entry.strip()):
-                    raise ValueError("A value must be given for {}".format(item_name))
-            new_value_entry = self._clean(storage_value_entry['type'], new_value_entry)
+            if validator.mandatory and not len(new_value_entry.strip()):
+                raise ValueError("A value must be given for {}".format(item_name))
+            new_value_entry = self._clean(validator.type, new_value_entry)
             # Evaluate new_value_entry as per rule if defined
-            if 'rule' in storage_value_entry:
-                rule = storage_value_entry['rule'].replace("value", new_value_entry)
-                if eval(rule) is False:
-                    raise ValueError('The value of {} is not valid, please supply a valid value'.format(item_name))
+            if validator.check_rule(new_value_entry) is False:
+                raise ValueError('The value of {} is not valid, please supply a valid value'.format(item_name))
             # Validations on the basis of optional attributes
             self._validate_value_per_optional_attribute(item_name, storage_value_entry, new_value_entry)
 
@@ -936,10 +1033,9 @@ class ConfigurationManager(ConfigurationManagerSingleton):
             category_val_prepared = await self._validate_category_val(category_name, category_value, True)
             # Evaluate value as per rule if defined
             for item_name in category_val_prepared:
-                if 'rule' in category_val_prepared[item_name]:
-                    rule = category_val_prepared[item_name]['rule'].replace("value", category_val_prepared[item_name]['value'])
-                    if eval(rule) is False:
-                        raise ValueError('For {} category, The value of {} is not valid, please supply a valid value'.format(category_name, item_name))
+                validator = self._get_item_validator(category_name, item_name, category_val_prepared[item_name])
+                if validator.check_rule(category_val_prepared[item_name]['value']) is False:
+                    raise ValueError('For {} category, The value of {} is not valid, please supply a valid value'.format(category_name, item_name))
             # check if category_name is already in storage
             category_val_storage = await self._read_category_val(category_name)
             if category_val_storage is None:
@@ -1315,52 +1411,17 @@ class ConfigurationManager(ConfigurationManagerSingleton):
                     del self._registered_interests[category_name]
 
     def _validate_type_value(self, _type, _value):
-        # TODO: Not implemented for password and X509 certificate type
-        def _str_to_bool(item_val):
-            return item_val.lower() in ("true", "false")
-
-        def _str_to_int(item_val):
-            try:
-                _value = int(item_val)
-            except ValueError:
-                return False
-            else:
-                return True
-
-        def _str_to_float(item_val):
-            try:
-                _value = float(item_val)
-            except ValueError:
-                return False
-            else:
-                return True
-
-        def _str_to_ipaddress(item_val):
-            try:
-                return ipaddress.ip_address(item_val)
-            except ValueError:
-                return False
-
-        if _type == 'boolean':
-            return _str_to_bool(_value)
-        elif _type == 'integer':
-            return _str_to_int(_value)
-        elif _type == 'float':
-            return _str_to_float(_value)
-        elif _type == 'JSON':
-            if isinstance(_value, dict):
-                return True
-            return Utils.is_json(_value)
-        elif _type == 'IPv4' or _type == 'IPv6':
-            return _str_to_ipaddress(_value)
-        elif _type == 'URL':
-            try:
-                result = urlparse(_value)
-                return True if all([result.scheme, result.netloc]) else False
-            except:
-                return False
-        elif _type == 'string':
-            return isinstance(_value, str)
+        check = _TYPE_VALIDATORS.get(_type)
+        return None if check is None else check(_value)
+
+    def _get_item_validator(self, category_name, item_name, item_val):
+        """Validator of a config item, compiled again only when the definition of the item has changed"""
+        signature = ItemValidator.make_signature(item_val)
+        validator = self._validators.get((category_name, item_name))
+        if validator is None or validator.signature != signature:
+            validator = ItemValidator(item_val, signature)
+            self._validators[(category_name, item_name)] = validator
+        return validator
 
     def _clean(self, item_type, item_val):
         if item_type == 'boolean':
@@ -7,6 +7,8 @@
 """ A simple implementation using the jq product to apply a transformation to the JSON document
 """
 
+from functools import lru_cache
+
 import pyjq
 
 from fledge.common import logger
@@ -17,6 +19,12 @@ __license__ = "Apache 2.0"
 __version__ = "${VERSION}"
 
 
+@lru_cache(maxsize=32)
+def _compile(filter_string):
+    """ The jq program of the filter, compiled once for all the blocks the filter is applied to """
+    return pyjq.compile(filter_string)
+
+
 class JQFilter:
     """JQFilter class to use the jq product.
     jq is a lightweight and flexible JSON processor.
@@ -43,7 +51,29 @@ class JQFilter:
 
         """
         try:
-            return pyjq.all(filter_string, reading_block)
+            return _compile(filter_string).all(reading_block)
+        except TypeError as ex:
+            self._logger.error("Invalid JSON passed, exception %s", str(ex))
+            raise
+        except ValueError as ex:
+            self._logger.error("Failed to transform, please check the transformation rule, exception %s", str(ex))
+            raise
+
+    def transform_rows(self, rows, filter_string):
+        """
+        Args:
+            rows: iterable of the readings, each one of them a JSON on which the filter is applied
+            filter_string: filter to apply to each reading. Filter should be in JQ format.
+        Returns: generator of the outputs of the filter, reading after reading; a filter may output no value, or
+            several values, for a reading
+        Raises:
+            TypeError: If a reading is not a valid JSON
+            ValueError: If filter is not a proper JQ filter
+        """
+        try:
+            script = _compile(filter_string)
+            for row in rows:
+                yield from script.all(row)
         except TypeError as ex:
             self._logger.error("Invalid JSON passed, exception %s", str(ex))
             raise
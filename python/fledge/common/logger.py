@@ -4,11 +4,20 @@
 # See: http://fledge.readthedocs.io/
 # FLEDGE_END
 
-""" Fledge Logger """
+""" Fledge Logger
 
+The loggers do not write to syslog, or to stdout, themselves: the records are queued and a thread of the process
+formats and writes them, a batch at a time, so that logging does not block the event loop. The records logged by the
+same line of code below ERROR are rate limited, and the level of any logger can be overridden at runtime with
+set_level_overrides.
+"""
+
+import atexit
+import queue
 import sys
 import logging
-from logging.handlers import SysLogHandler
+import threading
+from logging.handlers import QueueHandler, SysLogHandler
 
 __author__ = "Praveen Garg"
 __copyright__ = "Copyright (c) 2017 OSIsoft, LLC"
@@ -24,6 +33,212 @@ r"""Send log entries to /var/log/syslog
 CONSOLE = 1
 """Send log entries to STDOUT"""
 
+_FORMAT = 'Fledge[%(process)d] %(levelname)s: %(module)s: %(name)s: %(message)s'
+
+_QUEUE_SIZE = 10000
+"""Records waiting for the logging thread, the records logged while the queue is full are dropped and counted"""
+
+_BATCH_SIZE = 100
+"""Maximum number of records written by the logging thread at a time"""
+
+_REPEAT_INTERVAL = 10
+"""Interval, in seconds, in which the records of a line of code are rate limited"""
+
+_REPEAT_BURST = 20
+"""Records of a line of code, below ERROR, written in an interval; the others are suppressed and counted"""
+
+_levels = {}
+"""logger name: the level the logger was set up with"""
+
+_level_overrides = {}
+"""logger name: the level set by set_level_overrides, over the level of setup"""
+
+
+class _RepeatFilter(logging.Filter):
+    """ Suppresses the records of a line of code, below ERROR, past the first _REPEAT_BURST of an interval
+
+    The count of the suppressed records is added to the first record of the line in the next interval. The counts
+    are not locked, they may be a little off when the line is logged by several threads.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._intervals = {}
+        """(path, line number): [interval start, records written, records suppressed]"""
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.pathname, record.lineno)
+        interval = self._intervals.get(key)
+        if interval is None or record.created - interval[0] >= _REPEAT_INTERVAL:
+            self._intervals[key] = [record.created, 1, 0]
+            if interval is not None and interval[2]:
+                record.msg = '{} ({} similar messages suppressed)'.format(record.msg, interval[2])
+            return True
+        if interval[1] < _REPEAT_BURST:
+            interval[1] += 1
+            return True
+        interval[2] += 1
+        return False
+
+
+class _Listener(object):
+    """ Thread that writes the queued records to syslog or to stdout """
+
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._handlers = {}
+        """destination: logging.Handler that writes the records"""
+        self._dropped = 0
+
+    def handler(self, destination):
+        handler = self._handlers.get(destination)
+        if handler is None:
+            if destination == SYSLOG:
+                handler = SysLogHandler(address='/dev/log')
+            elif destination == CONSOLE:
+                handler = logging.StreamHandler(sys.stdout)
+            else:
+                raise ValueError("Invalid destination {}".format(destination))
+            # TODO: Consider using %r with message when using syslog .. \n looks better than #
+            handler.setFormatter(logging.Formatter(fmt=_FORMAT))
+            self._handlers[destination] = handler
+        return handler
+
+    def put(self, destination, record):
+        if self._thread is None or not self._thread.is_alive():
+            self._start()
+        try:
+            self._queue.put_nowait((destination, record))
+        except queue.Full:
+            self._dropped += 1
+
+    def _start(self):
+        with self._lock:
+            # The thread is not running in a forked child, it is started again with a queue of its own
+            if self._thread is None or not self._thread.is_alive():
+                self._queue = queue.Queue(_QUEUE_SIZE)
+                self._thread = threading.Thread(target=self._run, name='FledgeLogger', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        q = self._queue
+        while True:
+            batch = [q.get()]
+            try:
+                while len(batch) < _BATCH_SIZE:
+                    batch.append(q.get_nowait())
+            except queue.Empty:
+                pass
+
+            if self._dropped:
+                dropped, self._dropped = self._dropped, 0
+                batch.insert(0, (next(iter(self._handlers)), logging.makeLogRecord({
+                    'name': __name__, 'module': 'logger', 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': '{} log messages dropped, the logging queue was full'.format(dropped)})))
+
+            records = {}
+            for item in batch:
+                if item is None:
+                    self._write(records)
+                    return
+                records.setdefault(item[0], []).append(item[1])
+            self._write(records)
+
+    def _write(self, records):
+        for destination, destination_records in records.items():
+            handler = self._handlers[destination]
+            if isinstance(handler, logging.StreamHandler):
+                # A single write, and flush, for the batch
+                handler.acquire()
+                try:
+                    handler.stream.write(''.join(handler.format(record) + handler.terminator
+                                                 for record in destination_records))
+                    handler.flush()
+                except Exception:
+                    handler.handleError(destination_records[0])
+                finally:
+                    handler.release()
+            else:
+                # A datagram per record, as syslog expects
+                for record in destination_records:
+                    handler.handle(record)
+
+    def stop(self, timeout=5):
+        """ Writes the records that are queued, and stops the thread """
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+                self._thread.join(timeout)
+            except queue.Full:
+                pass
+
+
+_listener = _Listener()
+atexit.register(_listener.stop)
+
+
+class _QueueHandler(QueueHandler):
+    """ Queues the records of a logger for the logging thread """
+
+    def __init__(self, destination):
+        super().__init__(None)
+        self.destination = destination
+        self.addFilter(_RepeatFilter())
+
+    def prepare(self, record):
+        # The message is merged with its arguments now, as these may change by the time the logging thread formats
+        # the record
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        _listener.put(self.destination, record)
+
+
+def _to_level(level):
+    if isinstance(level, int) and not isinstance(level, bool) and level >= 0:
+        return level
+    if isinstance(level, str):
+        number = logging.getLevelName(level.upper())
+        if isinstance(number, int):
+            return number
+    raise ValueError("Invalid log level {}".format(level))
+
+
+def set_level_overrides(overrides):
+    """Overrides the level of the named loggers, at runtime
+
+    The loggers that were overridden and are not in overrides get back the level they were set up with. The
+    overrides also apply to the loggers set up afterwards.
+
+    Args:
+        overrides:
+            logger name: level, as a number or as a name, e.g. {"fledge.common.web.middleware": "WARNING"}
+
+    Raises:
+        ValueError: an invalid level, none of the overrides is applied
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("Invalid log level overrides {}".format(overrides))
+    levels = {name: _to_level(level) for name, level in overrides.items()}
+
+    for name in set(_level_overrides) - set(levels):
+        logging.getLogger(name).setLevel(_levels.get(name, logging.NOTSET))
+    _level_overrides.clear()
+    _level_overrides.update(levels)
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+
+def flush(timeout=5):
+    """Waits for the logging thread to write the records queued so far"""
+    _listener.stop(timeout)
+
 
 def setup(logger_name: str = None,
           destination: int = SYSLOG,
@@ -34,8 +249,8 @@ def setup(logger_name: str = None,
     Once configured, a logger can also be retrieved via
     `logging.getLogger`_
 
-    It is inefficient to call this function more than once for the same
-    logger name.
+    Calling this function again for the same logger name sets its level
+    and propagate again, it does not add another handler.
 
     Args:
         logger_name:
@@ -66,20 +281,14 @@ def setup(logger_name: str = None,
 
     logger = logging.getLogger(logger_name)
 
-    if destination == SYSLOG:
-        handler = SysLogHandler(address='/dev/log')
-    elif destination == CONSOLE:
-        handler = logging.StreamHandler(sys.stdout)
-    else:
-        raise ValueError("Invalid destination {}".format(destination))
-
-    # TODO: Consider using %r with message when using syslog .. \n looks better than #
-    formatter = logging.Formatter(fmt='Fledge[%(process)d] %(levelname)s: %(module)s: %(name)s: %(message)s')
-
-    handler.setFormatter(formatter)
+    # Validates the destination
+    _listener.handler(destination)
 
-    logger.setLevel(level)
+    _levels[logger.name] = level
+    logger.setLevel(_level_overrides.get(logger.name, level))
     logger.propagate = propagate
-    logger.addHandler(handler)
+    if not any(isinstance(handler, _QueueHandler) and handler.destination == destination
+               for handler in logger.handlers):
+        logger.addHandler(_QueueHandler(destination))
 
     return logger
@@ -4,9 +4,13 @@
 # See: http://fledge.readthedocs.io/
 # FLEDGE_END
 
+import asyncio
 import http.client
 import json
 import urllib.parse
+
+import aiohttp
+
 from fledge.common import logger
 from fledge.common.microservice_management_client import exceptions as client_exceptions
 
@@ -17,12 +21,55 @@ __version__ = "${VERSION}"
 
 _logger = logger.setup(__name__)
 
+_TIMEOUT = 30
+"""Seconds for a request to the core management API, connection included"""
+
+_POOL_SIZE = 8
+"""Keep-alive connections of MicroserviceManagementClientAsync to the core management API"""
+
+
+def _check_status(status, reason):
+    if status in range(400, 500):
+        _logger.error("Client error code: %d, Reason: %s", status, reason)
+        raise client_exceptions.MicroserviceManagementClientError(status=status, reason=reason)
+    if status in range(500, 600):
+        _logger.error("Server error code: %d, Reason: %s", status, reason)
+        raise client_exceptions.MicroserviceManagementClientError(status=status, reason=reason)
+
 
 class MicroserviceManagementClient(object):
+    """ Blocking client of the core management API, for the callers that do not run in the event loop
+
+    The coroutines use MicroserviceManagementClientAsync, which has the same methods and does not block the loop.
+    """
     _management_client_conn = None
 
-    def __init__(self, microservice_management_host, microservice_management_port):
-        self._management_client_conn = http.client.HTTPConnection("{0}:{1}".format(microservice_management_host, microservice_management_port))
+    def __init__(self, microservice_management_host, microservice_management_port, timeout=_TIMEOUT):
+        self._management_client_conn = http.client.HTTPConnection("{0}:{1}".format(microservice_management_host, microservice_management_port), timeout=timeout)
+
+    def _request(self, method, url, body=None):
+        # The connection is kept open for the next request; the core may have closed it in the meantime, in which
+        # case the request is sent once more, over a new connection
+        kwargs = {'method': method, 'url': url}
+        if body is not None:
+            kwargs['body'] = body
+        reused = self._management_client_conn.sock is not None
+        try:
+            self._management_client_conn.request(**kwargs)
+            r = self._management_client_conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            self._management_client_conn.close()
+            if not reused:
+                raise
+            self._management_client_conn.request(**kwargs)
+            r = self._management_client_conn.getresponse()
+        try:
+            _check_status(r.status, r.reason)
+            res = r.read().decode()
+        except Exception:
+            self._management_client_conn.close()
+            raise
+        return json.loads(res)
 
     def register_service(self, service_registration_payload):
         """ Registers a newly created microservice with the core service
@@ -37,17 +84,7 @@ class MicroserviceManagementClient(object):
         """
         url = '/fledge/service'
 
-        self._management_client_conn.request(method='POST', url=url, body=json.dumps(service_registration_payload))
-        r = self._management_client_conn.getresponse()
-        if r.status in range(400, 500):
-            _logger.error("Client error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        if r.status in range(500, 600):
-            _logger.error("Server error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        res = r.read().decode()
-        self._management_client_conn.close()
-        response = json.loads(res)
+        response = self._request('POST', url, json.dumps(service_registration_payload))
         try:
             response["id"]
         except (KeyError, Exception) as ex:
@@ -68,17 +105,7 @@ class MicroserviceManagementClient(object):
         """
         url = '/fledge/service/{}'.format(microservice_id)
 
-        self._management_client_conn.request(method='DELETE', url=url)
-        r = self._management_client_conn.getresponse()
-        if r.status in range(400, 500):
-            _logger.error("Client error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        if r.status in range(500, 600):
-            _logger.error("Server error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        res = r.read().decode()
-        self._management_client_conn.close()
-        response = json.loads(res)
+        response = self._request('DELETE', url)
         try:
             response["id"]
         except (KeyError, Exception) as ex:
@@ -99,17 +126,7 @@ class MicroserviceManagementClient(object):
         url = '/fledge/interest'
 
         payload = json.dumps({"category": category, "service": microservice_id}, sort_keys=True)
-        self._management_client_conn.request(method='POST', url=url, body=payload)
-        r = self._management_client_conn.getresponse()
-        if r.status in range(400, 500):
-            _logger.error("Client error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        if r.status in range(500, 600):
-            _logger.error("Server error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        res = r.read().decode()
-        self._management_client_conn.close()
-        response = json.loads(res)
+        response = self._request('POST', url, payload)
         try:
             response["id"]
         except (KeyError, Exception) as ex:
@@ -127,17 +144,7 @@ class MicroserviceManagementClient(object):
         """
         url = '/fledge/interest/{}'.format(registered_interest_id)
 
-        self._management_client_conn.request(method='DELETE', url=url)
-        r = self._management_client_conn.getresponse()
-        if r.status in range(400, 500):
-            _logger.error("Client error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        if r.status in range(500, 600):
-            _logger.error("Server error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        res = r.read().decode()
-        self._management_client_conn.close()
-        response = json.loads(res)
+        response = self._request('DELETE', url)
         try:
             response["id"]
         except (KeyError, Exception) as ex:
@@ -161,17 +168,7 @@ class MicroserviceManagementClient(object):
         if service_type:
             url = '{}{}type={}'.format(url, delimeter, service_type)
 
-        self._management_client_conn.request(method='GET', url=url)
-        r = self._management_client_conn.getresponse()
-        if r.status in range(400, 500):
-            _logger.error("Client error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        if r.status in range(500, 600):
-            _logger.error("Server error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        res = r.read().decode()
-        self._management_client_conn.close()
-        response = json.loads(res)
+        response = self._request('GET', url)
         try:
             response["services"]
         except (KeyError, Exception) as ex:
@@ -191,17 +188,7 @@ class MicroserviceManagementClient(object):
         if category_name:
             url = "{}/{}".format(url, urllib.parse.quote(category_name))
 
-        self._management_client_conn.request(method='GET', url=url)
-        r = self._management_client_conn.getresponse()
-        if r.status in range(400, 500):
-            _logger.error("Client error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        if r.status in range(500, 600):
-            _logger.error("Server error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        res = r.read().decode()
-        self._management_client_conn.close()
-        response = json.loads(res)
+        response = self._request('GET', url)
         return response
 
     def get_configuration_item(self, category_name, config_item):
@@ -213,17 +200,7 @@ class MicroserviceManagementClient(object):
         """
         url = "/fledge/service/category/{}/{}".format(urllib.parse.quote(category_name), urllib.parse.quote(config_item))
 
-        self._management_client_conn.request(method='GET', url=url)
-        r = self._management_client_conn.getresponse()
-        if r.status in range(400, 500):
-            _logger.error("Client error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        if r.status in range(500, 600):
-            _logger.error("Server error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        res = r.read().decode()
-        self._management_client_conn.close()
-        response = json.loads(res)
+        response = self._request('GET', url)
         return response
 
     def create_configuration_category(self, category_data):
@@ -240,17 +217,7 @@ class MicroserviceManagementClient(object):
         else:
             url = '/fledge/service/category'
 
-        self._management_client_conn.request(method='POST', url=url, body=json.dumps(data))
-        r = self._management_client_conn.getresponse()
-        if r.status in range(400, 500):
-            _logger.error("Client error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        if r.status in range(500, 600):
-            _logger.error("Server error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        res = r.read().decode()
-        self._management_client_conn.close()
-        response = json.loads(res)
+        response = self._request('POST', url, json.dumps(data))
         return response
 
     def create_child_category(self, parent, children):
@@ -262,17 +229,7 @@ class MicroserviceManagementClient(object):
         data = {"children": children}
         url = '/fledge/service/category/{}/children'.format(urllib.parse.quote(parent))
 
-        self._management_client_conn.request(method='POST', url=url, body=json.dumps(data))
-        r = self._management_client_conn.getresponse()
-        if r.status in range(400, 500):
-            _logger.error("Client error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        if r.status in range(500, 600):
-            _logger.error("Server error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        res = r.read().decode()
-        self._management_client_conn.close()
-        response = json.loads(res)
+        response = self._request('POST', url, json.dumps(data))
         return response
 
     def update_configuration_item(self, category_name, config_item, category_data):
@@ -285,17 +242,7 @@ class MicroserviceManagementClient(object):
         """
         url = "/fledge/service/category/{}/{}".format(urllib.parse.quote(category_name), urllib.parse.quote(config_item))
 
-        self._management_client_conn.request(method='PUT', url=url, body=category_data)
-        r = self._management_client_conn.getresponse()
-        if r.status in range(400, 500):
-            _logger.error("Client error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        if r.status in range(500, 600):
-            _logger.error("Server error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        res = r.read().decode()
-        self._management_client_conn.close()
-        response = json.loads(res)
+        response = self._request('PUT', url, category_data)
         return response
 
     def delete_configuration_item(self, category_name, config_item):
@@ -307,32 +254,12 @@ class MicroserviceManagementClient(object):
         """
         url = "/fledge/service/category/{}/{}/value".format(urllib.parse.quote(category_name), urllib.parse.quote(config_item))
 
-        self._management_client_conn.request(method='DELETE', url=url)
-        r = self._management_client_conn.getresponse()
-        if r.status in range(400, 500):
-            _logger.error("Client error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        if r.status in range(500, 600):
-            _logger.error("Server error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        res = r.read().decode()
-        self._management_client_conn.close()
-        response = json.loads(res)
+        response = self._request('DELETE', url)
         return response
 
     def get_asset_tracker_events(self):
         url = '/fledge/track'
-        self._management_client_conn.request(method='GET', url=url)
-        r = self._management_client_conn.getresponse()
-        if r.status in range(400, 500):
-            _logger.error("Client error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        if r.status in range(500, 600):
-            _logger.error("Server error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        res = r.read().decode()
-        self._management_client_conn.close()
-        response = json.loads(res)
+        response = self._request('GET', url)
         return response
 
     def create_asset_tracker_event(self, asset_event):
@@ -343,15 +270,169 @@ class MicroserviceManagementClient(object):
         :return:
         """
         url = '/fledge/track'
-        self._management_client_conn.request(method='POST', url=url, body=json.dumps(asset_event))
-        r = self._management_client_conn.getresponse()
-        if r.status in range(400, 500):
-            _logger.error("Client error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        if r.status in range(500, 600):
-            _logger.error("Server error code: %d, Reason: %s", r.status, r.reason)
-            raise client_exceptions.MicroserviceManagementClientError(status=r.status, reason=r.reason)
-        res = r.read().decode()
-        self._management_client_conn.close()
-        response = json.loads(res)
+        response = self._request('POST', url, json.dumps(asset_event))
+        return response
+
+
+class MicroserviceManagementClientAsync(object):
+    """ Client of the core management API for the coroutines, with the methods of MicroserviceManagementClient
+
+    The requests go over a pool of keep-alive connections, so that a burst of requests, e.g. the asset tracker
+    events of the new assets of a south service, neither waits for a connection to be set up for every request nor
+    blocks the event loop. Every request is bounded by the timeout.
+    """
+
+    def __init__(self, microservice_management_host, microservice_management_port, pool_size=_POOL_SIZE,
+                 timeout=_TIMEOUT):
+        self._base_url = "http://{0}:{1}".format(microservice_management_host, microservice_management_port)
+        self._pool_size = pool_size
+        self._timeout = timeout
+        self._session = None
+
+    def _get_session(self):
+        # The session is created in the event loop that it is used from, on the first request
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self._pool_size),
+                                                  timeout=aiohttp.ClientTimeout(total=self._timeout))
+        return self._session
+
+    async def close(self):
+        """ Closes the connections of the pool """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _request(self, method, url, body=None):
+        for attempt in range(2):
+            try:
+                async with self._get_session().request(method, self._base_url + url, data=body) as r:
+                    _check_status(r.status, r.reason)
+                    res = await r.text()
+                    return json.loads(res)
+            except aiohttp.ServerDisconnectedError:
+                # A keep-alive connection closed by the core: once more, over a new connection
+                if attempt:
+                    raise
+
+    async def register_service(self, service_registration_payload):
+        """ Registers a newly created microservice with the core service, see MicroserviceManagementClient """
+        response = await self._request('POST', '/fledge/service', json.dumps(service_registration_payload))
+        try:
+            response["id"]
+        except (KeyError, Exception) as ex:
+            _logger.exception("Could not register the microservice, From request %s, Reason: %s", json.dumps(service_registration_payload), str(ex))
+            raise
+        return response
+
+    async def unregister_service(self, microservice_id):
+        """ Removes the registration record for a microservice, see MicroserviceManagementClient """
+        response = await self._request('DELETE', '/fledge/service/{}'.format(microservice_id))
+        try:
+            response["id"]
+        except (KeyError, Exception) as ex:
+            _logger.exception("Could not unregister the micro-service having uuid %s, Reason: %s",
+                              microservice_id, str(ex))
+            raise
+        return response
+
+    async def register_interest(self, category, microservice_id):
+        """ Register an interest of microservice in a configuration category """
+        payload = json.dumps({"category": category, "service": microservice_id}, sort_keys=True)
+        response = await self._request('POST', '/fledge/interest', payload)
+        try:
+            response["id"]
+        except (KeyError, Exception) as ex:
+            _logger.exception("Could not register interest, for request payload %s, Reason: %s",
+                              payload, str(ex))
+            raise
+        return response
+
+    async def unregister_interest(self, registered_interest_id):
+        """ Remove a previously registered interest in a configuration category """
+        response = await self._request('DELETE', '/fledge/interest/{}'.format(registered_interest_id))
+        try:
+            response["id"]
+        except (KeyError, Exception) as ex:
+            _logger.exception("Could not unregister interest for %s, Reason: %s", registered_interest_id, str(ex))
+            raise
+        return response
+
+    async def get_services(self, service_name=None, service_type=None):
+        """ Retrieve the details of one or more services that are registered """
+        url = '/fledge/service'
+        delimeter = '?'
+        if service_name:
+            url = '{}{}name={}'.format(url, delimeter, urllib.parse.quote(service_name))
+            delimeter = '&'
+        if service_type:
+            url = '{}{}type={}'.format(url, delimeter, service_type)
+
+        response = await self._request('GET', url)
+        try:
+            response["services"]
+        except (KeyError, Exception) as ex:
+            _logger.exception("Could not find the micro-service for requested url %s, Reason: %s", url, str(ex))
+            raise
         return response
+
+    async def get_configuration_category(self, category_name=None):
+        url = '/fledge/service/category'
+        if category_name:
+            url = "{}/{}".format(url, urllib.parse.quote(category_name))
+        return await self._request('GET', url)
+
+    async def get_configuration_categories(self, category_names):
+        """ The configuration categories of category_names, in that order, requested concurrently """
+        return await asyncio.gather(*[self.get_configuration_category(name) for name in category_names])
+
+    async def get_configuration_item(self, category_name, config_item):
+        url = "/fledge/service/category/{}/{}".format(urllib.parse.quote(category_name), urllib.parse.quote(config_item))
+        return await self._request('GET', url)
+
+    async def create_configuration_category(self, category_data):
+        """
+
+        :param category_data: e.g. '{"key": "TEST", "description": "description", "value": {"info": {"description": "Test", "type": "boolean", "default": "true"}}}'
+        :return:
+        """
+        data = json.loads(category_data)
+        if 'keep_original_items' in data:
+            keep_original_item = 'true' if data['keep_original_items'] is True else 'false'
+            url = '/fledge/service/category?keep_original_items={}'.format(keep_original_item)
+            del data['keep_original_items']
+        else:
+            url = '/fledge/service/category'
+        return await self._request('POST', url, json.dumps(data))
+
+    async def create_child_category(self, parent, children):
+        data = {"children": children}
+        url = '/fledge/service/category/{}/children'.format(urllib.parse.quote(parent))
+        return await self._request('POST', url, json.dumps(data))
+
+    async def update_configuration_item(self, category_name, config_item, category_data):
+        url = "/fledge/service/category/{}/{}".format(urllib.parse.quote(category_name), urllib.parse.quote(config_item))
+        return await self._request('PUT', url, category_data)
+
+    async def delete_configuration_item(self, category_name, config_item):
+        url = "/fledge/service/category/{}/{}/value".format(urllib.parse.quote(category_name), urllib.parse.quote(config_item))
+        return await self._request('DELETE', url)
+
+    async def get_asset_tracker_events(self):
+        return await self._request('GET', '/fledge/track')
+
+    async def create_asset_tracker_event(self, asset_event):
+        """
+
+        :param asset_event
+               e.g. {"asset": "AirIntake", "event": "Ingest", "service": "PT100_In1", "plugin": "PT100"}
+        :return:
+        """
+        return await self._request('POST', '/fledge/track', json.dumps(asset_event))
+
+    async def create_asset_tracker_events(self, asset_events):
+        """ Creates the asset tracker events concurrently, over the connections of the pool
+
+        :return: the response, or the exception, of every event, in the order of asset_events
+        """
+        return await asyncio.gather(*[self.create_asset_tracker_event(e) for e in asset_events],
+                                    return_exceptions=True)
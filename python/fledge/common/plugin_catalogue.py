@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+"""Persistent catalogue of the plugin_info of the installed plugins
+
+Fetching the plugin_info of a C plugin forks the get_plugin_info utility, and of a Python plugin imports the
+plugin. The catalogue keeps the plugin_info of every plugin file, keyed by its path, with the modification time and
+the size of the file: the plugin_info is only fetched again when the file changes, e.g. when the plugin is updated.
+The catalogue is saved to a JSON file in the data directory, so that it outlives the restarts of Fledge.
+"""
+
+import copy
+import json
+import os
+
+from fledge.common import logger
+from fledge.common.common import _FLEDGE_DATA, _FLEDGE_ROOT
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+_logger = logger.setup(__name__)
+
+
+class PluginCatalogue(object):
+
+    _CATALOGUE_FILE = (_FLEDGE_DATA if _FLEDGE_DATA else _FLEDGE_ROOT + '/data') + '/var/plugins/catalogue.json'
+
+    _entries = None
+    """plugin file path: {"mtime": modification time in ns, "size": file size, "info": plugin_info}"""
+
+    @classmethod
+    def get(cls, path, fetch):
+        """ Returns a copy of the plugin_info of the plugin file at path, from the catalogue or, when the file is
+        not in the catalogue or has changed since, from fetch()
+
+        :param path: the path of the plugin file, e.g. the .so library of a C plugin
+        :param fetch: the function that returns the plugin_info of the plugin, an empty value if it failed; a
+            plugin_info that could not be fetched, or that is not JSON, is not added to the catalogue
+        """
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError, ValueError):
+            # Not a plugin file, e.g. a plugin that is not found: nothing to be kept
+            return fetch()
+
+        if cls._entries is None:
+            cls._load()
+        entry = cls._entries.get(path)
+        if entry is not None and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return copy.deepcopy(entry['info'])
+
+        info = fetch()
+        if info:
+            try:
+                json.dumps(info)
+            except (TypeError, ValueError) as ex:
+                # It would prevent the whole catalogue from being saved
+                _logger.warning("The plugin_info of %s is not catalogued. %s", path, str(ex))
+                return info
+            cls._entries[path] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "info": copy.deepcopy(info)}
+            cls._save()
+        return info
+
+    @classmethod
+    def _load(cls):
+        try:
+            with open(cls._CATALOGUE_FILE) as f:
+                cls._entries = json.load(f)
+        except FileNotFoundError:
+            cls._entries = {}
+        except (OSError, ValueError) as ex:
+            _logger.warning("Plugin catalogue %s could not be read, it is rebuilt. %s", cls._CATALOGUE_FILE, str(ex))
+            cls._entries = {}
+
+    @classmethod
+    def _save(cls):
+        # The entries of the plugins that were removed are dropped
+        cls._entries = {path: entry for path, entry in cls._entries.items() if os.path.exists(path)}
+        try:
+            os.makedirs(os.path.dirname(cls._CATALOGUE_FILE), exist_ok=True)
+            tmp_file = cls._CATALOGUE_FILE + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(cls._entries, f)
+            os.replace(tmp_file, cls._CATALOGUE_FILE)
+        except (OSError, TypeError, ValueError) as ex:
+            # The catalogue is kept in memory only
+            _logger.warning("Plugin catalogue %s could not be saved. %s", cls._CATALOGUE_FILE, str(ex))
@@ -11,7 +11,8 @@ import argparse
 import time
 from fledge.common.storage_client.storage_client import StorageClientAsync, ReadingsStorageClientAsync
 from fledge.common import logger
-from fledge.common.microservice_management_client.microservice_management_client import MicroserviceManagementClient
+from fledge.common.microservice_management_client.microservice_management_client import MicroserviceManagementClient, \
+    MicroserviceManagementClientAsync
 
 __author__ = "Ashwin Gopalakrishnan, Amarendra K Sinha"
 __copyright__ = "Copyright (c) 2017 OSIsoft, LLC"
@@ -38,6 +39,35 @@ class SilentArgParse(argparse.ArgumentParser):
         raise ArgumentParserError(message)
 
 
+class StartupProfile(object):
+    """ Durations of the start-up phases of a process, logged when the process is started with --profile-startup """
+
+    def __init__(self, enabled=False):
+        self._enabled = enabled
+        self._phases = []
+        if enabled:
+            # The CPU time spent before the process is built: the start of the interpreter and the imports
+            self._phases.append(('imports', time.process_time()))
+        self._phase_start = time.perf_counter()
+
+    def mark(self, phase):
+        """ Ends the phase, that started at the end of the previous one """
+        if not self._enabled:
+            return
+        now = time.perf_counter()
+        self._phases.append((phase, now - self._phase_start))
+        self._phase_start = now
+
+    def report(self, name):
+        """ Logs the durations of the phases ended so far, in a single line """
+        if not self._enabled or not self._phases:
+            return
+        _logger.info("Start-up of %s: %s, total %.3fs", name,
+                     ", ".join("{} {:.3f}s".format(phase, duration) for phase, duration in self._phases),
+                     sum(duration for phase, duration in self._phases))
+        self._phases = []
+
+
 class FledgeProcess(ABC):
     """ FledgeProcess for all non-core python processes.
 
@@ -56,6 +86,9 @@ class FledgeProcess(ABC):
     _core_microservice_management_client = None
     """ MicroserviceManagementClient instance """
 
+    _core_microservice_management_client_async = None
+    """ MicroserviceManagementClientAsync instance, for the coroutines """
+
     _readings_storage_async = None
     """ fledge.common.storage_client.storage_client.ReadingsStorageClientAsync """
 
@@ -65,12 +98,17 @@ class FledgeProcess(ABC):
     _start_time = None
     """ time at which this python process started """
 
+    _startup_profile = StartupProfile()
+    """ StartupProfile of the process, enabled by the --profile-startup argument """
+
     def __init__(self):
         """ All processes must have these three command line arguments passed:
 
         --address [core microservice management host]
         --port [core microservice management port]
         --name [process name]
+
+        and, optionally, --profile-startup to log the duration of the start-up phases
         """
 
         self._start_time = time.time()
@@ -80,10 +118,12 @@ class FledgeProcess(ABC):
             parser.add_argument("--name", required=True)
             parser.add_argument("--address", required=True)
             parser.add_argument("--port", required=True, type=int)
+            parser.add_argument("--profile-startup", action="store_true")
             namespace, args = parser.parse_known_args()
             self._name = getattr(namespace, 'name')
             self._core_management_host = getattr(namespace, 'address')
             self._core_management_port = getattr(namespace, 'port')
+            self._startup_profile = StartupProfile(getattr(namespace, 'profile_startup'))
             r = range(1, 65536)
             if self._core_management_port not in r:
                 raise ArgumentParserError("Invalid Port: {}".format(self._core_management_port))
@@ -97,13 +137,18 @@ class FledgeProcess(ABC):
         except ArgumentParserError as ex:
             _logger.error("Arg parser error: %s", str(ex))
             raise
+        self._startup_profile.mark('arguments')
 
         self._core_microservice_management_client = MicroserviceManagementClient(self._core_management_host,
                                                                                  self._core_management_port)
+        self._core_microservice_management_client_async = MicroserviceManagementClientAsync(
+            self._core_management_host, self._core_management_port)
 
+        # The storage service is discovered once, by the first client: the other one shares its service record
         self._readings_storage_async = ReadingsStorageClientAsync(self._core_management_host,
                                                                   self._core_management_port)
         self._storage_async = StorageClientAsync(self._core_management_host, self._core_management_port)
+        self._startup_profile.mark('storage discovery')
 
     # pure virtual method run() to be implemented by child class
     @abstractmethod
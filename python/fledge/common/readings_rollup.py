@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Definitions shared by the readings rollup task and the readings rollup consumers
+
+The readings rollup task aggregates the numeric datapoints of the readings into per minute and per hour buckets
+of the readings_rollup table. Bucket start times are kept as UTC strings 'YYYY-MM-DD HH:MM:SS+00:00', the same
+layout of the readings user_ts, so that they can be compared as strings.
+
+The position of the task is persisted in the plugin_data table under ROLLUP_POSITION_KEY as
+{"last_object": <id of the last reading aggregated>, "watermark": <user_ts up to which the rollup is complete>}
+"""
+
+import datetime
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+ROLLUP_TABLE = 'readings_rollup'
+ROLLUP_POSITION_KEY = 'readings rollup'
+
+MINUTE = 60
+HOUR = 3600
+
+_BUCKET_PREFIX = {MINUTE: 16, HOUR: 13}
+_BUCKET_SUFFIX = {MINUTE: ':00+00:00', HOUR: ':00:00+00:00'}
+
+
+def utc_timestamp(seconds_ago=0):
+    """ Current UTC time, or the UTC time seconds_ago seconds back, as 'YYYY-MM-DD HH:MM:SS.ffffff+00:00' """
+    ts = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=seconds_ago)
+    return ts.strftime('%Y-%m-%d %H:%M:%S.%f+00:00')
+
+
+def bucket_start(user_ts, granularity):
+    """ Start of the bucket of given granularity the timestamp belongs to
+
+    Args:
+        user_ts: UTC timestamp string 'YYYY-MM-DD HH:MM:SS[.ffffff][+00:00]'
+        granularity: MINUTE or HOUR
+    Returns:
+        bucket start as 'YYYY-MM-DD HH:MM:SS+00:00'
+    """
+    return user_ts[:_BUCKET_PREFIX[granularity]] + _BUCKET_SUFFIX[granularity]
+
+
+def bucket_label(bucket, granularity):
+    """ Bucket start in the format used by the asset browser i.e. 'YYYY-MM-DD HH24:MI' or 'YYYY-MM-DD HH24' """
+    return bucket[:_BUCKET_PREFIX[granularity]]
+
+
+def is_numeric(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -4,9 +4,8 @@
 # See: http://fledge.readthedocs.io/
 # FLEDGE_END
 
-import json
 from fledge.common import logger
-from fledge.common.storage_client.payload_builder import PayloadBuilder
+from fledge.common.storage_client.payload_builder import PayloadBuilder, PayloadTemplate, Slot
 from fledge.common.storage_client.storage_client import StorageClientAsync
 
 
@@ -18,6 +17,9 @@ __version__ = "${VERSION}"
 
 _logger = logger.setup(__name__)
 
+_INCREMENT_BY_KEY = PayloadTemplate(PayloadBuilder().WHERE(["key", "=", Slot("key")])
+                                    .EXPR(["value", "+", Slot("increment")]))
+
 
 async def create_statistics(storage=None):
     stat = Statistics(storage)
@@ -67,13 +69,39 @@ class Statistics(object):
                 payload_item = PayloadBuilder() \
                     .WHERE(["key", "=", k]) \
                     .EXPR(["value", "+", v]) \
-                    .payload()
-                payload['updates'].append(json.loads(payload_item))
-            await self._storage.update_tbl("statistics", json.dumps(payload, sort_keys=False))
+                    .chain_payload()
+                payload['updates'].append(payload_item)
+            await self._storage.update_tbl("statistics", payload)
         except Exception as ex:
             _logger.exception('Unable to bulk update statistics %s', str(ex))
             raise
 
+    async def set_bulk(self, stat_list):
+        """ Bulk set statistics table keys to their current values, for the statistics that are levels rather than
+        counters. Their previous_value is set too: a level has no delta, its history records no change
+
+        Args:
+            stat_list: dict containing statistics keys and current values
+
+        Returns:
+            None
+        """
+        if not isinstance(stat_list, dict):
+            raise TypeError('stat_list must be a dict')
+
+        try:
+            payload = {"updates": []}
+            for k, v in stat_list.items():
+                payload_item = PayloadBuilder() \
+                    .SET(value=v, previous_value=v) \
+                    .WHERE(["key", "=", k]) \
+                    .chain_payload()
+                payload['updates'].append(payload_item)
+            await self._storage.update_tbl("statistics", payload)
+        except Exception as ex:
+            _logger.exception('Unable to bulk set statistics %s', str(ex))
+            raise
+
     async def update(self, key, value_increment):
         """ UPDATE the value column only of a statistics row based on key
 
@@ -91,10 +119,7 @@ class Statistics(object):
             raise ValueError('value must be an integer')
 
         try:
-            payload = PayloadBuilder()\
-                .WHERE(["key", "=", key])\
-                .EXPR(["value", "+", value_increment])\
-                .payload()
+            payload = _INCREMENT_BY_KEY.fill(key=key, increment=value_increment)
             await self._storage.update_tbl("statistics", payload)
         except Exception as ex:
             _logger.exception(
@@ -114,10 +139,7 @@ class Statistics(object):
         for key, value_increment in sensor_stat_dict.items():
             # Try updating the statistics value for given key
             try:
-                payload = PayloadBuilder() \
-                    .WHERE(["key", "=", key]) \
-                    .EXPR(["value", "+", value_increment]) \
-                    .payload()
+                payload = _INCREMENT_BY_KEY.fill(key=key, increment=value_increment)
                 result = await self._storage.update_tbl("statistics", payload)
                 if result["response"] != "updated":
                     raise KeyError
@@ -14,10 +14,13 @@ __version__ = "${VERSION}"
 
 from collections import OrderedDict
 import json
+import re
 import urllib.parse
 import numbers
+import uuid
 
 from fledge.common import logger
+from fledge.common.storage_client.utils import JsonPayload
 
 
 _LOGGER = logger.setup(__name__)
@@ -35,11 +38,13 @@ class PayloadBuilder(object):
     '''
     # TODO: Add tests
 
-    query_payload = None
+    def __init__(self, initial_payload=None):
+        """ The payload is held by the instance, so that builders used by concurrent coroutines do not share state
 
-    def __init__(self, initial_payload=OrderedDict()):
-        # TODO: Investigate why simple "self.__class__.query_payload = initial_payload" is not working
-        self.__class__.query_payload = initial_payload if len(initial_payload) else OrderedDict()
+        :param initial_payload: payload to build upon, e.g. the chain_payload() of another builder; it is updated in
+                                place
+        """
+        self.query_payload = initial_payload if initial_payload else OrderedDict()
 
     @staticmethod
     def verify_select(arg):
@@ -162,8 +167,7 @@ class PayloadBuilder(object):
                 my_item[clause] = clause_value
             qp['group'] = my_item
 
-    @classmethod
-    def _add_clause(cls, clause, main_key, args):
+    def _add_clause(self, clause, main_key, args):
         """
         Adds "alias" and "format" clauses to columns in payload info. Currently, adding clauses is supported at two
         actions only - SELECT and AGGREGATE.
@@ -176,29 +180,28 @@ class PayloadBuilder(object):
         :return:
         """
         if clause not in ['alias', 'format', 'group']:
-            return cls
+            return self
 
         if main_key in ['return', 'aggregate', 'group']:
             for arg in args:
-                if cls.verify_alias(arg):
+                if self.verify_alias(arg):
                     if main_key == 'return':
                         col = arg[0]
                         alias = arg[1]
-                        cls.add_clause_to_select(clause, cls.query_payload[main_key], col, alias)
+                        self.add_clause_to_select(clause, self.query_payload[main_key], col, alias)
                     if main_key == 'aggregate':
                         col = arg[0]
                         opr = arg[1]
                         alias = arg[2]
-                        cls.add_clause_to_aggregate(clause, cls.query_payload[main_key], col, opr, alias)
+                        self.add_clause_to_aggregate(clause, self.query_payload[main_key], col, opr, alias)
                     if main_key == 'group':
                         col = arg[0]
                         alias = arg[1]
-                        cls.add_clause_to_group(clause, cls.query_payload, col, alias)
+                        self.add_clause_to_group(clause, self.query_payload, col, alias)
 
-        return cls
+        return self
 
-    @classmethod
-    def ALIAS(cls, main_key, *args):
+    def ALIAS(self, main_key, *args):
         """
         Adds "alias" to columns in payload info. Currently, adding clauses is supported at two
         actions only - SELECT and AGGREGATE.
@@ -264,10 +267,9 @@ class PayloadBuilder(object):
               ]
             }
         """
-        return cls._add_clause('alias', main_key, args)
+        return self._add_clause('alias', main_key, args)
 
-    @classmethod
-    def FORMAT(cls, main_key, *args):
+    def FORMAT(self, main_key, *args):
         """
         Adds "format" to columns in payload info. Currently, adding clauses is supported at two
         actions only - SELECT and AGGREGATE.
@@ -282,10 +284,9 @@ class PayloadBuilder(object):
             FORMAT('return', ('user_ts', "YYYY-MM-DD HH24:MI:SS.MS")).payload() returns
             {"return": ["reading", {"format": "YYYY-MM-DD HH24:MI:SS.MS", "column": "user_ts", "alias": "timestamp"}]}
         """
-        return cls._add_clause('format', main_key, args)
+        return self._add_clause('format', main_key, args)
 
-    @classmethod
-    def SELECT(cls, *args):
+    def SELECT(self, *args):
         """
         Forms a json to return a list of columns.
 
@@ -293,48 +294,45 @@ class PayloadBuilder(object):
         :return:
         """
         for arg in args:
-            if cls.verify_select(arg):
-                if 'return' not in cls.query_payload:
-                    cls.query_payload["return"] = list()
+            if self.verify_select(arg):
+                if 'return' not in self.query_payload:
+                    self.query_payload["return"] = list()
                 if isinstance(arg, tuple):
                     for a in arg:
                         if isinstance(a, list):
                             select = {"json": {'column': a[0], 'properties': a[1]}}
                         elif isinstance(a, str):
-                            select = json.loads(a) if cls.is_json(a) else a
+                            select = json.loads(a) if self.is_json(a) else a
                         else:
                             continue
-                        cls.query_payload["return"].append(select)
+                        self.query_payload["return"].append(select)
                 else:
                     if isinstance(arg, list):
                         select = {"json": {'column': arg[0], 'properties': arg[1]}}
                     elif isinstance(arg, str):
-                        select = json.loads(arg) if cls.is_json(arg) else arg
+                        select = json.loads(arg) if self.is_json(arg) else arg
                     else:
                         continue
-                    cls.query_payload["return"].append(select)
-        return cls
+                    self.query_payload["return"].append(select)
+        return self
 
-    @classmethod
-    def FROM(cls, tbl_name):
-        cls.query_payload["table"] = tbl_name
-        return cls
+    def FROM(self, tbl_name):
+        self.query_payload["table"] = tbl_name
+        return self
 
-    @classmethod
-    def DISTINCT(cls, cols):
+    def DISTINCT(self, cols):
         if cols is None:
-            return cls
+            return self
         if not isinstance(cols, list):
-            return cls
+            return self
         if len(cols) == 0:
-            return cls
-        cls.query_payload["modifier"] = "distinct"
-        cls.query_payload["return"] = cols
-        return cls
+            return self
+        self.query_payload["modifier"] = "distinct"
+        self.query_payload["return"] = cols
+        return self
 
-    @classmethod
-    def UPDATE_TABLE(cls, tbl_name):
-        return cls.FROM(tbl_name)
+    def UPDATE_TABLE(self, tbl_name):
+        return self.FROM(tbl_name)
 
     @classmethod
     def COLS(cls, kwargs):
@@ -343,36 +341,32 @@ class PayloadBuilder(object):
             values[key] = value
         return values
 
-    @classmethod
-    def SET(cls, **kwargs):
-        if 'values' in cls.query_payload:
-            cls.query_payload["values"].update(cls.COLS(kwargs))
+    def SET(self, **kwargs):
+        if 'values' in self.query_payload:
+            self.query_payload["values"].update(self.COLS(kwargs))
         else:
-            cls.query_payload["values"] = cls.COLS(kwargs)
-        return cls
+            self.query_payload["values"] = self.COLS(kwargs)
+        return self
 
-    @classmethod
-    def INSERT(cls, **kwargs):
-        cls.query_payload.update(cls.COLS(kwargs))
-        return cls
+    def INSERT(self, **kwargs):
+        self.query_payload.update(self.COLS(kwargs))
+        return self
 
-    @classmethod
-    def INSERT_INTO(cls, tbl_name):
-        return cls.FROM(tbl_name)
+    def INSERT_INTO(self, tbl_name):
+        return self.FROM(tbl_name)
 
-    @classmethod
-    def DELETE(cls, tbl_name):
-        return cls.FROM(tbl_name)
+    def DELETE(self, tbl_name):
+        return self.FROM(tbl_name)
 
     @classmethod
     def add_new_clause(cls, and_or, main, new):
         """
-        Recursively searches for the innermost and/or block, or cls.query_payload["where"] if none, in "main" to add
+        Recursively searches for the innermost and/or block, or the query_payload["where"] if none, in "main" to add
         the 'new' condition block under "and_or" key.
 
         Args:
             and_or: one of 'and', 'or'
-            main: Dict (cls.query_payload["where"] or the innermost and/or subset of it) where
+            main: Dict (the query_payload["where"] or the innermost and/or subset of it) where
                   the new condition block is to be added
             new: condition block to be added
 
@@ -386,62 +380,57 @@ class PayloadBuilder(object):
         else:
             cls.add_new_clause(and_or, main['and'], new)
 
-    @classmethod
-    def WHERE(cls, arg, *args):
+    def WHERE(self, arg, *args):
         # Pass multiple arguments in a single tuple also. Useful when called from external process i.e. api, test.
         args = (arg,) + args if not isinstance(arg, tuple) else arg
         for arg in args:
             condition = OrderedDict()
-            if cls.verify_condition(arg):
+            if self.verify_condition(arg):
                 condition["column"] = arg[0]
                 condition["condition"] = arg[1]
                 condition["value"] = arg[2]
-                if 'where' not in cls.query_payload:
-                    cls.query_payload["where"] = condition
+                if 'where' not in self.query_payload:
+                    self.query_payload["where"] = condition
                 else:
-                    cls.add_new_clause('and', cls.query_payload['where'], condition)
-        return cls
+                    self.add_new_clause('and', self.query_payload['where'], condition)
+        return self
 
-    @classmethod
-    def AND_WHERE(cls, arg, *args):
+    def AND_WHERE(self, arg, *args):
         # Pass multiple arguments in a single tuple also. Useful when called from external process i.e. api, test.
         args = (arg,) + args if not isinstance(arg, tuple) else arg
         for arg in args:
             condition = OrderedDict()
-            if cls.verify_condition(arg):
+            if self.verify_condition(arg):
                 condition["column"] = arg[0]
                 condition["condition"] = arg[1]
                 condition["value"] = arg[2]
-                if 'where' not in cls.query_payload:
-                    cls.query_payload["where"] = condition
+                if 'where' not in self.query_payload:
+                    self.query_payload["where"] = condition
                 else:
-                    cls.add_new_clause('and', cls.query_payload['where'], condition)
-        return cls
+                    self.add_new_clause('and', self.query_payload['where'], condition)
+        return self
 
-    @classmethod
-    def OR_WHERE(cls, arg, *args):
+    def OR_WHERE(self, arg, *args):
         # Pass multiple arguments in a single tuple also. Useful when called from external process i.e. api, test.
         args = (arg,) + args if not isinstance(arg, tuple) else arg
         for arg in args:
             condition = OrderedDict()
-            if cls.verify_condition(arg):
+            if self.verify_condition(arg):
                 condition["column"] = arg[0]
                 condition["condition"] = arg[1]
                 condition["value"] = arg[2]
-                if 'where' not in cls.query_payload:
-                    cls.query_payload["where"] = condition
+                if 'where' not in self.query_payload:
+                    self.query_payload["where"] = condition
                 else:
-                    cls.add_new_clause('or', cls.query_payload['where'], condition)
-        return cls
+                    self.add_new_clause('or', self.query_payload['where'], condition)
+        return self
 
-    @classmethod
-    def GROUP_BY(cls, *args):
+    def GROUP_BY(self, *args):
         # TODO: Add dict format for args
-        cls.query_payload["group"] = ', '.join(args)
-        return cls
+        self.query_payload["group"] = ', '.join(args)
+        return self
 
-    @classmethod
-    def AGGREGATE(cls, arg, *args):
+    def AGGREGATE(self, arg, *args):
         """
         Forms a json to return a dict (for a single col) or a list of dicts required in an aggregate clause.
 
@@ -464,7 +453,7 @@ class PayloadBuilder(object):
         args = (arg,) + args if not isinstance(arg, tuple) else arg
         for arg in args:
             aggregate = OrderedDict()
-            if cls.verify_aggregation(arg):
+            if self.verify_aggregation(arg):
                 aggregate["operation"] = arg[0]
                 if len(arg) >= 2:
                     if isinstance(arg[1], list):
@@ -473,51 +462,46 @@ class PayloadBuilder(object):
                         aggregate["column"] = arg[1]
                     else:
                         continue
-                if 'aggregate' in cls.query_payload:
-                    if not isinstance(cls.query_payload['aggregate'], list):
-                        cls.query_payload['aggregate'] = [cls.query_payload.get('aggregate')]
-                    cls.query_payload['aggregate'].append(aggregate)
+                if 'aggregate' in self.query_payload:
+                    if not isinstance(self.query_payload['aggregate'], list):
+                        self.query_payload['aggregate'] = [self.query_payload.get('aggregate')]
+                    self.query_payload['aggregate'].append(aggregate)
                 else:
-                    cls.query_payload["aggregate"] = aggregate
-        return cls
+                    self.query_payload["aggregate"] = aggregate
+        return self
 
-    @classmethod
-    def HAVING(cls):
+    def HAVING(self):
         raise NotImplementedError("To be implemented")
 
-    @classmethod
-    def LIMIT(cls, arg):
+    def LIMIT(self, arg):
         if isinstance(arg, numbers.Real):
-            cls.query_payload["limit"] = arg
-        return cls
+            self.query_payload["limit"] = arg
+        return self
 
-    @classmethod
-    def OFFSET(cls, arg):
+    def OFFSET(self, arg):
         if isinstance(arg, numbers.Real):
-            cls.query_payload["skip"] = arg
-        return cls
+            self.query_payload["skip"] = arg
+        return self
 
     SKIP = OFFSET
 
-    @classmethod
-    def ORDER_BY(cls, arg, *args):
+    def ORDER_BY(self, arg, *args):
         # Pass multiple arguments in a single tuple also. Useful when called from external process i.e. api, test.
         args = (arg,) + args if not isinstance(arg, tuple) else arg
         for arg in args:
             sort = OrderedDict()
-            if cls.verify_orderby(arg):
+            if self.verify_orderby(arg):
                 sort["column"] = arg[0]
                 sort["direction"] = arg[1]
-                if 'sort' in cls.query_payload:
-                    if not isinstance(cls.query_payload['sort'], list):
-                        cls.query_payload['sort'] = [cls.query_payload.get('sort')]
-                    cls.query_payload['sort'].append(sort)
+                if 'sort' in self.query_payload:
+                    if not isinstance(self.query_payload['sort'], list):
+                        self.query_payload['sort'] = [self.query_payload.get('sort')]
+                    self.query_payload['sort'].append(sort)
                 else:
-                    cls.query_payload["sort"] = sort
-        return cls
+                    self.query_payload["sort"] = sort
+        return self
 
-    @classmethod
-    def EXPR(cls, arg, *args):
+    def EXPR(self, arg, *args):
         args = (arg,) + args if not isinstance(arg, tuple) else arg
 
         for arg in args:
@@ -526,14 +510,13 @@ class PayloadBuilder(object):
             expr["operator"] = arg[1]
             expr["value"] = arg[2]
 
-            if 'expressions' in cls.query_payload:
-                cls.query_payload['expressions'].append(expr)
+            if 'expressions' in self.query_payload:
+                self.query_payload['expressions'].append(expr)
             else:
-                cls.query_payload['expressions'] = [expr]
-        return cls
+                self.query_payload['expressions'] = [expr]
+        return self
 
-    @classmethod
-    def JSON_PROPERTY(cls, *args):
+    def JSON_PROPERTY(self, *args):
         """
         Forms a json to return a list of dicts required in a json_properties clause.
 
@@ -556,20 +539,19 @@ class PayloadBuilder(object):
         # Pass multiple arguments in a single tuple also. Useful when called from external process i.e. api, test.
         for arg in args:
             json_property = OrderedDict()
-            if cls.verify_json_property(arg):
+            if self.verify_json_property(arg):
                 json_property["column"] = arg[0]
                 json_property["path"] = arg[1]
                 json_property["value"] = arg[2]
-                if 'json_properties' in cls.query_payload:
-                    if not isinstance(cls.query_payload['json_properties'], list):
-                        cls.query_payload['json_properties'] = [cls.query_payload.get('json_properties')]
-                    cls.query_payload['json_properties'].append(json_property)
+                if 'json_properties' in self.query_payload:
+                    if not isinstance(self.query_payload['json_properties'], list):
+                        self.query_payload['json_properties'] = [self.query_payload.get('json_properties')]
+                    self.query_payload['json_properties'].append(json_property)
                 else:
-                    cls.query_payload["json_properties"] = [json_property]
-        return cls
+                    self.query_payload["json_properties"] = [json_property]
+        return self
 
-    @classmethod
-    def TIMEBUCKET(cls, timestamp, size="1", fmt=None, alias=None):
+    def TIMEBUCKET(self, timestamp, size="1", fmt=None, alias=None):
         """
         Forms a json to return a dict of timebucket col
 
@@ -608,27 +590,80 @@ class PayloadBuilder(object):
             timebucket["format"] = fmt
         if alias is not None:
             timebucket["alias"] = alias
-        cls.query_payload["timebucket"] = timebucket
+        self.query_payload["timebucket"] = timebucket
 
-        return cls
+        return self
 
-    @classmethod
-    def payload(cls):
-        return json.dumps(cls.query_payload, sort_keys=False)
+    def payload(self):
+        return json.dumps(self.query_payload, sort_keys=False)
 
-    @classmethod
-    def chain_payload(cls):
+    def chain_payload(self):
         """
         Sometimes, we may want to create payload incremently, based upon some conditions, this method will come
         handy in such Use cases.
         """
-        return cls.query_payload
+        return self.query_payload
 
-    @classmethod
-    def query_params(cls):
-        where = cls.query_payload['where']
+    def query_params(self):
+        where = self.query_payload['where']
         query_params = OrderedDict({where['column']: where['value']})
         for key, value in where.items():
             if key == 'and':
                 query_params.update({value['column']: value['value']})
         return urllib.parse.urlencode(query_params)
+
+
+class Slot(object):
+    """ Placeholder of a value of a PayloadTemplate, given by name when the template is filled """
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class PayloadTemplate(object):
+    """ Payload serialised once, with slots for the values that change from one call to the next
+
+    Filling a template only serialises the slot values, the frequently used query shapes are neither rebuilt nor
+    serialised again on every call.
+
+    :example:
+    template = PayloadTemplate(PayloadBuilder().SELECT("value").WHERE(["key", "=", Slot("key")]))
+    template.fill(key="SENSORS") returns
+        '{"return": ["value"], "where": {"column": "key", "condition": "=", "value": "SENSORS"}}'
+    """
+
+    def __init__(self, builder):
+        """
+        :param builder: a PayloadBuilder, or its chain_payload(), with Slot values
+        """
+        payload = builder.chain_payload() if isinstance(builder, PayloadBuilder) else builder
+        marker = uuid.uuid4().hex
+        self._names = []
+
+        def replace_slots(item):
+            if isinstance(item, Slot):
+                self._names.append(item.name)
+                return '{}:{}'.format(marker, len(self._names) - 1)
+            if isinstance(item, dict):
+                return OrderedDict((k, replace_slots(v)) for k, v in item.items())
+            if isinstance(item, list):
+                return [replace_slots(v) for v in item]
+            return item
+
+        # json.dumps walks the payload in the same order as replace_slots, the slots appear in the text in order
+        text = json.dumps(replace_slots(payload), sort_keys=False)
+        self._parts = re.split('"{}:\\d+"'.format(marker), text)
+
+    def fill(self, **values):
+        """ Payload with the slots set to the given values
+
+        :return: JsonPayload, that the storage client sends without validating it again
+        :raises KeyError: if the value of a slot is missing
+        """
+        parts = [self._parts[0]]
+        for name, part in zip(self._names, self._parts[1:]):
+            parts.append(json.dumps(values[name]))
+            parts.append(part)
+        return JsonPayload(''.join(parts))
@@ -17,6 +17,7 @@ import http.client
 import json
 import time
 from abc import ABC, abstractmethod
+from collections import deque
 
 from fledge.common import logger
 from fledge.common.service_record import ServiceRecord
@@ -25,6 +26,9 @@ from fledge.common.storage_client.utils import Utils
 
 _LOGGER = logger.setup(__name__)
 
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+""" Content type of the readings block streamed as newline delimited JSON, one row per line """
+
 
 class AbstractStorage(ABC):
     """ abstract class for storage client """
@@ -49,6 +53,11 @@ class AbstractStorage(ABC):
 
 
 class StorageClientAsync(AbstractStorage):
+
+    _storage_services = {}
+    """ (core management host, core management port): ServiceRecord of the storage service, as discovered from the
+    core; the storage clients of a process share a single discovery round trip """
+
     def __init__(self, core_management_host, core_management_port, svc=None):
         try:
             if svc:
@@ -108,12 +117,20 @@ class StorageClientAsync(AbstractStorage):
         return svc
 
     def connect(self, core_management_host, core_management_port):
+        key = (core_management_host, core_management_port)
+        service = StorageClientAsync._storage_services.get(key)
+        if service is not None:
+            self.service = service
+            return self
+
         svc = self._get_storage_service(host=core_management_host, port=core_management_port)
         if len(svc) == 0:
             raise InvalidServiceInstance
         self.service = ServiceRecord(s_id=svc["id"], s_name=svc["name"], s_type=svc["type"], s_port=svc["service_port"],
                                      m_port=svc["management_port"], s_address=svc["address"],
                                      s_protocol=svc["protocol"])
+        # Only a valid storage service is kept
+        StorageClientAsync._storage_services[key] = self.service
 
         return self
 
@@ -126,7 +143,7 @@ class StorageClientAsync(AbstractStorage):
         """ insert json payload into given table
 
         :param tbl_name:
-        :param data: JSON payload
+        :param data: JSON payload, as a str or as a dict to be serialised once by the client
         :return:
 
         :Example:
@@ -145,7 +162,8 @@ class StorageClientAsync(AbstractStorage):
         if not data:
             raise ValueError("Data to insert is missing")
 
-        if not Utils.is_json(data):
+        data = Utils.encode(data)
+        if data is None:
             raise TypeError("Provided data to insert must be a valid JSON")
 
         post_url = '/storage/table/{tbl_name}'.format(tbl_name=tbl_name)
@@ -165,7 +183,7 @@ class StorageClientAsync(AbstractStorage):
         """ update json payload for specified condition into given table
 
         :param tbl_name:
-        :param data: JSON payload
+        :param data: JSON payload, as a str or as a dict to be serialised once by the client
         :return:
 
         :Example:
@@ -188,7 +206,8 @@ class StorageClientAsync(AbstractStorage):
         if not data:
             raise ValueError("Data to update is missing")
 
-        if not Utils.is_json(data):
+        data = Utils.encode(data)
+        if data is None:
             raise TypeError("Provided data to update must be a valid JSON")
 
         put_url = '/storage/table/{tbl_name}'.format(tbl_name=tbl_name)
@@ -209,7 +228,7 @@ class StorageClientAsync(AbstractStorage):
         """ Delete for specified condition from given table
 
         :param tbl_name:
-        :param condition: JSON payload
+        :param condition: JSON payload, as a str or as a dict
         :return:
 
         :Example:
@@ -227,8 +246,10 @@ class StorageClientAsync(AbstractStorage):
 
         del_url = '/storage/table/{tbl_name}'.format(tbl_name=tbl_name)
 
-        if condition and (not Utils.is_json(condition)):
-            raise TypeError("condition payload must be a valid JSON")
+        if condition:
+            condition = Utils.encode(condition)
+            if condition is None:
+                raise TypeError("condition payload must be a valid JSON")
 
         url = 'http://' + self.base_url + del_url
         async with aiohttp.ClientSession() as session:
@@ -277,7 +298,7 @@ class StorageClientAsync(AbstractStorage):
         """ Complex SELECT query for the specified table with a payload
 
         :param tbl_name:
-        :param query_payload: payload in valid JSON format
+        :param query_payload: payload in valid JSON format, as a str or as a dict
         :return:
 
         :Example:
@@ -295,7 +316,8 @@ class StorageClientAsync(AbstractStorage):
         if not query_payload:
             raise ValueError("Query payload is missing")
 
-        if not Utils.is_json(query_payload):
+        query_payload = Utils.encode(query_payload)
+        if query_payload is None:
             raise TypeError("Query payload must be a valid JSON")
 
         put_url = '/storage/table/{tbl_name}/query'.format(tbl_name=tbl_name)
@@ -404,6 +426,83 @@ class StorageClientAsync(AbstractStorage):
         return json.loads(jdoc)
 
 
+class ReadingsStream(object):
+    """ Rows of a readings block, as an async iterator
+
+    The block is asked for as newline delimited JSON, so that the rows are parsed while they arrive, a chunk of the
+    response at a time, and the JSON document of the whole block is never held in memory; the rows the caller keeps
+    still grow with the block size. If the storage service does not support it, the JSON document of the block is
+    parsed as a whole and its rows are iterated. The rows take longer to load than with fetch().
+
+    :Example:
+        async with readings_storage_client.fetch_stream(reading_id, count) as rows:
+            async for row in rows:
+                ...
+    """
+
+    def __init__(self, url):
+        self._url = url
+        self._session = None
+        self._resp = None
+        self._rows = None
+        self._lines = deque()
+        self._buffer = b''
+        self._eof = False
+
+    @property
+    def streaming(self):
+        """ True if the rows are streamed, False if the storage service answered with a single JSON document """
+        return self._rows is None
+
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession()
+        try:
+            self._resp = await self._session.get(
+                self._url, headers={'Accept': '{}, application/json'.format(NDJSON_CONTENT_TYPE)})
+            if self._resp.status not in range(200, 209):
+                jdoc = await self._resp.json()
+                _LOGGER.error("GET url: %s, Error code: %d, reason: %s, details: %s", self._url, self._resp.status,
+                              self._resp.reason, jdoc)
+                raise StorageServerError(code=self._resp.status, reason=self._resp.reason, error=jdoc)
+            if self._resp.content_type != NDJSON_CONTENT_TYPE:
+                jdoc = await self._resp.json()
+                self._rows = iter(jdoc['rows'])
+        except Exception:
+            await self.__aexit__()
+            raise
+        return self
+
+    async def __aexit__(self, *args):
+        if self._resp is not None:
+            self._resp.release()
+        await self._session.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._rows is not None:
+            try:
+                return next(self._rows)
+            except StopIteration:
+                raise StopAsyncIteration
+        while not self._lines:
+            if self._eof:
+                raise StopAsyncIteration
+            chunk = await self._resp.content.readany()
+            if chunk:
+                lines = (self._buffer + chunk).split(b'\n')
+                self._buffer = lines.pop()
+            else:
+                lines = [self._buffer]
+                self._eof = True
+            lines = [line for line in lines if line.strip()]
+            if lines:
+                # The complete lines of a chunk are parsed at once, a single JSON array
+                self._lines.extend(json.loads((b'[' + b','.join(lines) + b']').decode('utf-8')))
+        return self._lines.popleft()
+
+
 class ReadingsStorageClientAsync(StorageClientAsync):
     """ Readings table operations """
     _base_url = ""
@@ -414,7 +513,7 @@ class ReadingsStorageClientAsync(StorageClientAsync):
 
     async def append(self, readings):
         """
-        :param readings:
+        :param readings: JSON payload {"readings": [...]}, as a str or as a dict to be serialised once by the client
         :return:
 
         :Example:
@@ -442,7 +541,8 @@ class ReadingsStorageClientAsync(StorageClientAsync):
         if not readings:
             raise ValueError("Readings payload is missing")
 
-        if not Utils.is_json(readings):
+        readings = Utils.encode(readings)
+        if readings is None:
             raise TypeError("Readings payload must be a valid JSON")
 
         url = 'http://' + self._base_url + '/storage/reading'
@@ -492,6 +592,25 @@ class ReadingsStorageClientAsync(StorageClientAsync):
 
         return jdoc
 
+    def fetch_stream(self, reading_id, count):
+        """ Readings block of fetch(), with the rows parsed while they are received
+
+        :param reading_id: the first reading ID in the block that is retrieved
+        :param count: the number of readings to return, if available
+        :return: ReadingsStream, to be used as an async context manager
+        """
+
+        if reading_id is None:
+            raise ValueError("first reading id to retrieve the readings block is required")
+
+        if count is None:
+            raise ValueError("count is required to retrieve the readings block")
+
+        count = int(count)
+
+        get_url = '/storage/reading?id={}&count={}'.format(reading_id, count)
+        return ReadingsStream('http://' + self._base_url + get_url)
+
     async def query(self, query_payload):
         """
 
@@ -513,7 +632,8 @@ class ReadingsStorageClientAsync(StorageClientAsync):
         if not query_payload:
             raise ValueError("Query payload is missing")
 
-        if not Utils.is_json(query_payload):
+        query_payload = Utils.encode(query_payload)
+        if query_payload is None:
             raise TypeError("Query payload must be a valid JSON")
 
         url = 'http://' + self._base_url + '/storage/reading/query'
@@ -18,6 +18,10 @@ __version__ = "${VERSION}"
 import json
 
 
+class JsonPayload(str):
+    """ Payload already encoded as JSON by a trusted producer, sent to the storage without being parsed again """
+
+
 class Utils(object):
 
     @staticmethod
@@ -27,3 +31,16 @@ class Utils(object):
         except (TypeError, ValueError):  # JSONDecodeError is a subclass of ValueError
             return False
         return True
+
+    @staticmethod
+    def encode(payload):
+        """ Request body of a storage payload, None if the payload is not valid JSON
+
+        Structured payloads (dict, list) are serialised here, once. Encoded payloads are parsed to be validated,
+        but for a JsonPayload.
+        """
+        if isinstance(payload, (dict, list)):
+            return json.dumps(payload)
+        if isinstance(payload, JsonPayload):
+            return payload
+        return payload if Utils.is_json(payload) else None
@@ -84,6 +84,7 @@ class FledgeMicroservice(FledgeProcess):
             self._run_microservice_management_app(loop, host)
             res = self.register_service_with_core(self._get_service_registration_payload())
             self._microservice_id = res["id"]
+            self._startup_profile.mark('registration')
         except Exception as ex:
             _logger.exception('Unable to intialize FledgeMicroservice due to exception %s', str(ex))
             raise
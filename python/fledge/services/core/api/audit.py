@@ -4,7 +4,9 @@
 # See: http://fledge.readthedocs.io/
 # FLEDGE_END
 
-import copy
+import base64
+import binascii
+import json
 from datetime import datetime
 from enum import IntEnum
 from aiohttp import web
@@ -124,10 +126,48 @@ async def create_audit_entry(request):
         raise web.HTTPInternalServerError(reason=str(ex))
 
 
+def _select():
+    """ The columns of the audit entries, and the exact timestamp and the id of their cursor """
+    payload = PayloadBuilder().SELECT("id", "code", "level", "log", "ts")\
+        .ALIAS("return", ("ts", 'timestamp')).FORMAT("return", ("ts", "YYYY-MM-DD HH24:MI:SS.MS"))
+    # The timestamp as stored, not rounded to the milliseconds
+    payload.chain_payload()["return"].append({"column": "ts", "alias": "cursor_ts"})
+    return payload
+
+
+def _filter(payload, source_list, severity):
+    if len(source_list) == 1:
+        payload.WHERE(['code', '=', source_list[0]])
+    elif source_list:
+        payload.WHERE(['code', 'in', source_list])
+    if severity is not None:
+        payload.AND_WHERE(['level', '=', severity])
+    return payload
+
+
+def _encode_cursor(ts, _id):
+    return base64.urlsafe_b64encode(json.dumps([ts, _id]).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        ts, _id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if not isinstance(ts, str) or not isinstance(_id, int):
+            raise ValueError
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise web.HTTPBadRequest(reason="{} is not a valid cursor".format(cursor))
+    return ts, _id
+
+
 async def get_audit_entries(request):
     """ Returns a list of audit trail entries sorted with most recent first and total count
         (including the criteria search if applied)
 
+        The entries are sorted by timestamp and id. When there may be more entries, the response has the cursor of the
+        next page in "next": the next page is requested with cursor=<next>, in constant time however deep the page,
+        where skip reads and discards all the entries it skips. The total count is read from the log_counts table,
+        that the storage maintains per source and severity.
+
     :Example:
 
         curl -X GET http://localhost:8081/fledge/audit
@@ -144,6 +184,8 @@ async def get_audit_entries(request):
         curl -X GET http://localhost:8081/fledge/audit?severity=FAILURE
 
         curl -X GET http://localhost:8081/fledge/audit?source=LOGGN&severity=INFORMATION&limit=10
+
+        curl -X GET http://localhost:8081/fledge/audit?limit=10&cursor=WyIyMDIwLTA5LTAxIDEwOjAwOjAwLjEyMyIsIDQyXQ==
     """
 
     limit = __DEFAULT_LIMIT
@@ -164,6 +206,12 @@ async def get_audit_entries(request):
         except ValueError:
             raise web.HTTPBadRequest(reason="Skip/Offset must be a positive integer")
 
+    cursor = None
+    if 'cursor' in request.query and request.query['cursor'] != '':
+        if offset > 0:
+            raise web.HTTPBadRequest(reason="Skip/Offset cannot be used with a cursor")
+        cursor = _decode_cursor(request.query['cursor'])
+
     source = None
     source_list = []
     if 'source' in request.query and request.query['source'] != '':
@@ -188,45 +236,34 @@ async def get_audit_entries(request):
             raise web.HTTPBadRequest(reason="{} is not a valid severity".format(ex))
 
     try:
-        # HACK: This way when we can more future we do not get an exponential
-        # explosion of if statements
-        payload = PayloadBuilder().SELECT("code", "level", "log", "ts")\
-            .ALIAS("return", ("ts", 'timestamp')).FORMAT("return", ("ts", "YYYY-MM-DD HH24:MI:SS.MS"))\
-            .WHERE(['1', '=', 1])
-
-        if source is not None:
-            if len(source_list) == 1:
-                payload.AND_WHERE(['code', '=', source])
-            else:
-                payload = PayloadBuilder().SELECT("code", "level", "log", "ts") \
-                    .ALIAS("return", ("ts", 'timestamp')).FORMAT("return", ("ts", "YYYY-MM-DD HH24:MI:SS.MS"))
-                payload.WHERE(['code', 'in', source_list])
-        if severity is not None:
-            payload.AND_WHERE(['level', '=', severity])
-
-        _and_where_payload = payload.chain_payload()
-        # SELECT *, count(*) OVER() FROM log - No support yet from storage layer
-        # TODO: FOGL-740, FOGL-663 once ^^ resolved we should replace below storage call for getting total rows
-        _and_where_copy = copy.deepcopy(_and_where_payload)
-        total_count_payload = PayloadBuilder(_and_where_copy).AGGREGATE(["count", "*"])\
-            .ALIAS("aggregate", ("*", "count", "count")).payload()
-
-        # SELECT count (*) FROM log <_and_where_payload>
         storage_client = connect.get_storage_async()
-        result = await storage_client.query_tbl_with_payload('log', total_count_payload)
-        total_count = result['rows'][0]['count']
-
-        payload = PayloadBuilder(_and_where_payload)
-        payload.ORDER_BY(['ts', 'desc'])
-        payload.LIMIT(limit)
 
-        if offset > 0:
-            payload.OFFSET(offset)
+        # SELECT sum(entries) FROM log_counts <filters>
+        count_payload = _filter(PayloadBuilder().AGGREGATE(["sum", "entries"])
+                                .ALIAS("aggregate", ("entries", "sum", "count")), source_list, severity).payload()
+        result = await storage_client.query_tbl_with_payload('log_counts', count_payload)
+        total_count = int(result['rows'][0]['count'] or 0) if result['rows'] else 0
+
+        if cursor is None:
+            # SELECT * FROM log <filters> ORDER BY ts DESC, id DESC LIMIT limit OFFSET offset
+            payload = _filter(_select(), source_list, severity).ORDER_BY(['ts', 'desc'], ['id', 'desc']).LIMIT(limit)
+            if offset > 0:
+                payload.OFFSET(offset)
+            rows = (await storage_client.query_tbl_with_payload('log', payload.payload()))['rows']
+        else:
+            # The entries after the cursor: those with its timestamp and a lower id, then those with an older
+            # timestamp; each query only has AND conditions, that the storage layer does not need to parenthesise
+            cursor_ts, cursor_id = cursor
+            payload = _filter(_select(), source_list, severity).AND_WHERE(['ts', '=', cursor_ts])\
+                .AND_WHERE(['id', '<', cursor_id]).ORDER_BY(['id', 'desc']).LIMIT(limit)
+            rows = (await storage_client.query_tbl_with_payload('log', payload.payload()))['rows']
+            if len(rows) < limit:
+                payload = _filter(_select(), source_list, severity).AND_WHERE(['ts', '<', cursor_ts])\
+                    .ORDER_BY(['ts', 'desc'], ['id', 'desc']).LIMIT(limit - len(rows))
+                rows += (await storage_client.query_tbl_with_payload('log', payload.payload()))['rows']
 
-        # SELECT * FROM log <payload.payload()>
-        results = await storage_client.query_tbl_with_payload('log', payload.payload())
         res = []
-        for row in results['rows']:
+        for row in rows:
             r = dict()
             r["details"] = row["log"]
             severity_level = int(row["level"])
@@ -239,7 +276,10 @@ async def get_audit_entries(request):
     except Exception as ex:
         raise web.HTTPInternalServerError(reason=str(ex))
 
-    return web.json_response({'audit': res, 'totalCount': total_count})
+    response = {'audit': res, 'totalCount': total_count}
+    if limit > 0 and len(rows) == limit:
+        response['next'] = _encode_cursor(rows[-1]['cursor_ts'], rows[-1]['id'])
+    return web.json_response(response)
 
 
 async def get_audit_log_codes(request):
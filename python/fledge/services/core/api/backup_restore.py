@@ -6,15 +6,20 @@
 
 """Backup and Restore Rest API support"""
 
+import asyncio
+import glob
+import io
+import mimetypes
 import os
 import sys
 import tarfile
-from pathlib import Path
-from aiohttp import web
+import tempfile
+from aiohttp import hdrs, web
 from enum import IntEnum
 from collections import OrderedDict
 
 from fledge.services.core import connect
+from fledge.services.core.archive import ParallelGzipWriter
 from fledge.common.common import _FLEDGE_ROOT, _FLEDGE_DATA
 
 if 'fledge.plugins.storage.common.backup' not in sys.modules:
@@ -32,6 +37,8 @@ __version__ = "${VERSION}"
 
 __DEFAULT_LIMIT = 20
 __DEFAULT_OFFSET = 0
+_DOWNLOAD_QUEUE_SIZE = 16
+"""Chunks of the archive of a backup held between the thread that compresses it and the response"""
 
 _help = """
     ------------------------------------------------------------------------------------
@@ -148,11 +155,133 @@ async def get_backup_details(request):
     return web.json_response(resp)
 
 
+def _get_backup_dir():
+    return _FLEDGE_DATA + '/backup/' if _FLEDGE_DATA else _FLEDGE_ROOT + "/data/backup/"
+
+
+def _get_download_file(backup_id, source):
+    """ Archive of the backup file for the downloads, kept next to the backup; the modification time of the backup
+    file is part of the name, so that a backup file that was written again is archived again """
+    return "{}download-{}-{}.tar.gz".format(_get_backup_dir(), backup_id, os.stat(source).st_mtime_ns)
+
+
+def _remove_download_files(backup_id, keep=None):
+    for download_file in glob.glob("{}download-{}-*.tar.gz".format(_get_backup_dir(), backup_id)):
+        if download_file != keep:
+            try:
+                os.remove(download_file)
+            except OSError:
+                pass
+
+
+class _DownloadStream(io.RawIOBase):
+    """ Hands the archive, as it is compressed by a thread, to the response that is written by the event loop """
+
+    def __init__(self, loop):
+        super().__init__()
+        self._loop = loop
+        self.queue = asyncio.Queue(maxsize=_DOWNLOAD_QUEUE_SIZE)
+        self.abandoned = False
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        # The thread waits for the response to take the chunks, unless the client went away
+        if not self.abandoned:
+            asyncio.run_coroutine_threadsafe(self.queue.put(bytes(data)), self._loop).result()
+        return len(data)
+
+    def end(self):
+        self.write(b'')
+
+    def abandon(self):
+        """ Called by the event loop: the archive goes on being written to the download file only """
+        self.abandoned = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+
+class _Tee(io.RawIOBase):
+    def __init__(self, *files):
+        super().__init__()
+        self._files = files
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        for f in self._files:
+            f.write(data)
+        return len(data)
+
+
+def _write_download_file(backup_id, source, download_file, stream=None):
+    """ Archives the backup file source to download_file and, as it is compressed, to the stream """
+    fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(download_file), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            gz = ParallelGzipWriter(_Tee(f, stream) if stream else f)
+            try:
+                with tarfile.open(fileobj=gz, mode='w|') as tar:
+                    tar.add(source, arcname=os.path.basename(source))
+            finally:
+                gz.close()
+        # Downloads of the same backup may write it concurrently: the download file is replaced, never rewritten
+        os.replace(tmp_file, download_file)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+    finally:
+        if stream:
+            stream.end()
+    _remove_download_files(backup_id, keep=download_file)
+
+
+async def _stream_download_file(request, backup_id, source, download_file):
+    """ Sends the archive of the backup file, with a chunked response, while a thread compresses it """
+    loop = asyncio.get_event_loop()
+    stream = _DownloadStream(loop)
+    archiving = loop.run_in_executor(None, _write_download_file, backup_id, source, download_file, stream)
+    response = None
+    try:
+        while True:
+            chunk = await stream.queue.get()
+            if not chunk:
+                break
+            if response is None:
+                # The same headers as the web.FileResponse of the download file
+                content_type, encoding = mimetypes.guess_type(download_file)
+                response = web.StreamResponse(headers={hdrs.CONTENT_TYPE: content_type})
+                if encoding:
+                    response.headers[hdrs.CONTENT_ENCODING] = encoding
+                response.enable_chunked_encoding()
+                await response.prepare(request)
+            await response.write(chunk)
+        await archiving
+    except asyncio.CancelledError:
+        # The client went away
+        raise
+    except Exception as ex:
+        if response is None:
+            raise web.HTTPInternalServerError(reason=str(ex))
+        raise
+    finally:
+        if not archiving.done():
+            stream.abandon()
+    await response.write_eof()
+    return response
+
+
 async def get_backup_download(request):
     """ Download back up file by id
 
+    The backup file is archived on the first download, while it is sent: the next downloads, and the range requests
+    that resume an interrupted download, are served from the archive, until the backup file changes.
+
     :Example:
         wget -O fledge-backup-1.tar.gz http://localhost:8081/fledge/backup/1/download
+        wget -c -O fledge-backup-1.tar.gz http://localhost:8081/fledge/backup/1/download
 
     """
     backup_id = request.match_info.get('backup_id', None)
@@ -164,17 +293,17 @@ async def get_backup_download(request):
         # Strip filename from backup path
         file_name_path = str(backup_json["file_name"]).split('data/backup/')
         file_name = str(file_name_path[1])
-        dir_name = _FLEDGE_DATA + '/backup/' if _FLEDGE_DATA else _FLEDGE_ROOT + "/data/backup/"
-        source = dir_name + file_name
-
-        # Create tar file
-        t = tarfile.open(source + ".tar.gz", "w:gz")
-        t.add(source, arcname=os.path.basename(source))
-        t.close()
-
-        # Path of tar.gz file
-        gz_path = Path(source + ".tar.gz")
-
+        source = _get_backup_dir() + file_name
+        download_file = _get_download_file(backup_id, source)
+
+        stream = False
+        if not os.path.isfile(download_file):
+            if hdrs.RANGE in request.headers:
+                # A range of an archive that was not kept, e.g. after a restart of Fledge: the archive is written first
+                await asyncio.get_event_loop().run_in_executor(None, _write_download_file, backup_id, source,
+                                                               download_file)
+            else:
+                stream = True
     except ValueError:
         raise web.HTTPBadRequest(reason='Invalid backup id')
     except exceptions.DoesNotExist:
@@ -182,7 +311,9 @@ async def get_backup_download(request):
     except Exception as ex:
         raise web.HTTPInternalServerError(reason=(str(ex)))
 
-    return web.FileResponse(path=gz_path)
+    if stream:
+        return await _stream_download_file(request, backup_id, source, download_file)
+    return web.FileResponse(path=download_file)
 
 
 async def delete_backup(request):
@@ -195,6 +326,7 @@ async def delete_backup(request):
         backup_id = int(backup_id)
         backup = Backup(connect.get_storage_async())
         await backup.delete_backup(backup_id)
+        _remove_download_files(backup_id)
         return web.json_response({'message': "Backup deleted successfully"})
     except ValueError:
         raise web.HTTPBadRequest(reason='Invalid backup id')
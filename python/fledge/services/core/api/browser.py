@@ -34,13 +34,28 @@ Supports a number of REST API:
   Note: seconds, minutes and hours can not be combined in a URL. If they are then only seconds
   will have an effect.
   Note: if datetime units are supplied then limit will not respect i.e mutually exclusive
+
+  Once the readings rollup task has run, series grouped by minutes or hours and summaries over a time window
+  of ten minutes or more are answered from the readings_rollup table, the readings are only read for the
+  buckets the rollup has not completed yet. The rollup is complete up to its watermark, the newest user_ts its
+  last run aggregated: a reading that arrives late, with a user_ts older than the watermark, is left out of these
+  series and summaries until the next run of the rollup task aggregates it into its bucket
+
+  The responses of /fledge/asset, /fledge/asset/{asset_code}, /fledge/asset/{asset_code}/summary and
+  /fledge/asset/{asset_code}/{reading} are cached until readings are added or purged
 """
+import asyncio
+import copy
 import datetime
+import functools
 
 from aiohttp import web
 
+from fledge.common.readings_rollup import ROLLUP_TABLE, ROLLUP_POSITION_KEY, MINUTE, HOUR, bucket_start, \
+    bucket_label, utc_timestamp
 from fledge.common.storage_client.payload_builder import PayloadBuilder
 from fledge.services.core import connect
+from fledge.services.core.api.browser_cache import ResponseCache
 
 __author__ = "Mark Riddoch, Ashish Jabble"
 __copyright__ = "Copyright (c) 2017 OSIsoft, LLC"
@@ -51,9 +66,23 @@ __version__ = "${VERSION}"
 __DEFAULT_LIMIT = 20
 __DEFAULT_OFFSET = 0
 
+# Series grouped per minute or hour are answered from the readings rollup
+_ROLLUP_GROUPS = {'minutes': MINUTE, 'hours': HOUR}
+# Summaries over shorter windows are cheap enough on the readings
+_ROLLUP_MIN_SUMMARY_WINDOW = 600
+
+_RESPONSE_CACHE = 'browser_response_cache'
+_DATAPOINTS_CACHE = 'browser_datapoints_cache'
+# Datapoints of the assets are remembered for this number of seconds
+_DATAPOINTS_TTL = 60
+# Maximum number of datapoint aggregates of an asset summary run at once
+_SUMMARY_CONCURRENCY = 8
+
 
 def setup(app):
     """ Add the routes for the API endpoints supported by the data browser """
+    app[_RESPONSE_CACHE] = ResponseCache()
+    app[_DATAPOINTS_CACHE] = ResponseCache()
     app.router.add_route('GET', '/fledge/asset', asset_counts)
     app.router.add_route('GET', '/fledge/asset/{asset_code}', asset)
     app.router.add_route('GET', '/fledge/asset/{asset_code}/summary', asset_all_readings_summary)
@@ -64,14 +93,72 @@ def setup(app):
     app.router.add_route('GET', '/fledge/asset/{asset_code}/{reading}/bucket/{bucket_size}', asset_readings_with_bucket_size)
 
 
-def prepare_limit_skip_payload(request, _dict):
-    """ limit skip clause validation
+async def _get_readings_watermark():
+    """ Ids of the oldest and of the newest reading, None if they can not be read
+
+    min and max are asked separately, the storage can answer each from the index but not both at once
+    """
+    try:
+        _readings = connect.get_readings_async()
+        oldest = await _readings.query(PayloadBuilder().AGGREGATE(["min", "id"])
+                                       .ALIAS("aggregate", ("id", "min", "oldest")).payload())
+        newest = await _readings.query(PayloadBuilder().AGGREGATE(["max", "id"])
+                                       .ALIAS("aggregate", ("id", "max", "newest")).payload())
+        return oldest['rows'][0]['oldest'], newest['rows'][0]['newest']
+    except Exception:
+        return None
+
+
+async def _get_asset_datapoints(request, _readings, asset_code):
+    """ Datapoints of the latest reading of an asset, None if the asset has no readings
+
+    The datapoints are remembered for _DATAPOINTS_TTL seconds
+    """
+    cache = request.app.get(_DATAPOINTS_CACHE)
+    datapoints = cache.get(asset_code) if cache is not None else None
+    if datapoints is None:
+        payload = PayloadBuilder().SELECT("reading").WHERE(["asset_code", "=", asset_code]).LIMIT(1) \
+            .ORDER_BY(["user_ts", "desc"]).payload()
+        results = await _readings.query(payload)
+        if not results['rows']:
+            return None
+        datapoints = list(results['rows'][-1]['reading'].keys())
+        if cache is not None:
+            cache.put(asset_code, datapoints, _DATAPOINTS_TTL)
+    return datapoints
+
+
+def cached_response(handler):
+    """ Serve the responses of a browser endpoint from the response cache while the readings do not change """
+    @functools.wraps(handler)
+    async def wrapper(request):
+        cache = request.app.get(_RESPONSE_CACHE)
+        if cache is None:
+            return await handler(request)
+        if cache.watermark_expired():
+            cache.set_watermark(await _get_readings_watermark())
+        watermark = cache.watermark
+        if watermark is None:
+            return await handler(request)
+        key = cache.key(request)
+        body = cache.get(key)
+        if body is not None:
+            return web.Response(body=body, content_type='application/json')
+        response = await handler(request)
+        # Readings may have changed while the response was computed
+        if cache.watermark == watermark:
+            cache.put(key, response.body, cache.window_ttl(get_time_window(request)))
+        return response
+    return wrapper
+
+
+def get_limit_skip(request):
+    """ limit skip query params validation
 
     Args:
         request: request query params
-        _dict: main payload dict
     Returns:
-        chain payload dict
+        tuple of limit and offset
     """
     limit = __DEFAULT_LIMIT
     if 'limit' in request.query and request.query['limit'] != '':
@@ -90,7 +177,19 @@ def prepare_limit_skip_payload(request, _dict):
                 raise ValueError
         except ValueError:
             raise web.HTTPBadRequest(reason="Skip/Offset must be a positive integer")
+    return limit, offset
+
+
+def prepare_limit_skip_payload(request, _dict):
+    """ limit skip clause validation
 
+    Args:
+        request: request query params
+        _dict: main payload dict
+    Returns:
+        chain payload dict
+    """
+    limit, offset = get_limit_skip(request)
     payload = PayloadBuilder(_dict).LIMIT(limit)
     if offset:
         payload = PayloadBuilder(_dict).SKIP(offset)
@@ -98,6 +197,7 @@ def prepare_limit_skip_payload(request, _dict):
     return payload.chain_payload()
 
 
+@cached_response
 async def asset_counts(request):
     """ Browse all the assets for which we have recorded readings and
     return a readings count.
@@ -123,6 +223,7 @@ async def asset_counts(request):
         return web.json_response(asset_json)
 
 
+@cached_response
 async def asset(request):
     """ Browse a particular asset for which we have recorded readings and
     return a readings with timestamps for the asset. The number of readings
@@ -160,6 +261,7 @@ async def asset(request):
         return web.json_response(response)
 
 
+@cached_response
 async def asset_reading(request):
     """ Browse a particular sensor value of a particular asset for which we have recorded readings and
     return the timestamp and reading value for that sensor. The number of rows returned
@@ -215,6 +317,7 @@ async def asset_reading(request):
         return web.json_response(response)
 
 
+@cached_response
 async def asset_all_readings_summary(request):
     """ Browse all the assets for which we have recorded readings and
     return a summary for all sensors values for an asset code. The values that are
@@ -234,18 +337,13 @@ async def asset_all_readings_summary(request):
     try:
         # Get readings from asset_code
         asset_code = request.match_info.get('asset_code', '')
-        # TODO: Use only the latest asset read to determine the data points to use. This
-        # avoids reading every single reading into memory and creating a very big result set See FOGL-2635
-        payload = PayloadBuilder().SELECT("reading").WHERE(["asset_code", "=", asset_code]).LIMIT(1).ORDER_BY(["user_ts", "desc"]).payload()
         _readings = connect.get_readings_async()
-        results = await _readings.query(payload)
-        if not results['rows']:
+        reading_keys = await _get_asset_datapoints(request, _readings, asset_code)
+        if reading_keys is None:
             raise web.HTTPNotFound(reason="{} asset_code not found".format(asset_code))
 
-        # TODO: FOGL-1768 when support available from storage layer then avoid multiple calls
-        # Find keys in readings
-        reading_keys = list(results['rows'][-1]['reading'].keys())
-        response = []
+        # The storage layer returns only the readings having every datapoint of a multi datapoint aggregate,
+        # each datapoint is summarised by its own query and the queries run concurrently
         _where = PayloadBuilder().WHERE(["asset_code", "=", asset_code]).chain_payload()
         if 'seconds' in request.query or 'minutes' in request.query or 'hours' in request.query:
             _and_where = where_clause(request, _where)
@@ -253,16 +351,21 @@ async def asset_all_readings_summary(request):
             # Add limit, offset clause
             _and_where = prepare_limit_skip_payload(request, _where)
 
-        for reading in reading_keys:
-            _aggregate = PayloadBuilder(_and_where).AGGREGATE(["min", ["reading", reading]],
-                                                              ["max", ["reading", reading]],
-                                                              ["avg", ["reading", reading]]) \
+        semaphore = asyncio.Semaphore(_SUMMARY_CONCURRENCY)
+
+        async def summarise(reading):
+            # PayloadBuilder extends the payload it is given, each query gets its own copy
+            payload = PayloadBuilder(copy.deepcopy(_and_where)).AGGREGATE(["min", ["reading", reading]],
+                                                                          ["max", ["reading", reading]],
+                                                                          ["avg", ["reading", reading]]) \
                 .ALIAS('aggregate', ('reading', 'min', 'min'),
                        ('reading', 'max', 'max'),
-                       ('reading', 'avg', 'average')).chain_payload()
-            payload = PayloadBuilder(_aggregate).payload()
-            results = await _readings.query(payload)
-            response.append({reading: results['rows'][0]})
+                       ('reading', 'avg', 'average')).payload()
+            async with semaphore:
+                results = await _readings.query(payload)
+            return {reading: results['rows'][0]}
+
+        response = await asyncio.gather(*[summarise(reading) for reading in reading_keys])
     except (KeyError, IndexError) as ex:
         raise web.HTTPNotFound(reason=ex)
     except (TypeError, ValueError) as ex:
@@ -290,6 +393,9 @@ async def asset_summary(request):
 
     Only one of hour, minutes or seconds should be supplied
 
+    Over a time window of ten minutes or more the summary is answered from the readings rollup: the late
+    readings, with a user_ts older than the watermark of the rollup, are left out until the next rollup run
+
     Returns:
            json result on basis of SELECT MIN(reading->>'reading'), MAX(reading->>'reading'), AVG((reading->>'reading')::float) FROM readings WHERE asset_code = 'asset_code';
 
@@ -311,6 +417,11 @@ async def asset_summary(request):
         if reading not in reading_keys:
             raise web.HTTPNotFound(reason="{} reading key is not found".format(reading))
 
+        window = get_time_window(request)
+        bounds = await _get_rollup_bounds(MINUTE, window) if window >= _ROLLUP_MIN_SUMMARY_WINDOW else None
+        if bounds is not None:
+            return web.json_response({reading: await _rollup_summary(asset_code, reading, bounds, window)})
+
         _aggregate = PayloadBuilder().AGGREGATE(["min", ["reading", reading]], ["max", ["reading", reading]],
                                                 ["avg", ["reading", reading]]) \
             .ALIAS('aggregate', ('reading', 'min', 'min'), ('reading', 'max', 'max'),
@@ -348,6 +459,9 @@ async def asset_averages(request):
     The amount of time covered by each returned value is set using the
     query parameter group. This may be set to seconds, minutes or hours
 
+    Grouped by minutes or hours, the series is answered from the readings rollup: the late readings, with a
+    user_ts older than the watermark of the rollup, are left out until the next rollup run
+
     Returns:
             on the basis of
             SELECT min((reading->>'reading')::float) AS "min",
@@ -392,6 +506,15 @@ async def asset_averages(request):
                ('reading', 'avg', 'average')).chain_payload()
     _where = PayloadBuilder(_aggregate).WHERE(["asset_code", "=", asset_code]).chain_payload()
 
+    granularity = _ROLLUP_GROUPS.get(request.query.get('group'))
+    if granularity is not None:
+        window = get_time_window(request)
+        limit, offset = get_limit_skip(request)
+        bounds = await _get_rollup_bounds(granularity, window)
+        if bounds is not None:
+            return await _rollup_averages(asset_code, reading, _where, ts_restraint, granularity, bounds, window,
+                                          limit, offset)
+
     if 'seconds' in request.query or 'minutes' in request.query or 'hours' in request.query:
         _and_where = where_clause(request, _where)
     else:
@@ -413,7 +536,134 @@ async def asset_averages(request):
         return web.json_response(response)
 
 
-def where_clause(request, where):
+async def _get_rollup_bounds(granularity, window):
+    """ Buckets of the readings rollup that can answer for a time window
+
+    The rollup is complete only up to the bucket of its watermark, the buckets from there onward are left to the
+    readings. With a time window, the bucket the window starts in is partial and is left to the readings as well.
+    The watermark is a user_ts: the readings added since the last rollup run with an older user_ts are in neither.
+
+    Args:
+        granularity: MINUTE or HOUR
+        window: time window in seconds, 0 for no window
+    Returns:
+        tuple of the first (None with no window) and the last (excluded) bucket start, None if the rollup is not
+        available or has no complete bucket within the window
+    """
+    try:
+        payload = PayloadBuilder().SELECT("data").WHERE(["key", "=", ROLLUP_POSITION_KEY]).payload()
+        _storage = connect.get_storage_async()
+        results = await _storage.query_tbl_with_payload('plugin_data', payload)
+        watermark = results['rows'][0]['data']['watermark']
+    except Exception:
+        # The rollup task has not run yet, the readings answer alone
+        return None
+    last = bucket_start(watermark, granularity)
+    first = bucket_start(utc_timestamp(window - granularity), granularity) if window else None
+    if first is not None and first >= last:
+        return None
+    return first, last
+
+
+def _rollup_payload(asset_code, reading, granularity, bounds):
+    """ Rollup buckets of a datapoint within bounds, as returned by _get_rollup_bounds """
+    first, last = bounds
+    _where = PayloadBuilder().WHERE(["asset_code", "=", asset_code]).AND_WHERE(["datapoint", "=", reading]) \
+        .AND_WHERE(["granularity", "=", granularity]).AND_WHERE(["bucket", "<", last]).chain_payload()
+    if first is not None:
+        _where = PayloadBuilder(_where).AND_WHERE(["bucket", ">=", first]).chain_payload()
+    return _where
+
+
+async def _rollup_averages(asset_code, reading, _where, ts_restraint, granularity, bounds, window, limit, offset):
+    """ Series of averages per minute or hour answered from the readings rollup
+
+    The complete buckets come from the rollup, the partial buckets at the edges from the readings
+    """
+    first, last = bounds
+    fetch = offset + limit
+    payloads = []
+    # Readings from the bucket of the watermark onward
+    # PayloadBuilder extends the payload it is given, each query gets its own copy
+    _tail = PayloadBuilder(copy.deepcopy(_where)).AND_WHERE(["user_ts", ">=", last]).chain_payload()
+    if not window:
+        _tail = PayloadBuilder(_tail).LIMIT(fetch).chain_payload()
+    payloads.append(_tail)
+    if first is not None:
+        # Readings of the partial bucket the window starts in
+        payloads.append(PayloadBuilder(copy.deepcopy(_where)).AND_WHERE(["user_ts", "newer", window])
+                        .AND_WHERE(["user_ts", "<", first]).chain_payload())
+
+    _readings = connect.get_readings_async()
+    raw = []
+    for _payload in payloads:
+        payload = PayloadBuilder(_payload).GROUP_BY("user_ts").ALIAS("group", ("user_ts", "timestamp")) \
+            .FORMAT("group", ("user_ts", ts_restraint)).ORDER_BY(["user_ts", "desc"]).payload()
+        results = await _readings.query(payload)
+        if 'rows' not in results:
+            raise web.HTTPBadRequest(reason=results['message'])
+        raw.append(results['rows'])
+
+    _rollup = PayloadBuilder(_rollup_payload(asset_code, reading, granularity, bounds)) \
+        .SELECT("bucket", "min_value", "max_value", "sum_value", "readings_count").ORDER_BY(["bucket", "desc"])
+    if not window:
+        _rollup = _rollup.LIMIT(fetch)
+    _storage = connect.get_storage_async()
+    results = await _storage.query_tbl_with_payload(ROLLUP_TABLE, _rollup.payload())
+    if 'rows' not in results:
+        raise web.HTTPBadRequest(reason=results['message'])
+    rollup = [{"min": r['min_value'], "max": r['max_value'],
+               "average": float(r['sum_value']) / int(r['readings_count']),
+               "timestamp": bucket_label(r['bucket'], granularity)} for r in results['rows']]
+
+    # Series are newest first: the tail readings, the rollup buckets then the bucket the window starts in
+    response = raw[0] + rollup + (raw[1] if len(raw) > 1 else [])
+    if not window:
+        response = response[offset:fetch]
+    return web.json_response(response)
+
+
+async def _rollup_summary(asset_code, reading, bounds, window):
+    """ Summary of a datapoint over a time window answered from the per minute readings rollup
+
+    The complete minutes come from the rollup, the partial minutes at the edges from the readings
+    """
+    first, last = bounds
+    _readings = connect.get_readings_async()
+    parts = []
+    for condition in ([["user_ts", "newer", window], ["user_ts", "<", first]], [["user_ts", ">=", last]]):
+        _aggregate = PayloadBuilder().AGGREGATE(["min", ["reading", reading]], ["max", ["reading", reading]],
+                                                ["sum", ["reading", reading]], ["count", ["reading", reading]]) \
+            .ALIAS('aggregate', ('reading', 'min', 'min'), ('reading', 'max', 'max'), ('reading', 'sum', 'sum'),
+                   ('reading', 'count', 'count')).chain_payload()
+        _where = PayloadBuilder(_aggregate).WHERE(["asset_code", "=", asset_code]).chain_payload()
+        for cond in condition:
+            _where = PayloadBuilder(_where).AND_WHERE(cond).chain_payload()
+        results = await _readings.query(PayloadBuilder(_where).payload())
+        if 'rows' not in results:
+            raise web.HTTPBadRequest(reason=results['message'])
+        parts.append(results['rows'][0])
+
+    _rollup = PayloadBuilder(_rollup_payload(asset_code, reading, MINUTE, bounds)) \
+        .AGGREGATE(["min", "min_value"], ["max", "max_value"], ["sum", "sum_value"], ["sum", "readings_count"]) \
+        .ALIAS('aggregate', ('min_value', 'min', 'min'), ('max_value', 'max', 'max'), ('sum_value', 'sum', 'sum'),
+               ('readings_count', 'sum', 'count')).payload()
+    _storage = connect.get_storage_async()
+    results = await _storage.query_tbl_with_payload(ROLLUP_TABLE, _rollup)
+    if 'rows' not in results:
+        raise web.HTTPBadRequest(reason=results['message'])
+    parts.append(results['rows'][0])
+
+    parts = [p for p in parts if p['count'] and int(p['count'])]
+    if not parts:
+        return {"min": None, "max": None, "average": None}
+    count = sum(int(p['count']) for p in parts)
+    return {"min": min(float(p['min']) for p in parts), "max": max(float(p['max']) for p in parts),
+            "average": sum(float(p['sum']) for p in parts) / count}
+
+
+def get_time_window(request):
+    """ Time window in seconds given by the seconds, minutes or hours query params, 0 if none is given """
     val = 0
     try:
         if 'seconds' in request.query and request.query['seconds'] != '':
@@ -427,7 +677,11 @@ def where_clause(request, where):
             raise ValueError
     except ValueError:
         raise web.HTTPBadRequest(reason="Time must be a positive integer")
+    return val
+
 
+def where_clause(request, where):
+    val = get_time_window(request)
     # if no time units then NO AND_WHERE condition applied
     if val == 0:
         return where
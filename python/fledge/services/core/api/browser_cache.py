@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Response cache of the asset browser
+
+The responses are valid as long as the readings do not change. The readings watermark, i.e. the ids of the oldest
+and of the newest reading, is checked at most once every WATERMARK_INTERVAL seconds: new readings move the newest id,
+a purge moves the oldest id, and either empties the cache. The responses for a time window also expire after a short
+TTL, as the window slides with the clock even when no reading is added.
+"""
+
+import time
+from collections import OrderedDict
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+class ResponseCache(object):
+    """ Bounded LRU cache of the asset browser responses """
+
+    MAX_ENTRIES = 256
+    MAX_WINDOW_TTL = 5
+    WATERMARK_INTERVAL = 1
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        """
+        max_entries: number of responses held, the least recently used are evicted first
+        hit: number of responses served from the cache
+        miss: number of responses that had to be computed
+        watermark: readings watermark the cached responses were computed at, None if unknown
+        """
+        self._entries = OrderedDict()
+        self.max_entries = max_entries
+        self.hit = 0
+        self.miss = 0
+        self.watermark = None
+        self._watermark_time = None
+
+    @staticmethod
+    def key(request):
+        """ Route and query parameters of a request, in a fixed order and without the empty parameters
+
+        The path is the raw one: decoded, the path of an asset code with a slash is the path of a datapoint.
+        """
+        return request.rel_url.raw_path, tuple(sorted((k, v) for k, v in request.query.items() if v != ''))
+
+    @classmethod
+    def window_ttl(cls, window):
+        """ TTL of a response for a time window in seconds, None for no window """
+        return min(cls.MAX_WINDOW_TTL, window / 10) if window else None
+
+    def watermark_expired(self):
+        return self._watermark_time is None or time.monotonic() - self._watermark_time >= self.WATERMARK_INTERVAL
+
+    def set_watermark(self, watermark):
+        """ Record the current readings watermark, emptying the cache if it has moved """
+        if watermark is None or watermark != self.watermark:
+            self._entries.clear()
+        self.watermark = watermark
+        self._watermark_time = time.monotonic()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            body, expiry = entry
+            if expiry is None or time.monotonic() < expiry:
+                self._entries.move_to_end(key)
+                self.hit += 1
+                return body
+            del self._entries[key]
+        self.miss += 1
+        return None
+
+    def put(self, key, body, ttl=None):
+        self._entries[key] = (body, None if ttl is None else time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @property
+    def size(self):
+        return len(self._entries)
@@ -26,10 +26,12 @@ _help = """
 """
 
 
-async def _get_sent_stats(storage_client):
+async def _get_sent_stats(storage_client, sch_names):
     stats = []
+    if not sch_names:
+        return stats
     try:
-        payload = PayloadBuilder().SELECT("key", "value").payload()
+        payload = PayloadBuilder().SELECT("key", "value").WHERE(["key", "in", sch_names]).payload()
         result = await storage_client.query_tbl_with_payload('statistics', payload)
         if int(result['count']):
             stats = result['rows']
@@ -39,13 +41,21 @@ async def _get_sent_stats(storage_client):
         return stats
 
 
-async def _get_tasks_status():
+async def _get_tasks_status(sch_names):
+    """ Latest task of each of the given schedules, as kept by the scheduler; only when the scheduler does not keep
+    them are the tasks of these schedules read from storage """
+    tasks = {}
+    if not sch_names:
+        return tasks
+    latest_tasks = server.Server.scheduler.get_latest_tasks(sch_names)
+    if latest_tasks is not None:
+        return latest_tasks
     payload = PayloadBuilder().SELECT("id", "schedule_name", "process_name", "state", "start_time", "end_time", "reason", "pid", "exit_code")\
         .ALIAS("return", ("start_time", 'start_time'), ("end_time", 'end_time'))\
         .FORMAT("return", ("start_time", "YYYY-MM-DD HH24:MI:SS.MS"), ("end_time", "YYYY-MM-DD HH24:MI:SS.MS"))\
+        .WHERE(["schedule_name", "in", sch_names])\
         .ORDER_BY(["schedule_name", "asc"], ["start_time", "desc"])
 
-    tasks = {}
     try:
         _storage = connect.get_storage_async()
         results = await _storage.query_tbl_with_payload('tasks', payload.payload())
@@ -72,26 +82,26 @@ async def _get_north_schedules(storage_client):
 
     schedules = []
     schedule_list = await server.Server.scheduler.get_schedules()
-    latest_tasks = await _get_tasks_status()
-    for sch in schedule_list:
-        if sch.name in north_schedules:
-            task = latest_tasks.get(sch.name, None)
-            schedules.append({
-                'id': str(sch.schedule_id),
-                'name': sch.name,
-                'processName': sch.process_name,
-                'repeat': sch.repeat.total_seconds() if sch.repeat else 0,
-                'day': sch.day,
-                'enabled': sch.enabled,
-                'exclusive': sch.exclusive,
-                'taskStatus': None if task is None else {
-                    'state': [t.name.capitalize() for t in list(Task.State)][int(task['state']) - 1],
-                    'startTime': str(task['start_time']),
-                    'endTime': str(task['end_time']),
-                    'exitCode': task['exit_code'],
-                    'reason': task['reason'],
-                }
-            })
+    north_schedule_list = [sch for sch in schedule_list if sch.name in north_schedules]
+    latest_tasks = await _get_tasks_status([sch.name for sch in north_schedule_list])
+    for sch in north_schedule_list:
+        task = latest_tasks.get(sch.name, None)
+        schedules.append({
+            'id': str(sch.schedule_id),
+            'name': sch.name,
+            'processName': sch.process_name,
+            'repeat': sch.repeat.total_seconds() if sch.repeat else 0,
+            'day': sch.day,
+            'enabled': sch.enabled,
+            'exclusive': sch.exclusive,
+            'taskStatus': None if task is None else {
+                'state': [t.name.capitalize() for t in list(Task.State)][int(task['state']) - 1],
+                'startTime': str(task['start_time']),
+                'endTime': str(task['end_time']),
+                'exitCode': task['exit_code'],
+                'reason': task['reason'],
+            }
+        })
 
     return schedules
 
@@ -101,18 +111,21 @@ def _get_installed_plugins():
     return PluginDiscovery.get_plugins_installed("north", False)
 
 
-async def _get_tracked_plugin(storage_client, sch_name):
-    plugin = ''
-    payload = PayloadBuilder().SELECT("plugin").WHERE(['service', '=', sch_name]).\
-        AND_WHERE(['event', '=', 'Egress']).LIMIT(1).payload()
+async def _get_tracked_plugins(storage_client, sch_names):
+    """ Fetch the tracked Egress plugin of all the given schedules in a single query """
+    plugins = {}
+    if not sch_names:
+        return plugins
+    payload = PayloadBuilder().SELECT("service", "plugin").WHERE(['service', 'in', sch_names]).\
+        AND_WHERE(['event', '=', 'Egress']).payload()
     try:
         result = await storage_client.query_tbl_with_payload('asset_tracker', payload)
-        if len(result['rows']):
-            plugin = result['rows'][0]['plugin']
+        for r in result['rows']:
+            plugins.setdefault(r['service'], r['plugin'])
     except:
         raise
     else:
-        return plugin
+        return plugins
 
 
 async def get_north_schedules(request):
@@ -132,21 +145,16 @@ async def get_north_schedules(request):
 
         storage_client = connect.get_storage_async()
         north_schedules = await _get_north_schedules(storage_client)
-        stats = await _get_sent_stats(storage_client)
+        sch_names = [sch["name"] for sch in north_schedules]
+        stats = {s["key"]: s["value"] for s in await _get_sent_stats(storage_client, sch_names)}
+        tracked_plugins = await _get_tracked_plugins(storage_client, sch_names)
 
-        installed_plugins = _get_installed_plugins()
+        installed_plugins = {p["name"]: p["version"] for p in reversed(_get_installed_plugins())}
 
         for sch in north_schedules:
-            stat = next((s for s in stats if s["key"] == sch["name"]), None)
-            sch["sent"] = stat["value"] if stat else -1
-
-            tracked_plugin = await _get_tracked_plugin(storage_client, sch["name"])
-            plugin_version = ''
-            for p in installed_plugins:
-                if p["name"] == tracked_plugin:
-                    plugin_version = p["version"]
-                    break
-            sch["plugin"] = {"name": tracked_plugin, "version": plugin_version}
+            sch["sent"] = stats.get(sch["name"], -1)
+            tracked_plugin = tracked_plugins.get(sch["name"], '')
+            sch["plugin"] = {"name": tracked_plugin, "version": installed_plugins.get(tracked_plugin, '')}
 
     except (KeyError, ValueError) as e:  # Handles KeyError of _get_sent_stats
         return web.HTTPInternalServerError(reason=e)
@@ -17,6 +17,7 @@ from functools import lru_cache
 
 from fledge.common import logger
 from fledge.common.common import _FLEDGE_ROOT, _FLEDGE_DATA, _FLEDGE_PLUGIN_PATH
+from fledge.common.plugin_catalogue import PluginCatalogue
 from fledge.services.core.api import utils
 from fledge.services.core.api.plugins.exceptions import *
 
@@ -51,15 +52,20 @@ def load_python_plugin(plugin_module_path: str, plugin: str, _type: str) -> Dict
 
 
 def load_and_fetch_python_plugin_info(plugin_module_path: str, plugin: str, _type: str) -> Dict:
-    _plugin = load_python_plugin(plugin_module_path, plugin, _type)
-    # Fetch configuration from the configuration defined in the plugin
-    try:
-        plugin_info = _plugin.plugin_info()
-        if plugin_info['type'] != _type:
-            msg = "Plugin of {} type is not supported".format(plugin_info['type'])
-            raise TypeError(msg)
-    except Exception as ex:
-        _logger.warning("Python plugin not found......{}, try C-plugin".format(ex))
+    def fetch():
+        _plugin = load_python_plugin(plugin_module_path, plugin, _type)
+        # Fetch configuration from the configuration defined in the plugin
+        try:
+            return _plugin.plugin_info()
+        except Exception as ex:
+            _logger.warning("Python plugin not found......{}, try C-plugin".format(ex))
+            raise FileNotFoundError
+
+    # The plugin is only imported when it is new or changed since its plugin_info was catalogued
+    plugin_info = PluginCatalogue.get("{}/{}.py".format(plugin_module_path, plugin), fetch)
+    if plugin_info['type'] != _type:
+        _logger.warning("Python plugin not found......Plugin of {} type is not supported, try C-plugin".format(
+            plugin_info['type']))
         raise FileNotFoundError
     return plugin_info
 
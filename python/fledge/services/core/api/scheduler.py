@@ -783,38 +783,27 @@ async def get_tasks(request):
 async def get_tasks_latest(request):
     """
     Returns:
-            the list of the most recent task execution for each name from tasks table
+            the list of the most recent task execution for each name, as kept by the scheduler or else from
+            tasks table
 
     :Example:
               curl -X GET  http://localhost:8081/fledge/task/latest
 
               curl -X GET  http://localhost:8081/fledge/task/latest?name=xxx
     """
-    payload = PayloadBuilder().SELECT("id", "schedule_name", "process_name", "state", "start_time", "end_time", "reason", "pid", "exit_code")\
-        .ALIAS("return", ("start_time", 'start_time'), ("end_time", 'end_time'))\
-        .FORMAT("return", ("start_time", "YYYY-MM-DD HH24:MI:SS.MS"), ("end_time", "YYYY-MM-DD HH24:MI:SS.MS"))\
-        .ORDER_BY(["schedule_name", "asc"], ["start_time", "desc"])
-
-    if 'name' in request.query and request.query['name'] != '':
-        name = request.query['name']
-        payload.WHERE(["schedule_name", "=", name])
+    name = request.query['name'] if 'name' in request.query and request.query['name'] != '' else None
 
     try:
-        _storage = connect.get_storage_async()
-        results = await _storage.query_tbl_with_payload('tasks', payload.payload())
+        latest_tasks = server.Server.scheduler.get_latest_tasks(None if name is None else [name])
+        if latest_tasks is not None:
+            tasks = [latest_tasks[schedule_name] for schedule_name in sorted(latest_tasks)
+                     if schedule_name.strip()]
+        else:
+            tasks = await _read_tasks_latest(name)
 
-        if len(results['rows']) == 0:
+        if len(tasks) == 0:
             raise web.HTTPNotFound(reason="No Tasks found")
 
-        tasks = []
-        previous_schedule = None
-        for row in results['rows']:
-            if not row['schedule_name'].strip():
-                continue
-            if previous_schedule != row['schedule_name']:
-                tasks.append(row)
-                previous_schedule = row['schedule_name']
-
         new_tasks = []
         for task in tasks:
             new_tasks.append(
@@ -834,6 +823,30 @@ async def get_tasks_latest(request):
         raise web.HTTPNotFound(reason=str(ex))
 
 
+async def _read_tasks_latest(name):
+    """ Latest task of each schedule, read from the tasks table when the scheduler does not keep them """
+    payload = PayloadBuilder().SELECT("id", "schedule_name", "process_name", "state", "start_time", "end_time", "reason", "pid", "exit_code")\
+        .ALIAS("return", ("start_time", 'start_time'), ("end_time", 'end_time'))\
+        .FORMAT("return", ("start_time", "YYYY-MM-DD HH24:MI:SS.MS"), ("end_time", "YYYY-MM-DD HH24:MI:SS.MS"))\
+        .ORDER_BY(["schedule_name", "asc"], ["start_time", "desc"])
+
+    if name is not None:
+        payload.WHERE(["schedule_name", "=", name])
+
+    _storage = connect.get_storage_async()
+    results = await _storage.query_tbl_with_payload('tasks', payload.payload())
+
+    tasks = []
+    previous_schedule = None
+    for row in results['rows']:
+        if not row['schedule_name'].strip():
+            continue
+        if previous_schedule != row['schedule_name']:
+            tasks.append(row)
+            previous_schedule = row['schedule_name']
+    return tasks
+
+
 async def cancel_task(request):
     """Cancel a running task from tasks table
 
@@ -29,10 +29,13 @@ _help = """
 """
 
 
-async def _get_schedule_status(storage_client, svc_name):
-    payload = PayloadBuilder().SELECT("enabled").WHERE(['schedule_name', '=', svc_name]).payload()
+async def _get_schedules_status(storage_client, svc_names):
+    """ Fetch the enabled flag of all the given schedules in a single query """
+    if not svc_names:
+        return {}
+    payload = PayloadBuilder().SELECT("schedule_name", "enabled").WHERE(['schedule_name', 'in', svc_names]).payload()
     result = await storage_client.query_tbl_with_payload('schedules', payload)
-    return True if result['rows'][0]['enabled'] == 't' else False
+    return {r['schedule_name']: True if r['enabled'] == 't' else False for r in result['rows']}
 
 
 @lru_cache(maxsize=1024)
@@ -48,20 +51,16 @@ async def _services_with_assets(storage_client, south_services):
         except DoesNotExist:
             services_from_registry = []
 
-        def is_svc_in_service_registry(name):
-            return next((svc for svc in services_from_registry if svc._name == name), None)
+        registry_names = {svc._name for svc in services_from_registry}
+        svc_names = [svc._name for svc in services_from_registry]
+        svc_names.extend([s_name for s_name in south_services if s_name not in registry_names])
 
-        installed_plugins = _get_installed_plugins()
+        installed_plugins = {p["name"]: p["version"] for p in reversed(_get_installed_plugins())}
+        tracked = await _get_tracked_plugins_assets_and_readings(storage_client, svc_names)
+        schedules_status = await _get_schedules_status(storage_client, svc_names)
 
         for s_record in services_from_registry:
-            plugin, assets = await _get_tracked_plugin_assets_and_readings(storage_client, s_record._name)
-
-            plugin_version = ''
-            for p in installed_plugins:
-                if p["name"] == plugin:
-                    plugin_version = p["version"]
-                    break
-
+            plugin, assets = tracked.get(s_record._name, ('', []))
             sr_list.append(
                 {
                     'name': s_record._name,
@@ -71,21 +70,12 @@ async def _services_with_assets(storage_client, south_services):
                     'protocol': s_record._protocol,
                     'status': ServiceRecord.Status(int(s_record._status)).name.lower(),
                     'assets': assets,
-                    'plugin': {'name': plugin, 'version': plugin_version},
-                    'schedule_enabled': await _get_schedule_status(storage_client, s_record._name)
+                    'plugin': {'name': plugin, 'version': installed_plugins.get(plugin, '')},
+                    'schedule_enabled': schedules_status.get(s_record._name, False)
                 })
         for s_name in south_services:
-            south_svc = is_svc_in_service_registry(s_name)
-
-            if not south_svc:
-                plugin, assets = await _get_tracked_plugin_assets_and_readings(storage_client, s_name)
-
-                plugin_version = ''
-                for p in installed_plugins:
-                    if p["name"] == plugin:
-                        plugin_version = p["version"]
-                        break
-
+            if s_name not in registry_names:
+                plugin, assets = tracked.get(s_name, ('', []))
                 sr_list.append(
                     {
                         'name': s_name,
@@ -95,8 +85,8 @@ async def _services_with_assets(storage_client, south_services):
                         'protocol': '',
                         'status': '',
                         'assets': assets,
-                        'plugin': {'name': plugin, 'version': plugin_version},
-                        'schedule_enabled': await _get_schedule_status(storage_client, s_name)
+                        'plugin': {'name': plugin, 'version': installed_plugins.get(plugin, '')},
+                        'schedule_enabled': schedules_status.get(s_name, False)
                     })
     except:
         raise
@@ -104,28 +94,39 @@ async def _services_with_assets(storage_client, south_services):
         return sr_list
 
 
-async def _get_tracked_plugin_assets_and_readings(storage_client, svc_name):
-    asset_json = []
-    payload = PayloadBuilder().SELECT(["asset", "plugin"]).WHERE(['service', '=', svc_name]).\
+async def _get_tracked_plugins_assets_and_readings(storage_client, svc_names):
+    """ Fetch the tracked plugin and the assets with their readings count for all the given services
+
+    Issues one asset_tracker query and one statistics query irrespective of the number of services and assets.
+
+    Returns:
+        dict of service name to (plugin name, list of {"count", "asset"})
+    """
+    tracked = {}
+    if not svc_names:
+        return tracked
+    payload = PayloadBuilder().SELECT("asset", "plugin", "service").WHERE(['service', 'in', svc_names]).\
         AND_WHERE(['event', '=', 'Ingest']).payload()
     try:
         result = await storage_client.query_tbl_with_payload('asset_tracker', payload)
         asset_records = result['rows']
 
-        plugin = ''
-        if len(result['rows']):
-            plugin = result['rows'][0]['plugin']
+        stats = {}
+        stat_keys = sorted({r["asset"].upper() for r in asset_records})
+        if stat_keys:
+            payload = PayloadBuilder().SELECT("key", "value").WHERE(["key", "in", stat_keys]).payload()
+            results = await storage_client.query_tbl_with_payload("statistics", payload)
+            stats = {s['key']: s['value'] for s in results['rows']}
 
         for r in asset_records:
-            payload = PayloadBuilder().SELECT("value").WHERE(["key", "=", r["asset"].upper()]).payload()
-            results = await storage_client.query_tbl_with_payload("statistics", payload)
-            if int(results['count']):
-                asset_result = results['rows'][0]
-                asset_json.append({"count": asset_result['value'], "asset": r["asset"]})
+            plugin, asset_json = tracked.setdefault(r["service"], (r["plugin"], []))
+            stat_key = r["asset"].upper()
+            if stat_key in stats:
+                asset_json.append({"count": stats[stat_key], "asset": r["asset"]})
     except:
         raise
     else:
-        return plugin, asset_json
+        return tracked
 
 
 async def get_south_services(request):
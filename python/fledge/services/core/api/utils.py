@@ -11,25 +11,32 @@ import json
 
 from fledge.common import logger
 from fledge.common.common import _FLEDGE_ROOT, _FLEDGE_PLUGIN_PATH
+from fledge.common.plugin_catalogue import PluginCatalogue
 
 _logger = logger.setup(__name__)
 _lib_path = _FLEDGE_ROOT + "/" + "plugins"
+_c_utils = {}
 
 
 def get_plugin_info(name, dir):
-    try:
-        arg1 = _find_c_util('get_plugin_info')
-        arg2 = _find_c_lib(name, dir)
-        cmd_with_args = [arg1, arg2, "plugin_info"]
-        p = subprocess.Popen(cmd_with_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        out, err = p.communicate()
-        res = out.decode("utf-8")
-        jdoc = json.loads(res)
-    except (OSError, subprocess.CalledProcessError, Exception) as ex:
-        _logger.exception("%s C plugin get info failed due to %s", name, ex)
-        return {}
-    else:
-        return jdoc
+    arg1 = _find_c_util('get_plugin_info')
+    arg2 = _find_c_lib(name, dir)
+
+    def fetch():
+        try:
+            cmd_with_args = [arg1, arg2, "plugin_info"]
+            p = subprocess.Popen(cmd_with_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            out, err = p.communicate()
+            res = out.decode("utf-8")
+            jdoc = json.loads(res)
+        except (OSError, subprocess.CalledProcessError, Exception) as ex:
+            _logger.exception("%s C plugin get info failed due to %s", name, ex)
+            return {}
+        else:
+            return jdoc
+
+    # The utility is only forked for the plugins that are new or changed since their plugin_info was catalogued
+    return PluginCatalogue.get(arg2, fetch)
 
 
 def _find_c_lib(name, dir):
@@ -45,11 +52,15 @@ def _find_c_lib(name, dir):
 
 
 def _find_c_util(name):
+    # The utilities do not move, FLEDGE_ROOT is only walked for the first lookup
+    if name in _c_utils and os.path.isfile(_c_utils[name]):
+        return _c_utils[name]
     for path, subdirs, files in os.walk(_FLEDGE_ROOT):
         for fname in files:
             # C-utility file
             if fname == name:
-                return os.path.join(path, fname)
+                _c_utils[name] = os.path.join(path, fname)
+                return _c_utils[name]
     return None
 
 
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Provides a tar.gz archive that is written without blocking the event loop, for the support bundles and the
+plugin snapshots.
+
+The members are added by a thread of the archive, one at a time, while the event loop goes on serving the
+requests; JSON data is serialised straight into the archive, with no temporary file. The archive is compressed by
+a pool of threads, in blocks that are compressed independently, as pigz does: the blocks are gzip members of the
+.tar.gz file, that gzip, tar and tarfile read as a single stream.
+"""
+
+import asyncio
+import gzip
+import io
+import json
+import os
+import tarfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+_BLOCK_SIZE = 1024 * 1024
+"""Size of the blocks compressed by the threads"""
+
+
+class ParallelGzipWriter(io.RawIOBase):
+    """ Writable file object that gzips what is written to it with a pool of threads """
+
+    def __init__(self, fileobj, threads=None, compresslevel=6):
+        super().__init__()
+        self._fileobj = fileobj
+        self._threads = threads if threads else (os.cpu_count() or 1)
+        self._compresslevel = compresslevel
+        self._executor = ThreadPoolExecutor(max_workers=self._threads)
+        self._buffer = bytearray()
+        self._pending = deque()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= _BLOCK_SIZE:
+            block = bytes(self._buffer[:_BLOCK_SIZE])
+            del self._buffer[:_BLOCK_SIZE]
+            self._pending.append(self._executor.submit(gzip.compress, block, self._compresslevel))
+            # zlib releases the GIL, the blocks are compressed in parallel; the compressed blocks are written in order
+            while len(self._pending) > 2 * self._threads or (self._pending and self._pending[0].done()):
+                self._fileobj.write(self._pending.popleft().result())
+        return len(data)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._buffer or not self._pending:
+                self._pending.append(self._executor.submit(gzip.compress, bytes(self._buffer), self._compresslevel))
+                self._buffer = bytearray()
+            while self._pending:
+                self._fileobj.write(self._pending.popleft().result())
+        finally:
+            self._executor.shutdown()
+            super().close()
+
+
+class Archive(object):
+    """ tar.gz archive, all of whose methods are coroutines that run in a thread of the archive """
+
+    def __init__(self, file_name, threads=None):
+        self._file = open(file_name, 'wb')
+        self._gzip = ParallelGzipWriter(self._file, threads)
+        self._tar = tarfile.open(fileobj=self._gzip, mode='w|')
+        # tarfile is not thread safe: the members are added one after the other, by a single thread
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def _run(self, func, *args):
+        return await asyncio.get_event_loop().run_in_executor(self._executor, func, *args)
+
+    def _add_bytes(self, arcname, data):
+        tar_info = tarfile.TarInfo(arcname)
+        tar_info.size = len(data)
+        tar_info.mtime = time.time()
+        tar_info.mode = 0o644
+        self._tar.addfile(tar_info, io.BytesIO(data))
+
+    def _add_json(self, arcname, data):
+        self._add_bytes(arcname, json.dumps(data, indent=4).encode())
+
+    async def add_bytes(self, arcname, data):
+        await self._run(self._add_bytes, arcname, data)
+
+    async def add_json(self, arcname, data):
+        """ Adds the JSON of data to the archive, as the file arcname """
+        await self._run(self._add_json, arcname, data)
+
+    async def add(self, name, arcname, recursive=True, filter=None):
+        """ Adds the file or the directory name to the archive, as tarfile.add does """
+        await self._run(lambda: self._tar.add(name, arcname=arcname, recursive=recursive, filter=filter))
+
+    def _close(self):
+        try:
+            self._tar.close()
+            self._gzip.close()
+        finally:
+            self._file.close()
+
+    async def close(self):
+        try:
+            await self._run(self._close)
+        finally:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Callback of the LOGGING configuration category, that overrides the level of the loggers of the core at runtime """
+
+import json
+
+from fledge.common import logger
+from fledge.common.configuration_manager import ConfigurationManager
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+_logger = logger.setup(__name__)
+
+CATEGORY = 'LOGGING'
+
+DEFAULT_CONFIG = {
+    'levels': {
+        'description': 'Level of the named loggers of the core, over their own level, '
+                       'e.g. {"fledge.common.web.middleware": "WARNING"}',
+        'type': 'JSON',
+        'default': '{}',
+        'displayName': 'Log Levels',
+        'order': '1'
+    }
+}
+
+
+def apply(category):
+    """ Sets the level overrides of the levels item of the category, the levels are not changed if it is invalid """
+    try:
+        levels = category['levels']['value']
+        logger.set_level_overrides(json.loads(levels) if isinstance(levels, str) else levels)
+    except (KeyError, TypeError, ValueError) as ex:
+        _logger.error("Invalid log levels in the %s category, the log levels are not changed. %s", CATEGORY, str(ex))
+
+
+async def run(category_name):
+    """ Callback run by the configuration manager when the category changes
+
+    Args:
+        category_name (str): name of the category that was changed
+    """
+    category = await ConfigurationManager().get_category_all_items(category_name)
+    apply(category)
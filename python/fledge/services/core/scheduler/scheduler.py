@@ -19,7 +19,6 @@ import signal
 from typing import List
 
 from fledge.common import logger
-from fledge.common import utils as common_utils
 from fledge.common.audit_logger import AuditLogger
 from fledge.common.storage_client.exceptions import *
 from fledge.common.storage_client.payload_builder import PayloadBuilder
@@ -165,6 +164,9 @@ class Scheduler(object):
         """Dictionary of schedules.id to _ScheduleExecution"""
         self._task_processes = dict()
         """Dictionary of tasks.id to _TaskProcess"""
+        self._latest_tasks = None
+        """Dictionary of schedules.id to the tasks row of the latest task of the schedule, None until it is read
+        from storage"""
         self._check_processes_pending = False
         """bool: True when request to run check_processes"""
         self._scheduler_loop_task = None  # type: asyncio.Task
@@ -261,11 +263,12 @@ class Scheduler(object):
                 state = Task.State.CANCELED
             else:
                 state = Task.State.COMPLETE
+            end_time = datetime.datetime.now(datetime.timezone.utc).astimezone()
             # Update the task's status
             update_payload = PayloadBuilder() \
                 .SET(exit_code=exit_code,
                      state=int(state),
-                     end_time=str(common_utils.local_timestamp())) \
+                     end_time=str(end_time)) \
                 .WHERE(['id', '=', str(task_process.task_id)]) \
                 .payload()
             try:
@@ -275,6 +278,11 @@ class Scheduler(object):
                 self._logger.exception('Update failed: %s', update_payload)
                 # Must keep going!
 
+            # A later task of a non exclusive schedule may have started meanwhile, it stays the latest one
+            latest_task = self._latest_tasks.get(schedule.id) if self._latest_tasks is not None else None
+            if latest_task is not None and latest_task['id'] == str(task_process.task_id):
+                latest_task.update(state=int(state), exit_code=exit_code, end_time=self._task_time(end_time))
+
         # Due to maximum running tasks reached, it is necessary to
         # look for schedules that are ready to run even if there
         # are only manual tasks waiting
@@ -330,6 +338,7 @@ class Scheduler(object):
 
         # Startup tasks are not tracked in the tasks table and do not have any future associated with them.
         if schedule.type != Schedule.Type.STARTUP:
+            start_time = datetime.datetime.now(datetime.timezone.utc).astimezone()
             # The task row needs to exist before the completion handler runs
             insert_payload = PayloadBuilder() \
                 .INSERT(id=str(task_id),
@@ -339,7 +348,7 @@ class Scheduler(object):
                         schedule_id=str(schedule.id),
                         process_name=schedule.process_name,
                         state=int(Task.State.RUNNING),
-                        start_time=str(common_utils.local_timestamp())) \
+                        start_time=str(start_time)) \
                 .payload()
             try:
                 self._logger.debug('Database command: %s', insert_payload)
@@ -347,6 +356,11 @@ class Scheduler(object):
             except Exception:
                 self._logger.exception('Insert failed: %s', insert_payload)
                 # The process has started. Regardless of this error it must be waited on.
+            if self._latest_tasks is not None:
+                self._latest_tasks[schedule.id] = {
+                    "id": str(task_id), "schedule_name": schedule.name, "process_name": schedule.process_name,
+                    "state": int(Task.State.RUNNING), "start_time": self._task_time(start_time), "end_time": None,
+                    "reason": None, "pid": process.pid, "exit_code": None}
             self._task_processes[task_id].future = asyncio.ensure_future(self._wait_for_task_completion(task_process))
 
     async def purge_tasks(self):
@@ -357,9 +371,10 @@ class Scheduler(object):
         if not self._ready:
             raise NotReadyError()
 
+        purge_time = datetime.datetime.now() - self._max_completed_task_age
         delete_payload = PayloadBuilder() \
             .WHERE(["state", "!=", int(Task.State.RUNNING)]) \
-            .AND_WHERE(["start_time", "<", str(datetime.datetime.now() - self._max_completed_task_age)]) \
+            .AND_WHERE(["start_time", "<", str(purge_time)]) \
             .LIMIT(self._DELETE_TASKS_LIMIT) \
             .payload()
         try:
@@ -375,6 +390,12 @@ class Scheduler(object):
         finally:
             self._purge_tasks_task = None
 
+        if self._latest_tasks is not None:
+            purge_time = self._task_time(purge_time)
+            for schedule_id, row in list(self._latest_tasks.items()):
+                if row['state'] != int(Task.State.RUNNING) and row['start_time'] < purge_time:
+                    del self._latest_tasks[schedule_id]
+
         self._last_task_purge_time = time.time()
 
     def _check_purge_tasks(self):
@@ -696,6 +717,39 @@ class Scheduler(object):
         await self._get_process_scripts()
         await self._get_schedules()
 
+    @staticmethod
+    def _task_time(timestamp):
+        """A time written to the tasks table, as the task queries return the start_time and the end_time of the
+        tasks"""
+        return timestamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+    async def _read_latest_tasks(self):
+        """Reads the latest task of each schedule from the storage server
+
+        Each schedule is one lookup in the (schedule_name, start_time) index of the tasks table; from then on
+        the latest tasks are kept up to date by :meth:`_start_task` and :meth:`_wait_for_task_completion`.
+        """
+        async def read_latest_task(schedule):
+            payload = PayloadBuilder().SELECT("id", "schedule_name", "process_name", "state", "start_time",
+                                              "end_time", "reason", "pid", "exit_code") \
+                .ALIAS("return", ("start_time", 'start_time'), ("end_time", 'end_time')) \
+                .FORMAT("return", ("start_time", "YYYY-MM-DD HH24:MI:SS.MS"),
+                        ("end_time", "YYYY-MM-DD HH24:MI:SS.MS")) \
+                .WHERE(["schedule_name", "=", schedule.name]) \
+                .ORDER_BY(["start_time", "desc"]) \
+                .LIMIT(1) \
+                .payload()
+            res = await self._storage_async.query_tbl_with_payload("tasks", payload)
+            return schedule.id, res['rows'][0] if res['rows'] else None
+
+        try:
+            rows = await asyncio.gather(*[read_latest_task(schedule) for schedule in self._schedules.values()])
+        except Exception:
+            # The task APIs read the tasks table instead
+            self._logger.exception('Query failed: %s', 'tasks')
+            return
+        self._latest_tasks = {schedule_id: row for schedule_id, row in rows if row is not None}
+
     async def _mark_tasks_interrupted(self):
         """The state for any task with a NULL end_time is set to interrupted"""
         # TODO FOGL-722 NULL can not be passed like this
@@ -790,6 +844,7 @@ class Scheduler(object):
         await self._read_config()
         await self._mark_tasks_interrupted()
         await self._read_storage()
+        await self._read_latest_tasks()
 
         self._ready = True
         if not self._is_safe_mode:
@@ -1407,6 +1462,9 @@ class Scheduler(object):
             raise ScheduleNotFoundError(schedule_id)
 
         del self._schedules[schedule_id]
+        # Its tasks are deleted with it
+        if self._latest_tasks is not None:
+            self._latest_tasks.pop(schedule_id, None)
 
         # TODO: Inspect race conditions with _set_first
         delete_payload = PayloadBuilder() \
@@ -1448,6 +1506,27 @@ class Scheduler(object):
 
         return tasks
 
+    def get_latest_tasks(self, names=None):
+        """Retrieves the latest task of each schedule
+
+        Args:
+            names: The names of the schedules, all of the schedules when None
+
+        Returns:
+            A dictionary of schedule name to the tasks row of its latest task, with the columns and the time
+            format of the task queries; a schedule renamed since its latest task started is under its new name
+
+            None when the latest tasks are not available, e.g. before the scheduler has started
+        """
+        if self._latest_tasks is None:
+            return None
+        latest_tasks = {}
+        for schedule_id, row in self._latest_tasks.items():
+            schedule = self._schedules.get(schedule_id)
+            if schedule is not None and (names is None or schedule.name in names):
+                latest_tasks[schedule.name] = dict(row)
+        return latest_tasks
+
     async def get_task(self, task_id: uuid.UUID) -> Task:
         """Retrieves a task given its id"""
         query_payload = PayloadBuilder().SELECT("id", "process_name", "schedule_name", "state", "start_time", "end_time", "reason", "exit_code")\
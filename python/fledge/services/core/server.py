@@ -30,6 +30,7 @@ from fledge.common.storage_client.storage_client import StorageClientAsync
 from fledge.common.storage_client.storage_client import ReadingsStorageClientAsync
 
 from fledge.services.core import routes as admin_routes
+from fledge.services.core import logging_config
 from fledge.services.core.api import configuration as conf_api
 from fledge.services.common.microservice_management import routes as management_routes
 
@@ -477,6 +478,21 @@ class Server:
             _logger.exception(str(ex))
             raise
 
+    @classmethod
+    async def logging_config(cls):
+        """
+        Apply the log level overrides of the LOGGING category, and follow their changes
+        """
+        try:
+            await cls._configuration_manager.create_category(logging_config.CATEGORY, logging_config.DEFAULT_CONFIG,
+                                                             'Log level overrides', True, display_name='Logging')
+            config = await cls._configuration_manager.get_category_all_items(logging_config.CATEGORY)
+            logging_config.apply(config)
+            cls._configuration_manager.register_interest(logging_config.CATEGORY, logging_config.__name__)
+        except Exception as ex:
+            _logger.exception(str(ex))
+            raise
+
     @classmethod
     async def installation_config(cls):
         """
@@ -738,7 +754,7 @@ class Server:
         # Create the parent category for all advanced configuration categories
         try:
             await cls._configuration_manager.create_category("Advanced", {}, 'Advanced', True)
-            await cls._configuration_manager.create_child_category("Advanced", ["SMNTR", "SCHEDULER"])
+            await cls._configuration_manager.create_child_category("Advanced", ["SMNTR", "SCHEDULER", "LOGGING"])
         except KeyError:
             _logger.error('Failed to create Advanced parent configuration category for service')
             raise
@@ -783,6 +799,9 @@ class Server:
             cls._configuration_manager = ConfigurationManager(cls._storage_client_async)
             cls._interest_registry = InterestRegistry(cls._configuration_manager)
 
+            # log level overrides
+            loop.run_until_complete(cls.logging_config())
+
             # start scheduler
             # see scheduler.py start def FIXME
             # scheduler on start will wait for storage service registration
@@ -17,6 +17,7 @@ from collections import OrderedDict
 
 from fledge.common import logger
 from fledge.common.common import _FLEDGE_ROOT
+from fledge.services.core.archive import Archive
 
 
 __author__ = "Amarendra K Sinha"
@@ -58,21 +59,21 @@ class SnapshotPluginBuilder:
             snapshot_id = str(int(time.time()))
             snapshot_filename = "{}-{}.tar.gz".format(SNAPSHOT_PREFIX, snapshot_id)
             tar_file_name = "{}/{}".format(self._out_file_path, snapshot_filename)
-            pyz = tarfile.open(tar_file_name, "w:gz")
+            pyz = Archive(tar_file_name)
             try:
                 # files are being added to tarfile with relative path and NOT with absolute path.
-                pyz.add("{}/python/fledge/plugins".format(_FLEDGE_ROOT),
-                        arcname="python/fledge/plugins", recursive=True)
+                await pyz.add("{}/python/fledge/plugins".format(_FLEDGE_ROOT),
+                              arcname="python/fledge/plugins", recursive=True)
                 # C plugins location is different with "make install" and "make"
                 if path.exists("{}/bin".format(_FLEDGE_ROOT)) and path.exists("{}/bin/fledge".format(_FLEDGE_ROOT)):
-                    pyz.add("{}/plugins".format(_FLEDGE_ROOT), arcname="plugins", recursive=True, filter=reset)
+                    await pyz.add("{}/plugins".format(_FLEDGE_ROOT), arcname="plugins", recursive=True, filter=reset)
                 else:
-                    pyz.add("{}/C/plugins".format(_FLEDGE_ROOT), arcname="C/plugins", recursive=True)
-                    pyz.add("{}/plugins".format(_FLEDGE_ROOT), arcname="plugins", recursive=True)
-                    pyz.add("{}/cmake_build/C/plugins".format(_FLEDGE_ROOT), arcname="cmake_build/C/plugins",
-                            recursive=True)
+                    await pyz.add("{}/C/plugins".format(_FLEDGE_ROOT), arcname="C/plugins", recursive=True)
+                    await pyz.add("{}/plugins".format(_FLEDGE_ROOT), arcname="plugins", recursive=True)
+                    await pyz.add("{}/cmake_build/C/plugins".format(_FLEDGE_ROOT), arcname="cmake_build/C/plugins",
+                                  recursive=True)
             finally:
-                pyz.close()
+                await pyz.close()
         except Exception as ex:
             if os.path.isfile(tar_file_name):
                 os.remove(tar_file_name)
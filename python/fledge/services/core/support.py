@@ -7,6 +7,7 @@
 """ Provides utility functions to build a Fledge Support bundle.
 """
 
+import asyncio
 import datetime
 import platform
 import os
@@ -14,10 +15,8 @@ from os.path import basename
 import glob
 import sys
 import shutil
-import json
-import tarfile
 import fnmatch
-import subprocess
+from fledge.services.core.archive import Archive
 from fledge.services.core.connect import *
 from fledge.common import logger
 from fledge.services.core.api.service import get_service_records
@@ -63,21 +62,28 @@ class SupportBuilder:
             today = datetime.datetime.now()
             file_spec = today.strftime('%y%m%d-%H-%M-%S')
             tar_file_name = self._out_file_path+"/"+"support-{}.tar.gz".format(file_spec)
-            pyz = tarfile.open(tar_file_name, "w:gz")
+            pyz = Archive(tar_file_name)
             try:
-                self.add_syslog_fledge(pyz, file_spec)
-                self.add_syslog_storage(pyz, file_spec)
-                await self.add_table_configuration(pyz, file_spec)
-                await self.add_table_audit_log(pyz, file_spec)
-                await self.add_table_schedules(pyz, file_spec)
-                await self.add_table_scheduled_processes(pyz, file_spec)
-                self.add_service_registry(pyz, file_spec)
-                self.add_machine_resources(pyz, file_spec)
-                self.add_psinfo(pyz, file_spec)
-                self.add_script_dir_content(pyz)
-                self.add_package_log_dir_content(pyz)
+                # The steps collect concurrently, the archive adds what they collected one member at a time; all of
+                # them are done before the archive is closed, even when one of them fails
+                results = await asyncio.gather(
+                    self.add_syslog_fledge(pyz, file_spec),
+                    self.add_syslog_storage(pyz, file_spec),
+                    self.add_table_configuration(pyz, file_spec),
+                    self.add_table_audit_log(pyz, file_spec),
+                    self.add_table_schedules(pyz, file_spec),
+                    self.add_table_scheduled_processes(pyz, file_spec),
+                    self.add_service_registry(pyz, file_spec),
+                    self.add_machine_resources(pyz, file_spec),
+                    self.add_psinfo(pyz, file_spec),
+                    self.add_script_dir_content(pyz),
+                    self.add_package_log_dir_content(pyz),
+                    return_exceptions=True)
+                errors = [result for result in results if isinstance(result, BaseException)]
+                if errors:
+                    raise errors[0]
             finally:
-                pyz.close()
+                await pyz.close()
         except Exception as ex:
             _LOGGER.error("Error in creating Support .tar.gz file: %s ", str(ex))
             raise RuntimeError(str(ex))
@@ -100,66 +106,72 @@ class SupportBuilder:
             if not fnmatch.fnmatch(f, 'support*.tar.gz'):
                 os.remove(os.path.join(support_dir, f))
 
-    def write_to_tar(self, pyz, temp_file, data):
-        with open(temp_file, 'w') as outfile:
-            json.dump(data, outfile, indent=4)
-        pyz.add(temp_file, arcname=basename(temp_file))
+    async def write_to_tar(self, pyz, temp_file, data):
+        await pyz.add_json(basename(temp_file), data)
 
-    def add_syslog_fledge(self, pyz, file_spec):
-        # The fledge entries from the syslog file
-        temp_file = self._interim_file_path + "/" + "syslog-{}".format(file_spec)
+    @staticmethod
+    async def _shell(cmd, stdout=asyncio.subprocess.PIPE):
+        """ Output lines of a shell command, run without blocking the event loop """
+        process = await asyncio.create_subprocess_shell(cmd, stdout=stdout)
+        out, _ = await process.communicate()
+        return out.splitlines(keepends=True) if out else []
+
+    async def _add_syslog(self, pyz, temp_file, pattern):
+        # The matching lines can be many: grep writes them to a file, that is then added to the archive
         try:
-            subprocess.call("grep '{}' {} > {}".format("Fledge", _SYSLOG_FILE, temp_file), shell=True)
+            with open(temp_file, 'w') as f:
+                await self._shell("grep '{}' {}".format(pattern, _SYSLOG_FILE), stdout=f)
         except OSError as ex:
             raise RuntimeError("Error in creating {}. Error-{}".format(temp_file, str(ex)))
-        pyz.add(temp_file, arcname=basename(temp_file))
+        await pyz.add(temp_file, arcname=basename(temp_file))
 
-    def add_syslog_storage(self, pyz, file_spec):
+    async def add_syslog_fledge(self, pyz, file_spec):
+        # The fledge entries from the syslog file
+        temp_file = self._interim_file_path + "/" + "syslog-{}".format(file_spec)
+        await self._add_syslog(pyz, temp_file, "Fledge")
+
+    async def add_syslog_storage(self, pyz, file_spec):
         # The contents of the syslog file that relate to the database layer (postgres)
         temp_file = self._interim_file_path + "/" + "syslogStorage-{}".format(file_spec)
-        try:
-            subprocess.call("grep '{}' {} > {}".format("Fledge Storage", _SYSLOG_FILE, temp_file), shell=True)
-        except OSError as ex:
-            raise RuntimeError("Error in creating {}. Error-{}".format(temp_file, str(ex)))
-        pyz.add(temp_file, arcname=basename(temp_file))
+        await self._add_syslog(pyz, temp_file, "Fledge Storage")
 
     async def add_table_configuration(self, pyz, file_spec):
         # The contents of the configuration table from the storage layer
         temp_file = self._interim_file_path + "/" + "configuration-{}".format(file_spec)
         data = await self._storage.query_tbl("configuration")
-        self.write_to_tar(pyz, temp_file, data)
+        await self.write_to_tar(pyz, temp_file, data)
 
     async def add_table_audit_log(self, pyz, file_spec):
         # The contents of the audit log from the storage layer
         temp_file = self._interim_file_path + "/" + "audit-{}".format(file_spec)
         data = await self._storage.query_tbl("log")
-        self.write_to_tar(pyz, temp_file, data)
+        await self.write_to_tar(pyz, temp_file, data)
 
     async def add_table_schedules(self, pyz, file_spec):
         # The contents of the schedules table from the storage layer
         temp_file = self._interim_file_path + "/" + "schedules-{}".format(file_spec)
         data = await self._storage.query_tbl("schedules")
-        self.write_to_tar(pyz, temp_file, data)
+        await self.write_to_tar(pyz, temp_file, data)
 
     async def add_table_scheduled_processes(self, pyz, file_spec):
         temp_file = self._interim_file_path + "/" + "scheduled_processes-{}".format(file_spec)
         data = await self._storage.query_tbl("scheduled_processes")
-        self.write_to_tar(pyz, temp_file, data)
+        await self.write_to_tar(pyz, temp_file, data)
 
-    def add_service_registry(self, pyz, file_spec):
+    async def add_service_registry(self, pyz, file_spec):
         # The contents of the service registry
         temp_file = self._interim_file_path + "/" + "service_registry-{}".format(file_spec)
         data = {
             "about": "Service Registry",
             "serviceRegistry": get_service_records()
         }
-        self.write_to_tar(pyz, temp_file, data)
+        await self.write_to_tar(pyz, temp_file, data)
 
-    def add_machine_resources(self, pyz, file_spec):
+    async def add_machine_resources(self, pyz, file_spec):
         # Details of machine resources, memory size, amount of available memory, storage size and amount of free storage
         temp_file = self._interim_file_path + "/" + "machine-{}".format(file_spec)
         total, used, free = shutil.disk_usage("/")
-        memory = subprocess.Popen('free -h', shell=True, stdout=subprocess.PIPE).stdout.readlines()[1].split()[1:]
+        memory = (await self._shell('free -h'))[1].split()[1:]
         data = {
             "about": "Machine resources",
             "platform": sys.platform,
@@ -170,17 +182,15 @@ class SupportBuilder:
             "usedDiskSpace_MB": int(used / (1024 * 1024)),
             "freeDiskSpace_MB": int(free / (1024 * 1024)),
         }
-        self.write_to_tar(pyz, temp_file, data)
+        await self.write_to_tar(pyz, temp_file, data)
 
-    def add_psinfo(self, pyz, file_spec):
+    async def add_psinfo(self, pyz, file_spec):
         # A PS listing of al the python applications running on the machine
         temp_file = self._interim_file_path + "/" + "psinfo-{}".format(file_spec)
-        a = subprocess.Popen('ps -aufx | egrep "(%MEM|fledge\.)" | grep -v grep', shell=True,
-                             stdout=subprocess.PIPE).stdout.readlines()
+        a = await self._shell('ps -aufx | egrep "(%MEM|fledge\.)" | grep -v grep')
         c = [b.decode() for b in a]  # Since "a" contains return value in bytes, convert it to string
 
-        c_tasks = subprocess.Popen('ps -aufx | grep "./tasks" | grep -v grep', shell=True,
-                                   stdout=subprocess.PIPE).stdout.readlines()
+        c_tasks = await self._shell('ps -aufx | grep "./tasks" | grep -v grep')
         c_tasks_decode = [t.decode() for t in c_tasks]
         if c_tasks_decode:
             c.extend(c_tasks_decode)
@@ -188,19 +198,19 @@ class SupportBuilder:
         data = {
             "runningProcesses": list(map(str.strip, c))
         }
-        self.write_to_tar(pyz, temp_file, data)
+        await self.write_to_tar(pyz, temp_file, data)
 
-    def add_script_dir_content(self, pyz):
+    async def add_script_dir_content(self, pyz):
         script_file_path = _PATH + '/scripts'
         if os.path.exists(script_file_path):
             # recursively 'true' by default and __pycache__ dir excluded
-            pyz.add(script_file_path, arcname='scripts', filter=self.exclude_pycache)
+            await pyz.add(script_file_path, arcname='scripts', filter=self.exclude_pycache)
 
-    def add_package_log_dir_content(self, pyz):
+    async def add_package_log_dir_content(self, pyz):
         script_package_logs_path = _PATH + '/logs'
         if os.path.exists(script_package_logs_path):
             # recursively 'true' by default and __pycache__ dir excluded
-            pyz.add(script_package_logs_path, arcname='package_logs', filter=self.exclude_pycache)
+            await pyz.add(script_package_logs_path, arcname='package_logs', filter=self.exclude_pycache)
 
     def exclude_pycache(self, tar_info):
         return None if '__pycache__' in tar_info.name else tar_info
@@ -108,6 +108,12 @@ class Ingest(object):
     _payload_events = []
     """The list of unique reading payload for asset tracker"""
 
+    _pending_payload_events = []
+    """Asset tracker payloads of new assets, yet to be sent to the core"""
+
+    _asset_tracker_task = None  # type: asyncio.Task
+    """asyncio task for :meth:`_create_asset_tracker_events`"""
+
     stats = None
     """Statistics class instance"""
 
@@ -168,17 +174,17 @@ class Ingest(object):
             "value": default_config,
             "keep_original_items": True
         })
-        cls._parent_service._core_microservice_management_client.create_configuration_category(config_payload)
+        management_client = cls._parent_service._core_microservice_management_client_async
+        await management_client.create_configuration_category(config_payload)
 
         # Check and warn if pipeline exists in South service
         if 'filter' in cls._parent_service.config:
             _LOGGER.warning('South Service [%s] does not support the use of a filter pipeline.', cls._parent_service._name)
 
-        # Read configuration
-        config = cls._parent_service._core_microservice_management_client.get_configuration_category(category_name=category)
-
-        # Create child category
-        cls._parent_service._core_microservice_management_client.create_child_category(parent=cls._parent_service._name, children=[category])
+        # Read configuration and create child category, concurrently
+        config, _ = await asyncio.gather(
+            management_client.get_configuration_category(category_name=category),
+            management_client.create_child_category(parent=cls._parent_service._name, children=[category]))
 
         cls._readings_buffer_size = int(config['readings_buffer_size']['value'])
         cls._max_concurrent_readings_inserts = int(config['max_concurrent_readings_inserts']
@@ -194,6 +200,7 @@ class Ingest(object):
             config['max_readings_insert_batch_reconnect_wait_seconds']['value'])
 
         cls._payload_events = []
+        cls._pending_payload_events = []
 
     @classmethod
     async def start(cls, parent):
@@ -241,7 +248,7 @@ class Ingest(object):
         cls._insert_readings_task = asyncio.ensure_future(cls._insert_readings())
         cls._readings_lists_not_full = asyncio.Event()
 
-        cls._payload_events = cls._parent_service._core_microservice_management_client.get_asset_tracker_events()['track']
+        cls._payload_events = (await cls._parent_service._core_microservice_management_client_async.get_asset_tracker_events())['track']
 
         cls.stats = await statistics.create_statistics(cls.storage_async)
 
@@ -276,6 +283,10 @@ class Ingest(object):
         except Exception:
             _LOGGER.exception('An exception was raised by Ingest._insert_readings')
 
+        if cls._asset_tracker_task is not None:
+            await cls._asset_tracker_task
+            cls._asset_tracker_task = None
+
         cls._insert_readings_wait_tasks = None
         cls._insert_readings_tasks = None
         cls._readings_lists = None
@@ -358,7 +369,7 @@ class Ingest(object):
             while True:
                 try:
                     batch_size = len(readings_list)
-                    payload = json.dumps({"readings": readings_list[:batch_size]})
+                    payload = {"readings": readings_list[:batch_size]}
                     # insert_start_time = time.time()
                     # _LOGGER.debug('Begin insert: Queue index: %s Batch size: %s', list_index, batch_size)
                     try:
@@ -459,6 +470,20 @@ class Ingest(object):
         _LOGGER.warning('The ingest service is unavailable %s', list_index)
         return False
 
+    @classmethod
+    async def _create_asset_tracker_events(cls):
+        """Sends the asset tracker events of the new assets to the core, the events of a burst of new assets at once"""
+        management_client = cls._parent_service._core_microservice_management_client_async
+        while cls._pending_payload_events:
+            payloads = cls._pending_payload_events
+            cls._pending_payload_events = []
+            results = await management_client.create_asset_tracker_events(payloads)
+            for payload, result in zip(payloads, results):
+                if isinstance(result, Exception):
+                    # Sent again with the next reading of the asset
+                    _LOGGER.error('Asset tracker event %s could not be created, %s', payload, str(result))
+                    cls._payload_events.remove(payload)
+
     @classmethod
     async def add_readings(cls, asset: str, timestamp: Union[str, datetime.datetime],
                            key: Union[str, uuid.UUID] = None, readings: dict = None) -> None:
@@ -552,8 +577,11 @@ class Ingest(object):
         payload = {"asset": asset, "event": "Ingest", "service": cls._parent_service._name,
                    "plugin": cls._parent_service._plugin_info['config']['plugin']['default']}
         if payload not in cls._payload_events:
-            cls._parent_service._core_microservice_management_client.create_asset_tracker_event(payload)
+            # Sent to the core in the background, the readings are not held back
             cls._payload_events.append(payload)
+            cls._pending_payload_events.append(payload)
+            if cls._asset_tracker_task is None or cls._asset_tracker_task.done():
+                cls._asset_tracker_task = asyncio.ensure_future(cls._create_asset_tracker_events())
 
         # _LOGGER.debug('Add readings list index: %s size: %s', cls._current_readings_list_index, list_size)
 
@@ -80,8 +80,8 @@ class Server(FledgeMicroservice):
                 "value": self.config,
                 "keep_original_items": True
             })
-            self._core_microservice_management_client.create_configuration_category(config_payload)
-            self.config = self._core_microservice_management_client.get_configuration_category(category_name=category)
+            await self._core_microservice_management_client_async.create_configuration_category(config_payload)
+            self.config = await self._core_microservice_management_client_async.get_configuration_category(category_name=category)
 
             try:
                 plugin_module_name = self.config['plugin']['value']
@@ -95,6 +95,7 @@ class Server(FledgeMicroservice):
                                                                 dir=plugin_module_name,
                                                                 file=plugin_module_name)
                 self._plugin = __import__(import_file_name, fromlist=[''])
+                self._startup_profile.mark('plugin load')
             except Exception as ex:
                 message = self._MESSAGES_LIST['e000003'].format(plugin_module_name, self._name, str(ex))
                 _LOGGER.error(message)
@@ -103,7 +104,7 @@ class Server(FledgeMicroservice):
             try:
                 parent_payload = json.dumps({"key": "South", "description": "South microservices", "value": {},
                                              "children": [self._name], "keep_original_items": True})
-                self._core_microservice_management_client.create_configuration_category(parent_payload)
+                await self._core_microservice_management_client_async.create_configuration_category(parent_payload)
             except KeyError:
                 message = self._MESSAGES_LIST['e000004'].format(self._name)
                 _LOGGER.error(message)
@@ -128,11 +129,11 @@ class Server(FledgeMicroservice):
                 "value": default_config,
                 "keep_original_items": True
             })
-            self._core_microservice_management_client.create_configuration_category(config_payload)
-            self.config = self._core_microservice_management_client.get_configuration_category(category_name=category)
+            await self._core_microservice_management_client_async.create_configuration_category(config_payload)
+            self.config = await self._core_microservice_management_client_async.get_configuration_category(category_name=category)
 
             # Register interest with category and microservice_id
-            result = self._core_microservice_management_client.register_interest(category, self._microservice_id)
+            result = await self._core_microservice_management_client_async.register_interest(category, self._microservice_id)
 
             # KeyError when result (id and message) keys are not found
             registration_id = result['id']
@@ -144,8 +145,12 @@ class Server(FledgeMicroservice):
                 _LOGGER.error(message)
                 raise exceptions.InvalidPluginTypeError()
 
+            self._startup_profile.mark('configuration')
             self._plugin_handle = self._plugin.plugin_init(self.config)
+            self._startup_profile.mark('plugin init')
             await Ingest.start(self)
+            self._startup_profile.mark('ingest')
+            self._startup_profile.report(self._name)
 
             # Executes the requested plugin type
             if self._plugin_info['mode'] == 'async':
@@ -247,6 +252,8 @@ class Server(FledgeMicroservice):
             _LOGGER.exception('Unable to stop the Ingest server. %s', str(ex))
             raise ex
 
+        await self._core_microservice_management_client_async.close()
+
         try:
             if self._task_main is not None:
                 self._task_main.cancel()
@@ -299,7 +306,7 @@ class Server(FledgeMicroservice):
 
         try:
             # retrieve new configuration
-            new_config = self._core_microservice_management_client.get_configuration_category(category_name=self._name)
+            new_config = await self._core_microservice_management_client_async.get_configuration_category(category_name=self._name)
 
             # Check and warn if pipeline exists in South service
             if 'filter' in new_config:
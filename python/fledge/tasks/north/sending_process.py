@@ -26,18 +26,17 @@ import datetime
 import signal
 import json
 import uuid
+import os
+import copy
 
 import fledge.plugins.north.common.common as plugin_common
 from fledge.common.parser import Parser
-from fledge.common.storage_client.storage_client import StorageClientAsync, ReadingsStorageClientAsync
 from fledge.common.storage_client import payload_builder
 from fledge.common import statistics
-from fledge.common.jqfilter import JQFilter
 from fledge.common.audit_logger import AuditLogger
 from fledge.common.process import FledgeProcess
 from fledge.common import logger
 from fledge.common.common import _FLEDGE_ROOT
-from fledge.services.core.api.plugins import common
 
 __author__ = "Stefano Simonelli, Massimiliano Pinto, Mark Riddoch, Amarendra K Sinha"
 __copyright__ = "Copyright (c) 2018 OSIsoft, LLC"
@@ -95,6 +94,10 @@ _MESSAGES_LIST = {
 """ Messages used for Information, Warning and Error notice """
 
 _LOGGER = logger.setup(__name__)
+
+_LAST_OBJECT_UPDATE = payload_builder.PayloadTemplate(payload_builder.PayloadBuilder()
+                                                      .SET(last_object=payload_builder.Slot("last_object"), ts='now()')
+                                                      .WHERE(['id', '=', payload_builder.Slot("stream_id")]))
 _event_loop = ""
 _log_performance = False
 """ Enable/Disable performance logging, enabled using a command line parameter"""
@@ -204,6 +207,14 @@ class SendingProcess(FledgeProcess):
     """ Maximum number of increments for the sleep handling, the amount of time is doubled at every sleep """
     TASK_SEND_UPDATE_POSITION_MAX = 10
     """ the position is updated after the specified numbers of interactions of the sending task """
+    MEMORY_BUFFER_MEMORY_RATIO = 20
+    """ When no memory_buffer_bytes is configured, the in memory buffer holds up to 1/20 of the physical memory """
+    MEMORY_BUFFER_BYTES_DEFAULT = 64 * 1024 * 1024
+    """ Bytes the in memory buffer holds when the physical memory is not known """
+    MEMORY_BUFFER_SAMPLE = 16
+    """ Number of rows of a block encoded to estimate the size of the block """
+    BUFFER_STATISTICS_INTERVAL = 10
+    """ Seconds between the updates of the statistics of the in memory buffer """
     _PLUGIN_TYPE = "north"
     """Define the type of the plugin managed by the Sending Process"""
 
@@ -246,6 +257,30 @@ class SendingProcess(FledgeProcess):
             "default": "10",
             "order": "12",
             "displayName": "Memory Buffer Size"
+        },
+        "memory_buffer_bytes": {
+            "description": "Maximum size in bytes of the data buffered in memory, 0 for 1/20 of the physical memory",
+            "type": "integer",
+            "default": "0",
+            "order": "13",
+            "displayName": "Memory Buffer Bytes"
+        },
+        "destinations": {
+            "description": "Names of other north instances to which the data is also sent, as a JSON list; the data "
+                           "is read once for all of them. The schedules of these north instances must be disabled",
+            "type": "JSON",
+            "default": "[]",
+            "order": "14",
+            "displayName": "Fan Out Destinations"
+        },
+        "stream_readings": {
+            "description": "Receive the readings block as a stream of rows, if the storage service supports it, to "
+                           "parse each row as it arrives rather than the block as a whole. The block is slower to "
+                           "load",
+            "type": "boolean",
+            "default": "false",
+            "order": "15",
+            "displayName": "Stream Readings"
         }
     }
 
@@ -254,16 +289,36 @@ class SendingProcess(FledgeProcess):
 
         if not SendingProcess._logger:
             SendingProcess._logger = _LOGGER
+        self._init_destination()
+        self._readings = None
+        """" Interfaces to the Fledge Storage Layer """
+        self._audit = None
+        """" Used to log operations in the Storage Layer """
+        self._log_performance = None
+        """ Enable/Disable performance logging, enabled using a command line parameter"""
+        self._debug_level = None
+        """ Defines what and the level of details for logging """
+        self._task_fetch_data_run = True
+        self._task_fetch_data_task_id = None
+        """" The fetch task runs until _task_fetch_data_run is False """
+        self._fan_out = []
+        """" Sending processes of the other north instances the data fetched is also sent to """
+        self._event_loop = asyncio.get_event_loop() if loop is None else loop
+
+    def _init_destination(self):
+        """ Sets the state of the sending of the data to a destination: its configuration, plugin, stream and in
+        memory buffer """
         self._config = {
             'enable': self._CONFIG_DEFAULT['enable']['default'],
             'duration': int(self._CONFIG_DEFAULT['duration']['default']),
             'blockSize': int(self._CONFIG_DEFAULT['blockSize']['default']),
             'sleepInterval': float(self._CONFIG_DEFAULT['sleepInterval']['default']),
             'memory_buffer_size': int(self._CONFIG_DEFAULT['memory_buffer_size']['default']),
+            'stream_readings': False,
         }
         self._config_from_manager = ""
         self._module_template = "fledge.plugins.north." + "empty." + "empty"
-        self._plugin = importlib.import_module(self._module_template)
+        self.__plugin = None
         self._plugin_info = {
             'name': "",
             'version': "",
@@ -273,18 +328,8 @@ class SendingProcess(FledgeProcess):
         }
         self._plugin_handle = None
         self.statistics_key = None
-        self._readings = None
-        """" Interfaces to the Fledge Storage Layer """
-        self._audit = None
-        """" Used to log operations in the Storage Layer """
-        self._log_performance = None
-        """ Enable/Disable performance logging, enabled using a command line parameter"""
-        self._debug_level = None
-        """ Defines what and the level of details for logging """
-        self._task_fetch_data_run = True
         self._task_send_data_run = True
         """" The specific task will run until the value is True """
-        self._task_fetch_data_task_id = None
         self._task_send_data_task_id = None
         """" Used to to managed the fetch/send operations """
         self._task_fetch_data_sem = None
@@ -295,7 +340,28 @@ class SendingProcess(FledgeProcess):
         self._memory_buffer_fetch_idx = 0
         self._memory_buffer_send_idx = 0
         """" Used to to managed the in memory buffer for the fetch/send operations """
-        self._event_loop = asyncio.get_event_loop() if loop is None else loop
+        self._memory_buffer_max_bytes = self._memory_buffer_default_bytes()
+        self._memory_buffer_bytes = {}
+        self._memory_buffer_bytes_total = 0
+        """" Approximate size in bytes of the blocks of the in memory buffer, by position, and of the whole buffer """
+        self._memory_buffer_wait = 0.0
+        """" Seconds the fetch operation waited for room in the in memory buffer """
+        self._buffer_statistics = {}
+        """" Values of the statistics of the in memory buffer, as last updated in the Storage layer """
+        self._jqfilter = None
+        """" JQFilter applied to the blocks of data, created with the first block to be filtered """
+
+    @property
+    def _plugin(self):
+        """ The north plugin, the empty plugin until the configured one is loaded; the empty plugin is only imported
+        if it is used """
+        if self.__plugin is None:
+            self.__plugin = importlib.import_module(self._module_template)
+        return self.__plugin
+
+    @_plugin.setter
+    def _plugin(self, plugin):
+        self.__plugin = plugin
 
     @staticmethod
     def _signal_handler(_signal_num, _stack_frame):
@@ -311,6 +377,56 @@ class SendingProcess(FledgeProcess):
             usage = resource.getrusage(resource.RUSAGE_SELF)
             process_memory = usage.ru_maxrss / 1000
 
+    @classmethod
+    def _memory_buffer_default_bytes(cls):
+        """ Bytes the in memory buffer holds when no memory_buffer_bytes is configured, so that the same default
+        suits small devices and large servers """
+        try:
+            return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // cls.MEMORY_BUFFER_MEMORY_RATIO
+        except (ValueError, OSError, AttributeError):
+            return cls.MEMORY_BUFFER_BYTES_DEFAULT
+
+    @classmethod
+    def _block_bytes(cls, block):
+        """ Approximate size in bytes of the JSON of a block, from the JSON of a sample of its rows """
+        if not block:
+            return 0
+        sample = block[::max(1, len(block) // cls.MEMORY_BUFFER_SAMPLE)]
+        return len(json.dumps(sample, default=str)) * len(block) // len(sample)
+
+    def _memory_buffer_full(self):
+        """ True when the blocks in memory reach the byte budget; a block is always loaded into an empty buffer,
+        however large it is """
+        return 0 < self._memory_buffer_max_bytes <= self._memory_buffer_bytes_total
+
+    async def _update_buffer_statistics(self):
+        """ Updates the statistics of the in memory buffer: the blocks and the bytes it holds, and the
+        milliseconds the fetch operation waited for room in it """
+        values = {
+            "{}-BUFFER-BLOCKS".format(self._name): len(self._memory_buffer_bytes),
+            "{}-BUFFER-BYTES".format(self._name): self._memory_buffer_bytes_total,
+            "{}-BUFFER-WAIT".format(self._name): int(self._memory_buffer_wait * 1000),
+        }
+        try:
+            _stats = await statistics.create_statistics(self._storage_async)
+            for key, description in zip(values, ("Blocks in the memory buffer of {}",
+                                                 "Bytes in the memory buffer of {}",
+                                                 "Milliseconds {} waited for room in its memory buffer")):
+                await _stats.register(key, description.format(self._name))
+            # The blocks and the bytes are levels, set to their current values, always at the first update: a
+            # sending process that did not end cleanly may have left other values. The wait is a counter
+            wait_key = "{}-BUFFER-WAIT".format(self._name)
+            levels = {key: value for key, value in values.items()
+                      if key != wait_key and value != self._buffer_statistics.get(key)}
+            if levels:
+                await _stats.set_bulk(levels)
+            increment = values[wait_key] - self._buffer_statistics.get(wait_key, 0)
+            if increment:
+                await _stats.update_bulk({wait_key: increment})
+            self._buffer_statistics = values
+        except Exception as ex:
+            SendingProcess._logger.warning("Unable to update the statistics of the memory buffer | {}".format(ex))
+
     async def _update_statistics(self, num_sent):
         """ Updates Fledge statistics"""
         try:
@@ -326,10 +442,7 @@ class SendingProcess(FledgeProcess):
     async def _last_object_id_update(self, new_last_object_id):
         """ Updates reached position"""
         try:
-            payload = payload_builder.PayloadBuilder() \
-                .SET(last_object=new_last_object_id, ts='now()') \
-                .WHERE(['id', '=', self._stream_id]) \
-                .payload()
+            payload = _LAST_OBJECT_UPDATE.fill(last_object=new_last_object_id, stream_id=self._stream_id)
             await self._storage_async.update_tbl("streams", payload)
         except Exception as _ex:
             SendingProcess._logger.error(_MESSAGES_LIST["e000020"].format(_ex))
@@ -386,6 +499,8 @@ class SendingProcess(FledgeProcess):
                             update_last_object_id = new_last_object_id
                             tot_num_sent = tot_num_sent + num_sent
                             self._memory_buffer[self._memory_buffer_send_idx] = None
+                            self._memory_buffer_bytes_total -= self._memory_buffer_bytes.pop(
+                                self._memory_buffer_send_idx, 0)
                             self._memory_buffer_send_idx += 1
                             self._task_send_data_sem.release()
                             self.performance_track("task _task_send_data")
@@ -484,47 +599,66 @@ class SendingProcess(FledgeProcess):
 
         converted_data = []
         for row in raw_data:
+            new_row = SendingProcess._transform_in_memory_data_reading(row)
+            if new_row is not None:
+                converted_data.append(new_row)
 
-            try:
+        return converted_data
 
-                asset_code = row['asset_code'].replace(" ", "")
+    @staticmethod
+    def _transform_in_memory_data_reading(row):
+        """ Applies the transformation/validation of _transform_in_memory_data_readings to a single row,
+        returns None for a row to be skipped """
 
-                # Skips row having undefined asset_code
-                if asset_code != "":
-                    # Converts values to the proper types, for example "180.2" to float 180.2
-                    payload = row['reading']
+        try:
 
-                    for key in list(payload.keys()):
-                        value = payload[key]
-                        payload[key] = plugin_common.convert_to_type(value)
-                    timestamp = apply_date_format(row['user_ts'])  # Adds timezone UTC
-                    new_row = {
-                        'id': row['id'],
-                        'asset_code': asset_code,
-                        'read_key': row['read_key'],
-                        'reading': payload,
-                        'user_ts': timestamp
-                    }
-                    converted_data.append(new_row)
-                else:
-                    SendingProcess._logger.warning(_MESSAGES_LIST["e000032"].format(row))
+            asset_code = row['asset_code'].replace(" ", "")
+
+            # Skips row having undefined asset_code
+            if asset_code != "":
+                # Converts values to the proper types, for example "180.2" to float 180.2
+                payload = row['reading']
+
+                for key in list(payload.keys()):
+                    value = payload[key]
+                    payload[key] = plugin_common.convert_to_type(value)
+                timestamp = apply_date_format(row['user_ts'])  # Adds timezone UTC
+                return {
+                    'id': row['id'],
+                    'asset_code': asset_code,
+                    'read_key': row['read_key'],
+                    'reading': payload,
+                    'user_ts': timestamp
+                }
+            else:
+                SendingProcess._logger.warning(_MESSAGES_LIST["e000032"].format(row))
 
-            except Exception as e:
-                SendingProcess._logger.warning(_MESSAGES_LIST["e000031"].format(str(e), row))
+        except Exception as e:
+            SendingProcess._logger.warning(_MESSAGES_LIST["e000031"].format(str(e), row))
 
-        return converted_data
+        return None
 
     async def _load_data_into_memory_readings(self, last_object_id):
-        """ Extracts from the DB Layer data related to the readings loading into a memory structure"""
-        raw_data = None
+        """ Extracts from the DB Layer data related to the readings loading into a memory structure
+
+        With stream_readings the rows are streamed, each one is transformed as soon as it is received: the JSON
+        document of the whole block is not held, the transformed block still is.
+        """
         converted_data = []
         try:
             # Loads data, +1 as > is needed
-            readings = await self._readings.fetch(last_object_id + 1, self._config['blockSize'])
-            raw_data = readings['rows']
-            converted_data = self._transform_in_memory_data_readings(raw_data)
+            if self._config.get('stream_readings'):
+                async with self._readings.fetch_stream(last_object_id + 1, self._config['blockSize']) as rows:
+                    async for row in rows:
+                        new_row = self._transform_in_memory_data_reading(row)
+                        if new_row is not None:
+                            converted_data.append(new_row)
+            else:
+                readings = await self._readings.fetch(last_object_id + 1, self._config['blockSize'])
+                converted_data = self._transform_in_memory_data_readings(readings['rows'])
         except aiohttp.client_exceptions.ClientPayloadError as _ex:
             SendingProcess._logger.warning(_MESSAGES_LIST["e000009"].format(str(_ex)))
+            converted_data = []
         except Exception as _ex:
             SendingProcess._logger.error(_MESSAGES_LIST["e000009"].format(str(_ex)))
             raise
@@ -562,57 +696,83 @@ class SendingProcess(FledgeProcess):
             raise
         return last_object_id
 
+    def _filter_block(self, block):
+        """ Applies the JQ filter of the configuration, if any, to a block of data """
+        if self._config_from_manager['applyFilter']["value"].upper() == "TRUE":
+            if self._jqfilter is None:
+                # pyjq is only imported by the sending processes that apply a filter
+                from fledge.common.jqfilter import JQFilter
+                self._jqfilter = JQFilter()
+            # The filter outputs the Python objects of the block, the first output is the block
+            # expected by the SP; the jq program is compiled once, for the first block
+            block = self._jqfilter.transform(block, self._config_from_manager['filterRule']["value"])[0]
+        return block
+
+    def _memory_buffer_room(self):
+        """ True when the in memory buffer has room for a new block, at the position of the fetch operation """
+        if self._memory_buffer_fetch_idx >= self._config['memory_buffer_size']:
+            self._memory_buffer_fetch_idx = 0
+        return self._memory_buffer[self._memory_buffer_fetch_idx] is None and not self._memory_buffer_full()
+
+    def _memory_buffer_load(self, block):
+        """ Loads a block of data into the in memory buffer, for the send operation """
+        self._memory_buffer[self._memory_buffer_fetch_idx] = block
+        block_bytes = self._block_bytes(block)
+        self._memory_buffer_bytes[self._memory_buffer_fetch_idx] = block_bytes
+        self._memory_buffer_bytes_total += block_bytes
+        self._memory_buffer_fetch_idx += 1
+        self._task_fetch_data_sem.release()
+
     async def _task_fetch_data(self):
-        """ Read data from the Storage Layer into a memory structure"""
+        """ Read data from the Storage Layer into a memory structure
+
+        The data is read once for all the destinations: this sending process and the ones of its fan out. The read
+        starts from the destination that is the farthest behind; each destination gets the rows after its own
+        position and the read waits for room in the in memory buffers of all of them.
+        """
         try:
-            last_object_id = await self._last_object_id_read()
-            self._memory_buffer_fetch_idx = 0
+            destinations = [self] + self._fan_out
+            positions = []
+            for destination in destinations:
+                destination._memory_buffer_fetch_idx = 0
+                positions.append(await destination._last_object_id_read())
+            last_object_id = min(positions)
             sleep_time = self.TASK_FETCH_SLEEP
             sleep_num_increments = 1
             while self._task_fetch_data_run:
                 slept = False
-                if self._memory_buffer_fetch_idx < self._config['memory_buffer_size']:
-                    # Checks if there is enough space to load a new block of data
-                    if self._memory_buffer[self._memory_buffer_fetch_idx] is None:
-                        try:
-                            data_to_send = await self._load_data_into_memory(last_object_id)
-                        except Exception as ex:
-                            _message = _MESSAGES_LIST["e000028"].format(ex)
-                            SendingProcess._logger.error(_message)
-                            await self._audit.failure(self._AUDIT_CODE, {"error - on _task_fetch_data": _message})
-                            data_to_send = False
-                            slept = True
-                            await asyncio.sleep(sleep_time)
-                        if data_to_send:
-                            # Handles the JQFilter functionality
-                            if self._config_from_manager['applyFilter']["value"].upper() == "TRUE":
-                                jqfilter = JQFilter()
-                                # Steps needed to proper format the data generated by the JQFilter
-                                # to the one expected by the SP
-                                data_to_send_2 = jqfilter.transform(data_to_send,
-                                                                    self._config_from_manager['filterRule']["value"])
-                                data_to_send_3 = json.dumps(data_to_send_2)
-                                del data_to_send_2
-                                data_to_send_4 = eval(data_to_send_3)
-                                del data_to_send_3
-                                data_to_send = data_to_send_4[0]
-                                del data_to_send_4
-                            # Loads the block of data into the in memory buffer
-                            self._memory_buffer[self._memory_buffer_fetch_idx] = data_to_send
-                            last_position = len(data_to_send) - 1
-                            last_object_id = data_to_send[last_position]['id']
-                            self._memory_buffer_fetch_idx += 1
-                            self._task_fetch_data_sem.release()
-                            self.performance_track("task _task_fetch_data")
-                        else:
-                            # There is no more data to load
-                            slept = True
-                            await asyncio.sleep(sleep_time)
+                # Checks if there is enough space to load a new block of data
+                waiting = next((destination for destination in destinations
+                                if not destination._memory_buffer_room()), None)
+                if waiting is None:
+                    try:
+                        data_to_send = await self._load_data_into_memory(last_object_id)
+                    except Exception as ex:
+                        _message = _MESSAGES_LIST["e000028"].format(ex)
+                        SendingProcess._logger.error(_message)
+                        await self._audit.failure(self._AUDIT_CODE, {"error - on _task_fetch_data": _message})
+                        data_to_send = False
+                        slept = True
+                        await asyncio.sleep(sleep_time)
+                    if data_to_send:
+                        for destination, position in zip(destinations, positions):
+                            block = data_to_send
+                            if block[0]['id'] <= position:
+                                # The destination has already sent the first rows of the block
+                                block = [row for row in block if row['id'] > position]
+                            if block:
+                                destination._memory_buffer_load(destination._filter_block(block))
+                        last_object_id = data_to_send[-1]['id']
+                        self.performance_track("task _task_fetch_data")
                     else:
-                        # There is no more space in the in memory buffer
-                        await self._task_send_data_sem.acquire()
+                        # There is no more data to load
+                        slept = True
+                        await asyncio.sleep(sleep_time)
                 else:
-                    self._memory_buffer_fetch_idx = 0
+                    # There is no more space in the in memory buffer
+                    wait_start = time.time()
+                    await waiting._task_send_data_sem.acquire()
+                    waiting._memory_buffer_wait += time.time() - wait_start
                 # Handles the sleep time, it is doubled every time up to a limit
                 if slept:
                     sleep_num_increments += 1
@@ -629,17 +789,24 @@ class SendingProcess(FledgeProcess):
     async def send_data(self):
         """ Handles the sending of the data to the destination using the configured plugin for a defined amount of time"""
 
-        # Prepares the in memory buffer for the fetch/send operations
-        self._memory_buffer = [None for _ in range(self._config['memory_buffer_size'])]
-        self._task_fetch_data_sem = asyncio.Semaphore(0)
-        self._task_send_data_sem = asyncio.Semaphore(0)
+        destinations = [self] + self._fan_out
+        # Prepares the in memory buffer for the fetch/send operations, one for each destination
+        for destination in destinations:
+            destination._memory_buffer = [None for _ in range(destination._config['memory_buffer_size'])]
+            destination._memory_buffer_bytes = {}
+            destination._memory_buffer_bytes_total = 0
+            destination._task_fetch_data_sem = asyncio.Semaphore(0)
+            destination._task_send_data_sem = asyncio.Semaphore(0)
         self._task_fetch_data_task_id = asyncio.ensure_future(self._task_fetch_data())
-        self._task_send_data_task_id = asyncio.ensure_future(self._task_send_data())
+        for destination in destinations:
+            destination._task_send_data_task_id = asyncio.ensure_future(destination._task_send_data())
         self._task_fetch_data_run = True
-        self._task_send_data_run = True
+        for destination in destinations:
+            destination._task_send_data_run = True
 
         try:
             start_time = time.time()
+            statistics_time = start_time
             elapsed_seconds = 0
             while elapsed_seconds < self._config['duration']:
                 # Terminates the execution in case a signal has been received
@@ -651,6 +818,10 @@ class SendingProcess(FledgeProcess):
                 await asyncio.sleep(self._config['sleepInterval'])
                 elapsed_seconds = time.time() - start_time
                 SendingProcess._logger.debug("{0} - elapsed_seconds {1}".format("send_data", elapsed_seconds))
+                if time.time() - statistics_time >= self.BUFFER_STATISTICS_INTERVAL:
+                    for destination in destinations:
+                        await destination._update_buffer_statistics()
+                    statistics_time = time.time()
         except Exception as ex:
             _message = _MESSAGES_LIST["e000021"].format(ex)
             SendingProcess._logger.error(_message)
@@ -659,15 +830,23 @@ class SendingProcess(FledgeProcess):
         try:
             # Graceful termination of the tasks
             self._task_fetch_data_run = False
-            self._task_send_data_run = False
-            # Unblocks the task if it is waiting
-            self._task_fetch_data_sem.release()
-            self._task_send_data_sem.release()
+            for destination in destinations:
+                destination._task_send_data_run = False
+                # Unblocks the task if it is waiting
+                destination._task_fetch_data_sem.release()
+                destination._task_send_data_sem.release()
             await self._task_fetch_data_task_id
-            await self._task_send_data_task_id
+            for destination in destinations:
+                await destination._task_send_data_task_id
         except Exception as ex:
             SendingProcess._logger.error(_MESSAGES_LIST["e000029"].format(ex))
 
+        # The data not sent is dropped with the process, it is fetched again by the next execution
+        for destination in destinations:
+            destination._memory_buffer_bytes = {}
+            destination._memory_buffer_bytes_total = 0
+            await destination._update_buffer_statistics()
+
     async def _get_stream_id(self, config_stream_id):
         async def get_rows_from_stream_id(stream_id):
             payload = payload_builder.PayloadBuilder() \
@@ -799,6 +978,7 @@ class SendingProcess(FledgeProcess):
         return north_ok
 
     def _plugin_load(self):
+        from fledge.services.core.api.plugins import common
         try:
             plugin_module_path = "{}/python/fledge/plugins/{}/{}".format(_FLEDGE_ROOT, self._PLUGIN_TYPE, self._config['plugin'])
             self._plugin = common.load_python_plugin(plugin_module_path, self._config['plugin'], self._PLUGIN_TYPE)
@@ -858,6 +1038,17 @@ class SendingProcess(FledgeProcess):
                 self._config['plugin'] = _config_from_manager['plugin']['value']
 
             self._config['memory_buffer_size'] = int(_config_from_manager['memory_buffer_size']['value'])
+            if 'memory_buffer_bytes' in _config_from_manager and int(_config_from_manager['memory_buffer_bytes']['value']) > 0:
+                self._memory_buffer_max_bytes = int(_config_from_manager['memory_buffer_bytes']['value'])
+            else:
+                self._memory_buffer_max_bytes = self._memory_buffer_default_bytes()
+            self._config['stream_readings'] = 'stream_readings' in _config_from_manager and \
+                _config_from_manager['stream_readings']['value'].upper() == 'TRUE'
+            if 'destinations' in _config_from_manager:
+                destinations = _config_from_manager['destinations']['value']
+                self._config['destinations'] = json.loads(destinations) if isinstance(destinations, str) else destinations
+            else:
+                self._config['destinations'] = []
             _config_from_manager['_CONFIG_CATEGORY_NAME'] = cat_name
 
             if 'stream_id' in _config_from_manager:
@@ -907,6 +1098,7 @@ class SendingProcess(FledgeProcess):
                                          cat_keep_original=True)
 
             exec_sending_process = self._config['enable']
+            self._startup_profile.mark('configuration')
 
             if self._config['enable']:
 
@@ -914,6 +1106,7 @@ class SendingProcess(FledgeProcess):
                 if 'plugin' in self._config:
                     self._plugin_load()
                     self._plugin_info = self._plugin.plugin_info()
+                    self._startup_profile.mark('plugin load')
                     if self._is_north_valid():
                         try:
                             # Fetch plugin configuration
@@ -929,6 +1122,7 @@ class SendingProcess(FledgeProcess):
                             data['log_performance'] = self._log_performance
                             data.update({'sending_process_instance': self})
                             self._plugin_handle = self._plugin.plugin_init(data)
+                            self._startup_profile.mark('plugin init')
                         except Exception as e:
                             _message = _MESSAGES_LIST["e000018"].format(self._config['plugin'])
                             SendingProcess._logger.error(_message)
@@ -955,6 +1149,83 @@ class SendingProcess(FledgeProcess):
 
         return exec_sending_process
 
+    def _destination(self, name):
+        """ Sending process of the north instance name, to which the data fetched by this one is also sent; it shares
+        the connections to Fledge and the audit trail of this one """
+        destination = copy.copy(self)
+        destination._init_destination()
+        destination._name = name
+        destination._fan_out = []
+        return destination
+
+    async def _schedule_enabled(self, name):
+        """ True when the north instance name has an enabled schedule, it then sends its data on its own, False when
+        its schedules are disabled and None when it has no schedule, i.e. there is no such north instance """
+        payload = payload_builder.PayloadBuilder() \
+            .SELECT("enabled") \
+            .WHERE(['schedule_name', '=', name]) \
+            .payload()
+        schedules = await self._storage_async.query_tbl_with_payload("schedules", payload)
+        if not schedules['rows']:
+            return None
+        return any(row['enabled'] in ('t', True) for row in schedules['rows'])
+
+    def _stop_destination(self, destination):
+        """ Stops a destination of the fan out, its failure does not prevent the others from being stopped """
+        try:
+            destination.stop()
+        except Exception as ex:
+            SendingProcess._logger.error("Unable to stop the fan out destination {} | {}".format(destination._name,
+                                                                                                ex))
+
+    async def _start_fan_out(self):
+        """ Starts the sending processes of the destinations of the fan out
+
+        A destination sends the data of its own stream: a destination that is this north instance, that is listed
+        twice or that also runs on its own schedule would send the same rows twice, updating its stream in both.
+        A destination with no schedule is not a north instance, it is skipped before its configuration category and
+        its stream are created.
+        """
+        names = set()
+        for name in self._config.get('destinations', []):
+            if name == self._name:
+                SendingProcess._logger.warning("Fan out destination {} is this north instance, it is skipped".format(
+                    name))
+                continue
+            if name in names:
+                SendingProcess._logger.warning("Fan out destination {} is listed twice, it is skipped".format(name))
+                continue
+            names.add(name)
+            try:
+                enabled = await self._schedule_enabled(name)
+                if enabled is None:
+                    SendingProcess._logger.warning("Fan out destination {} has no schedule, it is not a north "
+                                                   "instance and it is skipped".format(name))
+                    continue
+                if enabled:
+                    SendingProcess._logger.warning("Fan out destination {} has an enabled schedule, it is skipped; "
+                                                   "disable its schedule to send it the data".format(name))
+                    continue
+            except Exception as ex:
+                SendingProcess._logger.error("Unable to read the schedule of the fan out destination {} | {}".format(
+                    name, ex))
+                continue
+            destination = self._destination(name)
+            try:
+                if not await destination._start():
+                    SendingProcess._logger.warning("Fan out destination {} is not enabled".format(name))
+                    continue
+            except Exception as ex:
+                SendingProcess._logger.error("Unable to start the fan out destination {} | {}".format(name, ex))
+                continue
+            if destination._config.get('source') != self._config.get('source'):
+                SendingProcess._logger.warning("Fan out destination {} does not send the {} data".format(
+                    name, self._config.get('source')))
+                self._stop_destination(destination)
+                continue
+            self._fan_out.append(destination)
+            SendingProcess._logger.info("The data is also sent to {}".format(name))
+
     async def run(self):
         global _log_performance
         global _LOGGER
@@ -968,9 +1239,11 @@ class SendingProcess(FledgeProcess):
         _log_performance = self._log_performance
 
         try:
-            self._storage_async = StorageClientAsync(self._core_management_host, self._core_management_port)
-            self._readings = ReadingsStorageClientAsync(self._core_management_host, self._core_management_port)
+            # The storage clients of FledgeProcess are used, the storage service is not discovered again
+            self._readings = self._readings_storage_async
             self._audit = AuditLogger(self._storage_async)
+            # The position updates, and the failures of a flapping connection, are written in bulk
+            self._audit.start_buffering()
         except Exception as ex:
             SendingProcess._logger.exception(_MESSAGES_LIST["e000023"].format(str(ex)))
             sys.exit(1)
@@ -983,6 +1256,9 @@ class SendingProcess(FledgeProcess):
 
             try:
                 is_started = await self._start()
+                if is_started:
+                    await self._start_fan_out()
+                self._startup_profile.report(self._name)
                 if is_started:
                     await self.send_data()
                 self.stop()
@@ -991,9 +1267,13 @@ class SendingProcess(FledgeProcess):
             except (ValueError, Exception) as ex:
                 SendingProcess._logger.exception(_MESSAGES_LIST["e000002"].format(str(ex)))
                 sys.exit(1)
+            finally:
+                await self._audit.stop_buffering()
 
     def stop(self):
         """ Terminates the sending process and the related plugin"""
+        for destination in self._fan_out:
+            self._stop_destination(destination)
         try:
             self._plugin.plugin_shutdown(self._plugin_handle)
         except Exception:
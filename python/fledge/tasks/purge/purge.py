@@ -21,7 +21,17 @@ Statistics reported by Purge process are:
     -> Readings retained (based on retainUnsent configuration)
     -> Remaining readings
     All these statistics are inserted into the log table
+
+Chunks:
+    With a purgeBlockSize the readings are purged in chunks of consecutive ids, oldest first, each one a purge of the
+    storage bounded by the id of its last reading, so that no single storage operation removes millions of readings
+    and stalls the ingest. The task pauses between the chunks to keep below rowsPerSecond and writes its progress to a
+    checkpoint file after every chunk: a purge that is killed resumes from the checkpoint the next time it runs.
+    purgeBlockSize is 0 by default: a single purge operation, that the storage plugins already carry out in blocks.
 """
+import asyncio
+import json
+import os
 import time
 
 from fledge.common.audit_logger import AuditLogger
@@ -31,6 +41,7 @@ from fledge.common.storage_client.payload_builder import PayloadBuilder
 from fledge.common import logger
 from fledge.common.storage_client.exceptions import *
 from fledge.common.process import FledgeProcess
+from fledge.common.common import _FLEDGE_DATA, _FLEDGE_ROOT
 
 
 __author__ = "Ori Shadmon, Vaibhav Singhal, Mark Riddoch, Amarendra K Sinha"
@@ -64,10 +75,29 @@ class Purge(FledgeProcess):
             "default": "False",
             "displayName": "Retain Unsent Data",
             "order": "3"
+        },
+        "purgeBlockSize": {
+            "description": "Maximum number of readings removed by each storage purge operation. 0 removes all the "
+                           "readings in a single operation.",
+            "type": "integer",
+            "default": "0",
+            "displayName": "Purge Block Size",
+            "order": "4",
+            "minimum": "0"
+        },
+        "rowsPerSecond": {
+            "description": "Maximum rate, in readings per second, at which readings are removed when purging in "
+                           "blocks. 0 for no limit.",
+            "type": "integer",
+            "default": "0",
+            "displayName": "Max Readings Removed Per Second",
+            "order": "5",
+            "minimum": "0"
         }
     }
     _CONFIG_CATEGORY_NAME = 'PURGE_READ'
     _CONFIG_CATEGORY_DESCRIPTION = 'Purge the readings table'
+    _CHECKPOINT_FILE = (_FLEDGE_DATA if _FLEDGE_DATA else _FLEDGE_ROOT + '/data') + '/var/purge/checkpoint.json'
 
     def __init__(self):
         super().__init__()
@@ -98,6 +128,94 @@ class Purge(FledgeProcess):
 
         return await cfg_manager.get_category_all_items(self._CONFIG_CATEGORY_NAME)
 
+    def _read_checkpoint(self):
+        try:
+            with open(self._CHECKPOINT_FILE) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as ex:
+            self._logger.warning("Ignoring the purge checkpoint %s: %s", self._CHECKPOINT_FILE, str(ex))
+            return {}
+
+    def _write_checkpoint(self, checkpoint):
+        os.makedirs(os.path.dirname(self._CHECKPOINT_FILE), exist_ok=True)
+        # Written aside and renamed, a task killed while writing leaves the previous checkpoint in place
+        tmp_file = self._CHECKPOINT_FILE + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_file, self._CHECKPOINT_FILE)
+
+    def _clear_checkpoint(self):
+        try:
+            os.remove(self._CHECKPOINT_FILE)
+        except FileNotFoundError:
+            pass
+
+    async def _purge_in_chunks(self, criterion, value, last_id, flag, block_size, rows_per_second, checkpoint):
+        """ Purge by age or size, block_size ids at a time, from the oldest reading to the newest reading present
+        when the purge started. Every chunk is a purge that retains the readings above its upper id, so it only
+        removes readings of its own id range, upper id included; the unsent readings are purged by the chunks above
+        last_id.
+
+        :return: the result of the purge, as the storage returns it, i.e. removed, unsentPurged and unsentRetained
+        """
+        state = checkpoint.get(criterion)
+        if state is None or [state['value'], state['flag']] != [value, flag]:
+            payload = PayloadBuilder().AGGREGATE(["min", "id"], ["max", "id"]).ALIAS(
+                'aggregate', ('id', 'min', 'min_id'), ('id', 'max', 'max_id')).payload()
+            result = await self._readings_storage_async.query(payload)
+            min_id = result['rows'][0]['min_id'] if result['rows'] else None
+            max_id = result['rows'][0]['max_id'] if result['rows'] else None
+            state = {"value": value, "flag": flag,
+                     "next_id": min_id if isinstance(min_id, int) else 0,
+                     "end_id": max_id if isinstance(max_id, int) else -1,
+                     "removed": 0, "unsentPurged": 0, "unsentRetained": 0,
+                     "chunks": 0, "chunkSeconds": 0, "chunkSecondsMax": 0, "done": False}
+            checkpoint[criterion] = state
+
+        # The storage purge with the retain flag removes the readings up to sent_id included, the id ranges of the
+        # chunks are inclusive too
+        end_id = state['end_id']
+        if flag == 'retain':
+            end_id = min(end_id, last_id)
+        while not state['done'] and state['next_id'] <= end_id:
+            upper_id = min(state['next_id'] + block_size - 1, end_id)
+            if state['next_id'] <= last_id < upper_id:
+                # Chunks do not mix sent and unsent readings
+                upper_id = last_id
+            chunk_start = time.time()
+            try:
+                result = await self._readings_storage_async.purge(sent_id=upper_id, flag='retain',
+                                                                  **{criterion: value})
+            except StorageServerError:
+                # Already logged by the storage client. The readings purged so far are reported, the next purge
+                # starts over
+                break
+            chunk_seconds = time.time() - chunk_start
+
+            state['removed'] += result['removed']
+            if state['next_id'] > last_id:
+                state['unsentPurged'] += result['removed']
+            if flag == 'retain':
+                state['unsentRetained'] = result['unsentRetained']
+            state['next_id'] = upper_id + 1
+            # The readings are purged oldest first: once a chunk removes none, neither will the newer chunks
+            state['done'] = result['removed'] == 0 or upper_id >= end_id
+            state['chunks'] += 1
+            state['chunkSeconds'] += chunk_seconds
+            state['chunkSecondsMax'] = max(state['chunkSecondsMax'], chunk_seconds)
+            self._write_checkpoint(checkpoint)
+            self._logger.info("Purged %s readings by %s up to id %s in %.3f seconds", result['removed'], criterion,
+                              upper_id, chunk_seconds)
+
+            if not state['done']:
+                # Yield to the storage, at least as long as it takes to keep below rows_per_second
+                await asyncio.sleep(max(0, result['removed'] / rows_per_second - chunk_seconds)
+                                    if rows_per_second else 0)
+        state['done'] = True
+        return state
+
     async def purge_data(self, config):
         """" Purge readings table based on the set configuration
         :return:
@@ -121,47 +239,64 @@ class Purge(FledgeProcess):
         else:
             last_id = 0
         flag = "purge" if config['retainUnsent']['value'].lower() == "false" else "retain"
-        try:
-            if int(config['age']['value']) != 0:
-                result = await self._readings_storage_async.purge(age=config['age']['value'], sent_id=last_id, flag=flag)
-                total_rows_removed = result['removed']
-                unsent_rows_removed = result['unsentPurged']
-                unsent_retained = result['unsentRetained']
-        except ValueError:
-            self._logger.error("Configuration item age {} should be integer!".format(config['age']['value']))
-
-        except StorageServerError as ex:
-            # skip logging as its already done in details for this operation in case of error
-            # FIXME: check if ex.error jdoc has retryable True then retry the operation else move on
-            pass
 
         try:
-            if int(config['size']['value']) != 0:
-                result = await self._readings_storage_async.purge(size=config['size']['value'], sent_id=last_id, flag=flag)
-                total_rows_removed += result['removed']
-                unsent_rows_removed += result['unsentPurged']
-                unsent_retained += result['unsentRetained']
+            block_size = int(config.get('purgeBlockSize', {}).get('value', 0))
+            rows_per_second = int(config.get('rowsPerSecond', {}).get('value', 0))
         except ValueError:
-            self._logger.error("Configuration item size {} should be integer!".format(config['size']['value']))
+            self._logger.error("Configuration items purgeBlockSize and rowsPerSecond should be integer!")
+            block_size = rows_per_second = 0
+        checkpoint = self._read_checkpoint() if block_size > 0 else {}
+        if checkpoint:
+            self._logger.info("Resuming the purge started at %s", checkpoint['start_time'])
+            start_time = checkpoint['start_time']
+        else:
+            checkpoint['start_time'] = start_time
 
-        except StorageServerError as ex:
-            # skip logging as its already done in details for this operation in case of error
-            # FIXME: check if ex.error jdoc has retryable True then retry the operation else move on
-            pass
+        for criterion in ('age', 'size'):
+            try:
+                if int(config[criterion]['value']) != 0:
+                    if block_size > 0:
+                        result = await self._purge_in_chunks(criterion, config[criterion]['value'], last_id, flag,
+                                                             block_size, rows_per_second, checkpoint)
+                    else:
+                        result = await self._readings_storage_async.purge(
+                            sent_id=last_id, flag=flag, **{criterion: config[criterion]['value']})
+                    total_rows_removed += result['removed']
+                    unsent_rows_removed += result['unsentPurged']
+                    unsent_retained += result['unsentRetained']
+            except ValueError:
+                self._logger.error("Configuration item {} {} should be integer!".format(criterion,
+                                                                                        config[criterion]['value']))
+
+            except StorageServerError as ex:
+                # skip logging as its already done in details for this operation in case of error
+                # FIXME: check if ex.error jdoc has retryable True then retry the operation else move on
+                pass
 
         end_time = time.strftime('%Y-%m-%d %H:%M:%S.%s', time.localtime(time.time()))
 
         if total_rows_removed > 0:
             """ Only write an audit log entry when rows are removed """
-            await self._audit.information('PURGE', {"start_time": start_time,
-                                                    "end_time": end_time,
-                                                    "rowsRemoved": total_rows_removed,
-                                                    "unsentRowsRemoved": unsent_rows_removed,
-                                                    "rowsRetained": unsent_retained
-                                                    })
+            details = {"start_time": start_time,
+                       "end_time": end_time,
+                       "rowsRemoved": total_rows_removed,
+                       "unsentRowsRemoved": unsent_rows_removed,
+                       "rowsRetained": unsent_retained
+                       }
+            chunks = [checkpoint[c] for c in ('age', 'size') if c in checkpoint]
+            if chunks:
+                count = sum(c['chunks'] for c in chunks)
+                details.update({"chunks": count,
+                                "chunkSecondsMean": round(sum(c['chunkSeconds'] for c in chunks) / count, 3),
+                                "chunkSecondsMax": round(max(c['chunkSecondsMax'] for c in chunks), 3)})
+            await self._audit.information('PURGE', details)
         else:
             self._logger.info("No rows purged")
 
+        if block_size > 0:
+            self._clear_checkpoint()
+
         return total_rows_removed, unsent_rows_removed
 
     async def run(self):
@@ -174,6 +309,8 @@ class Purge(FledgeProcess):
         """
         try:
             config = await self.set_configuration()
+            self._startup_profile.mark('configuration')
+            self._startup_profile.report(self._name)
             total_purged, unsent_purged = await self.purge_data(config)
             await self.write_statistics(total_purged, unsent_purged)
         except Exception as ex:
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+"""Readings rollup process starter"""
+
+import asyncio
+from fledge.tasks.rollup.rollup import ReadingsRollup
+from fledge.common import logger
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+if __name__ == '__main__':
+    _logger = logger.setup("ReadingsRollup")
+    rollup_process = ReadingsRollup()
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(rollup_process.run())
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Readings rollup task
+
+Incrementally aggregates the numeric datapoints of the readings into per minute and per hour buckets of the
+readings_rollup table, so that the asset browser can answer long time windows without scanning the readings.
+
+Every run:
+    1. Fetches the readings added since the last run, in blocks, by reading id
+    2. Computes min, max, sum and count per asset, datapoint and bucket in a single pass
+    3. Merges the aggregates with the buckets already stored and writes them with one bulk insert and one bulk update
+    4. Persists the id of the last reading aggregated and the watermark, the user_ts up to which the rollup is complete
+    5. Removes the buckets older than the configured retention
+
+The readings are aggregated by id, so a reading that arrives late, with a user_ts older than the watermark, is
+aggregated into its bucket by the next run. Until then the asset browser, which reads the readings only past the
+watermark, leaves it out of the series and summaries it answers from the rollup.
+"""
+
+import json
+
+from fledge.common import logger
+from fledge.common.configuration_manager import ConfigurationManager
+from fledge.common.process import FledgeProcess
+from fledge.common.readings_rollup import ROLLUP_TABLE, ROLLUP_POSITION_KEY, MINUTE, HOUR, bucket_start, is_numeric, \
+    utc_timestamp
+from fledge.common.storage_client.payload_builder import PayloadBuilder
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+class ReadingsRollup(FledgeProcess):
+
+    _DEFAULT_ROLLUP_CONFIG = {
+        "blockSize": {
+            "description": "The number of readings fetched from the buffer in each block",
+            "type": "integer",
+            "default": "5000",
+            "displayName": "Block Size",
+            "order": "1",
+            "minimum": "1"
+        },
+        "blocksPerRun": {
+            "description": "Maximum number of blocks aggregated in a single run of the task",
+            "type": "integer",
+            "default": "100",
+            "displayName": "Blocks Per Run",
+            "order": "2",
+            "minimum": "1"
+        },
+        "minuteRetention": {
+            "description": "Age of the per minute aggregates to be retained (in hours)",
+            "type": "integer",
+            "default": "168",
+            "displayName": "Minute Aggregates Retention (In Hours)",
+            "order": "3"
+        },
+        "hourRetention": {
+            "description": "Age of the per hour aggregates to be retained (in hours)",
+            "type": "integer",
+            "default": "8760",
+            "displayName": "Hour Aggregates Retention (In Hours)",
+            "order": "4"
+        }
+    }
+    _CONFIG_CATEGORY_NAME = 'ROLLUP'
+    _CONFIG_CATEGORY_DESCRIPTION = 'Aggregate the readings for the asset browser'
+
+    def __init__(self):
+        super().__init__()
+        self._logger = logger.setup("Readings Rollup")
+
+    async def set_configuration(self):
+        """ Set the default configuration for the readings rollup
+
+        Returns:
+            Configuration information that was set for readings rollup process
+        """
+        cfg_manager = ConfigurationManager(self._storage_async)
+        await cfg_manager.create_category(self._CONFIG_CATEGORY_NAME, self._DEFAULT_ROLLUP_CONFIG,
+                                          self._CONFIG_CATEGORY_DESCRIPTION, display_name="Readings Rollup")
+        await cfg_manager.create_child_category("Utilities", [self._CONFIG_CATEGORY_NAME])
+        return await cfg_manager.get_category_all_items(self._CONFIG_CATEGORY_NAME)
+
+    async def _get_position(self):
+        """ Position of the last run, None if the rollup has never run """
+        payload = PayloadBuilder().SELECT("data").WHERE(["key", "=", ROLLUP_POSITION_KEY]).payload()
+        result = await self._storage_async.query_tbl_with_payload('plugin_data', payload)
+        return result['rows'][0]['data'] if result['rows'] else None
+
+    async def _set_position(self, position, exists):
+        if exists:
+            payload = PayloadBuilder().SET(data=position).WHERE(["key", "=", ROLLUP_POSITION_KEY]).payload()
+            await self._storage_async.update_tbl('plugin_data', payload)
+        else:
+            payload = PayloadBuilder().INSERT(key=ROLLUP_POSITION_KEY, data=position).payload()
+            await self._storage_async.insert_into_tbl('plugin_data', payload)
+
+    @staticmethod
+    def aggregate(rows, buckets=None):
+        """ Aggregate readings rows into buckets in a single pass
+
+        Args:
+            rows: readings rows as returned by the readings fetch
+            buckets: dict to aggregate into, keyed by (asset_code, datapoint, granularity, bucket)
+        Returns:
+            dict of (asset_code, datapoint, granularity, bucket) to [min, max, sum, count]
+        """
+        buckets = {} if buckets is None else buckets
+        for row in rows:
+            user_ts = row['user_ts']
+            starts = ((MINUTE, bucket_start(user_ts, MINUTE)), (HOUR, bucket_start(user_ts, HOUR)))
+            for datapoint, value in row['reading'].items():
+                if not is_numeric(value):
+                    continue
+                for granularity, start in starts:
+                    key = (row['asset_code'], datapoint, granularity, start)
+                    agg = buckets.get(key)
+                    if agg is None:
+                        buckets[key] = [value, value, value, 1]
+                    else:
+                        if value < agg[0]:
+                            agg[0] = value
+                        if value > agg[1]:
+                            agg[1] = value
+                        agg[2] += value
+                        agg[3] += 1
+        return buckets
+
+    async def _get_stored_buckets(self, buckets):
+        """ Fetch the stored rows of the buckets that are about to be written """
+        stored = {}
+        for granularity in (MINUTE, HOUR):
+            keys = [k for k in buckets if k[2] == granularity]
+            if not keys:
+                continue
+            assets = sorted({k[0] for k in keys})
+            starts = sorted({k[3] for k in keys})
+            payload = PayloadBuilder().SELECT("asset_code", "datapoint", "bucket", "min_value", "max_value",
+                                              "sum_value", "readings_count")\
+                .WHERE(["granularity", "=", granularity])\
+                .AND_WHERE(["asset_code", "in", assets])\
+                .AND_WHERE(["bucket", "in", starts]).payload()
+            result = await self._storage_async.query_tbl_with_payload(ROLLUP_TABLE, payload)
+            for r in result['rows']:
+                key = (r['asset_code'], r['datapoint'], granularity, bucket_start(r['bucket'], granularity))
+                stored[key] = r
+        return stored
+
+    async def write_buckets(self, buckets):
+        """ Merge the aggregates with the stored buckets and write them with a bulk insert and a bulk update """
+        if not buckets:
+            return
+        stored = await self._get_stored_buckets(buckets)
+        inserts = []
+        updates = []
+        for key, agg in buckets.items():
+            asset_code, datapoint, granularity, start = key
+            row = stored.get(key)
+            if row is None:
+                inserts.append({"asset_code": asset_code, "datapoint": datapoint, "granularity": granularity,
+                                "bucket": start, "min_value": agg[0], "max_value": agg[1], "sum_value": agg[2],
+                                "readings_count": agg[3]})
+            else:
+                updates.append(PayloadBuilder()
+                               .SET(min_value=min(agg[0], float(row['min_value'])),
+                                    max_value=max(agg[1], float(row['max_value'])),
+                                    sum_value=agg[2] + float(row['sum_value']),
+                                    readings_count=agg[3] + int(row['readings_count']))
+                               .WHERE(["asset_code", "=", asset_code]).AND_WHERE(["datapoint", "=", datapoint])
+                               .AND_WHERE(["granularity", "=", granularity]).AND_WHERE(["bucket", "=", start])
+                               .chain_payload())
+        if inserts:
+            await self._storage_async.insert_into_tbl(ROLLUP_TABLE, json.dumps({"inserts": inserts}))
+        if updates:
+            await self._storage_async.update_tbl(ROLLUP_TABLE, json.dumps({"updates": updates}))
+
+    async def rollup(self, config):
+        """ Aggregate the readings added since the last run
+
+        Returns:
+            number of readings aggregated
+        """
+        block_size = int(config['blockSize']['value'])
+        blocks_per_run = int(config['blocksPerRun']['value'])
+        position = await self._get_position()
+        exists = position is not None
+        position = dict(position) if exists else {"last_object": 0}
+        last_object = int(position.get("last_object", 0))
+        now = utc_timestamp()
+        max_user_ts = None
+        total = 0
+        for _ in range(blocks_per_run):
+            result = await self._readings_storage_async.fetch(last_object + 1, block_size)
+            rows = result['rows']
+            if not rows:
+                break
+            await self.write_buckets(self.aggregate(rows))
+            last_object = max(int(r['id']) for r in rows)
+            block_max_ts = max(r['user_ts'] for r in rows)
+            max_user_ts = block_max_ts if max_user_ts is None else max(max_user_ts, block_max_ts)
+            total += len(rows)
+            if len(rows) < block_size:
+                break
+        if total:
+            # A reading timestamped in the future must not move the watermark past the time of this run
+            position["last_object"] = last_object
+            position["watermark"] = min(max_user_ts, now)
+            await self._set_position(position, exists)
+        return total
+
+    async def purge(self, config):
+        """ Remove the buckets older than the configured retention """
+        for granularity, item in ((MINUTE, 'minuteRetention'), (HOUR, 'hourRetention')):
+            retention = int(config[item]['value'])
+            if retention <= 0:
+                continue
+            payload = PayloadBuilder().WHERE(["granularity", "=", granularity])\
+                .AND_WHERE(["bucket", "older", retention * 60 * 60]).payload()
+            await self._storage_async.delete_from_tbl(ROLLUP_TABLE, payload)
+
+    async def run(self):
+        """ Starts the readings rollup task """
+        try:
+            config = await self.set_configuration()
+            total = await self.rollup(config)
+            self._logger.info("%d readings aggregated", total)
+            await self.purge(config)
+        except Exception as ex:
+            self._logger.exception(str(ex))
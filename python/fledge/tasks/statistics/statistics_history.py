@@ -10,9 +10,12 @@
 Fetch information from the statistics table, compute delta and
 stores the delta value (statistics.value - statistics.previous_value) in the statistics_history table
 """
+
+import asyncio
 import json
 
 from fledge.common.storage_client.payload_builder import PayloadBuilder
+from fledge.common.storage_client.utils import JsonPayload
 from fledge.common import logger
 from fledge.common.process import FledgeProcess
 from fledge.common import utils as common_utils
@@ -22,6 +25,65 @@ __copyright__ = "Copyright (c) 2017 OSI Soft, LLC"
 __license__ = "Apache 2.0"
 __version__ = "${VERSION}"
 
+_LOGGER = logger.setup(__name__)
+
+
+class StatisticsSnapshot(object):
+    """ Snapshot of the statistics table into the statistics_history table
+
+    A snapshot reads the key, value and previous_value of every statistic and computes the deltas in a single pass,
+    building the bulk insert into statistics_history and the bulk update of previous_value as compact JSON, once.
+    Only the statistics that changed since the previous snapshot are updated, so that a snapshot of tens of thousands
+    of mostly idle per-asset statistics is one query, one insert and a small update.
+
+    The snapshot can be taken by the statistics history task or periodically, with run(), by a long running service.
+    """
+
+    _QUERY = PayloadBuilder().SELECT("key", "value", "previous_value").payload()
+
+    def __init__(self, storage):
+        self._storage = storage
+
+    async def take(self, history_ts=None):
+        """ Takes a snapshot
+
+        :param history_ts: timestamp of the history rows, the current time by default
+        :return: the number of statistics and the number of them that changed since the previous snapshot
+        """
+        history_ts = common_utils.local_timestamp() if history_ts is None else history_ts
+        results = await self._storage.query_tbl_with_payload("statistics", self._QUERY)
+        inserts = []
+        updates = []
+        for r in results['rows']:
+            value = int(r['value'])
+            delta = value - int(r['previous_value'])
+            inserts.append({"key": r['key'], "value": delta, "history_ts": history_ts})
+            if delta:
+                updates.append({"values": {"previous_value": value},
+                                "where": {"column": "key", "condition": "=", "value": r['key']}})
+        if inserts:
+            await self._storage.insert_into_tbl("statistics_history", self._encode({"inserts": inserts}))
+        if updates:
+            # UPDATE statistics SET previous_value = value WHERE key = key, of the snapshot
+            await self._storage.update_tbl("statistics", self._encode({"updates": updates}))
+        return len(inserts), len(updates)
+
+    async def run(self, interval, stop_event):
+        """ Takes a snapshot every interval seconds until stop_event is set """
+        while not stop_event.is_set():
+            try:
+                await self.take()
+            except Exception as ex:
+                _LOGGER.exception('Statistics snapshot failed, %s', str(ex))
+            try:
+                await asyncio.wait_for(stop_event.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    def _encode(payload):
+        return JsonPayload(json.dumps(payload, separators=(',', ':')))
+
 
 class StatisticsHistory(FledgeProcess):
 
@@ -31,40 +93,13 @@ class StatisticsHistory(FledgeProcess):
         super().__init__()
         self._logger = logger.setup("StatisticsHistory")
 
-    async def _bulk_update_previous_value(self, payload):
-        """ UPDATE previous_value of column to have the same value as snapshot
-    
-        Query: 
-            UPDATE statistics_history SET previous_value = value WHERE key = key
-        Args:
-           payload: dict containing statistics keys and previous values
-        """
-        await self._storage_async.update_tbl("statistics", json.dumps(payload, sort_keys=False))
-
     async def run(self):
         """ SELECT against the statistics table, to get a snapshot of the data at that moment.
     
         Based on the snapshot:
             1. INSERT the delta between `value` and `previous_value` into  statistics_history
-            2. UPDATE the previous_value in statistics table to be equal to statistics.value at snapshot 
+            2. UPDATE the previous_value in statistics table to be equal to statistics.value at snapshot,
+               for the statistics that changed
         """
-        current_time = common_utils.local_timestamp()
-        results = await self._storage_async.query_tbl("statistics")
-        # Bulk updates payload
-        payload = {"updates": []}
-        # Bulk inserts payload
-        insert_payload = {"inserts": []}
-        for r in results['rows']:
-            key = r['key']
-            value = int(r["value"])
-            previous_value = int(r["previous_value"])
-            delta = value - previous_value
-            payload_item = PayloadBuilder().SET(previous_value=value).WHERE(["key", "=", key]).payload()
-            # Add element to bulk updates
-            payload['updates'].append(json.loads(payload_item))
-            # Add element to bulk inserts
-            insert_payload['inserts'].append({'key': key, 'value': delta, 'history_ts': current_time})
-        # Bulk inserts
-        await self._storage_async.insert_into_tbl("statistics_history", json.dumps(insert_payload))
-        # Bulk updates
-        await self._bulk_update_previous_value(payload)
+        self._startup_profile.report(self._name)
+        await StatisticsSnapshot(self._storage_async).take()
@@ -0,0 +1,7 @@
+DROP TRIGGER IF EXISTS log_counts_trigger ON fledge.log;
+DROP FUNCTION IF EXISTS fledge.log_counts_update();
+DROP TABLE IF EXISTS fledge.log_counts;
+
+DROP INDEX IF EXISTS fledge.log_ix2;
+CREATE INDEX log_ix2
+    ON fledge.log(ts);
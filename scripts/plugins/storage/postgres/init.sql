@@ -205,8 +205,33 @@ ALTER SEQUENCE fledge.log_id_seq OWNED BY fledge.log.id;
 CREATE INDEX log_ix1
     ON fledge.log USING btree (code, ts, level);
 
+-- The audit API pages on (ts, id)
 CREATE INDEX log_ix2
-    ON fledge.log(ts);
+    ON fledge.log(ts, id);
+
+-- Audit log counts
+-- Number of entries of the log table per code and level, maintained by a trigger, for the totals of the audit API.
+CREATE TABLE fledge.log_counts (
+       code    character(5)                NOT NULL,                                                -- The code of the log entries
+       level   smallint                    NOT NULL,                                                -- The level of the log entries
+       entries bigint                      NOT NULL DEFAULT 0,                                      -- Number of log entries with the code and the level
+       CONSTRAINT log_counts_pkey PRIMARY KEY (code, level) );
+
+CREATE FUNCTION fledge.log_counts_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO fledge.log_counts (code, level, entries) VALUES (NEW.code, NEW.level, 1)
+               ON CONFLICT (code, level) DO UPDATE SET entries = fledge.log_counts.entries + 1;
+        RETURN NEW;
+    END IF;
+    UPDATE fledge.log_counts SET entries = entries - 1 WHERE code = OLD.code AND level = OLD.level;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER log_counts_trigger
+    AFTER INSERT OR DELETE ON fledge.log
+    FOR EACH ROW EXECUTE PROCEDURE fledge.log_counts_update();
 
 
 -- Asset status
@@ -771,6 +796,23 @@ CREATE TABLE fledge.filter_users (
              name        character varying(255)        NOT NULL,
              "user"      character varying(255)        NOT NULL);
 
+-- Readings rollup
+-- Per asset and per datapoint aggregates of the numeric readings, one row per time bucket.
+-- The table is maintained by the readings rollup task and used by the asset browser.
+CREATE TABLE fledge.readings_rollup (
+       asset_code      character varying(255)      NOT NULL,                           -- The asset code of the aggregated readings
+       datapoint       character varying(255)      NOT NULL,                           -- The reading key (datapoint) aggregated
+       granularity     integer                     NOT NULL,                           -- Bucket size in seconds, 60 (minute) or 3600 (hour)
+       bucket          timestamp(6) with time zone NOT NULL,                           -- UTC start time of the bucket
+       min_value       double precision            NOT NULL,                           -- Minimum of the datapoint in the bucket
+       max_value       double precision            NOT NULL,                           -- Maximum of the datapoint in the bucket
+       sum_value       double precision            NOT NULL,                           -- Sum of the datapoint in the bucket
+       readings_count  bigint                      NOT NULL DEFAULT 0,                 -- Number of readings aggregated
+       CONSTRAINT readings_rollup_pkey PRIMARY KEY (asset_code, datapoint, granularity, bucket) );
+
+CREATE INDEX readings_rollup_ix1
+    ON fledge.readings_rollup (granularity, bucket);
+
 -- Grants to fledge schema
 GRANT SELECT, INSERT, UPDATE, DELETE ON ALL TABLES IN SCHEMA fledge TO PUBLIC;
 
@@ -857,6 +899,7 @@ INSERT INTO fledge.scheduled_processes ( name, script ) VALUES ( 'purge',
 INSERT INTO fledge.scheduled_processes ( name, script ) VALUES ( 'stats collector',     '["tasks/statistics"]' );
 INSERT INTO fledge.scheduled_processes ( name, script ) VALUES ( 'FledgeUpdater',      '["tasks/update"]'     );
 INSERT INTO fledge.scheduled_processes ( name, script ) VALUES ( 'certificate checker', '["tasks/check_certs"]' );
+INSERT INTO fledge.scheduled_processes ( name, script ) VALUES ( 'readings rollup',     '["tasks/rollup"]'     );
 
 -- Storage Tasks
 --
@@ -900,6 +943,19 @@ INSERT INTO fledge.schedules ( id, schedule_name, process_name, schedule_type,
               );
 
 
+-- Readings rollup
+INSERT INTO fledge.schedules ( id, schedule_name, process_name, schedule_type,
+                                schedule_time, schedule_interval, exclusive, enabled )
+       VALUES ( '1ea97d30-cb3f-11ea-b86a-0242ac120002', -- id
+                'readings rollup',                      -- schedule_name
+                'readings rollup',                      -- process_name
+                3,                                      -- schedule_type (interval)
+                NULL,                                   -- schedule_time
+                '00:05:00',                             -- schedule_interval
+                true,                                   -- exclusive
+                true                                    -- enabled
+              );
+
 -- Check for expired certificates
 INSERT INTO fledge.schedules ( id, schedule_name, process_name, schedule_type,
                                 schedule_time, schedule_interval, exclusive, enabled )
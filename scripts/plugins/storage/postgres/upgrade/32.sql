@@ -0,0 +1,31 @@
+-- Readings rollup
+-- Per asset and per datapoint aggregates of the numeric readings, one row per time bucket.
+-- The table is maintained by the readings rollup task and used by the asset browser.
+CREATE TABLE fledge.readings_rollup (
+       asset_code      character varying(255)      NOT NULL,                           -- The asset code of the aggregated readings
+       datapoint       character varying(255)      NOT NULL,                           -- The reading key (datapoint) aggregated
+       granularity     integer                     NOT NULL,                           -- Bucket size in seconds, 60 (minute) or 3600 (hour)
+       bucket          timestamp(6) with time zone NOT NULL,                           -- UTC start time of the bucket
+       min_value       double precision            NOT NULL,                           -- Minimum of the datapoint in the bucket
+       max_value       double precision            NOT NULL,                           -- Maximum of the datapoint in the bucket
+       sum_value       double precision            NOT NULL,                           -- Sum of the datapoint in the bucket
+       readings_count  bigint                      NOT NULL DEFAULT 0,                 -- Number of readings aggregated
+       CONSTRAINT readings_rollup_pkey PRIMARY KEY (asset_code, datapoint, granularity, bucket) );
+
+CREATE INDEX readings_rollup_ix1
+    ON fledge.readings_rollup (granularity, bucket);
+
+INSERT INTO fledge.scheduled_processes ( name, script ) VALUES ( 'readings rollup',     '["tasks/rollup"]'     );
+
+-- Readings rollup
+INSERT INTO fledge.schedules ( id, schedule_name, process_name, schedule_type,
+                                schedule_time, schedule_interval, exclusive, enabled )
+       VALUES ( '1ea97d30-cb3f-11ea-b86a-0242ac120002', -- id
+                'readings rollup',                      -- schedule_name
+                'readings rollup',                      -- process_name
+                3,                                      -- schedule_type (interval)
+                NULL,                                   -- schedule_time
+                '00:05:00',                             -- schedule_interval
+                true,                                   -- exclusive
+                true                                    -- enabled
+              );
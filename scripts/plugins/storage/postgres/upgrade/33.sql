@@ -0,0 +1,31 @@
+-- Audit log counts
+-- Number of entries of the log table per code and level, maintained by a trigger, for the totals of the audit API.
+CREATE TABLE fledge.log_counts (
+       code    character(5)                NOT NULL,                                                -- The code of the log entries
+       level   smallint                    NOT NULL,                                                -- The level of the log entries
+       entries bigint                      NOT NULL DEFAULT 0,                                      -- Number of log entries with the code and the level
+       CONSTRAINT log_counts_pkey PRIMARY KEY (code, level) );
+
+CREATE FUNCTION fledge.log_counts_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO fledge.log_counts (code, level, entries) VALUES (NEW.code, NEW.level, 1)
+               ON CONFLICT (code, level) DO UPDATE SET entries = fledge.log_counts.entries + 1;
+        RETURN NEW;
+    END IF;
+    UPDATE fledge.log_counts SET entries = entries - 1 WHERE code = OLD.code AND level = OLD.level;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER log_counts_trigger
+    AFTER INSERT OR DELETE ON fledge.log
+    FOR EACH ROW EXECUTE PROCEDURE fledge.log_counts_update();
+
+INSERT INTO fledge.log_counts (code, level, entries)
+       SELECT code, level, count(*) FROM fledge.log GROUP BY code, level;
+
+-- The audit API pages on (ts, id)
+DROP INDEX IF EXISTS fledge.log_ix2;
+CREATE INDEX log_ix2
+    ON fledge.log(ts, id);
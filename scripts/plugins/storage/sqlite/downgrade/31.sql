@@ -0,0 +1,7 @@
+DELETE FROM fledge.tasks WHERE process_name = 'readings rollup';
+DELETE FROM fledge.schedules WHERE process_name = 'readings rollup';
+DELETE FROM fledge.scheduled_processes WHERE name = 'readings rollup';
+DELETE FROM fledge.plugin_data WHERE key = 'readings rollup';
+
+DROP INDEX IF EXISTS readings_rollup_ix1;
+DROP TABLE IF EXISTS fledge.readings_rollup;
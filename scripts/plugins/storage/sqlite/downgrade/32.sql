@@ -0,0 +1,3 @@
+DROP TRIGGER IF EXISTS fledge.log_counts_insert;
+DROP TRIGGER IF EXISTS fledge.log_counts_delete;
+DROP TABLE IF EXISTS fledge.log_counts;
@@ -75,9 +75,29 @@ CREATE INDEX log_ix1
     ON log(code, ts, level);
 
 -- Index to make GUI response faster
+-- The entries of the index are in (ts, id) order, id being the rowid: the audit API pages on (ts, id)
 CREATE INDEX log_ix2
     ON log(ts);
 
+-- Audit log counts
+-- Number of entries of the log table per code and level, maintained by triggers, for the totals of the audit API.
+CREATE TABLE fledge.log_counts (
+       code    CHARACTER(5)           NOT NULL,                  -- The code of the log entries
+       level   SMALLINT               NOT NULL,                  -- The level of the log entries
+       entries INTEGER                NOT NULL DEFAULT 0,        -- Number of log entries with the code and the level
+       CONSTRAINT log_counts_pkey PRIMARY KEY (code, level) );
+
+CREATE TRIGGER fledge.log_counts_insert AFTER INSERT ON log
+BEGIN
+    INSERT OR IGNORE INTO log_counts (code, level, entries) VALUES (NEW.code, NEW.level, 0);
+    UPDATE log_counts SET entries = entries + 1 WHERE code = NEW.code AND level = NEW.level;
+END;
+
+CREATE TRIGGER fledge.log_counts_delete AFTER DELETE ON log
+BEGIN
+    UPDATE log_counts SET entries = entries - 1 WHERE code = OLD.code AND level = OLD.level;
+END;
+
 -- Asset status
 -- List of status an asset can have.
 CREATE TABLE fledge.asset_status (
@@ -593,6 +613,23 @@ CREATE TABLE fledge.filter_users (
              name        character varying(255)        NOT NULL,
              user        character varying(255)        NOT NULL);
 
+-- Readings rollup
+-- Per asset and per datapoint aggregates of the numeric readings, one row per time bucket.
+-- The table is maintained by the readings rollup task and used by the asset browser.
+CREATE TABLE fledge.readings_rollup (
+       asset_code      character varying(255)      NOT NULL,                           -- The asset code of the aggregated readings
+       datapoint       character varying(255)      NOT NULL,                           -- The reading key (datapoint) aggregated
+       granularity     integer                     NOT NULL,                           -- Bucket size in seconds, 60 (minute) or 3600 (hour)
+       bucket          DATETIME                    NOT NULL,                           -- UTC start time of the bucket
+       min_value       double precision            NOT NULL,                           -- Minimum of the datapoint in the bucket
+       max_value       double precision            NOT NULL,                           -- Maximum of the datapoint in the bucket
+       sum_value       double precision            NOT NULL,                           -- Sum of the datapoint in the bucket
+       readings_count  bigint                      NOT NULL DEFAULT 0,                 -- Number of readings aggregated
+       CONSTRAINT readings_rollup_pkey PRIMARY KEY (asset_code, datapoint, granularity, bucket) );
+
+CREATE INDEX readings_rollup_ix1
+    ON readings_rollup (granularity, bucket);
+
 ----------------------------------------------------------------------
 -- Initialization phase - DML
 ----------------------------------------------------------------------
@@ -672,6 +709,7 @@ INSERT INTO fledge.scheduled_processes ( name, script ) VALUES ( 'purge',
 INSERT INTO fledge.scheduled_processes ( name, script ) VALUES ( 'stats collector',     '["tasks/statistics"]' );
 INSERT INTO fledge.scheduled_processes ( name, script ) VALUES ( 'FledgeUpdater',      '["tasks/update"]'     );
 INSERT INTO fledge.scheduled_processes ( name, script ) VALUES ( 'certificate checker', '["tasks/check_certs"]' );
+INSERT INTO fledge.scheduled_processes ( name, script ) VALUES ( 'readings rollup',     '["tasks/rollup"]'     );
 
 -- Storage Tasks
 --
@@ -715,6 +753,19 @@ INSERT INTO fledge.schedules ( id, schedule_name, process_name, schedule_type,
                 't'                                    -- enabled
               );
 
+-- Readings rollup
+INSERT INTO fledge.schedules ( id, schedule_name, process_name, schedule_type,
+                                schedule_time, schedule_interval, exclusive, enabled )
+       VALUES ( '1ea97d30-cb3f-11ea-b86a-0242ac120002', -- id
+                'readings rollup',                      -- schedule_name
+                'readings rollup',                      -- process_name
+                3,                                      -- schedule_type (interval)
+                NULL,                                   -- schedule_time
+                '00:05:00',                             -- schedule_interval
+                't',                                   -- exclusive
+                't'                                    -- enabled
+              );
+
 -- Check for expired certificates
 INSERT INTO fledge.schedules ( id, schedule_name, process_name, schedule_type,
                                 schedule_time, schedule_interval, exclusive, enabled )
@@ -0,0 +1,21 @@
+-- Audit log counts
+-- Number of entries of the log table per code and level, maintained by triggers, for the totals of the audit API.
+CREATE TABLE fledge.log_counts (
+       code    CHARACTER(5)           NOT NULL,                  -- The code of the log entries
+       level   SMALLINT               NOT NULL,                  -- The level of the log entries
+       entries INTEGER                NOT NULL DEFAULT 0,        -- Number of log entries with the code and the level
+       CONSTRAINT log_counts_pkey PRIMARY KEY (code, level) );
+
+CREATE TRIGGER fledge.log_counts_insert AFTER INSERT ON log
+BEGIN
+    INSERT OR IGNORE INTO log_counts (code, level, entries) VALUES (NEW.code, NEW.level, 0);
+    UPDATE log_counts SET entries = entries + 1 WHERE code = NEW.code AND level = NEW.level;
+END;
+
+CREATE TRIGGER fledge.log_counts_delete AFTER DELETE ON log
+BEGIN
+    UPDATE log_counts SET entries = entries - 1 WHERE code = OLD.code AND level = OLD.level;
+END;
+
+INSERT INTO fledge.log_counts (code, level, entries)
+       SELECT code, level, count(*) FROM fledge.log GROUP BY code, level;
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Configuration perf/python/conftest.py
+
+Fixtures of the performance tests: the storage stand-in, the storage clients connected to it and the benchmark
+recorder. The results of the benchmarks are written as JSON with --perf-json=<file>.
+"""
+
+import json
+import math
+import platform
+import statistics
+import time
+
+import pytest
+
+from fledge.common.storage_client.storage_client import StorageClientAsync, ReadingsStorageClientAsync
+from storage_standin import StorageStandin
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+_RESULTS = []
+
+
+def pytest_addoption(parser):
+    parser.addoption("--perf-json", action="store", default=None,
+                     help="File the results of the benchmarks are written to, as JSON")
+    parser.addoption("--perf-rounds", action="store", type=int, default=5,
+                     help="Number of rounds of each benchmark")
+    parser.addoption("--ingest-rate", action="store", type=int, default=None,
+                     help="Readings per second added to the ingest by test_ingest_perf, in place of its scenarios")
+    parser.addoption("--ingest-duration", action="store", type=float, default=2,
+                     help="Seconds the readings are added to the ingest for")
+    parser.addoption("--ingest-assets", action="store", type=int, default=10,
+                     help="Number of assets of the readings added to the ingest")
+    parser.addoption("--ingest-datapoints", action="store", type=int, default=5,
+                     help="Number of datapoints of the readings added to the ingest")
+
+
+def percentile(values, p):
+    """ Nearest rank percentile of the values, p in 0..100 """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class Benchmark(object):
+    """ Times a coroutine function over a number of rounds and records the timings and the metrics of a test """
+
+    def __init__(self, name, rounds):
+        self.name = name
+        self.rounds = rounds
+        self.timings = []
+        self.metrics = {}
+
+    async def __call__(self, func, *args, **kwargs):
+        """ Awaits func(*args, **kwargs) once per round, returns the result of the last round """
+        result = None
+        for _ in range(self.rounds):
+            start = time.perf_counter()
+            result = await func(*args, **kwargs)
+            self.timings.append(time.perf_counter() - start)
+        return result
+
+    def record(self, **metrics):
+        """ Additional metrics of the test, e.g. the throughput or the latency percentiles """
+        self.metrics.update(metrics)
+
+    def result(self):
+        result = {"name": self.name, "metrics": self.metrics}
+        if self.timings:
+            result["timings"] = {"rounds": len(self.timings), "min": min(self.timings), "max": max(self.timings),
+                                 "mean": statistics.mean(self.timings), "median": statistics.median(self.timings),
+                                 "stddev": statistics.stdev(self.timings) if len(self.timings) > 1 else 0}
+        return result
+
+
+@pytest.fixture
+def benchmark(request):
+    bench = Benchmark(request.node.nodeid, request.config.getoption("--perf-rounds"))
+    yield bench
+    _RESULTS.append(bench.result())
+
+
+@pytest.fixture
+def storage_standin(event_loop):
+    standin = StorageStandin()
+    event_loop.run_until_complete(standin.start())
+    yield standin
+    event_loop.run_until_complete(standin.stop())
+
+
+@pytest.fixture
+def storage_client(storage_standin):
+    return StorageClientAsync(None, None, svc=storage_standin.service_record)
+
+
+@pytest.fixture
+def readings_client(storage_standin):
+    return ReadingsStorageClientAsync(None, None, svc=storage_standin.service_record)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _RESULTS:
+        return
+    terminalreporter.section("benchmarks")
+    for r in _RESULTS:
+        timings = r.get("timings")
+        line = r["name"]
+        if timings:
+            line += "  median {:.6f}s  min {:.6f}s  max {:.6f}s".format(timings["median"], timings["min"],
+                                                                      timings["max"])
+        terminalreporter.write_line(line)
+        for k, v in sorted(r["metrics"].items()):
+            terminalreporter.write_line("    {}: {}".format(k, v))
+
+
+def pytest_unconfigure(config):
+    path = config.getoption("--perf-json")
+    if path and _RESULTS:
+        with open(path, 'w') as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "time": time.time(),
+                       "benchmarks": _RESULTS}, f, indent=2)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Load harness of the south ingest
+
+Drives Ingest.add_readings with synthetic readings at a given rate, asset cardinality and number of datapoints, with
+the storage stand-in behind Ingest._insert_readings and ReadingsStorageClientAsync.append, and measures:
+
+    throughput          readings committed to the storage per second
+    latency p50, p99    seconds from Ingest.add_readings to the append of the reading by the storage
+    discarded           readings discarded by the ingest, e.g. when the buffer is full or the storage fails
+    event loop lag      delay of a periodic timer of the event loop, max and p99
+"""
+
+import asyncio
+import time
+import tracemalloc
+import uuid
+
+from fledge.common import statistics
+from fledge.common.storage_client.storage_client import StorageClientAsync, ReadingsStorageClientAsync
+from fledge.services.south.ingest import Ingest
+from conftest import percentile
+from storage_standin import epoch
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+LAG_INTERVAL = 0.01
+
+
+class SouthService(object):
+    """ The attributes of the south service used by Ingest """
+
+    def __init__(self, standin, config):
+        self._name = 'perf'
+        self.config = {}
+        self._plugin_info = {'config': {'plugin': {'default': 'perf'}}}
+        self._storage_async = StorageClientAsync(None, None, svc=standin.service_record)
+        self._readings_storage_async = ReadingsStorageClientAsync(None, None, svc=standin.service_record)
+        self._core_microservice_management_client_async = ManagementClient(config)
+
+
+class ManagementClient(object):
+    """ The core management API used by Ingest """
+
+    def __init__(self, config):
+        self._config = {k: {'value': str(v)} for k, v in config.items()}
+
+    async def create_configuration_category(self, category_data):
+        return None
+
+    async def create_child_category(self, parent, children):
+        return None
+
+    async def get_configuration_category(self, category_name=None):
+        return self._config
+
+    async def get_asset_tracker_events(self):
+        return {'track': []}
+
+    async def create_asset_tracker_events(self, asset_events):
+        return [{} for _ in asset_events]
+
+
+class IngestLoad(object):
+    """ Ingest run against the storage stand-in """
+
+    def __init__(self, standin, buffer_size=4096, concurrent_inserts=4, batch_size=1024, batch_timeout=1):
+        self.standin = standin
+        self.config = {
+            'readings_buffer_size': buffer_size,
+            'max_concurrent_readings_inserts': concurrent_inserts,
+            'readings_insert_batch_size': batch_size,
+            'readings_insert_batch_timeout_seconds': batch_timeout,
+            'max_readings_insert_batch_connection_idle_seconds': 60,
+            'max_readings_insert_batch_reconnect_wait_seconds': 10
+        }
+        self.enqueued = {}
+        self.lags = []
+        self._lag_monitor = None
+
+    async def start(self):
+        # Statistics and Ingest keep their state at class level, the previous run must not leak into this one
+        statistics.Statistics._shared_state.clear()
+        Ingest._sensor_stats = {}
+        Ingest._readings_stats = 0
+        Ingest._discarded_readings_stats = 0
+        Ingest._current_readings_list_index = 0
+        # Ingest.stop() leaves _stop set, and the insert loop started by Ingest.start() would end at once
+        Ingest._stop = False
+        await Ingest.start(SouthService(self.standin, self.config))
+        self._lag_monitor = asyncio.ensure_future(self._monitor_lag())
+
+    async def stop(self):
+        await Ingest.stop()
+        self._lag_monitor.cancel()
+
+    async def _monitor_lag(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(time.perf_counter() - start - LAG_INTERVAL)
+
+    @staticmethod
+    def reading(i, assets, datapoints):
+        return "asset{}".format(i % assets), {"dp{}".format(d): i + d / 10 for d in range(datapoints)}
+
+    async def drive(self, rate, duration, assets=10, datapoints=5):
+        """ Add rate readings per second for duration seconds, a reading for each asset in turn """
+        total = int(rate * duration)
+        start = time.perf_counter()
+        i = 0
+        while i < total:
+            # All the readings that are due are added at once, then the driver sleeps till the next one is due
+            due = min(total, int((time.perf_counter() - start) * rate) + 1)
+            while i < due:
+                asset, readings = self.reading(i, assets, datapoints)
+                key = uuid.uuid4()
+                self.enqueued[str(key)] = time.time()
+                await Ingest.add_readings(asset, '2020-01-01 10:00:00.000000+00:00', key, readings)
+                i += 1
+            await asyncio.sleep(max(0, start + i / rate - time.perf_counter()))
+
+    def results(self):
+        """ Metrics of the run, to be called after stop() """
+        committed = [r for r in self.standin.readings if r['read_key'] in self.enqueued]
+        latencies = [epoch(r['ts']) - self.enqueued[r['read_key']] for r in committed]
+        discarded = sum(r['value'] for r in self.standin.tables['statistics'] if r['key'] == 'DISCARDED')
+        elapsed = max(epoch(r['ts']) for r in committed) - min(self.enqueued.values()) if committed else None
+        return {
+            "enqueued": len(self.enqueued),
+            "committed": len(committed),
+            "discarded": discarded,
+            "throughput": round(len(committed) / elapsed) if elapsed else 0,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p99": percentile(latencies, 99),
+            "loop_lag_max": max(self.lags) if self.lags else None,
+            "loop_lag_p99": percentile(self.lags, 99)
+        }
+
+    async def memory_per_reading(self, count, assets=10, datapoints=5):
+        """ Bytes allocated per reading buffered by the ingest, with the inserts held back """
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            for i in range(count):
+                asset, readings = self.reading(i, assets, datapoints)
+                await Ingest.add_readings(asset, '2020-01-01 10:00:00.000000+00:00', uuid.uuid4(), readings)
+            return (tracemalloc.get_traced_memory()[0] - before) / count
+        finally:
+            tracemalloc.stop()
@@ -0,0 +1,484 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Pure Python stand-in of the storage service, for the performance tests
+
+Implements, in memory, the subset of the REST interface of the storage service used by StorageClientAsync and
+ReadingsStorageClientAsync:
+
+    POST   /storage/table/{table}          insert a row, or {"inserts": [rows]}
+    PUT    /storage/table/{table}          update {"values", "expressions", "json_properties", "where"}, or {"updates": [...]}
+    DELETE /storage/table/{table}          delete, with an optional {"where": ...}
+    GET    /storage/table/{table}          query, ?column=value
+    PUT    /storage/table/{table}/query    query with a payload
+    POST   /storage/reading                append {"readings": [...]}
+    GET    /storage/reading?id=&count=     fetch a block of readings, as newline delimited JSON if asked for
+    PUT    /storage/reading/query          query the readings with a payload
+    PUT    /storage/reading/purge          purge the readings by age or by size
+
+The queries support the payloads built by PayloadBuilder: where, return with alias, json properties, aggregate,
+group, sort, limit and skip. Formats, time zones and time buckets are ignored.
+
+Latency and failures can be injected in every request, with a seeded random generator for reproducible runs.
+
+The stand-in can also be run on its own, e.g. to point a Fledge service at it:
+
+    python3 storage_standin.py --port 8080 --latency 0.002
+"""
+
+import argparse
+import asyncio
+import bisect
+import datetime
+import json
+import random
+import re
+import time
+from collections import Counter, defaultdict, OrderedDict
+
+from aiohttp import web
+from aiohttp.test_utils import unused_port
+
+from fledge.common.service_record import ServiceRecord
+from fledge.common.storage_client.storage_client import NDJSON_CONTENT_TYPE
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+_TIMESTAMP = re.compile(r'(\d{4}-\d\d-\d\d)[ T](\d\d:\d\d:\d\d)(\.\d+)?\s*(?:([+-])(\d\d):?(\d\d)?)?')
+_FETCH_CHUNK_ROWS = 500
+
+
+def now():
+    """ Current time in the layout of the timestamps of the storage service """
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f+00:00')
+
+
+def epoch(timestamp):
+    """ Seconds since the epoch of a timestamp string, None if it is not a timestamp """
+    m = _TIMESTAMP.match(timestamp) if isinstance(timestamp, str) else None
+    if m is None:
+        return None
+    date, hms, fraction, sign, tz_h, tz_m = m.groups()
+    ts = datetime.datetime.strptime('{} {}'.format(date, hms), '%Y-%m-%d %H:%M:%S')
+    seconds = ts.replace(tzinfo=datetime.timezone.utc).timestamp() + float(fraction or 0)
+    if sign:
+        offset = int(tz_h) * 3600 + int(tz_m or 0) * 60
+        seconds -= offset if sign == '+' else -offset
+    return seconds
+
+
+def _coerce(a, b):
+    """ Values made comparable the way the database does, numeric strings are compared to numbers as numbers """
+    if isinstance(a, str) and isinstance(b, (int, float)):
+        try:
+            return float(a), b
+        except ValueError:
+            return a, str(b)
+    if isinstance(b, str) and isinstance(a, (int, float)):
+        try:
+            return a, float(b)
+        except ValueError:
+            return str(a), b
+    return a, b
+
+
+def _json_value(value, properties):
+    for p in properties if isinstance(properties, list) else [properties]:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(p)
+    return value
+
+
+def _column_value(row, item):
+    """ Value of a column, or of the json properties of a column, of a row """
+    if isinstance(item, dict) and 'json' in item:
+        return _json_value(row.get(item['json']['column']), item['json']['properties'])
+    return row.get(item['column'] if isinstance(item, dict) else item)
+
+
+def _compare(value, condition, operand):
+    if condition in ('in', 'not in'):
+        found = any(a == b for a, b in (_coerce(value, o) for o in operand))
+        return found if condition == 'in' else not found
+    if condition in ('newer', 'older'):
+        seconds = epoch(value)
+        if seconds is None:
+            return False
+        limit = time.time() - float(operand)
+        return seconds > limit if condition == 'newer' else seconds < limit
+    if value is None:
+        return False
+    a, b = _coerce(value, operand)
+    try:
+        if condition == '=':
+            return a == b
+        if condition == '!=':
+            return a != b
+        if condition == '<':
+            return a < b
+        if condition == '>':
+            return a > b
+        if condition == '<=':
+            return a <= b
+        if condition == '>=':
+            return a >= b
+    except TypeError:
+        return False
+    raise ValueError('Unsupported condition {}'.format(condition))
+
+
+def match(row, where):
+    """ True if the row matches a where clause of PayloadBuilder """
+    if not where:
+        return True
+    ok = _compare(row.get(where['column']), where['condition'], where['value'])
+    if 'and' in where:
+        ok = ok and match(row, where['and'])
+    if 'or' in where:
+        ok = ok or match(row, where['or'])
+    return ok
+
+
+def _name(item):
+    if isinstance(item, dict):
+        if 'alias' in item:
+            return item['alias']
+        if 'json' in item:
+            properties = item['json']['properties']
+            return properties[-1] if isinstance(properties, list) else properties
+        return item['column']
+    return item
+
+
+def _aggregate(rows, aggregate):
+    results = OrderedDict()
+    for agg in aggregate if isinstance(aggregate, list) else [aggregate]:
+        operation = agg['operation']
+        column = agg.get('column')
+        name = agg.get('alias', '{}_{}'.format(operation, column if column else agg['json']['properties']))
+        if operation == 'count':
+            values = rows if column == '*' else [r for r in rows if _column_value(r, agg) is not None]
+            results[name] = len(values)
+            continue
+        values = []
+        for r in rows:
+            v = _column_value(r, agg)
+            if v is None:
+                continue
+            try:
+                values.append(float(v) if isinstance(v, str) else v)
+            except ValueError:
+                pass
+        if not values:
+            results[name] = None
+        elif operation == 'min':
+            results[name] = min(values)
+        elif operation == 'max':
+            results[name] = max(values)
+        elif operation == 'sum':
+            results[name] = sum(values)
+        elif operation == 'avg':
+            results[name] = sum(values) / len(values)
+        else:
+            raise ValueError('Unsupported aggregate {}'.format(operation))
+    return results
+
+
+def _sort_key(column):
+    def key(row):
+        value = row.get(column)
+        return (value is None, value if not isinstance(value, (dict, list)) else json.dumps(value))
+    return key
+
+
+def _sort(rows, sort):
+    for s in reversed(sort if isinstance(sort, list) else [sort] if sort else []):
+        rows.sort(key=_sort_key(s['column']), reverse=s.get('direction', 'asc').upper() == 'DESC')
+
+
+def query(rows, payload):
+    """ Result rows of a query payload of PayloadBuilder """
+    rows = [r for r in rows if match(r, payload.get('where'))]
+    if 'aggregate' in payload:
+        group = payload.get('group')
+        if group is None:
+            rows = [_aggregate(rows, payload['aggregate'])]
+        else:
+            columns = [group] if isinstance(group, dict) else [c.strip() for c in group.split(',')]
+            groups = OrderedDict()
+            for r in rows:
+                groups.setdefault(tuple(_column_value(r, c) for c in columns), []).append(r)
+            rows = []
+            for key, group_rows in groups.items():
+                result = OrderedDict((_name(c), v) for c, v in zip(columns, key))
+                result.update(_aggregate(group_rows, payload['aggregate']))
+                rows.append(result)
+        # The aggregates are sorted by the group columns or by their aliases
+        _sort(rows, payload.get('sort'))
+    else:
+        _sort(rows, payload.get('sort'))
+        columns = payload.get('return')
+        if columns and payload.get('modifier') == 'distinct':
+            distinct = OrderedDict.fromkeys(tuple(_column_value(r, c) for c in columns) for r in rows)
+            rows = [OrderedDict((_name(c), v) for c, v in zip(columns, k)) for k in distinct]
+        elif columns:
+            rows = [OrderedDict((_name(c), _column_value(r, c)) for c in columns) for r in rows]
+    skip = payload.get('skip', 0)
+    limit = payload.get('limit')
+    return rows[skip:skip + limit if limit is not None else None]
+
+
+def _set_json_property(value, path, new_value):
+    for p in path[:-1]:
+        value = value.setdefault(p, {})
+    value[path[-1]] = new_value
+
+
+class StorageStandin(object):
+    """ In memory storage service, served by aiohttp on localhost """
+
+    def __init__(self, latency=0, failure_rate=0, seed=0, ndjson=True):
+        """
+        latency: seconds added to every request, or a function of the request returning them
+        failure_rate: probability that a request fails with a retryable error of the storage service
+        seed: of the random generator of the failures
+        ndjson: stream the readings blocks as newline delimited JSON to the clients that ask for it
+        tables: rows of the tables, by table name
+        readings: readings, in the order of their ids
+        requests: number of requests received, by route
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.ndjson = ndjson
+        self.tables = defaultdict(list)
+        self.readings = []
+        self.requests = Counter()
+        self._reading_ids = []
+        self._next_reading_id = 1
+        self._failures = []
+        self._random = random.Random(seed)
+        self._runner = None
+        self.host = None
+        self.port = None
+        # The storage service does not limit the size of the requests, the bulk inserts of the benchmarks are large
+        self.app = web.Application(middlewares=[self._inject], client_max_size=1024 ** 3)
+        self.app.router.add_routes([
+            web.post('/storage/table/{table}', self.insert),
+            web.put('/storage/table/{table}', self.update),
+            web.delete('/storage/table/{table}', self.delete),
+            web.get('/storage/table/{table}', self.query_params),
+            web.put('/storage/table/{table}/query', self.query),
+            web.post('/storage/reading', self.append),
+            web.get('/storage/reading', self.fetch),
+            web.put('/storage/reading/query', self.readings_query),
+            web.put('/storage/reading/purge', self.purge)
+        ])
+
+    def fail_next(self, count=1, status=400, retryable=True):
+        """ Fail the next count requests with the given status """
+        self._failures.extend([(status, retryable)] * count)
+
+    @staticmethod
+    def error(status, message, entry_point, retryable=False):
+        """ Error response in the layout of the storage service """
+        return web.json_response({"entryPoint": entry_point, "message": message, "retryable": retryable},
+                                 status=status)
+
+    @web.middleware
+    async def _inject(self, request, handler):
+        resource = request.match_info.route.resource
+        self.requests['{} {}'.format(request.method, resource.canonical if resource else request.path)] += 1
+        latency = self.latency(request) if callable(self.latency) else self.latency
+        if latency:
+            await asyncio.sleep(latency)
+        if self._failures:
+            status, retryable = self._failures.pop(0)
+            return self.error(status, 'injected failure', request.path, retryable)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            return self.error(400, 'injected failure', request.path, True)
+        return await handler(request)
+
+    async def start(self, host='127.0.0.1', port=None):
+        self.host = host
+        self.port = port if port else unused_port()
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    @property
+    def service_record(self):
+        """ Service record to be given to the storage clients """
+        return ServiceRecord('standin', 'Fledge Storage', 'Storage', 'http', self.host, self.port, self.port)
+
+    def load(self, table, rows):
+        """ Rows added to a table, without going through the REST interface """
+        self.tables[table].extend(rows)
+
+    def load_readings(self, readings):
+        """ Readings added, without going through the REST interface """
+        ts = now()
+        for r in readings:
+            self.readings.append(dict(r, id=self._next_reading_id, ts=ts))
+            self._reading_ids.append(self._next_reading_id)
+            self._next_reading_id += 1
+
+    # Tables
+
+    @staticmethod
+    def _values(values):
+        return {k: now() if v == 'now()' else v for k, v in values.items()}
+
+    async def insert(self, request):
+        payload = await request.json()
+        rows = payload['inserts'] if 'inserts' in payload else [payload]
+        table = self.tables[request.match_info['table']]
+        for row in rows:
+            table.append(self._values(row))
+        return web.json_response({"response": "inserted", "rows_affected": len(rows)})
+
+    def _update(self, table, payload):
+        count = 0
+        for row in table:
+            if not match(row, payload.get('where')):
+                continue
+            row.update(self._values(payload.get('values', {})))
+            for expr in payload.get('expressions', []):
+                value = float(row.get(expr['column']) or 0)
+                operand = expr['value']
+                value = {'+': value + operand, '-': value - operand, '*': value * operand,
+                         '/': value / operand}[expr['operator']]
+                row[expr['column']] = int(value) if value == int(value) else value
+            for prop in payload.get('json_properties', []):
+                if not isinstance(row.get(prop['column']), dict):
+                    row[prop['column']] = {}
+                _set_json_property(row[prop['column']], prop['path'], prop['value'])
+            count += 1
+        return count
+
+    async def update(self, request):
+        payload = await request.json()
+        table = self.tables[request.match_info['table']]
+        count = sum(self._update(table, p) for p in payload.get('updates', [payload]))
+        return web.json_response({"response": "updated", "rows_affected": count})
+
+    async def delete(self, request):
+        body = await request.text()
+        where = json.loads(body).get('where') if body else None
+        name = request.match_info['table']
+        kept = [r for r in self.tables[name] if not match(r, where)]
+        count = len(self.tables[name]) - len(kept)
+        self.tables[name] = kept
+        return web.json_response({"response": "deleted", "rows_affected": count})
+
+    async def query_params(self, request):
+        rows = [r for r in self.tables[request.match_info['table']]
+                if all(_compare(r.get(k), '=', v) for k, v in request.query.items())]
+        return web.json_response({"count": len(rows), "rows": rows})
+
+    async def query(self, request):
+        payload = await request.json()
+        rows = query(self.tables[request.match_info['table']], payload)
+        return web.json_response({"count": len(rows), "rows": rows})
+
+    # Readings
+
+    async def append(self, request):
+        payload = await request.json()
+        ts = now()
+        for r in payload['readings']:
+            reading = r['reading'] if isinstance(r['reading'], dict) else json.loads(r['reading'])
+            self.readings.append({"id": self._next_reading_id, "asset_code": r['asset_code'],
+                                  "read_key": r.get('read_key'), "reading": reading,
+                                  "user_ts": r.get('user_ts', ts), "ts": ts})
+            self._reading_ids.append(self._next_reading_id)
+            self._next_reading_id += 1
+        return web.json_response({"response": "appended", "readings_added": len(payload['readings'])})
+
+    async def fetch(self, request):
+        try:
+            reading_id = int(request.query['id'])
+            count = int(request.query['count'])
+        except (KeyError, ValueError):
+            return self.error(400, 'id and count are required', 'retrieve readings')
+        start = bisect.bisect_left(self._reading_ids, reading_id)
+        rows = self.readings[start:start + count]
+        if not (self.ndjson and NDJSON_CONTENT_TYPE in request.headers.get('Accept', '')):
+            return web.json_response({"count": len(rows), "rows": rows})
+        resp = web.StreamResponse(headers={'Content-Type': NDJSON_CONTENT_TYPE})
+        await resp.prepare(request)
+        for i in range(0, len(rows), _FETCH_CHUNK_ROWS):
+            chunk = ''.join(json.dumps(r) + '\n' for r in rows[i:i + _FETCH_CHUNK_ROWS])
+            await resp.write(chunk.encode())
+        await resp.write_eof()
+        return resp
+
+    async def readings_query(self, request):
+        payload = await request.json()
+        rows = query(self.readings, payload)
+        return web.json_response({"count": len(rows), "rows": rows})
+
+    async def purge(self, request):
+        params = request.query
+        sent = int(params.get('sent', 0))
+        retain = params.get('flags', 'purge') == 'retain'
+        if 'age' in params:
+            limit = time.time() - int(params['age']) * 3600
+            expired = [epoch(r['user_ts']) < limit for r in self.readings]
+        elif 'size' in params:
+            # Oldest readings removed until the JSON size of the others is within size Kbytes
+            budget = int(params['size']) * 1024
+            expired = [False] * len(self.readings)
+            for i in range(len(self.readings) - 1, -1, -1):
+                budget -= len(json.dumps(self.readings[i]))
+                expired[i] = budget < 0
+        else:
+            return self.error(400, 'age or size is required', 'purge')
+        kept = []
+        removed = unsent_purged = unsent_retained = 0
+        for r, old in zip(self.readings, expired):
+            unsent = r['id'] > sent
+            if old and not (unsent and retain):
+                removed += 1
+                unsent_purged += unsent
+            else:
+                unsent_retained += old and unsent
+                kept.append(r)
+        self.readings = kept
+        self._reading_ids = [r['id'] for r in kept]
+        return web.json_response({"removed": removed, "unsentPurged": unsent_purged,
+                                  "unsentRetained": unsent_retained, "readings": len(kept)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fledge storage service stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0, help='seconds added to every request')
+    parser.add_argument('--failure-rate', type=float, default=0, help='probability of a retryable failure')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    standin = StorageStandin(latency=args.latency, failure_rate=args.failure_rate, seed=args.seed)
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(standin.start(args.host, args.port))
+    print('Storage stand-in listening on {}:{}'.format(standin.host, standin.port))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(standin.stop())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Benchmarks of the south ingest, from Ingest.add_readings to the readings appended by the storage stand-in """
+
+import pytest
+
+from ingest_harness import IngestLoad
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+pytestmark = pytest.mark.asyncio
+
+BUFFERED = 2000
+
+
+def pytest_generate_tests(metafunc):
+    if "rate" in metafunc.fixturenames:
+        rate = metafunc.config.getoption("--ingest-rate")
+        metafunc.parametrize("rate", [rate] if rate else [500, 5000])
+
+
+@pytest.fixture
+def load_options(request):
+    return {k: request.config.getoption("--ingest-{}".format(k)) for k in ("duration", "assets", "datapoints")}
+
+
+@pytest.allure.feature("perf")
+@pytest.allure.story("ingest")
+class TestIngestPerf:
+
+    async def test_ingest(self, benchmark, storage_standin, load_options, rate):
+        load = IngestLoad(storage_standin)
+        await load.start()
+        try:
+            await load.drive(rate, **load_options)
+        finally:
+            await load.stop()
+        results = load.results()
+        assert results["enqueued"] == results["committed"] + results["discarded"]
+        benchmark.record(rate=rate, **load_options, **results)
+
+    @pytest.mark.parametrize("datapoints", [1, 10])
+    async def test_memory_per_reading(self, benchmark, storage_standin, datapoints):
+        # The readings stay in the buffer of the ingest as the batches are never full nor timed out
+        load = IngestLoad(storage_standin, buffer_size=4 * BUFFERED, batch_size=2 * BUFFERED, batch_timeout=3600)
+        await load.start()
+        try:
+            per_reading = await load.memory_per_reading(BUFFERED, datapoints=datapoints)
+            assert 0 == len(storage_standin.readings)
+        finally:
+            await load.stop()
+        benchmark.record(datapoints=datapoints, buffered=BUFFERED, bytes_per_reading=round(per_reading))
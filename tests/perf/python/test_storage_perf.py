@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Benchmarks of the storage paths of the Python services, against the storage stand-in """
+
+import json
+from unittest.mock import patch
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+import pytest
+
+from fledge.services.core import connect
+from fledge.services.core.api import browser
+from fledge.tasks.north.sending_process import SendingProcess
+from fledge.tasks.statistics.statistics_history import StatisticsSnapshot
+from storage_standin import now
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+pytestmark = pytest.mark.asyncio
+
+BLOCK_SIZE = 5000
+ASSETS = 10
+STATISTICS = 5000
+
+
+def _readings(count, assets=ASSETS):
+    ts = now()
+    return [{"asset_code": "asset{}".format(i % assets), "read_key": None,
+             "reading": {"sine": i / 10, "cosine": -i / 10, "label": "r{}".format(i)}, "user_ts": ts}
+            for i in range(count)]
+
+
+@pytest.allure.feature("perf")
+@pytest.allure.story("storage")
+class TestStoragePerf:
+
+    @pytest.mark.parametrize("batch_size", [100, 1000])
+    async def test_readings_append(self, benchmark, storage_standin, readings_client, batch_size):
+        readings = {"readings": _readings(batch_size)}
+        await benchmark(readings_client.append, readings)
+        median = sorted(benchmark.timings)[len(benchmark.timings) // 2]
+        benchmark.record(batch_size=batch_size, readings_per_second=round(batch_size / median))
+
+    @pytest.mark.parametrize("streaming", [False, True])
+    async def test_sending_process_load(self, benchmark, storage_standin, readings_client, streaming):
+        storage_standin.load_readings(_readings(BLOCK_SIZE))
+
+        async def load():
+            if streaming:
+                converted = []
+                async with readings_client.fetch_stream(1, BLOCK_SIZE) as rows:
+                    async for row in rows:
+                        converted.append(SendingProcess._transform_in_memory_data_reading(row))
+                return converted
+            block = await readings_client.fetch(1, BLOCK_SIZE)
+            return SendingProcess._transform_in_memory_data_readings(block['rows'])
+
+        assert BLOCK_SIZE == len(await benchmark(load))
+        median = sorted(benchmark.timings)[len(benchmark.timings) // 2]
+        benchmark.record(block_size=BLOCK_SIZE, readings_per_second=round(BLOCK_SIZE / median))
+
+    async def test_purge(self, benchmark, storage_standin, readings_client):
+        async def purge():
+            storage_standin.load_readings(_readings(BLOCK_SIZE))
+            return await readings_client.purge(size=1, sent_id=len(storage_standin.readings), flag='purge')
+
+        result = await benchmark(purge)
+        assert result['removed'] > 0
+
+    @pytest.mark.parametrize("url", ["/fledge/asset", "/fledge/asset/asset1?limit=100",
+                                     "/fledge/asset/asset1/sine/summary", "/fledge/asset/asset1/summary"])
+    async def test_browser(self, benchmark, storage_standin, readings_client, url):
+        storage_standin.load_readings(_readings(BLOCK_SIZE))
+        app = web.Application()
+        browser.setup(app)
+        client = TestClient(TestServer(app))
+        await client.start_server()
+
+        async def get():
+            # Every round is computed, rather than served from the response cache
+            app[browser._RESPONSE_CACHE].set_watermark(None)
+            resp = await client.get(url)
+            assert 200 == resp.status
+            return json.loads(await resp.text())
+
+        try:
+            with patch.object(connect, 'get_readings_async', return_value=readings_client):
+                await benchmark(get)
+        finally:
+            await client.close()
+        benchmark.record(readings=BLOCK_SIZE,
+                         storage_requests_per_round=sum(storage_standin.requests.values()) / benchmark.rounds)
+
+    async def test_statistics_snapshot(self, benchmark, storage_standin, storage_client):
+        # One statistic per asset, one in a hundred of them changes between the snapshots
+        storage_standin.load("statistics", [{"key": "ASSET{}".format(i), "description": "", "value": 0,
+                                             "previous_value": 0} for i in range(STATISTICS)])
+        snapshot = StatisticsSnapshot(storage_client)
+
+        async def take():
+            for r in storage_standin.tables["statistics"][::100]:
+                r["value"] += 1
+            return await snapshot.take()
+
+        assert (STATISTICS, STATISTICS // 100) == await benchmark(take)
+        benchmark.record(statistics=STATISTICS, changed=STATISTICS // 100)
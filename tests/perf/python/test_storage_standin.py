@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Test the storage stand-in against the storage clients """
+
+import pytest
+
+from fledge.common.storage_client.exceptions import StorageServerError
+from fledge.common.storage_client.payload_builder import PayloadBuilder
+from storage_standin import now
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+pytestmark = pytest.mark.asyncio
+
+
+def _readings(count, asset_code='sinusoid', user_ts=None):
+    return {"readings": [{"asset_code": asset_code, "read_key": None, "reading": {"sine": i},
+                          "user_ts": user_ts if user_ts else now()} for i in range(count)]}
+
+
+@pytest.allure.feature("perf")
+@pytest.allure.story("storage stand-in")
+class TestStorageStandin:
+
+    async def test_tables(self, storage_client):
+        await storage_client.insert_into_tbl("statistics", {"inserts": [
+            {"key": "READINGS", "value": 0, "previous_value": 0},
+            {"key": "PURGED", "value": 0, "previous_value": 0}]})
+        payload = PayloadBuilder().WHERE(["key", "=", "READINGS"]).EXPR(["value", "+", 5]).payload()
+        assert 1 == (await storage_client.update_tbl("statistics", payload))["rows_affected"]
+        result = await storage_client.query_tbl_with_payload(
+            "statistics", PayloadBuilder().SELECT("key", "value").ORDER_BY(["key", "asc"]).payload())
+        assert [{"key": "PURGED", "value": 0}, {"key": "READINGS", "value": 5}] == result["rows"]
+        result = await storage_client.query_tbl("statistics", "key=READINGS")
+        assert 5 == result["rows"][0]["value"]
+        payload = PayloadBuilder().WHERE(["key", "in", ["PURGED"]]).payload()
+        assert 1 == (await storage_client.delete_from_tbl("statistics", payload))["rows_affected"]
+        assert 1 == (await storage_client.query_tbl("statistics"))["count"]
+
+    async def test_readings(self, storage_standin, readings_client):
+        await readings_client.append(_readings(5))
+        await readings_client.append(_readings(3, 'random'))
+        block = await readings_client.fetch(2, 3)
+        assert [2, 3, 4] == [r['id'] for r in block['rows']]
+        async with readings_client.fetch_stream(4, 10) as rows:
+            assert rows.streaming
+            assert [4, 5, 6, 7, 8] == [r['id'] async for r in rows]
+        payload = PayloadBuilder().AGGREGATE(["count", "*"]).ALIAS("aggregate", ("*", "count", "count")) \
+            .GROUP_BY("asset_code").payload()
+        result = await readings_client.query(payload)
+        assert [{"asset_code": "sinusoid", "count": 5}, {"asset_code": "random", "count": 3}] == result['rows']
+        payload = PayloadBuilder().AGGREGATE(["max", ["reading", "sine"]]).ALIAS("aggregate", ("reading", "max", "max"))\
+            .WHERE(["asset_code", "=", "sinusoid"]).payload()
+        assert 4 == (await readings_client.query(payload))['rows'][0]['max']
+        assert 2 == storage_standin.requests['POST /storage/reading']
+
+    async def test_purge(self, storage_standin, readings_client):
+        await readings_client.append(_readings(4, user_ts='2020-01-01 10:00:00.000000+00:00'))
+        await readings_client.append(_readings(2))
+        result = await readings_client.purge(age=1, sent_id=2, flag='retain')
+        assert {"removed": 2, "unsentPurged": 0, "unsentRetained": 2, "readings": 4} == result
+        result = await readings_client.purge(age=1, sent_id=2, flag='purge')
+        assert {"removed": 2, "unsentPurged": 2, "unsentRetained": 0, "readings": 2} == result
+
+    async def test_failure_injection(self, storage_standin, readings_client):
+        storage_standin.fail_next()
+        with pytest.raises(StorageServerError) as excinfo:
+            await readings_client.append(_readings(1))
+        assert excinfo.value.error['retryable'] is True
+        await readings_client.append(_readings(1))
+        assert 1 == len(storage_standin.readings)
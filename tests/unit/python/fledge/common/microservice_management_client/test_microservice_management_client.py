@@ -2,12 +2,16 @@
 
 from unittest.mock import MagicMock
 from unittest.mock import patch
-from http.client import HTTPConnection, HTTPResponse
+from http.client import HTTPConnection, HTTPResponse, RemoteDisconnected
+import asyncio
 import json
+import urllib.parse
+from aiohttp import web
 import pytest
 
 from fledge.common.microservice_management_client import exceptions as client_exceptions
-from fledge.common.microservice_management_client.microservice_management_client import MicroserviceManagementClient, _logger
+from fledge.common.microservice_management_client.microservice_management_client import MicroserviceManagementClient, \
+    MicroserviceManagementClientAsync, _logger
 
 __author__ = "Ashwin Gopalakrishnan"
 __copyright__ = "Copyright (c) 2017 OSIsoft, LLC"
@@ -783,3 +787,93 @@ class TestMicroserviceManagementClient:
         assert 'POST' == kwargs['method']
         assert '/fledge/track' == kwargs['url']
         assert test_dict == json.loads(kwargs['body'])
+
+    def test_keep_alive_reconnect(self):
+        ms_mgt_client = MicroserviceManagementClient('host1', 1)
+        response_mock = MagicMock(type=HTTPResponse)
+        response_mock.read.return_value = json.dumps({'track': []}).encode()
+        response_mock.status = 200
+        # A connection that was used before, and that the core closed since
+        ms_mgt_client._management_client_conn.sock = MagicMock()
+        with patch.object(HTTPConnection, 'request') as request_patch:
+            with patch.object(HTTPConnection, 'getresponse',
+                              side_effect=[RemoteDisconnected(), response_mock]) as response_patch:
+                assert {'track': []} == ms_mgt_client.get_asset_tracker_events()
+            assert 2 == response_patch.call_count
+        assert 2 == request_patch.call_count
+
+
+@pytest.allure.feature("unit")
+@pytest.allure.story("common", "microservice-management-client")
+class TestMicroserviceManagementClientAsync:
+
+    @staticmethod
+    async def core(aiohttp_server):
+        """ Management API of the core, that records the connections the requests came over """
+        async def track(request):
+            core.connections.add(id(request.transport))
+            if request.method == 'GET':
+                return web.json_response({'track': []})
+            event = await request.json()
+            if event['asset'] == 'bad':
+                raise web.HTTPBadRequest(reason='bad asset')
+            await asyncio.sleep(0.1)
+            return web.json_response(event)
+
+        async def category(request):
+            await asyncio.sleep(float(request.query.get('delay', 0)))
+            return web.json_response({'name': urllib.parse.unquote(request.match_info['name'])})
+
+        app = web.Application()
+        app.router.add_route('*', '/fledge/track', track)
+        app.router.add_get('/fledge/service/category/{name}', category)
+        core = await aiohttp_server(app)
+        core.connections = set()
+        return core
+
+    async def test_keep_alive(self, aiohttp_server):
+        core = await self.core(aiohttp_server)
+        client = MicroserviceManagementClientAsync(core.host, core.port)
+        try:
+            for _ in range(5):
+                assert {'track': []} == await client.get_asset_tracker_events()
+        finally:
+            await client.close()
+        assert 1 == len(core.connections)
+
+    async def test_create_asset_tracker_events(self, aiohttp_server):
+        core = await self.core(aiohttp_server)
+        events = [{"asset": "a{}".format(i), "event": "Ingest", "service": "s", "plugin": "p"} for i in range(8)]
+        events[3]['asset'] = 'bad'
+        client = MicroserviceManagementClientAsync(core.host, core.port, pool_size=4)
+        try:
+            with patch.object(_logger, "error") as log_error:
+                start = asyncio.get_event_loop().time()
+                results = await client.create_asset_tracker_events(events)
+                elapsed = asyncio.get_event_loop().time() - start
+            log_error.assert_called_once_with('Client error code: %d, Reason: %s', 400, 'bad asset')
+        finally:
+            await client.close()
+        assert isinstance(results[3], client_exceptions.MicroserviceManagementClientError)
+        assert 400 == results[3].status
+        assert events[:3] + events[4:] == results[:3] + results[4:]
+        # Sent 4 at a time over the connections of the pool, not one after the other
+        assert 4 == len(core.connections)
+        assert elapsed < 0.7
+
+    async def test_get_configuration_categories(self, aiohttp_server):
+        core = await self.core(aiohttp_server)
+        client = MicroserviceManagementClientAsync(core.host, core.port)
+        try:
+            assert [{'name': 'a b'}, {'name': 'c'}] == await client.get_configuration_categories(['a b', 'c'])
+        finally:
+            await client.close()
+
+    async def test_timeout(self, aiohttp_server):
+        core = await self.core(aiohttp_server)
+        client = MicroserviceManagementClientAsync(core.host, core.port, timeout=0.2)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await client._request('GET', '/fledge/service/category/slow?delay=3')
+        finally:
+            await client.close()
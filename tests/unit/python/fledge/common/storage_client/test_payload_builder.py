@@ -8,7 +8,8 @@ import json
 import os
 import pytest
 import py
-from fledge.common.storage_client.payload_builder import PayloadBuilder
+from fledge.common.storage_client.payload_builder import PayloadBuilder, PayloadTemplate, Slot
+from fledge.common.storage_client.utils import JsonPayload
 
 __author__ = "Vaibhav Singhal"
 __copyright__ = "Copyright (c) 2017 OSIsoft, LLC"
@@ -449,3 +450,54 @@ class TestPayloadBuilderDelete:
     def test_delete_where_payload(self, input_where, input_table, expected):
         res = PayloadBuilder().DELETE(input_table).WHERE(input_where).payload()
         assert expected == json.loads(res)
+
+
+@pytest.allure.feature("unit")
+@pytest.allure.story("payload_builder")
+class TestPayloadBuilderInstance:
+    """
+    This class tests that the builders do not share state
+    """
+    def test_interleaved_builders(self):
+        b1 = PayloadBuilder().SELECT("name")
+        b2 = PayloadBuilder().SELECT("id")
+        b1.WHERE(["name", "=", "test"])
+        b2.LIMIT(1)
+        assert {"return": ["name"], "where": {"column": "name", "condition": "=", "value": "test"}} == json.loads(
+            b1.payload())
+        assert {"return": ["id"], "limit": 1} == json.loads(b2.payload())
+
+    def test_initial_payload_default_is_not_shared(self):
+        PayloadBuilder().SELECT("name")
+        assert {} == PayloadBuilder().chain_payload()
+
+
+@pytest.allure.feature("unit")
+@pytest.allure.story("payload_builder")
+class TestPayloadTemplate:
+    """
+    This class tests the payload templates
+    """
+    @pytest.mark.parametrize("key, values", [
+        ("test", [1, 2]),
+        ('a "quoted" key', []),
+        (None, ["x"])
+    ])
+    def test_fill(self, key, values):
+        template = PayloadTemplate(PayloadBuilder().SELECT("value").WHERE(["key", "=", Slot("key")])
+                                   .AND_WHERE(["id", "in", Slot("ids")]).LIMIT(1))
+        res = template.fill(key=key, ids=values)
+        assert isinstance(res, JsonPayload)
+        assert PayloadBuilder().SELECT("value").WHERE(["key", "=", key]).AND_WHERE(["id", "in", values]).LIMIT(1)\
+            .payload() == res
+
+    def test_fill_repeated_slot(self):
+        template = PayloadTemplate(PayloadBuilder().SET(value=Slot("v"), previous_value=Slot("v"))
+                                   .WHERE(["key", "=", "test"]).chain_payload())
+        assert {"values": {"value": 5, "previous_value": 5},
+                "where": {"column": "key", "condition": "=", "value": "test"}} == json.loads(template.fill(v=5))
+
+    def test_fill_missing_value(self):
+        template = PayloadTemplate(PayloadBuilder().WHERE(["key", "=", Slot("key")]))
+        with pytest.raises(KeyError):
+            template.fill()
@@ -15,7 +15,8 @@ from aiohttp.test_utils import unused_port
 from functools import partial
 
 from fledge.common.service_record import ServiceRecord
-from fledge.common.storage_client.storage_client import _LOGGER, StorageClientAsync, ReadingsStorageClientAsync
+from fledge.common.storage_client.storage_client import _LOGGER, StorageClientAsync, ReadingsStorageClientAsync, \
+    NDJSON_CONTENT_TYPE
 
 from fledge.common.storage_client.exceptions import *
 
@@ -26,6 +27,9 @@ __version__ = "${VERSION}"
 HOST = '127.0.0.1'
 PORT = unused_port()
 
+ROWS = [{"id": i, "asset_code": "a", "reading": {"x": i}, "user_ts": "2020-01-01 10:00:0{}.000000+00".format(i)}
+        for i in range(1, 4)]
+
 
 class FakeFledgeStorageSrvr:
 
@@ -48,6 +52,7 @@ class FakeFledgeStorageSrvr:
         ])
         self.handler = None
         self.server = None
+        self.ndjson = False
 
     async def start(self):
 
@@ -128,6 +133,18 @@ class FakeFledgeStorageSrvr:
         if request.query.get("id") == "internal_server_err":
             return web.HTTPInternalServerError(reason="something wrong", text='{"key": "value"}')
 
+        if request.query.get("id") == "rows":
+            if self.ndjson and NDJSON_CONTENT_TYPE in request.headers.get('Accept', ''):
+                resp = web.StreamResponse(headers={'Content-Type': NDJSON_CONTENT_TYPE})
+                await resp.prepare(request)
+                text = ''.join(json.dumps(r) + '\n' for r in ROWS)
+                # Lines split across the chunks
+                for i in range(0, len(text), 50):
+                    await resp.write(text[i:i + 50].encode())
+                await resp.write_eof()
+                return resp
+            return web.json_response({"count": len(ROWS), "rows": ROWS})
+
         return web.json_response({"readings": [],
                                   "start": request.query.get('id'),
                                   "count": request.query.get('count')
@@ -163,6 +180,9 @@ class FakeFledgeStorageSrvr:
 @pytest.allure.story("common", "storage_client")
 class TestStorageClientAsync:
 
+    def setup_method(self):
+        StorageClientAsync._storage_services = {}
+
     def test_init(self):
         svc = {"id": 1, "name": "foo", "address": "local", "service_port": 1000, "management_port": 2000,
                "type": "Storage", "protocol": "http"}
@@ -171,6 +191,16 @@ class TestStorageClientAsync:
             assert "local:1000" == sc.base_url
             assert "local:2000" == sc.management_api_url
 
+    def test_init_discovers_storage_service_once(self):
+        svc = {"id": 1, "name": "foo", "address": "local", "service_port": 1000, "management_port": 2000,
+               "type": "Storage", "protocol": "http"}
+        with patch.object(StorageClientAsync, '_get_storage_service', return_value=svc) as patch_get_service:
+            sc = StorageClientAsync(1, 2)
+            rsc = ReadingsStorageClientAsync(1, 2)
+        patch_get_service.assert_called_once_with(host=1, port=2)
+        assert sc.service is rsc.service
+        assert "local:1000" == rsc.base_url
+
     def test_init_with_invalid_storage_service(self):
         svc = {"id": 1, "name": "foo", "address": "local", "service_port": 1000, "management_port": 2000,
                "type": "xStorage", "protocol": "http"}
@@ -239,7 +269,7 @@ class TestStorageClientAsync:
         assert "Data to insert is missing" in str(excinfo.value)
 
         with pytest.raises(Exception) as excinfo:
-            args = "aTable", {"k": "v"}
+            args = "aTable", "blah"
             await sc.insert_into_tbl(*args)
         assert excinfo.type is TypeError
         assert "Provided data to insert must be a valid JSON" in str(excinfo.value)
@@ -248,6 +278,10 @@ class TestStorageClientAsync:
         response = await sc.insert_into_tbl(*args)
         assert {"k": "v"} == response["called"]
 
+        args = "aTable", {"k": "v"}
+        response = await sc.insert_into_tbl(*args)
+        assert {"k": "v"} == response["called"]
+
         with pytest.raises(Exception) as excinfo:
             with patch.object(_LOGGER, "error") as log_e:
                 with patch.object(_LOGGER, "info") as log_i:
@@ -297,7 +331,7 @@ class TestStorageClientAsync:
         assert "Data to update is missing" in str(excinfo.value)
 
         with pytest.raises(Exception) as excinfo:
-            args = "aTable", {"k": "v"}
+            args = "aTable", "blah"
             await sc.update_tbl(*args)
         assert excinfo.type is TypeError
         assert "Provided data to update must be a valid JSON" in str(excinfo.value)
@@ -306,6 +340,10 @@ class TestStorageClientAsync:
         response = await sc.update_tbl(*args)
         assert {"k": "v"} == response["called"]
 
+        args = "aTable", {"k": "v"}
+        response = await sc.update_tbl(*args)
+        assert {"k": "v"} == response["called"]
+
         with pytest.raises(Exception) as excinfo:
             with patch.object(_LOGGER, "error") as log_e:
                 with patch.object(_LOGGER, "info") as log_i:
@@ -353,7 +391,7 @@ class TestStorageClientAsync:
         assert 1 == response["called"]
 
         with pytest.raises(Exception) as excinfo:
-            args = "aTable", {"condition": "v"}
+            args = "aTable", "blah"
             await sc.delete_from_tbl(*args)
         assert excinfo.type is TypeError
         assert "condition payload must be a valid JSON" in str(excinfo.value)
@@ -362,6 +400,10 @@ class TestStorageClientAsync:
         response = await sc.delete_from_tbl(*args)
         assert {"condition": "v"} == response["called"]
 
+        args = "aTable", {"condition": "v"}
+        response = await sc.delete_from_tbl(*args)
+        assert {"condition": "v"} == response["called"]
+
         with pytest.raises(Exception) as excinfo:
             with patch.object(_LOGGER, "error") as log_e:
                 with patch.object(_LOGGER, "info") as log_i:
@@ -461,7 +503,7 @@ class TestStorageClientAsync:
         assert "Query payload is missing" in str(excinfo.value)
 
         with pytest.raises(Exception) as excinfo:
-            args = "aTable", {"k": "v"}
+            args = "aTable", "blah"
             await sc.query_tbl_with_payload(*args)
         assert excinfo.type is TypeError
         assert "Query payload must be a valid JSON" in str(excinfo.value)
@@ -470,6 +512,10 @@ class TestStorageClientAsync:
         response = await sc.query_tbl_with_payload(*args)
         assert {"k": "v"} == response["called"]
 
+        args = "aTable", {"k": "v"}
+        response = await sc.query_tbl_with_payload(*args)
+        assert {"k": "v"} == response["called"]
+
         with pytest.raises(Exception) as excinfo:
             with patch.object(_LOGGER, "error") as log_e:
                 with patch.object(_LOGGER, "info") as log_i:
@@ -554,6 +600,9 @@ class TestReadingsStorageAsyncClient:
         response = await rsc.append(readings)
         assert {'readings': []} == response['appended']
 
+        response = await rsc.append({"readings": [{"asset_code": "a", "reading": {"x": 1}}]})
+        assert {'readings': [{"asset_code": "a", "reading": {"x": 1}}]} == response['appended']
+
         await fake_storage_srvr.stop()
 
     @pytest.mark.asyncio
@@ -611,6 +660,37 @@ class TestReadingsStorageAsyncClient:
 
         await fake_storage_srvr.stop()
 
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("ndjson", [True, False])
+    async def test_fetch_stream(self, event_loop, ndjson):
+        fake_storage_srvr = FakeFledgeStorageSrvr(loop=event_loop)
+        fake_storage_srvr.ndjson = ndjson
+        await fake_storage_srvr.start()
+
+        mockServiceRecord = MagicMock(ServiceRecord)
+        mockServiceRecord._address = HOST
+        mockServiceRecord._type = "Storage"
+        mockServiceRecord._port = PORT
+        mockServiceRecord._management_port = 2000
+
+        rsc = ReadingsStorageClientAsync(1, 2, mockServiceRecord)
+
+        with pytest.raises(ValueError) as excinfo:
+            rsc.fetch_stream(None, 3)
+        assert "first reading id to retrieve the readings block is required" in str(excinfo.value)
+
+        with pytest.raises(Exception) as excinfo:
+            async with rsc.fetch_stream("bad_data", 3):
+                pass
+        assert excinfo.type is aiohttp.client_exceptions.ContentTypeError
+
+        async with rsc.fetch_stream("rows", 3) as rows:
+            # The storage service that does not stream the rows answers with the JSON document
+            assert ndjson is rows.streaming
+            assert ROWS == [row async for row in rows]
+
+        await fake_storage_srvr.stop()
+
     @pytest.mark.asyncio
     async def test_query(self, event_loop):
         # 'PUT', '/storage/reading/query' query_payload
@@ -640,6 +720,9 @@ class TestReadingsStorageAsyncClient:
         response = await rsc.query(json.dumps({"k": "v"}))
         assert {"k": "v"} == response["called"]
 
+        response = await rsc.query({"k": "v"})
+        assert {"k": "v"} == response["called"]
+
         with pytest.raises(Exception) as excinfo:
             with patch.object(_LOGGER, "error") as log_e:
                 await rsc.query(json.dumps({"bad_request": "v"}))
@@ -6,8 +6,10 @@
 
 """ Test common/storage_client/utils.py """
 
+from unittest.mock import patch
+
 import pytest
-from fledge.common.storage_client.utils import Utils
+from fledge.common.storage_client.utils import Utils, JsonPayload
 
 __copyright__ = "Copyright (c) 2018 OSIsoft, LLC"
 __license__ = "Apache 2.0"
@@ -45,3 +47,19 @@ class TestUtils:
     def test_is_json_return_false_with_invalid_json(self, test_input):
         ret_val = Utils.is_json(test_input)
         assert ret_val is False
+
+    @pytest.mark.parametrize("test_input, expected", [({"k": "v"}, '{"k": "v"}'),
+                                                      ([{"k": 1}], '[{"k": 1}]'),
+                                                      ('{"k": "v"}', '{"k": "v"}'),
+                                                      ('{ k": "v"}', None),
+                                                      ({"k", "v"}, None),
+                                                      (1, None)
+                                                      ])
+    def test_encode(self, test_input, expected):
+        assert expected == Utils.encode(test_input)
+
+    def test_encode_trusted_payload_is_not_parsed(self):
+        payload = JsonPayload('{"k": "v"}')
+        with patch.object(Utils, 'is_json') as patch_is_json:
+            assert payload is Utils.encode(payload)
+        patch_is_json.assert_not_called()
@@ -1,10 +1,16 @@
 # -*- coding: utf-8 -*-
 
 import asyncio
+import datetime
+import json
+import os
+import sqlite3
+import time
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from fledge.common.audit_logger import AuditLogger
+from fledge.common.storage_client.exceptions import StorageServerError
 from fledge.common.storage_client.storage_client import StorageClientAsync
 
 __copyright__ = "Copyright (c) 2018 OSIsoft, LLC"
@@ -130,3 +136,125 @@ class TestAuditLogger():
         await audit.success('AUDTCODE', None)
         assert audit._storage.insert_into_tbl.called is True
         audit._storage.insert_into_tbl.reset_mock()
+
+    @pytest.mark.asyncio
+    async def test_buffering(self):
+        """ Test that the buffered entries are written in a single insert, with the repeated failures coalesced """
+        async def mock_insert(table, payload):
+            return None
+
+        storageMock = MagicMock(spec=StorageClientAsync)
+        audit = AuditLogger(storageMock)
+        with patch.object(audit._storage, 'insert_into_tbl', side_effect=mock_insert) as patch_insert:
+            audit.start_buffering(flush_interval=60)
+            try:
+                await audit.information('NTFSN', {'sentRows': 10})
+                for _ in range(3):
+                    await audit.failure('NTFSN', {'error': 'connection refused'})
+                await audit.failure('NTFSN', {'error': 'timeout'})
+                await audit.information('NTFSN', {'sentRows': 10})
+                assert patch_insert.called is False
+            finally:
+                await audit.stop_buffering()
+        patch_insert.assert_called_once()
+        table, payload = patch_insert.call_args[0]
+        assert 'log' == table
+        rows = payload['inserts']
+        assert [({'sentRows': 10}, 4),
+                ({'error': 'connection refused', 'repeated': 3}, 1),
+                ({'error': 'timeout'}, 1),
+                ({'sentRows': 10}, 4)] == [(row['log'], row['level']) for row in rows]
+        assert all(row['code'] == 'NTFSN' and row['ts'] for row in rows)
+        # The time is in UTC, with an explicit offset
+        ts = datetime.datetime.strptime(rows[0]['ts'].replace('+00:00', '+0000'), '%Y-%m-%d %H:%M:%S.%f%z')
+        assert abs(datetime.datetime.now(datetime.timezone.utc) - ts) < datetime.timedelta(seconds=60)
+
+    @pytest.mark.asyncio
+    async def test_buffering_ts_order(self):
+        """ Test that the buffered entries sort by ts with the entries whose ts is the default of the column """
+        db = sqlite3.connect(':memory:')
+        db.execute("CREATE TABLE log (id INTEGER PRIMARY KEY AUTOINCREMENT, code CHARACTER(5), level SMALLINT, "
+                   "log JSON, ts DATETIME DEFAULT (STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW')))")
+
+        async def mock_insert(table, payload):
+            # The entries that are not buffered are inserted one at a time, with the JSON of a PayloadBuilder
+            payload = json.loads(payload) if isinstance(payload, str) else payload
+            for row in payload.get('inserts', [payload]):
+                columns = [c for c in ('code', 'level', 'log', 'ts') if c in row]
+                db.execute("INSERT INTO log ({}) VALUES ({})".format(', '.join(columns), ', '.join('?' * len(columns))),
+                           [json.dumps(row[c]) if c == 'log' else row[c] for c in columns])
+
+        storageMock = MagicMock(spec=StorageClientAsync)
+        audit = AuditLogger(storageMock)
+        tz = os.environ.get('TZ')
+        # A time zone ahead of UTC, where the local time would sort the buffered entries last
+        os.environ['TZ'] = 'Asia/Kolkata'
+        time.tzset()
+        try:
+            with patch.object(audit._storage, 'insert_into_tbl', side_effect=mock_insert):
+                for n in range(4):
+                    if n % 2 == 0:
+                        audit.start_buffering(flush_interval=60)
+                    await audit.information('NTFSN', {'n': n})
+                    if n % 2 == 0:
+                        await audit.stop_buffering()
+                    await asyncio.sleep(0.01)
+        finally:
+            if tz is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = tz
+            time.tzset()
+        rows = db.execute("SELECT log FROM log ORDER BY ts DESC").fetchall()
+        assert [{'n': 3}, {'n': 2}, {'n': 1}, {'n': 0}] == [json.loads(row[0]) for row in rows]
+
+    @pytest.mark.asyncio
+    async def test_buffering_flush_size(self):
+        """ Test that the buffer is flushed once it has flush_size entries, and kept when the flush fails """
+        inserts = []
+
+        async def mock_insert(table, payload):
+            if not inserts:
+                inserts.append(None)
+                raise StorageServerError(400, 'Bad request', {})
+            inserts.append(payload['inserts'])
+
+        storageMock = MagicMock(spec=StorageClientAsync)
+        audit = AuditLogger(storageMock)
+        with patch.object(audit._storage, 'insert_into_tbl', side_effect=mock_insert):
+            audit.start_buffering(flush_interval=60, flush_size=2)
+            try:
+                await audit.success('AUDTCODE', {'entry': 1})
+                await audit.success('AUDTCODE', {'entry': 2})
+                await asyncio.sleep(0)
+                # The failed flush
+                assert [None] == inserts
+                # The buffer holds more than flush_size entries, the next one triggers a flush
+                await audit.success('AUDTCODE', None)
+                await asyncio.sleep(0)
+                assert 2 == len(inserts)
+            finally:
+                await audit.stop_buffering()
+        assert [{'entry': 1}, {'entry': 2}, None] == [row.get('log') for row in inserts[1]]
+        # The entries are written one at a time again
+        assert audit._buffer is None
+
+    @pytest.mark.asyncio
+    async def test_stop_buffering_pending_flush(self):
+        """ Test that stop_buffering waits for the flush triggered by flush_size """
+        inserts = []
+
+        async def mock_insert(table, payload):
+            await asyncio.sleep(0.1)
+            inserts.append(payload['inserts'])
+
+        storageMock = MagicMock(spec=StorageClientAsync)
+        audit = AuditLogger(storageMock)
+        with patch.object(audit._storage, 'insert_into_tbl', side_effect=mock_insert):
+            audit.start_buffering(flush_interval=60, flush_size=2)
+            await audit.success('AUDTCODE', {'entry': 1})
+            await audit.success('AUDTCODE', {'entry': 2})
+            # The flush has started, its insert is pending
+            await asyncio.sleep(0)
+            await audit.stop_buffering()
+        assert [[{'entry': 1}, {'entry': 2}]] == [[row['log'] for row in rows] for rows in inserts]
@@ -3,11 +3,12 @@
 import asyncio
 import json
 import ipaddress
+import math
 from unittest.mock import MagicMock, patch, call
 import pytest
 
 
-from fledge.common.configuration_manager import ConfigurationManager, ConfigurationManagerSingleton, _valid_type_strings, _logger, _optional_items
+from fledge.common.configuration_manager import ConfigurationManager, ConfigurationManagerSingleton, _valid_type_strings, _logger, _optional_items, ItemValidator
 from fledge.common.storage_client.payload_builder import PayloadBuilder
 from fledge.common.storage_client.storage_client import StorageClientAsync
 from fledge.common.storage_client.exceptions import StorageServerError
@@ -1627,17 +1628,10 @@ class TestConfigurationManager:
         storage_client_mock = MagicMock(spec=StorageClientAsync, **attrs)
         c_mgr = ConfigurationManager(storage_client_mock)
 
-        with patch.object(PayloadBuilder, '__init__', return_value=None):
-            with patch.object(PayloadBuilder, 'SELECT', return_value=PayloadBuilder) as pbselectpatch:
-                with patch.object(PayloadBuilder, 'WHERE', return_value=PayloadBuilder) as pbwherepatch:
-                    with patch.object(PayloadBuilder, 'payload', return_value=None) as pbpayloadpatch:
-                        ret_val = await c_mgr._read_category_val(category_name)
-                        assert 'value1' == ret_val
-                    pbpayloadpatch.assert_called_once_with()
-                pbwherepatch.assert_called_once_with(["key", "=", category_name])
-            pbselectpatch.assert_called_once_with('value')
-        storage_client_mock.query_tbl_with_payload.assert_called_once_with(
-            'configuration', None)
+        ret_val = await c_mgr._read_category_val(category_name)
+        assert 'value1' == ret_val
+        payload = PayloadBuilder().SELECT("value").WHERE(["key", "=", category_name]).payload()
+        storage_client_mock.query_tbl_with_payload.assert_called_once_with('configuration', payload)
 
     @pytest.mark.asyncio
     async def test__read_category_val_0_row(self, reset_singleton):
@@ -1651,17 +1645,10 @@ class TestConfigurationManager:
         storage_client_mock = MagicMock(spec=StorageClientAsync, **attrs)
         c_mgr = ConfigurationManager(storage_client_mock)
 
-        with patch.object(PayloadBuilder, '__init__', return_value=None):
-            with patch.object(PayloadBuilder, 'SELECT', return_value=PayloadBuilder) as pbselectpatch:
-                with patch.object(PayloadBuilder, 'WHERE', return_value=PayloadBuilder) as pbwherepatch:
-                    with patch.object(PayloadBuilder, 'payload', return_value=None) as pbpayloadpatch:
-                        ret_val = await c_mgr._read_category_val(category_name)
-                        assert ret_val is None
-                    pbpayloadpatch.assert_called_once_with()
-                pbwherepatch.assert_called_once_with(["key", "=", category_name])
-            pbselectpatch.assert_called_once_with('value')
-        storage_client_mock.query_tbl_with_payload.assert_called_once_with(
-            'configuration', None)
+        ret_val = await c_mgr._read_category_val(category_name)
+        assert ret_val is None
+        payload = PayloadBuilder().SELECT("value").WHERE(["key", "=", category_name]).payload()
+        storage_client_mock.query_tbl_with_payload.assert_called_once_with('configuration', payload)
 
     @pytest.mark.asyncio
     async def test__read_item_val_0_row(self, reset_singleton):
@@ -2686,6 +2673,52 @@ class TestConfigurationManager:
                                 await c_mgr.update_configuration_item_bulk(category_name, config_item_list)
             assert 1 == patch_update.call_count
 
+    @pytest.mark.parametrize("rule, value", [
+        ('value * 3 == 6', '2'),
+        ('value * 3 == 6', '3'),
+        ('value > 4', '4.5'),
+        ('value * (value + 1) == 6', '2'),
+        ('sqrt(value) < 1', '0.25'),
+        ('value ^ value == 2', '3'),
+        ('factorial(value) != 6', '3'),
+        ('value in [1, 2]', '2'),
+        ('value == True', 'True'),
+        # The value is substituted in the text: -2 ** 2 is -(2 ** 2)
+        ('value ** 2 == 4', '-2'),
+        ('value ** 2 == -4', '-2'),
+        # Every occurrence of value is substituted, in names and strings too
+        ('"values" == "2s"', '2'),
+        ('len("value") == 3', '12')
+    ])
+    def test_item_validator_rule(self, rule, value):
+        validator = ItemValidator({'rule': rule, 'type': 'integer'})
+        # Same outcome as evaluating the rule text with the value substituted
+        assert (eval(rule.replace("value", value), vars(math)) is not False) == validator.check_rule(value)
+
+    def test_item_validator_rule_substitution(self):
+        assert ItemValidator({'rule': 'value ** 2 == 4', 'type': 'integer'}).check_rule('-2') is False
+        assert ItemValidator({'rule': '"values" == "2s"', 'type': 'integer'}).check_rule('2') is True
+
+    def test_item_validator_rule_with_expression_value(self):
+        validator = ItemValidator({'rule': 'value == 6', 'type': 'integer'})
+        # Not a literal, evaluated as part of the rule text
+        assert validator.check_rule('2 * 3') is True
+        with pytest.raises(NameError):
+            validator.check_rule('blah')
+
+    async def test_item_validator_is_compiled_once(self, reset_singleton):
+        storage_client_mock = MagicMock(spec=StorageClientAsync)
+        c_mgr = ConfigurationManager(storage_client_mock)
+        item_val = {'rule': 'value*3==9', 'default': '3', 'description': 'Test', 'value': '3', 'type': 'integer'}
+        validator = c_mgr._get_item_validator('testcat', 'info', item_val)
+        item_val['value'] = '4'
+        assert validator is c_mgr._get_item_validator('testcat', 'info', item_val)
+        # A new definition compiles a new validator
+        item_val['rule'] = 'value*3==12'
+        new_validator = c_mgr._get_item_validator('testcat', 'info', item_val)
+        assert new_validator is not validator
+        assert new_validator.check_rule('4') is True
+
     @pytest.mark.parametrize("config_item_list", [
         {'info': "2"},
         {'info': "2", "info1": "9"},
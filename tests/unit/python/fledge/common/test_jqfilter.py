@@ -11,6 +11,7 @@ from unittest.mock import patch
 import pytest
 import pyjq
 from fledge.common import logger
+from fledge.common import jqfilter
 from fledge.common.jqfilter import JQFilter
 
 __author__ = "Vaibhav Singhal"
@@ -28,15 +29,20 @@ class TestJQFilter:
         assert isinstance(jqfilter_instance, JQFilter)
         log.assert_called_once_with("JQFilter")
 
+    def setup_method(self):
+        jqfilter._compile.cache_clear()
+
     @pytest.mark.parametrize("input_filter_string, input_reading_block, expected_return", [
         (".", '{"a": 1}', '{"a": 1}')
     ])
     def test_transform(self, input_filter_string, input_reading_block, expected_return):
         jqfilter_instance = JQFilter()
-        with patch.object(pyjq, "all", return_value=expected_return) as mock_pyjq:
+        with patch.object(pyjq, "compile") as mock_pyjq:
+            mock_pyjq.return_value.all.return_value = expected_return
             ret = jqfilter_instance.transform(input_filter_string, input_reading_block)
             assert ret == expected_return
-        mock_pyjq.assert_called_once_with(input_reading_block, input_filter_string)
+        mock_pyjq.assert_called_once_with(input_reading_block)
+        mock_pyjq.return_value.all.assert_called_once_with(input_filter_string)
 
     @pytest.mark.parametrize("input_filter_string, input_reading_block, expected_error, expected_log", [
         (".", '{"a" 1}', TypeError, 'Invalid JSON passed, exception %s'),
@@ -44,9 +50,32 @@ class TestJQFilter:
     ])
     def test_transform_exceptions(self, input_filter_string, input_reading_block, expected_error, expected_log):
         jqfilter_instance = JQFilter()
-        with patch.object(pyjq, "all", side_effect=expected_error) as mock_pyjq:
+        with patch.object(pyjq, "compile", side_effect=expected_error) as mock_pyjq:
             with patch.object(jqfilter_instance._logger, "error") as log:
                 with pytest.raises(expected_error):
                     jqfilter_instance.transform(input_filter_string, input_reading_block)
-        mock_pyjq.assert_called_once_with(input_reading_block, input_filter_string)
+        mock_pyjq.assert_called_once_with(input_reading_block)
         log.assert_called_once_with(expected_log, '')
+
+    def test_transform_compiles_once(self):
+        jqfilter_instance = JQFilter()
+        with patch.object(pyjq, "compile", wraps=pyjq.compile) as mock_pyjq:
+            for i in range(3):
+                assert [[{"id": i, "b": True}]] == jqfilter_instance.transform([{"id": i, "a": None}],
+                                                                                 "[.[] | {id, b: true}]")
+            assert [[{"id": 3, "b": True}]] == JQFilter().transform([{"id": 3}], "[.[] | {id, b: true}]")
+        mock_pyjq.assert_called_once_with("[.[] | {id, b: true}]")
+
+    def test_transform_rows(self):
+        jqfilter_instance = JQFilter()
+        rows = iter([{"id": 1, "reading": {"a": 1}}, {"id": 2, "reading": {}}, {"id": 3, "reading": {"a": 3}}])
+        outputs = jqfilter_instance.transform_rows(rows, "select(.reading.a) | {id, a: .reading.a}")
+        assert [{"id": 1, "a": 1}, {"id": 3, "a": 3}] == list(outputs)
+
+    def test_transform_rows_exception(self):
+        jqfilter_instance = JQFilter()
+        with patch.object(jqfilter_instance._logger, "error") as log:
+            with pytest.raises(ValueError):
+                list(jqfilter_instance.transform_rows([{"a": 1}], "..x"))
+        args, kwargs = log.call_args
+        assert 'Failed to transform, please check the transformation rule, exception %s' == args[0]
@@ -4,8 +4,10 @@
 # See: http://fledge.readthedocs.io/
 # FLEDGE_END
 
+import io
 import pytest
 import logging
+from unittest.mock import patch
 
 from fledge.common import logger
 
@@ -95,3 +97,59 @@ class TestLogger:
                     log.setLevel(level) 
                     log.propagate = propagate
                     assert log is logger.setup(name, propagate=propagate, level=level)
+
+    def test_setup_again(self):
+        """ Test that setting a logger up again does not add another handler """
+        instance = logger.setup('fledge.test.again')
+        assert instance is logger.setup('fledge.test.again', level=logging.INFO)
+        assert 1 == len(instance.handlers)
+        assert logging.INFO == instance.level
+
+    def test_records_written_by_thread(self):
+        """ Test that the records are formatted and written by the logging thread """
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(fmt=logger._FORMAT))
+        with patch.dict(logger._listener._handlers, {logger.CONSOLE: handler}):
+            instance = logger.setup('fledge.test.thread', destination=logger.CONSOLE, level=logging.INFO)
+            items = ['a']
+            instance.info("Items %s", items)
+            # The message is merged with its arguments when it is logged
+            items.append('b')
+            instance.debug("Not written")
+            logger.flush()
+        assert "INFO: test_logger: fledge.test.thread: Items ['a']\n" in stream.getvalue()
+        assert "Not written" not in stream.getvalue()
+
+    def test_repeat_filter(self):
+        """ Test that the records of a line of code past the burst of an interval are suppressed, and counted """
+        def record(created, level=logging.INFO):
+            return logging.makeLogRecord({'pathname': 'module.py', 'lineno': 10, 'created': created,
+                                          'levelno': level, 'msg': 'Repeated'})
+        repeat_filter = logger._RepeatFilter()
+        with patch.object(logger, '_REPEAT_BURST', 2):
+            assert [True, True, False, False] == [repeat_filter.filter(record(100 + i)) for i in range(4)]
+            # Errors are not rate limited
+            assert repeat_filter.filter(record(104, logging.ERROR)) is True
+            # A new interval
+            next_record = record(100 + logger._REPEAT_INTERVAL)
+            assert repeat_filter.filter(next_record) is True
+        assert 'Repeated (2 similar messages suppressed)' == next_record.msg
+
+    def test_set_level_overrides(self):
+        """ Test that the level overrides apply to the loggers set up before and after, until they are removed """
+        try:
+            instance = logger.setup('fledge.test.override', level=logging.INFO)
+            logger.set_level_overrides({'fledge.test.override': 'warning', 'fledge.test.override_later': 40})
+            assert logging.WARNING == instance.level
+            assert logging.ERROR == logger.setup('fledge.test.override_later', level=logging.DEBUG).level
+
+            with pytest.raises(ValueError):
+                logger.set_level_overrides({'fledge.test.override': 'loud'})
+            assert logging.WARNING == instance.level
+
+            logger.set_level_overrides({})
+            assert logging.INFO == instance.level
+            assert logging.DEBUG == logging.getLogger('fledge.test.override_later').level
+        finally:
+            logger.set_level_overrides({})
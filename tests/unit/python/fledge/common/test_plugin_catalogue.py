@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+import json
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from fledge.common.plugin_catalogue import PluginCatalogue
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+INFO = {"name": "Random", "version": "1.0.0", "type": "south", "config": {"plugin": {"default": "Random"}}}
+
+
+@pytest.fixture
+def catalogue(tmpdir, monkeypatch):
+    monkeypatch.setattr(PluginCatalogue, '_CATALOGUE_FILE', str(tmpdir.join('var', 'catalogue.json')))
+    monkeypatch.setattr(PluginCatalogue, '_entries', None)
+    return tmpdir
+
+
+@pytest.allure.feature("unit")
+@pytest.allure.story("common", "plugin-catalogue")
+class TestPluginCatalogue:
+
+    def test_get(self, catalogue):
+        lib = catalogue.join('libRandom.so')
+        lib.write('v1')
+        fetch = MagicMock(return_value=INFO)
+        assert INFO == PluginCatalogue.get(str(lib), fetch)
+        info = PluginCatalogue.get(str(lib), fetch)
+        assert INFO == info
+        fetch.assert_called_once_with()
+        # The callers get their own copy
+        info['config']['plugin']['default'] = 'Other'
+        assert INFO == PluginCatalogue.get(str(lib), fetch)
+
+    def test_get_persistent(self, catalogue):
+        lib = catalogue.join('libRandom.so')
+        lib.write('v1')
+        PluginCatalogue.get(str(lib), MagicMock(return_value=INFO))
+        saved = json.loads(catalogue.join('var', 'catalogue.json').read())
+        assert INFO == saved[str(lib)]['info']
+        # A restart loads the catalogue from its file
+        PluginCatalogue._entries = None
+        fetch = MagicMock()
+        assert INFO == PluginCatalogue.get(str(lib), fetch)
+        fetch.assert_not_called()
+
+    def test_get_changed(self, catalogue):
+        lib = catalogue.join('libRandom.so')
+        lib.write('v1')
+        PluginCatalogue.get(str(lib), MagicMock(return_value=INFO))
+        lib.write('v1.1')
+        info = dict(INFO, version="1.1.0")
+        fetch = MagicMock(return_value=info)
+        assert info == PluginCatalogue.get(str(lib), fetch)
+        fetch.assert_called_once_with()
+
+    def test_get_removed(self, catalogue):
+        lib = catalogue.join('libRandom.so')
+        lib.write('v1')
+        other = catalogue.join('libSinusoid.so')
+        other.write('v1')
+        PluginCatalogue.get(str(lib), MagicMock(return_value=INFO))
+        os.remove(str(lib))
+        PluginCatalogue.get(str(other), MagicMock(return_value=INFO))
+        assert [str(other)] == list(json.loads(catalogue.join('var', 'catalogue.json').read()))
+
+    @pytest.mark.parametrize("path", [None, [''], '/not/a/plugin.so'])
+    def test_get_not_a_file(self, catalogue, path):
+        fetch = MagicMock(return_value={})
+        assert {} == PluginCatalogue.get(path, fetch)
+        assert {} == PluginCatalogue.get(path, fetch)
+        assert 2 == fetch.call_count
+
+    def test_get_failed_fetch_not_kept(self, catalogue):
+        lib = catalogue.join('libRandom.so')
+        lib.write('v1')
+        fetch = MagicMock(side_effect=[{}, INFO])
+        assert {} == PluginCatalogue.get(str(lib), fetch)
+        assert INFO == PluginCatalogue.get(str(lib), fetch)
+
+    def test_get_not_json_not_kept(self, catalogue):
+        lib = catalogue.join('libRandom.so')
+        lib.write('v1')
+        info = dict(INFO, version=object())
+        fetch = MagicMock(return_value=info)
+        assert info == PluginCatalogue.get(str(lib), fetch)
+        assert info == PluginCatalogue.get(str(lib), fetch)
+        assert 2 == fetch.call_count
+        # The other plugins are still catalogued
+        other = catalogue.join('libSine.so')
+        other.write('v1')
+        assert INFO == PluginCatalogue.get(str(other), MagicMock(return_value=INFO))
+        assert [str(other)] == list(json.loads(catalogue.join('var', 'catalogue.json').read()))
+
+    def test_get_unreadable_catalogue(self, catalogue):
+        catalogue.join('var').mkdir()
+        catalogue.join('var', 'catalogue.json').write('{')
+        lib = catalogue.join('libRandom.so')
+        lib.write('v1')
+        assert INFO == PluginCatalogue.get(str(lib), MagicMock(return_value=INFO))
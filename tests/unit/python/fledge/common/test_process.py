@@ -6,6 +6,7 @@ import sys
 from unittest.mock import patch
 
 from fledge.common.storage_client.storage_client import ReadingsStorageClientAsync, StorageClientAsync
+from fledge.common import process
 from fledge.common.process import FledgeProcess, ArgumentParserError
 from fledge.common.microservice_management_client.microservice_management_client import MicroserviceManagementClient
 
@@ -63,6 +64,41 @@ class TestFledgeProcess:
         assert hasattr(fp, '_storage_async')
         assert hasattr(fp, '_start_time')
 
+    def test_constructor_profile_startup(self):
+        class FledgeProcessImp(FledgeProcess):
+            def run(self):
+                pass
+        with patch.object(sys, 'argv', ['pytest', '--address', 'corehost', '--port', '32333', '--name', 'sname',
+                                        '--profile-startup']):
+            with patch.object(MicroserviceManagementClient, '__init__', return_value=None):
+                with patch.object(ReadingsStorageClientAsync, '__init__', return_value=None):
+                    with patch.object(StorageClientAsync, '__init__', return_value=None):
+                        fp = FledgeProcessImp()
+        with patch.object(process._logger, 'info') as patch_log_info:
+            fp._startup_profile.mark('plugin load')
+            fp._startup_profile.report(fp._name)
+            # The phases are only reported once
+            fp._startup_profile.report(fp._name)
+        patch_log_info.assert_called_once()
+        args = patch_log_info.call_args[0]
+        assert 'sname' == args[1]
+        assert ['imports', 'arguments', 'storage discovery', 'plugin load'] == \
+            [phase.rsplit(' ', 1)[0] for phase in args[2].split(', ')]
+
+    def test_constructor_without_profile_startup(self):
+        class FledgeProcessImp(FledgeProcess):
+            def run(self):
+                pass
+        with patch.object(sys, 'argv', ['pytest', '--address', 'corehost', '--port', '32333', '--name', 'sname']):
+            with patch.object(MicroserviceManagementClient, '__init__', return_value=None):
+                with patch.object(ReadingsStorageClientAsync, '__init__', return_value=None):
+                    with patch.object(StorageClientAsync, '__init__', return_value=None):
+                        fp = FledgeProcessImp()
+        with patch.object(process._logger, 'info') as patch_log_info:
+            fp._startup_profile.mark('plugin load')
+            fp._startup_profile.report(fp._name)
+        patch_log_info.assert_not_called()
+
     def test_get_services_from_core(self):
         class FledgeProcessImp(FledgeProcess):
             def run(self):
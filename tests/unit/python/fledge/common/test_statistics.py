@@ -147,6 +147,23 @@ class TestStatistics:
             assert expected_result['response'] == "updated"
         stat_update.assert_called_once_with('statistics', payload)
 
+    async def test_set_bulk(self):
+        storage_client_mock = MagicMock(spec=StorageClientAsync)
+        s = statistics.Statistics(storage_client_mock)
+
+        async def mock_coro():
+            return {"response": "updated", "rows_affected": 2}
+
+        with patch.object(s._storage, 'update_tbl', return_value=mock_coro()) as stat_update:
+            await s.set_bulk({'BUFFER-BLOCKS': 2, 'BUFFER-BYTES': 0})
+        args, kwargs = stat_update.call_args
+        assert 'statistics' == args[0]
+        assert [({'value': 2, 'previous_value': 2}, 'BUFFER-BLOCKS'),
+                ({'value': 0, 'previous_value': 0}, 'BUFFER-BYTES')] == [
+            (update['values'], update['where']['value']) for update in args[1]['updates']]
+        with pytest.raises(TypeError):
+            await s.set_bulk([('BUFFER-BLOCKS', 2)])
+
     @pytest.mark.parametrize("key, value_increment, exception_name, exception_message", [
         (123456, 120, TypeError, "key must be a string"),
         ('PURGED', '120', ValueError, "value must be an integer"),
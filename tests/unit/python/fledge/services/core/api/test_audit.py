@@ -97,23 +97,47 @@ class TestAudit:
                 assert Counter(expected_code_list) == Counter(codes)
             log_code_patch.assert_called_once_with('log_codes')
 
-    @pytest.mark.parametrize("request_params, payload", [
-        ('', {"return": ["code", "level", "log", {"column": "ts", "format": "YYYY-MM-DD HH24:MI:SS.MS", "alias": "timestamp"}], "where": {"column": "1", "condition": "=", "value": 1}, "sort": {"column": "ts", "direction": "desc"}, "limit": 20}),
-        ('?source=PURGE', {'return': ['code', 'level', 'log', {'format': 'YYYY-MM-DD HH24:MI:SS.MS', 'column': 'ts', 'alias': 'timestamp'}], 'where': {'value': 1, 'and': {'value': 'PURGE', 'column': 'code', 'condition': '='}, 'column': '1', 'condition': '='}, 'sort': {'direction': 'desc', 'column': 'ts'}, 'limit': 20}),
-        ('?source=PURGE,START,CONAD', {'return': ['code', 'level', 'log', {'format': 'YYYY-MM-DD HH24:MI:SS.MS', 'column': 'ts', 'alias': 'timestamp'}], 'where': {'value': ['PURGE', 'START', 'CONAD'], 'column': 'code', 'condition': 'in'}, 'sort': {'direction': 'desc', 'column': 'ts'}, 'limit': 20}),
-        ('?skip=1', {'where': {'value': 1, 'column': '1', 'condition': '='}, 'limit': 20, 'return': ['code', 'level', 'log', {'column': 'ts', 'format': 'YYYY-MM-DD HH24:MI:SS.MS', 'alias': 'timestamp'}], 'skip': 1, 'sort': {'direction': 'desc', 'column': 'ts'}}),
-        ('?severity=failure', {'where': {'and': {'value': 1, 'column': 'level', 'condition': '='}, 'value': 1, 'column': '1', 'condition': '='}, 'limit': 20, 'return': ['code', 'level', 'log', {'column': 'ts', 'format': 'YYYY-MM-DD HH24:MI:SS.MS', 'alias': 'timestamp'}], 'sort': {'direction': 'desc', 'column': 'ts'}}),
-        ('?severity=FAILURE&limit=1', {'limit': 1, 'sort': {'direction': 'desc', 'column': 'ts'}, 'return': ['code', 'level', 'log', {'column': 'ts', 'format': 'YYYY-MM-DD HH24:MI:SS.MS', 'alias': 'timestamp'}], 'where': {'value': 1, 'condition': '=', 'and': {'value': 1, 'condition': '=', 'column': 'level'}, 'column': '1'}}),
-        ('?severity=INFORMATION&limit=1&skip=1', {'limit': 1, 'sort': {'direction': 'desc', 'column': 'ts'}, 'return': ['code', 'level', 'log', {'column': 'ts', 'format': 'YYYY-MM-DD HH24:MI:SS.MS', 'alias': 'timestamp'}], 'skip': 1, 'where': {'value': 1, 'condition': '=', 'and': {'value': 4, 'condition': '=', 'column': 'level'}, 'column': '1'}}),
-        ('?source=&severity=&limit=&skip=', {'limit': 20, 'sort': {'direction': 'desc', 'column': 'ts'}, 'return': ['code', 'level', 'log', {'column': 'ts', 'format': 'YYYY-MM-DD HH24:MI:SS.MS', 'alias': 'timestamp'}], 'where': {'value': 1, 'condition': '=', 'column': '1'}})
+    _RETURN = ['id', 'code', 'level', 'log', {'column': 'ts', 'format': 'YYYY-MM-DD HH24:MI:SS.MS', 'alias': 'timestamp'},
+               {'column': 'ts', 'alias': 'cursor_ts'}]
+    _SORT = [{'column': 'ts', 'direction': 'desc'}, {'column': 'id', 'direction': 'desc'}]
+
+    @pytest.mark.parametrize("request_params, payload, count_where", [
+        ('', {'return': _RETURN, 'sort': _SORT, 'limit': 20}, None),
+        ('?source=PURGE', {'return': _RETURN, 'where': {'column': 'code', 'condition': '=', 'value': 'PURGE'},
+                           'sort': _SORT, 'limit': 20},
+         {'column': 'code', 'condition': '=', 'value': 'PURGE'}),
+        ('?source=PURGE,START,CONAD', {'return': _RETURN, 'where': {'column': 'code', 'condition': 'in',
+                                                                    'value': ['PURGE', 'START', 'CONAD']},
+                                       'sort': _SORT, 'limit': 20},
+         {'column': 'code', 'condition': 'in', 'value': ['PURGE', 'START', 'CONAD']}),
+        ('?skip=1', {'return': _RETURN, 'sort': _SORT, 'limit': 20, 'skip': 1}, None),
+        ('?severity=failure', {'return': _RETURN, 'where': {'column': 'level', 'condition': '=', 'value': 1},
+                               'sort': _SORT, 'limit': 20},
+         {'column': 'level', 'condition': '=', 'value': 1}),
+        ('?severity=FAILURE&limit=1', {'return': _RETURN, 'where': {'column': 'level', 'condition': '=', 'value': 1},
+                                       'sort': _SORT, 'limit': 1},
+         {'column': 'level', 'condition': '=', 'value': 1}),
+        ('?severity=INFORMATION&limit=1&skip=1', {'return': _RETURN, 'where': {'column': 'level', 'condition': '=',
+                                                                               'value': 4},
+                                                  'sort': _SORT, 'limit': 1, 'skip': 1},
+         {'column': 'level', 'condition': '=', 'value': 4}),
+        ('?source=PURGE&severity=INFORMATION', {'return': _RETURN, 'where': {'column': 'code', 'condition': '=',
+                                                                             'value': 'PURGE',
+                                                                             'and': {'column': 'level',
+                                                                                     'condition': '=', 'value': 4}},
+                                                'sort': _SORT, 'limit': 20},
+         {'column': 'code', 'condition': '=', 'value': 'PURGE',
+          'and': {'column': 'level', 'condition': '=', 'value': 4}}),
+        ('?source=&severity=&limit=&skip=', {'return': _RETURN, 'sort': _SORT, 'limit': 20}, None)
     ])
-    async def test_get_audit_with_params(self, client, request_params, payload, get_log_codes, loop):
+    async def test_get_audit_with_params(self, client, request_params, payload, count_where, get_log_codes, loop):
         storage_client_mock = MagicMock(StorageClientAsync)
         response = {"rows": [{"log": {"end_time": "2018-01-30 18:39:48.1517317788", "rowsRemaining": 0,
                                       "start_time": "2018-01-30 18:39:48.1517317788", "rowsRemoved": 0,
                                       "unsentRowsRemoved": 0, "rowsRetained": 0},
                               "code": "PURGE", "level": "4", "id": 2,
-                              "timestamp": "2018-01-30 18:39:48.796263", 'count': 1}]}
+                              "timestamp": "2018-01-30 18:39:48.796263", "cursor_ts": "2018-01-30 18:39:48.796263",
+                              'count': 1}]}
         @asyncio.coroutine
         def async_mock():
             return response
@@ -131,11 +155,72 @@ class TestAudit:
                     json_response = json.loads(result)
                     assert 1 == json_response['totalCount']
                     assert 1 == len(json_response['audit'])
+                assert 2 == log_code_patch.call_count
+                args, kwargs = log_code_patch.call_args_list[0]
+                assert 'log_counts' == args[0]
+                p = json.loads(args[1])
+                assert {'operation': 'sum', 'column': 'entries', 'alias': 'count'} == p['aggregate']
+                assert count_where == p.get('where')
                 args, kwargs = log_code_patch.call_args
                 assert 'log' == args[0]
                 p = json.loads(args[1])
                 assert payload == p
 
+    async def test_get_audit_with_cursor(self, client, get_log_codes):
+        def row(_id, ts):
+            return {"log": {}, "code": "PURGE", "level": "4", "id": _id, "timestamp": ts[:23], "cursor_ts": ts}
+
+        pages = [{"rows": [{"count": 5}]}, {"rows": [row(5, "2020-09-01 10:00:02.123456"),
+                                                     row(4, "2020-09-01 10:00:01.123456")]},
+                 {"rows": [{"count": 5}]}, {"rows": [row(3, "2020-09-01 10:00:01.123456")]},
+                 {"rows": [row(2, "2020-09-01 10:00:00.123456")]},
+                 {"rows": [{"count": 5}]}, {"rows": []}, {"rows": [row(1, "2020-09-01 10:00:00.000001")]}]
+
+        async def mock_query(table, payload):
+            return pages.pop(0)
+
+        storage_client_mock = MagicMock(StorageClientAsync)
+        with patch.object(connect, 'get_storage_async', return_value=storage_client_mock):
+            with patch.object(storage_client_mock, 'query_tbl_with_payload', side_effect=mock_query) as query_patch:
+                resp = await client.get('/fledge/audit?limit=2')
+                assert 200 == resp.status
+                json_response = json.loads(await resp.text())
+                assert 5 == json_response['totalCount']
+                assert 2 == len(json_response['audit'])
+
+                resp = await client.get('/fledge/audit?limit=2&cursor={}'.format(json_response['next']))
+                assert 200 == resp.status
+                json_response = json.loads(await resp.text())
+                assert ["2020-09-01 10:00:01.123", "2020-09-01 10:00:00.123"] == \
+                    [entry['timestamp'] for entry in json_response['audit']]
+
+                resp = await client.get('/fledge/audit?limit=2&cursor={}'.format(json_response['next']))
+                assert 200 == resp.status
+                json_response = json.loads(await resp.text())
+                assert 1 == len(json_response['audit'])
+                assert 'next' not in json_response
+
+        # The entries with the timestamp of the cursor and a lower id, then the older entries
+        args, kwargs = query_patch.call_args_list[3]
+        assert {'column': 'ts', 'condition': '=', 'value': '2020-09-01 10:00:01.123456',
+                'and': {'column': 'id', 'condition': '<', 'value': 4}} == json.loads(args[1])['where']
+        assert 2 == json.loads(args[1])['limit']
+        args, kwargs = query_patch.call_args_list[4]
+        assert {'column': 'ts', 'condition': '<', 'value': '2020-09-01 10:00:01.123456'} == \
+            json.loads(args[1])['where']
+        assert 1 == json.loads(args[1])['limit']
+        assert 8 == query_patch.call_count
+
+    @pytest.mark.parametrize("request_params, response_message", [
+        ('?cursor=invalid', "invalid is not a valid cursor"),
+        ('?cursor=WyJ0cyJd', "WyJ0cyJd is not a valid cursor"),
+        ('?skip=1&cursor=WyIyMDIwLTA5LTAxIDEwOjAwOjAwLjEyMyIsIDQyXQ==', "Skip/Offset cannot be used with a cursor")
+    ])
+    async def test_get_audit_with_bad_cursor(self, client, request_params, response_message):
+        resp = await client.get('/fledge/audit{}'.format(request_params))
+        assert 400 == resp.status
+        assert response_message == resp.reason
+
     @pytest.mark.parametrize("request_params, response_code, response_message", [
         ('?source=BLA', 400, "BLA is not a valid source"),
         ('?source=1234', 400, "1234 is not a valid source"),
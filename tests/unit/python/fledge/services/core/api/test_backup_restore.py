@@ -4,9 +4,11 @@
 # See: http://fledge.readthedocs.io/
 # FLEDGE_END
 
+import io
 import os
 import asyncio
 import json
+import tarfile
 
 from unittest.mock import MagicMock, patch
 from collections import Counter
@@ -206,20 +208,77 @@ class TestBackup:
                 assert response_code == resp.status
                 assert response_message == resp.reason
 
-    async def test_get_backup_download(self, client):
-        storage_client_mock = MagicMock(StorageClientAsync)
+    @pytest.fixture
+    def backup_file(self, tmpdir):
+        tmpdir.mkdir('backup').join('fledge.db').write_binary(os.urandom(3 * 1024 * 1024) + b'fledge' * 100000)
+        with patch.object(backup_restore, '_FLEDGE_DATA', str(tmpdir)):
+            yield tmpdir.join('backup')
+
+    async def download(self, client, headers=None):
         response = {'id': 1, 'file_name': '/usr/local/fledge/data/backup/fledge.db', 'ts': '2018-02-15 15:18:41',
                     'status': '2', 'type': '1'}
+        storage_client_mock = MagicMock(StorageClientAsync)
+        with patch.object(connect, 'get_storage_async', return_value=storage_client_mock):
+            with patch.object(Backup, 'get_backup_details', return_value=mock_coro(response)) as patch_backup_detail:
+                resp = await client.get('/fledge/backup/{}/download'.format(1), headers=headers)
+                body = await resp.read()
+            patch_backup_detail.assert_called_once_with(1)
+        return resp, body
+
+    async def test_get_backup_download(self, loop, test_client, backup_file):
+        # The archive is checked as it is sent, without the gzip content encoding decoded
+        app = web.Application(loop=loop)
+        routes.setup(app)
+        client = await test_client(app, auto_decompress=False)
+        resp, body = await self.download(client)
+        assert 200 == resp.status
+        assert 'chunked' == resp.headers['Transfer-Encoding']
+        with tarfile.open(fileobj=io.BytesIO(body), mode='r:gz') as tar:
+            assert ['fledge.db'] == tar.getnames()
+            assert backup_file.join('fledge.db').read_binary() == tar.extractfile('fledge.db').read()
+        download_files = [f.basename for f in backup_file.listdir('download-1-*.tar.gz')]
+        assert 1 == len(download_files)
+        assert body == backup_file.join(download_files[0]).read_binary()
+
+        # Served from the archive
+        with patch('tarfile.open') as patch_tar:
+            resp, cached_body = await self.download(client)
+        assert 200 == resp.status
+        assert str(len(body)) == resp.headers['Content-Length']
+        assert body == cached_body
+        patch_tar.assert_not_called()
 
-        with patch("aiohttp.web.FileResponse", return_value=web.FileResponse(path=os.path.realpath(__file__))) as file_res:
-            with patch.object(connect, 'get_storage_async', return_value=storage_client_mock):
-                with patch.object(Backup, 'get_backup_details', return_value=mock_coro(response)) as patch_backup_detail:
-                    with patch('tarfile.open'):
-                        resp = await client.get('/fledge/backup/{}/download'.format(1))
-                        assert 200 == resp.status
-                        assert 'OK' == resp.reason
-                patch_backup_detail.assert_called_once_with(1)
-        assert 1 == file_res.call_count
+        # A download that is resumed
+        resp, partial_body = await self.download(client, headers={'Range': 'bytes=1000-'})
+        assert 206 == resp.status
+        assert body[1000:] == partial_body
+
+    async def test_get_backup_download_range(self, loop, test_client, backup_file):
+        app = web.Application(loop=loop)
+        routes.setup(app)
+        client = await test_client(app, auto_decompress=False)
+        resp, body = await self.download(client, headers={'Range': 'bytes=0-99'})
+        assert 206 == resp.status
+        assert 100 == len(body)
+        assert 1 == len(backup_file.listdir('download-1-*.tar.gz'))
+
+    async def test_get_backup_download_changed(self, client, backup_file):
+        await self.download(client)
+        download_file = backup_file.listdir('download-1-*.tar.gz')[0]
+        backup_file.join('fledge.db').setmtime(download_file.mtime() - 60)
+        resp, _ = await self.download(client)
+        assert 200 == resp.status
+        download_files = backup_file.listdir('download-1-*.tar.gz')
+        assert 1 == len(download_files)
+        assert download_file != download_files[0]
+
+    async def test_delete_backup_download(self, client, backup_file):
+        await self.download(client)
+        with patch.object(connect, 'get_storage_async', return_value=MagicMock(StorageClientAsync)):
+            with patch.object(Backup, 'delete_backup', return_value=mock_coro(None)):
+                resp = await client.delete('/fledge/backup/{}'.format(1))
+                assert 200 == resp.status
+        assert [] == backup_file.listdir('download-1-*.tar.gz')
 
 
 @pytest.allure.feature("unit")
@@ -15,7 +15,8 @@ import pytest
 
 from fledge.services.core.api import browser
 from fledge.services.core import connect
-from fledge.common.storage_client.storage_client import ReadingsStorageClientAsync
+from fledge.common.readings_rollup import utc_timestamp
+from fledge.common.storage_client.storage_client import ReadingsStorageClientAsync, StorageClientAsync
 
 __author__ = "Ashish Jabble"
 __copyright__ = "Copyright (c) 2017 OSIsoft, LLC"
@@ -66,6 +67,12 @@ class TestBrowserAssets:
     def client(self, app, loop, test_client):
         return loop.run_until_complete(test_client(app))
 
+    @pytest.fixture(autouse=True)
+    def no_response_cache(self):
+        """ Every request reaches the storage, the response cache is tested in test_browser_cache.py """
+        with patch.object(browser, '_get_readings_watermark', side_effect=lambda: mock_coro(None)):
+            yield
+
     def test_routes_count(self, app):
         assert 8 == len(app.router.resources())
 
@@ -216,18 +223,104 @@ class TestBrowserAssets:
     ])
     async def test_asset_averages_with_valid_group_name(self, client, group_name, payload, result):
         readings_storage_client_mock = MagicMock(ReadingsStorageClientAsync)
-        with patch.object(connect, 'get_readings_async', return_value=readings_storage_client_mock):
-            with patch.object(readings_storage_client_mock, 'query', return_value=mock_coro(result)) as query_patch:
-                resp = await client.get('fledge/asset/fogbench%2Fhumidity/temperature/series?group={}'
-                                        .format(group_name))
-                assert 200 == resp.status
-                r = await resp.text()
-                json_response = json.loads(r)
-                assert result['rows'] == json_response
+        storage_client_mock = MagicMock(StorageClientAsync)
+        # readings rollup has not run yet
+        with patch.object(connect, 'get_storage_async', return_value=storage_client_mock):
+            with patch.object(storage_client_mock, 'query_tbl_with_payload',
+                              return_value=mock_coro({'count': 0, 'rows': []})):
+                with patch.object(connect, 'get_readings_async', return_value=readings_storage_client_mock):
+                    with patch.object(readings_storage_client_mock, 'query',
+                                      return_value=mock_coro(result)) as query_patch:
+                        resp = await client.get('fledge/asset/fogbench%2Fhumidity/temperature/series?group={}'
+                                                .format(group_name))
+                        assert 200 == resp.status
+                        r = await resp.text()
+                        json_response = json.loads(r)
+                        assert result['rows'] == json_response
             args, kwargs = query_patch.call_args
             assert json.loads(payload) == json.loads(args[0])
             query_patch.assert_called_once_with(args[0])
 
+    async def test_asset_averages_from_rollup(self, client):
+        position = {'count': 1, 'rows': [{'data': {'last_object': 10, 'watermark': '2020-01-01 10:05:31.000+00:00'}}]}
+        rollup = {'count': 2, 'rows': [
+            {'bucket': '2020-01-01 10:04:00+00:00', 'min_value': 1, 'max_value': 5, 'sum_value': 12,
+             'readings_count': 4},
+            {'bucket': '2020-01-01 10:03:00+00:00', 'min_value': 2, 'max_value': 2, 'sum_value': 2,
+             'readings_count': 1}]}
+        raw = {'count': 1, 'rows': [{'min': 7, 'max': 9, 'average': 8, 'timestamp': '2020-01-01 10:05'}]}
+        readings_storage_client_mock = MagicMock(ReadingsStorageClientAsync)
+        storage_client_mock = MagicMock(StorageClientAsync)
+        with patch.object(connect, 'get_storage_async', return_value=storage_client_mock):
+            with patch.object(storage_client_mock, 'query_tbl_with_payload',
+                              side_effect=[mock_coro(position), mock_coro(rollup)]) as rollup_patch:
+                with patch.object(connect, 'get_readings_async', return_value=readings_storage_client_mock):
+                    with patch.object(readings_storage_client_mock, 'query', return_value=mock_coro(raw)) \
+                            as query_patch:
+                        resp = await client.get('fledge/asset/fogbench%2Fhumidity/temperature/series'
+                                                '?group=minutes&limit=2&skip=1')
+                        assert 200 == resp.status
+                        json_response = json.loads(await resp.text())
+        assert [{'min': 1, 'max': 5, 'average': 3.0, 'timestamp': '2020-01-01 10:04'},
+                {'min': 2, 'max': 2, 'average': 2.0, 'timestamp': '2020-01-01 10:03'}] == json_response
+        # Readings are only read from the bucket of the watermark onward
+        args, kwargs = query_patch.call_args
+        payload = json.loads(args[0])
+        assert {'column': 'user_ts', 'condition': '>=', 'value': '2020-01-01 10:05:00+00:00'} == \
+            payload['where']['and']
+        assert 3 == payload['limit']
+        query_patch.assert_called_once_with(args[0])
+        args, kwargs = rollup_patch.call_args
+        assert 'readings_rollup' == args[0]
+        payload = json.loads(args[1])
+        assert {'column': 'bucket', 'condition': '<', 'value': '2020-01-01 10:05:00+00:00'} == \
+            payload['where']['and']['and']['and']
+        assert 3 == payload['limit']
+
+    async def test_asset_summary_from_rollup(self, client):
+        position = {'count': 1, 'rows': [{'data': {'last_object': 10, 'watermark': utc_timestamp()}}]}
+        rollup = {'count': 1, 'rows': [{'min': 1, 'max': 5, 'sum': 30, 'count': 10}]}
+        asset = {"count": 1, "rows": [{"reading": {"temperature": 2}}]}
+        head = {'count': 1, 'rows': [{'min': 0, 'max': 2, 'sum': 4, 'count': 4}]}
+        tail = {'count': 1, 'rows': [{'min': None, 'max': None, 'sum': None, 'count': 0}]}
+        readings_storage_client_mock = MagicMock(ReadingsStorageClientAsync)
+        storage_client_mock = MagicMock(StorageClientAsync)
+        with patch.object(connect, 'get_storage_async', return_value=storage_client_mock):
+            with patch.object(storage_client_mock, 'query_tbl_with_payload',
+                              side_effect=[mock_coro(position), mock_coro(rollup)]):
+                with patch.object(connect, 'get_readings_async', return_value=readings_storage_client_mock):
+                    with patch.object(readings_storage_client_mock, 'query',
+                                      side_effect=[mock_coro(asset), mock_coro(head), mock_coro(tail)]) \
+                            as query_patch:
+                        resp = await client.get('/fledge/asset/fogbench%2fhumidity/temperature/summary?hours=1')
+                        assert 200 == resp.status
+                        json_response = json.loads(await resp.text())
+        assert {'temperature': {'min': 0, 'max': 5, 'average': 34 / 14}} == json_response
+        assert 3 == query_patch.call_count
+        # Readings are only read for the partial minutes at the edges of the window
+        args, kwargs = query_patch.call_args_list[1]
+        head_where = json.loads(args[0])['where']['and']
+        assert ('user_ts', 'newer', 3600) == (head_where['column'], head_where['condition'], head_where['value'])
+        assert '<' == head_where['and']['condition']
+        args, kwargs = query_patch.call_args_list[2]
+        assert '>=' == json.loads(args[0])['where']['and']['condition']
+
+    async def test_asset_summary_with_rollup_behind_window(self, client):
+        position = {'count': 1, 'rows': [{'data': {'last_object': 10, 'watermark': '2020-01-01 10:05:31.000+00:00'}}]}
+        asset = {"count": 1, "rows": [{"reading": {"temperature": 2}}]}
+        result = {'rows': [{'max': '9', 'min': '9', 'average': '9'}], 'count': 1}
+        readings_storage_client_mock = MagicMock(ReadingsStorageClientAsync)
+        storage_client_mock = MagicMock(StorageClientAsync)
+        with patch.object(connect, 'get_storage_async', return_value=storage_client_mock):
+            with patch.object(storage_client_mock, 'query_tbl_with_payload', return_value=mock_coro(position)):
+                with patch.object(connect, 'get_readings_async', return_value=readings_storage_client_mock):
+                    with patch.object(readings_storage_client_mock, 'query',
+                                      side_effect=[mock_coro(asset), mock_coro(result)]) as query_patch:
+                        resp = await client.get('/fledge/asset/fogbench%2fhumidity/temperature/summary?hours=1')
+                        assert 200 == resp.status
+                        assert {'temperature': result['rows'][0]} == json.loads(await resp.text())
+        assert 2 == query_patch.call_count
+
     @pytest.mark.parametrize("request_param, response_message", [
         ('?group=BLA', "BLA is not a valid group"),
         ('?group=0', "0 is not a valid group"),
@@ -317,6 +410,34 @@ class TestBrowserAssets:
             # FIXME: ordering issue and add tests for datetimeunits request param
             # assert '{"aggregate": [{"operation": "min", "json": {"column": "reading", "properties": "humidity"}, "alias": "min"}, {"operation": "max", "json": {"column": "reading", "properties": "humidity"}, "alias": "max"}, {"operation": "avg", "json": {"column": "reading", "properties": "humidity"}, "alias": "average"}], "where": {"column": "asset_code", "condition": "=", "value": "fogbench_humidity"}, "limit": 20}' in args1
 
+    async def test_asset_all_readings_summary_per_datapoint(self, client):
+        datapoints = ['dp{}'.format(i) for i in range(40)]
+
+        @asyncio.coroutine
+        def q_result(payload):
+            payload = json.loads(payload)
+            if 'return' in payload:
+                return {'rows': [{'reading': {dp: i for i, dp in enumerate(datapoints)}}], 'count': 1}
+            dp = payload['aggregate'][0]['json']['properties']
+            return {'count': 1, 'rows': [{'min': dp, 'max': dp, 'average': dp}]}
+
+        readings_storage_client_mock = MagicMock(ReadingsStorageClientAsync)
+        with patch.object(connect, 'get_readings_async', return_value=readings_storage_client_mock):
+            with patch.object(readings_storage_client_mock, 'query', side_effect=q_result) as patch_query:
+                for _ in range(2):
+                    resp = await client.get('fledge/asset/vibration/summary')
+                    assert 200 == resp.status
+                    json_response = json.loads(await resp.text())
+                    assert [{dp: {'min': dp, 'max': dp, 'average': dp}} for dp in datapoints] == json_response
+        # The datapoints of the asset are read once
+        payloads = [json.loads(c[0][0]) for c in patch_query.call_args_list]
+        assert 1 == len([p for p in payloads if 'return' in p])
+        aggregates = [p['aggregate'] for p in payloads if 'aggregate' in p]
+        assert 80 == len(aggregates)
+        # Each query aggregates a single datapoint
+        assert all(len({a['json']['properties'] for a in aggregate}) == 1 and len(aggregate) == 3
+                   for aggregate in aggregates)
+
     @pytest.mark.parametrize("asset_code", [
         "fogbench%2fhumidity",
         "fogbench%2fhumidity, fogbench%2ftemperature"
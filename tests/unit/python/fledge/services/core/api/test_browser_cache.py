@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Test fledge/services/core/api/browser_cache.py """
+
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+from aiohttp import web
+import pytest
+
+from fledge.services.core import connect
+from fledge.services.core.api import browser
+from fledge.services.core.api.browser_cache import ResponseCache
+from fledge.common.storage_client.storage_client import ReadingsStorageClientAsync
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+COUNTS = {'rows': [{'count': 10, 'asset_code': 'sinusoid'}], 'count': 1}
+
+
+def _readings_side_effect(watermark, calls):
+    """ Mimics the readings storage, answering the watermark queries with the ids in the watermark list """
+
+    @asyncio.coroutine
+    def query(payload):
+        _payload = json.loads(payload)
+        aggregate = _payload.get('aggregate')
+        if isinstance(aggregate, dict) and aggregate['column'] == 'id':
+            alias = aggregate['alias']
+            return {'rows': [{alias: watermark[0] if alias == 'oldest' else watermark[1]}], 'count': 1}
+        calls.append(_payload)
+        return COUNTS
+    return query
+
+
+@pytest.allure.feature("unit")
+@pytest.allure.story("api", "assets")
+class TestResponseCache:
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put('a', b'1')
+        cache.put('b', b'2')
+        assert b'1' == cache.get('a')
+        cache.put('c', b'3')
+        assert cache.get('b') is None
+        assert b'1' == cache.get('a')
+        assert b'3' == cache.get('c')
+        assert 2 == cache.size
+        assert 3 == cache.hit
+        assert 1 == cache.miss
+
+    def test_watermark_move_empties_cache(self):
+        cache = ResponseCache()
+        cache.set_watermark((1, 10))
+        cache.put('a', b'1')
+        cache.set_watermark((1, 10))
+        assert b'1' == cache.get('a')
+        cache.set_watermark((2, 10))
+        assert cache.get('a') is None
+        cache.put('a', b'1')
+        cache.set_watermark(None)
+        assert 0 == cache.size
+
+    def test_ttl(self):
+        cache = ResponseCache()
+        cache.put('a', b'1', ttl=0)
+        assert cache.get('a') is None
+        assert 0 == cache.size
+        assert ResponseCache.window_ttl(0) is None
+        assert 1 == ResponseCache.window_ttl(10)
+        assert ResponseCache.MAX_WINDOW_TTL == ResponseCache.window_ttl(3600)
+
+
+@pytest.allure.feature("unit")
+@pytest.allure.story("api", "assets")
+class TestBrowserResponseCache:
+
+    @pytest.fixture
+    def app(self):
+        app = web.Application()
+        browser.setup(app)
+        return app
+
+    @pytest.fixture
+    def client(self, app, loop, test_client):
+        return loop.run_until_complete(test_client(app))
+
+    async def test_identical_requests_are_served_from_cache(self, app, client):
+        calls = []
+        watermark = [1, 10]
+        readings_storage_client_mock = MagicMock(ReadingsStorageClientAsync)
+        with patch.object(connect, 'get_readings_async', return_value=readings_storage_client_mock):
+            with patch.object(readings_storage_client_mock, 'query',
+                              side_effect=_readings_side_effect(watermark, calls)):
+                for _ in range(3):
+                    resp = await client.get('/fledge/asset')
+                    assert 200 == resp.status
+                    assert [{'count': 10, 'assetCode': 'sinusoid'}] == json.loads(await resp.text())
+                assert 1 == len(calls)
+                # New readings
+                watermark[1] = 11
+                app[browser._RESPONSE_CACHE]._watermark_time = None
+                resp = await client.get('/fledge/asset')
+                assert 200 == resp.status
+                assert 2 == len(calls)
+                # Purge
+                watermark[0] = 5
+                app[browser._RESPONSE_CACHE]._watermark_time = None
+                resp = await client.get('/fledge/asset')
+                assert 200 == resp.status
+                assert 3 == len(calls)
+        assert 2 == app[browser._RESPONSE_CACHE].hit
+
+    async def test_query_params_are_normalised(self, app, client):
+        calls = []
+        readings_storage_client_mock = MagicMock(ReadingsStorageClientAsync)
+        with patch.object(connect, 'get_readings_async', return_value=readings_storage_client_mock):
+            with patch.object(readings_storage_client_mock, 'query',
+                              side_effect=_readings_side_effect([1, 10], calls)):
+                await client.get('/fledge/asset/sinusoid?limit=5&skip=1')
+                await client.get('/fledge/asset/sinusoid?skip=1&limit=5&seconds=')
+                await client.get('/fledge/asset/sinusoid?limit=5')
+        assert 2 == len(calls)
+
+    async def test_encoded_slash_is_not_a_datapoint(self, client):
+        calls = []
+        readings_storage_client_mock = MagicMock(ReadingsStorageClientAsync)
+        with patch.object(connect, 'get_readings_async', return_value=readings_storage_client_mock):
+            with patch.object(readings_storage_client_mock, 'query',
+                              side_effect=_readings_side_effect([1, 10], calls)):
+                # The asset fogbench/humidity and the datapoint humidity of the asset fogbench
+                await client.get('/fledge/asset/fogbench%2Fhumidity')
+                await client.get('/fledge/asset/fogbench/humidity')
+        assert 2 == len(calls)
+
+    async def test_no_cache_without_watermark(self, client):
+        calls = []
+        readings_storage_client_mock = MagicMock(ReadingsStorageClientAsync)
+        with patch.object(browser, '_get_readings_watermark', side_effect=lambda: asyncio.sleep(0)):
+            with patch.object(connect, 'get_readings_async', return_value=readings_storage_client_mock):
+                with patch.object(readings_storage_client_mock, 'query',
+                                  side_effect=_readings_side_effect([1, 10], calls)):
+                    await client.get('/fledge/asset')
+                    await client.get('/fledge/asset')
+        assert 2 == len(calls)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Test fledge/services/core/api/north.py """
+
+import asyncio
+import datetime
+import json
+import uuid
+from unittest.mock import MagicMock, patch
+from aiohttp import web
+import pytest
+
+from fledge.services.core import routes
+from fledge.services.core import connect
+from fledge.services.core import server
+from fledge.common.configuration_manager import ConfigurationManager
+from fledge.common.storage_client.storage_client import StorageClientAsync
+from fledge.services.core.api import north
+from fledge.services.core.scheduler.entities import IntervalSchedule
+from fledge.services.core.scheduler.scheduler import Scheduler
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+def _schedule(name):
+    schedule = IntervalSchedule()
+    schedule.schedule_id = uuid.uuid4()
+    schedule.name = name
+    schedule.process_name = 'north_c'
+    schedule.repeat = datetime.timedelta(seconds=30)
+    schedule.enabled = True
+    schedule.exclusive = True
+    schedule.day = None
+    return schedule
+
+
+def _query_side_effect(names, tasks_per_schedule, calls):
+    """ Mimics the storage tables used by GET /fledge/north and records every query made """
+
+    @asyncio.coroutine
+    def query(table, payload):
+        calls.append((table, json.loads(payload)))
+        if table == 'tasks':
+            rows = [{'id': str(uuid.uuid4()), 'schedule_name': n, 'process_name': 'north_c', 'state': 2,
+                     'start_time': '2020-01-01 00:00:{:02d}.000'.format(59 - t), 'end_time': '', 'reason': '',
+                     'pid': 1, 'exit_code': 0} for n in names for t in range(tasks_per_schedule)]
+        elif table == 'statistics':
+            rows = [{'key': k, 'value': 42} for k in json.loads(payload)['where']['value']]
+        elif table == 'asset_tracker':
+            rows = [{'service': n, 'plugin': 'OMF'} for n in names]
+        else:
+            rows = []
+        return {'rows': rows, 'count': len(rows)}
+    return query
+
+
+@pytest.allure.feature("unit")
+@pytest.allure.story("api", "north")
+class TestNorth:
+
+    @pytest.fixture
+    def client(self, loop, test_client):
+        app = web.Application(loop=loop)
+        # fill the routes table
+        routes.setup(app)
+        return loop.run_until_complete(test_client(app))
+
+    async def _get_north(self, client, names, tasks_per_schedule, calls, extra_schedules=()):
+        @asyncio.coroutine
+        def mock_child():
+            return [{'key': n, 'description': '', 'displayName': n} for n in names]
+
+        @asyncio.coroutine
+        def mock_schedules():
+            return [_schedule(n) for n in list(names) + list(extra_schedules)]
+
+        server.Server.scheduler = Scheduler(None, None)
+        storage_client_mock = MagicMock(StorageClientAsync)
+        with patch.object(connect, 'get_storage_async', return_value=storage_client_mock):
+            with patch.object(ConfigurationManager, 'get_category_child', return_value=mock_child()):
+                with patch.object(server.Server.scheduler, 'get_schedules', return_value=mock_schedules()):
+                    with patch.object(north, '_get_installed_plugins',
+                                      return_value=[{'name': 'OMF', 'version': '1.8.0'}]):
+                        with patch.object(storage_client_mock, 'query_tbl_with_payload',
+                                          side_effect=_query_side_effect(names, tasks_per_schedule, calls)):
+                            resp = await client.get('/fledge/north')
+                            assert 200 == resp.status
+                            return json.loads(await resp.text())
+
+    async def test_get_north_schedules(self, client):
+        calls = []
+        json_response = await self._get_north(client, ['OMF to PI'], 3, calls, extra_schedules=['purge'])
+        assert 1 == len(json_response)
+        sch = json_response[0]
+        assert 'OMF to PI' == sch['name']
+        assert 42 == sch['sent']
+        assert {'name': 'OMF', 'version': '1.8.0'} == sch['plugin']
+        assert '2020-01-01 00:00:59.000' == sch['taskStatus']['startTime']
+        assert 'Complete' == sch['taskStatus']['state']
+        tasks_query = next(c[1] for c in calls if c[0] == 'tasks')
+        assert {'column': 'schedule_name', 'condition': 'in', 'value': ['OMF to PI']} == tasks_query['where']
+        server.Server.scheduler = None
+
+    async def test_get_north_schedules_query_count_is_constant(self, client):
+        """ Hundreds of north instances must be served by a fixed number of storage reads """
+        names = ['north{}'.format(i) for i in range(200)]
+        calls = []
+        json_response = await self._get_north(client, names, 5, calls)
+        assert 200 == len(json_response)
+        assert all(sch['plugin']['name'] == 'OMF' for sch in json_response)
+        assert ['tasks', 'statistics', 'asset_tracker'] == [c[0] for c in calls]
+        server.Server.scheduler = None
+
+    async def test_get_north_schedules_latest_tasks_of_scheduler(self, client):
+        calls = []
+        with patch.object(Scheduler, 'get_latest_tasks', return_value={'OMF to PI': {
+                'id': '1', 'schedule_name': 'OMF to PI', 'process_name': 'north', 'state': 1,
+                'start_time': '2020-01-02 00:00:00.000', 'end_time': None, 'reason': None, 'pid': 1,
+                'exit_code': None}}) as patch_latest_tasks:
+            json_response = await self._get_north(client, ['OMF to PI'], 3, calls)
+        patch_latest_tasks.assert_called_once_with(['OMF to PI'])
+        assert '2020-01-02 00:00:00.000' == json_response[0]['taskStatus']['startTime']
+        assert 'Running' == json_response[0]['taskStatus']['state']
+        assert ['statistics', 'asset_tracker'] == [c[0] for c in calls]
+        server.Server.scheduler = None
@@ -639,6 +639,23 @@ class TestTasks:
                                    'state': 'Complete', 'exitCode': '0', 'endTime': '2018',
                                    'pid': '1', 'startTime': '2018', 'id': '1'}]} == json_response
 
+    @pytest.mark.parametrize("request_params, names", [('', None), ('?name=bla', ['bla'])])
+    async def test_get_tasks_latest_of_scheduler(self, client, request_params, names):
+        latest_tasks = {'bla': {'pid': 1, 'reason': None, 'exit_code': None, 'id': '1', 'process_name': 'bla',
+                                'schedule_name': 'bla', 'end_time': None, 'start_time': '2018', 'state': 1}}
+        storage_client_mock = MagicMock(StorageClientAsync)
+        with patch.object(connect, 'get_storage_async', return_value=storage_client_mock):
+            with patch.object(server.Server.scheduler, 'get_latest_tasks',
+                              return_value=latest_tasks) as patch_latest_tasks:
+                resp = await client.get('/fledge/task/latest{}'.format(request_params))
+                assert 200 == resp.status
+                json_response = json.loads(await resp.text())
+                assert {'tasks': [{'reason': None, 'name': 'bla', 'processName': 'bla',
+                                   'state': 'Running', 'exitCode': None, 'endTime': 'None',
+                                   'pid': 1, 'startTime': '2018', 'id': '1'}]} == json_response
+            patch_latest_tasks.assert_called_once_with(names)
+        assert not storage_client_mock.query_tbl_with_payload.called
+
     @pytest.mark.parametrize("request_params", ['', '?name=not_exist'])
     async def test_get_tasks_latest_no_task_exception(self, client, request_params):
         storage_client_mock = MagicMock(StorageClientAsync)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+""" Test fledge/services/core/api/south.py """
+
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+from aiohttp import web
+import pytest
+
+from fledge.services.core import routes
+from fledge.services.core import connect
+from fledge.common.configuration_manager import ConfigurationManager
+from fledge.common.service_record import ServiceRecord
+from fledge.common.storage_client.storage_client import StorageClientAsync
+from fledge.services.core.api import south
+from fledge.services.core.service_registry.service_registry import ServiceRegistry
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+def _query_side_effect(services, assets_per_service, calls):
+    """ Mimics the storage tables used by GET /fledge/south and records every query made """
+
+    @asyncio.coroutine
+    def query(table, payload):
+        calls.append((table, json.loads(payload)))
+        if table == 'asset_tracker':
+            rows = [{'asset': '{}_asset{}'.format(s, a), 'plugin': 'sinusoid', 'service': s}
+                    for s in services for a in range(assets_per_service)]
+        elif table == 'statistics':
+            rows = [{'key': k, 'value': 10} for k in json.loads(payload)['where']['value']]
+        elif table == 'schedules':
+            rows = [{'schedule_name': s, 'enabled': 't'} for s in services]
+        else:
+            rows = []
+        return {'rows': rows, 'count': len(rows)}
+    return query
+
+
+@pytest.allure.feature("unit")
+@pytest.allure.story("api", "south")
+class TestSouth:
+
+    @pytest.fixture
+    def client(self, loop, test_client):
+        app = web.Application(loop=loop)
+        # fill the routes table
+        routes.setup(app)
+        return loop.run_until_complete(test_client(app))
+
+    async def test_get_south_services(self, client):
+        @asyncio.coroutine
+        def mock_child():
+            return [{'key': 'Sine', 'description': '', 'displayName': 'Sine'},
+                    {'key': 'Random', 'description': '', 'displayName': 'Random'}]
+
+        calls = []
+        registered = [ServiceRecord('1', 'Sine', 'Southbound', 'http', 'localhost', 8118, 33301)]
+        storage_client_mock = MagicMock(StorageClientAsync)
+        with patch.object(connect, 'get_storage_async', return_value=storage_client_mock):
+            with patch.object(ConfigurationManager, 'get_category_child', return_value=mock_child()):
+                with patch.object(ServiceRegistry, 'get', return_value=registered):
+                    with patch.object(south, '_get_installed_plugins',
+                                      return_value=[{'name': 'sinusoid', 'version': '1.8.0'}]):
+                        with patch.object(storage_client_mock, 'query_tbl_with_payload',
+                                          side_effect=_query_side_effect(['Sine', 'Random'], 1, calls)):
+                            resp = await client.get('/fledge/south')
+                            assert 200 == resp.status
+                            json_response = json.loads(await resp.text())
+        services = json_response['services']
+        assert ['Sine', 'Random'] == [s['name'] for s in services]
+        assert 'running' == services[0]['status']
+        assert 8118 == services[0]['service_port']
+        assert '' == services[1]['status']
+        assert [{'count': 10, 'asset': 'Sine_asset0'}] == services[0]['assets']
+        assert [{'count': 10, 'asset': 'Random_asset0'}] == services[1]['assets']
+        assert {'name': 'sinusoid', 'version': '1.8.0'} == services[0]['plugin']
+        assert services[1]['schedule_enabled'] is True
+        assert {'column': 'service', 'condition': 'in', 'value': ['Sine', 'Random'],
+                'and': {'column': 'event', 'condition': '=', 'value': 'Ingest'}} == calls[0][1]['where']
+        assert {'column': 'key', 'condition': 'in', 'value': ['RANDOM_ASSET0', 'SINE_ASSET0']} == calls[1][1]['where']
+
+    async def test_get_south_services_query_count_is_constant(self, client):
+        """ Hundreds of services with thousands of assets must be served by a fixed number of storage reads """
+        service_names = ['svc{}'.format(i) for i in range(300)]
+
+        @asyncio.coroutine
+        def mock_child():
+            return [{'key': s, 'description': '', 'displayName': s} for s in service_names]
+
+        calls = []
+        storage_client_mock = MagicMock(StorageClientAsync)
+        with patch.object(connect, 'get_storage_async', return_value=storage_client_mock):
+            with patch.object(ConfigurationManager, 'get_category_child', return_value=mock_child()):
+                with patch.object(ServiceRegistry, 'get', return_value=[]):
+                    with patch.object(south, '_get_installed_plugins', return_value=[]):
+                        with patch.object(storage_client_mock, 'query_tbl_with_payload',
+                                          side_effect=_query_side_effect(service_names, 10, calls)):
+                            resp = await client.get('/fledge/south')
+                            assert 200 == resp.status
+                            json_response = json.loads(await resp.text())
+        assert 300 == len(json_response['services'])
+        assert 3000 == sum(len(s['assets']) for s in json_response['services'])
+        assert ['asset_tracker', 'statistics', 'schedules'] == [c[0] for c in calls]
+
+    async def test_get_south_services_without_children(self, client):
+        @asyncio.coroutine
+        def mock_child():
+            return []
+
+        storage_client_mock = MagicMock(StorageClientAsync)
+        with patch.object(connect, 'get_storage_async', return_value=storage_client_mock):
+            with patch.object(ConfigurationManager, 'get_category_child', return_value=mock_child()):
+                with patch.object(ServiceRegistry, 'get', return_value=[]):
+                    with patch.object(south, '_get_installed_plugins', return_value=[]):
+                        with patch.object(storage_client_mock, 'query_tbl_with_payload') as query_patch:
+                            resp = await client.get('/fledge/south')
+                            assert 200 == resp.status
+                            assert {'services': []} == json.loads(await resp.text())
+                        query_patch.assert_not_called()
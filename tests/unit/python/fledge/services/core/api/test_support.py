@@ -4,7 +4,11 @@
 # See: http://fledge.readthedocs.io/
 # FLEDGE_END
 
+import asyncio
+import json
 import pathlib
+import subprocess
+import tarfile
 from pathlib import PosixPath
 
 from unittest.mock import patch, mock_open, Mock, MagicMock
@@ -14,6 +18,7 @@ import pytest
 
 from fledge.services.core import routes
 from fledge.services.core.api import support
+from fledge.services.core import support as support_builder
 from fledge.services.core.support import *
 
 __author__ = "Ashish Jabble"
@@ -241,3 +246,72 @@ class TestBundleSupport:
             resp = await client.get('/fledge/syslog')
             assert 500 == resp.status
             assert msg == resp.reason
+
+
+@pytest.allure.feature("unit")
+@pytest.allure.story("services", "core", "bundle-support")
+class TestSupportBuilder:
+
+    async def test_build(self, loop, tmpdir):
+        @asyncio.coroutine
+        def mock_coro(table):
+            return {"count": 1, "rows": [{"table": table}]}
+
+        syslog = tmpdir.join('syslog')
+        syslog.write('Fledge core\nother\nFledge Storage\n')
+        tmpdir.mkdir('scripts').join('script').write('#!/bin/sh')
+        storage = MagicMock()
+        storage.query_tbl.side_effect = mock_coro
+        # Every test has its own event loop, the subprocesses of the builder are watched by the loop of this one
+        asyncio.get_child_watcher().attach_loop(loop)
+        with patch.object(support_builder, 'get_storage_async', return_value=storage):
+            builder = SupportBuilder(str(tmpdir.mkdir('support')))
+        with patch.object(support_builder, '_SYSLOG_FILE', str(syslog)):
+            with patch.object(support_builder, '_PATH', str(tmpdir)):
+                with patch.object(support_builder, 'get_service_records', return_value={"services": []}):
+                    tar_file_name = await builder.build()
+
+        with tarfile.open(tar_file_name, 'r:gz') as tar:
+            names = tar.getnames()
+            assert 11 == len(names)
+            assert {'scripts', 'scripts/script'} <= set(names)
+            syslog_name = [n for n in names if n.startswith('syslog-')][0]
+            assert b'Fledge core\nFledge Storage\n' == tar.extractfile(syslog_name).read()
+            storage_name = [n for n in names if n.startswith('syslogStorage-')][0]
+            assert b'Fledge Storage\n' == tar.extractfile(storage_name).read()
+            audit_name = [n for n in names if n.startswith('audit-')][0]
+            assert {"count": 1, "rows": [{"table": "log"}]} == json.loads(tar.extractfile(audit_name).read().decode())
+        # The interim syslog files are removed, only the bundle is left
+        assert [os.path.basename(tar_file_name)] == os.listdir(str(tmpdir.join('support')))
+
+    async def test_build_step_fails(self, loop, tmpdir):
+        done = []
+
+        @asyncio.coroutine
+        def mock_coro(table):
+            if table == 'configuration':
+                raise ValueError('query failed')
+            return {"count": 1, "rows": [{"table": table}]}
+
+        async def slow_step(pyz):
+            # Still adding to the archive after the failure of the other step
+            await asyncio.sleep(0.1)
+            await pyz.add_bytes('slow', b'slow')
+            done.append('slow')
+
+        syslog = tmpdir.join('syslog')
+        syslog.write('Fledge core\n')
+        storage = MagicMock()
+        storage.query_tbl.side_effect = mock_coro
+        asyncio.get_child_watcher().attach_loop(loop)
+        with patch.object(support_builder, 'get_storage_async', return_value=storage):
+            builder = SupportBuilder(str(tmpdir.mkdir('support')))
+        with patch.object(support_builder, '_SYSLOG_FILE', str(syslog)):
+            with patch.object(support_builder, '_PATH', str(tmpdir)):
+                with patch.object(support_builder, 'get_service_records', return_value={"services": []}):
+                    with patch.object(builder, 'add_script_dir_content', side_effect=slow_step):
+                        with pytest.raises(RuntimeError) as excinfo:
+                            await builder.build()
+        assert 'query failed' == str(excinfo.value)
+        # The archive is closed once all the steps are done
+        assert ['slow'] == done
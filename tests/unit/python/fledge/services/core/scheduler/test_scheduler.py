@@ -134,6 +134,10 @@ class TestScheduler:
                               _task_processes=mock_task_processes,
                               _schedule_executions=mock_schedule_executions)
         mocker.patch.object(scheduler, '_process_scripts', return_value="North Readings to PI")
+        mocker.patch.object(scheduler, '_latest_tasks', {mock_schedule.id: {
+            'id': str(mock_task_id), 'state': int(Task.State.RUNNING), 'end_time': None, 'exit_code': None}})
+        # The schedule is renamed while its task runs
+        mock_schedules[mock_schedule.id] = mock_schedule._replace(name="OMF to PI")
 
         # WHEN
         await scheduler._wait_for_task_completion(mock_task_process)
@@ -142,6 +146,11 @@ class TestScheduler:
         # After task completion, sleep above, no task processes should be left pending
         assert 0 == len(scheduler._task_processes)
         assert 0 == len(scheduler._schedule_executions[mock_schedule.id].task_processes)
+        assert ['OMF to PI'] == list(scheduler.get_latest_tasks())
+        latest_task = scheduler.get_latest_tasks()['OMF to PI']
+        assert int(Task.State.COMPLETE) == latest_task['state']
+        assert 0 == latest_task['exit_code']
+        assert latest_task['end_time'] is not None
         args, kwargs = log_info.call_args_list[0]
         assert 'OMF to PI north' in args
         assert 'North Readings to PI' in args
@@ -185,6 +194,9 @@ class TestScheduler:
         mocker.patch.object(scheduler, '_process_scripts', return_value="North Readings to PI")
         mocker.patch.object(scheduler, '_wait_for_task_completion')
 
+        mocker.patch.object(scheduler, '_latest_tasks', {})
+        scheduler._schedules[schedule.id] = schedule
+
         # Confirm that task has not started yet
         assert 0 == len(scheduler._schedule_executions[schedule.id].task_processes)
 
@@ -194,6 +206,11 @@ class TestScheduler:
         # THEN
         # Confirm that task has started
         assert 1 == len(scheduler._schedule_executions[schedule.id].task_processes)
+        task_id = next(iter(scheduler._schedule_executions[schedule.id].task_processes))
+        latest_task = scheduler.get_latest_tasks(['OMF to PI north'])['OMF to PI north']
+        assert str(task_id) == latest_task['id']
+        assert int(Task.State.RUNNING) == latest_task['state']
+        assert latest_task['end_time'] is None
         assert 1 == log_info.call_count
         # assert call("Queued schedule '%s' for execution", 'OMF to PI north') == log_info.call_args_list[0]
         args, kwargs = log_info.call_args_list[0]
@@ -218,6 +235,27 @@ class TestScheduler:
         assert scheduler._purge_tasks_task is None
         assert scheduler._last_task_purge_time is not None
 
+    @pytest.mark.asyncio
+    async def test_purge_tasks_latest_tasks(self, mocker):
+        # GIVEN
+        scheduler = Scheduler()
+        scheduler._storage = MockStorage(core_management_host=None, core_management_port=None)
+        scheduler._storage_async = MockStorageAsync(core_management_host=None, core_management_port=None)
+        mocker.patch.multiple(scheduler, _ready=True, _paused=False)
+        mocker.patch.object(scheduler, '_max_completed_task_age', datetime.timedelta(days=1))
+        old, running, recent = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        mocker.patch.object(scheduler, '_latest_tasks', {
+            old: {'state': int(Task.State.COMPLETE), 'start_time': '2018-02-06 13:28:14.477'},
+            running: {'state': int(Task.State.RUNNING), 'start_time': '2018-02-06 13:28:14.477'},
+            recent: {'state': int(Task.State.COMPLETE), 'start_time': Scheduler._task_time(datetime.datetime.now())}})
+
+        # WHEN
+        await scheduler.purge_tasks()
+
+        # THEN
+        # The purged tasks are no longer the latest tasks of their schedules
+        assert {running, recent} == set(scheduler._latest_tasks)
+
     @pytest.mark.asyncio
     async def test__check_purge_tasks(self, mocker):
         # TODO: Mandatory - Add negative tests for full code coverage
@@ -472,6 +510,27 @@ class TestScheduler:
         assert len(scheduler._storage_async.scheduled_processes) == len(scheduler._process_scripts)
         assert len(scheduler._storage_async.schedules) == len(scheduler._schedules)
 
+    @pytest.mark.asyncio
+    async def test__read_latest_tasks(self, mocker):
+        # GIVEN
+        scheduler = Scheduler()
+        scheduler._storage = MockStorage(core_management_host=None, core_management_port=None)
+        scheduler._storage_async = MockStorageAsync(core_management_host=None, core_management_port=None)
+        mocker.patch.object(scheduler, '_schedule_first_task')
+        await scheduler._read_storage()
+        assert scheduler.get_latest_tasks() is None
+        query = mocker.spy(MockStorageAsync, 'query_tbl_with_payload')
+
+        # WHEN
+        await scheduler._read_latest_tasks()
+
+        # THEN
+        names = {schedule.name for schedule in scheduler._schedules.values()}
+        # One index lookup per schedule
+        assert len(names) == query.call_count
+        assert names == set(scheduler.get_latest_tasks())
+        assert MockStorageAsync.tasks[0] == scheduler.get_latest_tasks(['purge'])['purge']
+
     @pytest.mark.asyncio
     @pytest.mark.skip("_mark_tasks_interrupted() not implemented in main Scheduler class.")
     async def test__mark_tasks_interrupted(self, mocker):
@@ -1117,6 +1176,8 @@ class TestScheduler:
 
         mocker.patch.object(scheduler, '_ready', True)
 
+        mocker.patch.object(scheduler, '_latest_tasks', {sch_id: {'id': str(uuid.uuid4())}})
+
         # WHEN
         # Now delete schedule
         await scheduler.delete_schedule(sch_id)
@@ -1124,6 +1185,7 @@ class TestScheduler:
         # THEN
         # Now confirm there is one schedule less
         assert len(scheduler._storage_async.schedules) - 1 == len(scheduler._schedules)
+        assert {} == scheduler.get_latest_tasks()
 
     @pytest.mark.asyncio
     async def test_delete_schedule_enabled_schedule(self, mocker):
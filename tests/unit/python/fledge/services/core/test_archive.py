@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+import asyncio
+import gzip
+import json
+import os
+import tarfile
+
+import pytest
+
+from fledge.services.core import archive
+from fledge.services.core.archive import Archive, ParallelGzipWriter
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.allure.feature("unit")
+@pytest.allure.story("services", "core", "archive")
+class TestArchive:
+
+    async def test_parallel_gzip_blocks(self, tmpdir):
+        data = os.urandom(archive._BLOCK_SIZE) + b'fledge' * archive._BLOCK_SIZE
+        file_name = str(tmpdir.join('data.gz'))
+        with open(file_name, 'wb') as f:
+            writer = ParallelGzipWriter(f, threads=3)
+            for i in range(0, len(data), 100000):
+                writer.write(data[i:i + 100000])
+            writer.close()
+        with gzip.open(file_name) as f:
+            assert data == f.read()
+
+    async def test_empty_gzip(self, tmpdir):
+        file_name = str(tmpdir.join('empty.gz'))
+        with open(file_name, 'wb') as f:
+            ParallelGzipWriter(f).close()
+        with gzip.open(file_name) as f:
+            assert b'' == f.read()
+
+    async def test_archive(self, tmpdir):
+        tmpdir.mkdir('dir').join('file').write('content')
+        tmpdir.join('dir').mkdir('__pycache__').join('file.pyc').write('pyc')
+        large = os.urandom(3 * archive._BLOCK_SIZE)
+        file_name = str(tmpdir.join('archive.tar.gz'))
+        pyz = Archive(file_name, threads=2)
+        await asyncio.gather(pyz.add_json('table', {"rows": [{"key": "value"}]}),
+                             pyz.add_bytes('large', large),
+                             pyz.add(str(tmpdir.join('dir')), arcname='dir',
+                                     filter=lambda t: None if '__pycache__' in t.name else t))
+        await pyz.close()
+
+        with tarfile.open(file_name, 'r:gz') as tar:
+            assert ['dir', 'dir/file', 'large', 'table'] == sorted(tar.getnames())
+            assert {"rows": [{"key": "value"}]} == json.loads(tar.extractfile('table').read().decode())
+            assert large == tar.extractfile('large').read()
+            assert b'content' == tar.extractfile('dir/file').read()
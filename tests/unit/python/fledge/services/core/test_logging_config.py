@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+import asyncio
+import logging
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from fledge.common import logger
+from fledge.common.configuration_manager import ConfigurationManager
+from fledge.common.storage_client.storage_client import StorageClientAsync
+from fledge.services.core import logging_config
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+@pytest.allure.feature("unit")
+@pytest.allure.story("services", "core", "logging-config")
+class TestLoggingConfig:
+
+    def teardown_method(self):
+        logger.set_level_overrides({})
+
+    def test_apply(self):
+        instance = logger.setup('fledge.test.logging_config', level=logging.INFO)
+        logging_config.apply({'levels': {'value': '{"fledge.test.logging_config": "ERROR"}'}})
+        assert logging.ERROR == instance.level
+
+    @pytest.mark.parametrize("value", ['[]', '{"fledge.test.logging_config": "loud"}', 'not json'])
+    def test_apply_invalid(self, value):
+        instance = logger.setup('fledge.test.logging_config', level=logging.INFO)
+        with patch.object(logging_config._logger, 'error') as patch_log_error:
+            logging_config.apply({'levels': {'value': value}})
+        assert 1 == patch_log_error.call_count
+        assert logging.INFO == instance.level
+
+    @pytest.mark.asyncio
+    async def test_run(self):
+        @asyncio.coroutine
+        def mock_coro():
+            return {'levels': {'value': '{"fledge.test.logging_config": "DEBUG"}'}}
+
+        instance = logger.setup('fledge.test.logging_config', level=logging.INFO)
+        storage_client_mock = MagicMock(spec=StorageClientAsync)
+        c_mgr = ConfigurationManager(storage_client_mock)
+        with patch.object(c_mgr, 'get_category_all_items', return_value=mock_coro()) as patch_get_all_items:
+            await logging_config.run(logging_config.CATEGORY)
+        patch_get_all_items.assert_called_once_with(logging_config.CATEGORY)
+        assert logging.DEBUG == instance.level
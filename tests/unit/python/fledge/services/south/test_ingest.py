@@ -13,7 +13,7 @@ from unittest.mock import MagicMock, call
 from fledge.services.south.ingest import *
 from fledge.services.south import ingest
 from fledge.common.storage_client.storage_client import StorageClientAsync, ReadingsStorageClientAsync
-from fledge.common.microservice_management_client.microservice_management_client import MicroserviceManagementClient
+from fledge.common.microservice_management_client.microservice_management_client import MicroserviceManagementClientAsync
 
 __author__ = "Amarendra K Sinha"
 __copyright__ = "Copyright (c) 2017 OSIsoft, LLC"
@@ -29,6 +29,14 @@ async def false_coro():
     return True
 
 
+async def mock_result(value):
+    return value
+
+
+async def mock_asset_tracker_events(asset_events):
+    return [{"message": "Asset tracker event created"} for _ in asset_events]
+
+
 def get_cat(old_config):
     new_config = {}
     for key, value in old_config.items():
@@ -113,11 +121,10 @@ class TestIngest:
         # GIVEN
         Ingest.storage_async = MagicMock(spec=StorageClientAsync)
         Ingest.readings_storage_async = MagicMock(spec=ReadingsStorageClientAsync)
-        mocker.patch.object(MicroserviceManagementClient, "__init__", return_value=None)
-        create_cfg = mocker.patch.object(MicroserviceManagementClient, "create_configuration_category", return_value=None)
-        get_cfg = mocker.patch.object(MicroserviceManagementClient, "get_configuration_category", return_value=get_cat(Ingest.default_config))
-        mocker.patch.object(MicroserviceManagementClient, "create_child_category", return_value=None)
-        Ingest._parent_service = MagicMock(_core_microservice_management_client=MicroserviceManagementClient())
+        create_cfg = mocker.patch.object(MicroserviceManagementClientAsync, "create_configuration_category", return_value=mock_result(None))
+        get_cfg = mocker.patch.object(MicroserviceManagementClientAsync, "get_configuration_category", return_value=mock_result(get_cat(Ingest.default_config)))
+        mocker.patch.object(MicroserviceManagementClientAsync, "create_child_category", return_value=mock_result(None))
+        Ingest._parent_service = MagicMock(_core_microservice_management_client_async=MicroserviceManagementClientAsync(None, None))
 
         # WHEN
         await Ingest._read_config()
@@ -173,13 +180,12 @@ class TestIngest:
         }
         Ingest.storage_async = MagicMock(spec=StorageClientAsync)
         Ingest.readings_storage_async = MagicMock(spec=ReadingsStorageClientAsync)
-        mocker.patch.object(MicroserviceManagementClient, "__init__", return_value=None)
-        create_cfg = mocker.patch.object(MicroserviceManagementClient, "create_configuration_category",
-                                         return_value=None)
-        get_cfg = mocker.patch.object(MicroserviceManagementClient, "get_configuration_category",
-                                      return_value=get_cat(Ingest.default_config))
-        mocker.patch.object(MicroserviceManagementClient, "create_child_category", return_value=None)
-        Ingest._parent_service = MagicMock(_core_microservice_management_client=MicroserviceManagementClient(), _name="test")
+        create_cfg = mocker.patch.object(MicroserviceManagementClientAsync, "create_configuration_category",
+                                         return_value=mock_result(None))
+        get_cfg = mocker.patch.object(MicroserviceManagementClientAsync, "get_configuration_category",
+                                      return_value=mock_result(get_cat(Ingest.default_config)))
+        mocker.patch.object(MicroserviceManagementClientAsync, "create_child_category", return_value=mock_result(None))
+        Ingest._parent_service = MagicMock(_core_microservice_management_client_async=MicroserviceManagementClientAsync(None, None), _name="test")
         Ingest._parent_service.config = mock_config
         log_warning = mocker.patch.object(ingest._LOGGER, "warning")
 
@@ -208,13 +214,12 @@ class TestIngest:
         mocker.patch.object(StorageClientAsync, "__init__", return_value=None)
         mocker.patch.object(ReadingsStorageClientAsync, "__init__", return_value=None)
         log_warning = mocker.patch.object(ingest._LOGGER, "warning")
-        mocker.patch.object(MicroserviceManagementClient, "__init__", return_value=None)
-        create_cfg = mocker.patch.object(MicroserviceManagementClient, "create_configuration_category", return_value=None)
-        get_cfg = mocker.patch.object(MicroserviceManagementClient, "get_configuration_category", return_value=get_cat(Ingest.default_config))
-        mocker.patch.object(MicroserviceManagementClient, "get_asset_tracker_events", return_value={'track':[]})
-        mocker.patch.object(MicroserviceManagementClient, "create_child_category", return_value=None)
+        create_cfg = mocker.patch.object(MicroserviceManagementClientAsync, "create_configuration_category", return_value=mock_result(None))
+        get_cfg = mocker.patch.object(MicroserviceManagementClientAsync, "get_configuration_category", return_value=mock_result(get_cat(Ingest.default_config)))
+        mocker.patch.object(MicroserviceManagementClientAsync, "get_asset_tracker_events", return_value=mock_result({'track':[]}))
+        mocker.patch.object(MicroserviceManagementClientAsync, "create_child_category", return_value=mock_result(None))
         mocker.patch.object(statistics, "create_statistics", return_value=mock_create(None))
-        parent_service = MagicMock(_core_microservice_management_client=MicroserviceManagementClient())
+        parent_service = MagicMock(_core_microservice_management_client_async=MicroserviceManagementClientAsync(None, None))
         mocker.patch.object(Ingest, "_write_statistics", return_value=mock_coro())
         mocker.patch.object(Ingest, "_insert_readings", return_value=mock_coro())
 
@@ -252,13 +257,12 @@ class TestIngest:
         mocker.patch.object(StorageClientAsync, "__init__", return_value=None)
         mocker.patch.object(ReadingsStorageClientAsync, "__init__", return_value=None)
         log_exception = mocker.patch.object(ingest._LOGGER, "exception")
-        mocker.patch.object(MicroserviceManagementClient, "__init__", return_value=None)
-        create_cfg = mocker.patch.object(MicroserviceManagementClient, "create_configuration_category", return_value=None)
-        get_cfg = mocker.patch.object(MicroserviceManagementClient, "get_configuration_category", return_value=get_cat(Ingest.default_config))
-        mocker.patch.object(MicroserviceManagementClient, "get_asset_tracker_events", return_value={'track':[]})
-        mocker.patch.object(MicroserviceManagementClient, "create_child_category", return_value=None)
+        create_cfg = mocker.patch.object(MicroserviceManagementClientAsync, "create_configuration_category", return_value=mock_result(None))
+        get_cfg = mocker.patch.object(MicroserviceManagementClientAsync, "get_configuration_category", return_value=mock_result(get_cat(Ingest.default_config)))
+        mocker.patch.object(MicroserviceManagementClientAsync, "get_asset_tracker_events", return_value=mock_result({'track':[]}))
+        mocker.patch.object(MicroserviceManagementClientAsync, "create_child_category", return_value=mock_result(None))
         mocker.patch.object(statistics, "create_statistics", return_value=mock_create(None))
-        parent_service = MagicMock(_core_microservice_management_client=MicroserviceManagementClient())
+        parent_service = MagicMock(_core_microservice_management_client_async=MicroserviceManagementClientAsync(None, None))
         mocker.patch.object(Ingest, "_write_statistics", return_value=mock_coro())
         mocker.patch.object(Ingest, "_insert_readings", return_value=mock_coro())
 
@@ -389,8 +393,10 @@ class TestIngest:
         Ingest._started = True
         mocker.patch.object(Ingest, "_write_statistics", return_value=mock_coro())
         mocker.patch.object(Ingest, "_insert_readings", return_value=mock_coro())
-        mocker.patch.object(MicroserviceManagementClient, "__init__", return_value=None)
-        mocker.patch.object(MicroserviceManagementClient, "create_asset_tracker_event", return_value=None)
+        create_events = mocker.patch.object(MicroserviceManagementClientAsync, "create_asset_tracker_events",
+                                            side_effect=mock_asset_tracker_events)
+        Ingest._parent_service = MagicMock(_core_microservice_management_client_async=MicroserviceManagementClientAsync(
+            None, None), _name="test")
         assert 0 == len(Ingest._readings_lists[0])
         assert 'PUMP1' not in list(Ingest._sensor_stats.keys())
 
@@ -402,6 +408,9 @@ class TestIngest:
 
         # THEN
         assert 1 == len(Ingest._readings_lists[0])
+        await Ingest._asset_tracker_task
+        assert 1 == create_events.call_count
+        assert 1 == len(create_events.call_args[0][0])
 
     @pytest.mark.asyncio
     async def test_add_readings_if_stop(self, mocker):
@@ -575,8 +584,10 @@ class TestIngest:
         Ingest._started = True
         mocker.patch.object(Ingest, "_write_statistics", return_value=mock_coro())
         mocker.patch.object(Ingest, "_insert_readings", return_value=mock_coro())
-        mocker.patch.object(MicroserviceManagementClient, "__init__", return_value=None)
-        mocker.patch.object(MicroserviceManagementClient, "create_asset_tracker_event", return_value=None)
+        create_events = mocker.patch.object(MicroserviceManagementClientAsync, "create_asset_tracker_events",
+                                            side_effect=mock_asset_tracker_events)
+        Ingest._parent_service = MagicMock(_core_microservice_management_client_async=MicroserviceManagementClientAsync(
+            None, None), _name="test")
 
         assert 0 == len(Ingest._readings_lists[0])
         assert 'PUMP1' not in list(Ingest._sensor_stats.keys())
@@ -595,3 +606,6 @@ class TestIngest:
         # THEN
         assert 1 == len(Ingest._readings_lists[0])
         assert 1 == len(Ingest._readings_lists[1])
+        # The asset tracker event of the asset is created once
+        await Ingest._asset_tracker_task
+        assert 1 == create_events.call_count
@@ -7,12 +7,14 @@
 import asyncio
 import copy
 import sys
-from unittest.mock import MagicMock, Mock, call, patch
+from unittest.mock import MagicMock, call, patch
 import pytest
 
 from fledge.services.south import server as South
 from fledge.services.south.server import Server
 from fledge.common.storage_client.storage_client import StorageClientAsync
+from fledge.common.microservice_management_client.microservice_management_client import \
+    MicroserviceManagementClientAsync
 from fledge.services.common.microservice import FledgeMicroservice
 from fledge.services.south.ingest import Ingest
 
@@ -93,6 +95,19 @@ async def false_coro():
     return True
 
 
+def management_client_mock(config):
+    """ MicroserviceManagementClientAsync with the answers of the core """
+    async def result(value):
+        return value
+
+    client = MagicMock(spec=MicroserviceManagementClientAsync)
+    client.create_configuration_category.side_effect = lambda *args, **kwargs: result(None)
+    client.get_configuration_category.side_effect = lambda *args, **kwargs: result(config)
+    client.register_interest.side_effect = lambda *args, **kwargs: result({'id': 1234, 'message': 'all ok'})
+    client.close.side_effect = lambda: result(None)
+    return client
+
+
 @pytest.allure.feature("unit")
 @pytest.allure.story("south")
 class TestServicesSouthServer:
@@ -107,13 +122,7 @@ class TestServicesSouthServer:
         south_server = Server()
         south_server._storage = MagicMock(spec=StorageClientAsync)
 
-        attrs = {
-                    'create_configuration_category.return_value': None,
-                    'get_configuration_category.return_value': cat_get(),
-                    'register_interest.return_value': {'id': 1234, 'message': 'all ok'}
-        }
-        south_server._core_microservice_management_client = Mock()
-        south_server._core_microservice_management_client.configure_mock(**attrs)
+        south_server._core_microservice_management_client_async = management_client_mock(cat_get())
 
         mocker.patch.object(south_server, '_name', 'test')
 
@@ -483,13 +492,7 @@ class TestServicesSouthServer:
         south_server = Server()
         south_server._storage = MagicMock(spec=StorageClientAsync)
 
-        attrs = {
-                    'create_configuration_category.return_value': None,
-                    'get_configuration_category.return_value': _FILTER_TEST_CONFIG,
-                    'register_interest.return_value': {'id': 1234, 'message': 'all ok'}
-        }
-        south_server._core_microservice_management_client = Mock()
-        south_server._core_microservice_management_client.configure_mock(**attrs)
+        south_server._core_microservice_management_client_async = management_client_mock(_FILTER_TEST_CONFIG)
 
         mocker.patch.object(south_server, '_name', 'test')
 
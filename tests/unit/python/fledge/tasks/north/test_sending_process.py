@@ -6,6 +6,8 @@
 # FLEDGE_END
 
 import asyncio
+import copy
+import json
 import logging
 import sys
 import time
@@ -49,6 +51,28 @@ async def mock_audit_failure():
     return True
 
 
+class MockReadingsStream:
+    """ mocks the ReadingsStream returned by ReadingsStorageClientAsync.fetch_stream """
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._rows)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
 @pytest.mark.asyncio
 @pytest.fixture
 def fixture_sp(event_loop):
@@ -466,10 +490,6 @@ class TestSendingProcess:
                                             expected_rows):
         """Test _load_data_into_memory handling and transformations for the readings """
 
-        async def mock_coroutine():
-            """" mock_coroutine """
-            return p_rows
-
         # Checks the Readings handling
         with patch.object(sys, 'argv', ['pytest', '--address', 'corehost', '--port', '32333', '--name', 'sname']):
             with patch.object(MicroserviceManagementClient, '__init__', return_value=None) as mmc_patch:
@@ -482,14 +502,29 @@ class TestSendingProcess:
 
         sp._readings = MagicMock(spec=ReadingsStorageClientAsync)
 
+        async def mock_coroutine():
+            """" mock_coroutine """
+            return copy.deepcopy(p_rows)
+
         # Checks the transformations and especially the adding of the UTC timezone
-        with patch.object(sp._readings, 'fetch', return_value=mock_coroutine()):
+        with patch.object(sp._readings, 'fetch', return_value=mock_coroutine()) as patch_fetch:
 
             generated_rows = await sp._load_data_into_memory_readings(5)
+            patch_fetch.assert_called_once_with(6, sp._config['blockSize'])
 
             assert len(generated_rows) == 1
             assert generated_rows == expected_rows
 
+        # The same rows, streamed
+        sp._config['stream_readings'] = True
+        with patch.object(sp._readings, 'fetch_stream', return_value=MockReadingsStream(p_rows['rows'])) \
+                as patch_fetch_stream:
+
+            generated_rows = await sp._load_data_into_memory_readings(5)
+            patch_fetch_stream.assert_called_once_with(6, sp._config['blockSize'])
+
+            assert generated_rows == expected_rows
+
     @pytest.mark.parametrize(
         "p_rows, "
         "expected_rows, ",
@@ -2221,6 +2256,281 @@ class TestSendingProcess:
         mock__update_statistics.assert_called_with(100)
         mock_audit_information.assert_called_with(SendingProcess._AUDIT_CODE, {"sentRows": 100})
 
+    async def test_block_bytes(self):
+        """ Unit tests - _block_bytes """
+        block = [{"id": i, "asset_code": "a", "reading": {"v": "x" * 100}} for i in range(1000)]
+        block_bytes = SendingProcess._block_bytes(block)
+        assert 0.9 < block_bytes / len(json.dumps(block)) < 1.1
+        assert 0 == SendingProcess._block_bytes([])
+
+    @pytest.mark.asyncio
+    async def test_task_fetch_data_memory_buffer_bytes(self, event_loop):
+        """ Unit tests - _task_fetch_data - the blocks are not fetched beyond the byte budget of the buffer """
+        rows = [[{"id": i, "asset_code": "a", "reading": {"v": "x" * 1000}}] for i in range(1, 4)]
+
+        with patch.object(sys, 'argv', ['pytest', '--address', 'corehost', '--port', '32333', '--name', 'sname']):
+            with patch.object(MicroserviceManagementClient, '__init__', return_value=None):
+                with patch.object(ReadingsStorageClientAsync, '__init__', return_value=None):
+                    with patch.object(StorageClientAsync, '__init__', return_value=None):
+                        with patch.object(asyncio, 'get_event_loop', return_value=event_loop):
+                            sp = SendingProcess()
+
+        SendingProcess._logger = MagicMock(spec=logging)
+        sp._audit = MagicMock(spec=AuditLogger)
+        sp._config = {'memory_buffer_size': 3}
+        sp._config_from_manager = {"applyFilter": {"value": "FALSE"}}
+        # Room for a single block
+        sp._memory_buffer_max_bytes = 1000
+        sp._task_fetch_data_run = True
+        sp._task_fetch_data_sem = asyncio.Semaphore(0)
+        sp._task_send_data_sem = asyncio.Semaphore(0)
+        sp._memory_buffer = [None for x in range(sp._config['memory_buffer_size'])]
+
+        with patch.object(sp, '_last_object_id_read', return_value=mock_coro(0)):
+            with patch.object(sp, '_load_data_into_memory', side_effect=[mock_coro(r) for r in rows]):
+                task_id = asyncio.ensure_future(sp._task_fetch_data())
+                await asyncio.sleep(0.5)
+
+                assert [rows[0], None, None] == sp._memory_buffer
+                assert {0: SendingProcess._block_bytes(rows[0])} == sp._memory_buffer_bytes
+                assert sp._memory_buffer_full()
+
+                # The sending frees the block, the next one is fetched
+                sp._memory_buffer[0] = None
+                sp._memory_buffer_bytes_total -= sp._memory_buffer_bytes.pop(0)
+                sp._task_send_data_sem.release()
+                await asyncio.sleep(0.5)
+                assert [None, rows[1], None] == sp._memory_buffer
+                assert 0 < sp._memory_buffer_wait
+
+                sp._task_fetch_data_run = False
+                sp._task_send_data_sem.release()
+                await task_id
+
+    @pytest.mark.asyncio
+    async def test_update_buffer_statistics(self, event_loop):
+        """ Unit tests - _update_buffer_statistics """
+        with patch.object(sys, 'argv', ['pytest', '--address', 'corehost', '--port', '32333', '--name', 'sname']):
+            with patch.object(MicroserviceManagementClient, '__init__', return_value=None):
+                with patch.object(ReadingsStorageClientAsync, '__init__', return_value=None):
+                    with patch.object(StorageClientAsync, '__init__', return_value=None):
+                        with patch.object(asyncio, 'get_event_loop', return_value=event_loop):
+                            sp = SendingProcess()
+
+        stats = MagicMock()
+        stats.register.side_effect = mock_coro
+        stats.update_bulk.side_effect = mock_coro
+        stats.set_bulk.side_effect = mock_coro
+        with patch.object(sp_module.statistics, 'create_statistics', side_effect=lambda storage: mock_coro(stats)):
+            # The levels are set at the first update, even when they are 0
+            await sp._update_buffer_statistics()
+            stats.set_bulk.assert_called_once_with({'sname-BUFFER-BLOCKS': 0, 'sname-BUFFER-BYTES': 0})
+            stats.update_bulk.assert_not_called()
+            assert 3 == stats.register.call_count
+
+            sp._memory_buffer_bytes = {0: 100, 1: 200}
+            sp._memory_buffer_bytes_total = 300
+            sp._memory_buffer_wait = 1.5
+            await sp._update_buffer_statistics()
+            stats.set_bulk.assert_called_with({'sname-BUFFER-BLOCKS': 2, 'sname-BUFFER-BYTES': 300})
+            stats.update_bulk.assert_called_once_with({'sname-BUFFER-WAIT': 1500})
+
+            # The blocks and the bytes are set to their current values, the wait is incremented
+            sp._memory_buffer_bytes = {0: 100}
+            sp._memory_buffer_bytes_total = 100
+            sp._memory_buffer_wait = 2
+            await sp._update_buffer_statistics()
+            stats.set_bulk.assert_called_with({'sname-BUFFER-BLOCKS': 1, 'sname-BUFFER-BYTES': 100})
+            stats.update_bulk.assert_called_with({'sname-BUFFER-WAIT': 500})
+
+    async def test_destination(self, event_loop):
+        """ Unit tests - _destination """
+        with patch.object(sys, 'argv', ['pytest', '--address', 'corehost', '--port', '32333', '--name', 'sname']):
+            with patch.object(MicroserviceManagementClient, '__init__', return_value=None):
+                with patch.object(ReadingsStorageClientAsync, '__init__', return_value=None):
+                    with patch.object(StorageClientAsync, '__init__', return_value=None):
+                        with patch.object(asyncio, 'get_event_loop', return_value=event_loop):
+                            sp = SendingProcess()
+
+        sp._audit = MagicMock(spec=AuditLogger)
+        sp._config['source'] = 'readings'
+        sp._memory_buffer = [[{"id": 1}]]
+        destination = sp._destination('dname')
+
+        assert 'dname' == destination._name
+        assert 'sname' == sp._name
+        assert sp._storage_async is destination._storage_async
+        assert sp._audit is destination._audit
+        assert 'source' not in destination._config
+        assert [None] == destination._memory_buffer
+        assert [] == destination._fan_out
+
+    @pytest.mark.asyncio
+    async def test_task_fetch_data_fan_out(self, event_loop):
+        """ Unit tests - _task_fetch_data - a block is read once for all the destinations, each one gets the rows
+        after its own position """
+        rows = [[{"id": i} for i in range(1, 4)], [{"id": i} for i in range(4, 7)]]
+
+        with patch.object(sys, 'argv', ['pytest', '--address', 'corehost', '--port', '32333', '--name', 'sname']):
+            with patch.object(MicroserviceManagementClient, '__init__', return_value=None):
+                with patch.object(ReadingsStorageClientAsync, '__init__', return_value=None):
+                    with patch.object(StorageClientAsync, '__init__', return_value=None):
+                        with patch.object(asyncio, 'get_event_loop', return_value=event_loop):
+                            sp = SendingProcess()
+
+        SendingProcess._logger = MagicMock(spec=logging)
+        sp._audit = MagicMock(spec=AuditLogger)
+        destination = sp._destination('dname')
+        sp._fan_out = [destination]
+        for p, position in ((sp, 0), (destination, 2)):
+            p._config = {'memory_buffer_size': 3}
+            p._config_from_manager = {"applyFilter": {"value": "FALSE"}}
+            p._task_fetch_data_sem = asyncio.Semaphore(0)
+            p._task_send_data_sem = asyncio.Semaphore(0)
+            p._memory_buffer = [None for x in range(3)]
+            p._last_object_id_read = MagicMock(return_value=mock_coro(position))
+        sp._task_fetch_data_run = True
+
+        with patch.object(sp, '_load_data_into_memory',
+                          side_effect=[mock_coro(rows[0]), mock_coro(rows[1]), mock_coro([])]) as patch_load:
+            task_id = asyncio.ensure_future(sp._task_fetch_data())
+            await asyncio.sleep(0.5)
+            sp._task_fetch_data_run = False
+            await task_id
+
+        # The read starts from the destination farthest behind, each block is read once
+        assert [(0,), (3,)] == [args for args, kwargs in patch_load.call_args_list[:2]]
+        assert [rows[0], rows[1], None] == sp._memory_buffer
+        assert [[{"id": 3}], rows[1], None] == destination._memory_buffer
+
+    @pytest.mark.asyncio
+    async def test_start_fan_out(self, event_loop):
+        """ Unit tests - _start_fan_out - the destinations that do not start or send other data are left out """
+        with patch.object(sys, 'argv', ['pytest', '--address', 'corehost', '--port', '32333', '--name', 'sname']):
+            with patch.object(MicroserviceManagementClient, '__init__', return_value=None):
+                with patch.object(ReadingsStorageClientAsync, '__init__', return_value=None):
+                    with patch.object(StorageClientAsync, '__init__', return_value=None):
+                        with patch.object(asyncio, 'get_event_loop', return_value=event_loop):
+                            sp = SendingProcess()
+
+        SendingProcess._logger = MagicMock(spec=logging)
+        sp._config['source'] = 'readings'
+        sp._config['destinations'] = ['ok', 'disabled', 'failed', 'statistics']
+
+        async def mock_start(self):
+            if self._name == 'failed':
+                raise ValueError(self._name)
+            self._config['source'] = 'statistics' if self._name == 'statistics' else 'readings'
+            return self._name != 'disabled'
+
+        with patch.object(SendingProcess, '_schedule_enabled', side_effect=lambda name: mock_coro(False)):
+            with patch.object(SendingProcess, '_start', mock_start):
+                with patch.object(SendingProcess, 'stop') as patch_stop:
+                    await sp._start_fan_out()
+
+        assert ['ok'] == [destination._name for destination in sp._fan_out]
+        assert 1 == patch_stop.call_count
+
+    @pytest.mark.parametrize("destinations, enabled, expected_warning", [
+        # This north instance
+        (['sname'], [], "Fan out destination sname is this north instance, it is skipped"),
+        # A destination listed twice
+        (['dname', 'dname'], [], "Fan out destination dname is listed twice, it is skipped"),
+        # A destination that runs on its own schedule
+        (['dname'], ['dname'], "Fan out destination dname has an enabled schedule, it is skipped; "
+                               "disable its schedule to send it the data"),
+        # A destination that is not a north instance
+        (['unknown'], [], "Fan out destination unknown has no schedule, it is not a north instance and it is "
+                          "skipped"),
+    ])
+    async def test_start_fan_out_skipped(self, event_loop, destinations, enabled, expected_warning):
+        """ Unit tests - _start_fan_out - the destinations that would send their rows twice are left out """
+        with patch.object(sys, 'argv', ['pytest', '--address', 'corehost', '--port', '32333', '--name', 'sname']):
+            with patch.object(MicroserviceManagementClient, '__init__', return_value=None):
+                with patch.object(ReadingsStorageClientAsync, '__init__', return_value=None):
+                    with patch.object(StorageClientAsync, '__init__', return_value=None):
+                        with patch.object(asyncio, 'get_event_loop', return_value=event_loop):
+                            sp = SendingProcess()
+
+        SendingProcess._logger = MagicMock(spec=logging)
+        sp._config['source'] = 'readings'
+        sp._config['destinations'] = destinations
+
+        async def mock_query(table, payload):
+            name = json.loads(payload)['where']['value']
+            assert 'schedules' == table
+            if name == 'unknown':
+                return {"count": 0, "rows": []}
+            return {"count": 1, "rows": [{"enabled": 't' if name in enabled else 'f'}]}
+
+        started = []
+
+        async def mock_start(self):
+            started.append(self._name)
+            self._config['source'] = 'readings'
+            return True
+
+        sp._storage_async = MagicMock(spec=StorageClientAsync)
+        with patch.object(sp._storage_async, 'query_tbl_with_payload', side_effect=mock_query):
+            with patch.object(SendingProcess, '_start', mock_start):
+                await sp._start_fan_out()
+
+        # The skipped destinations are not started: neither their category nor their stream are created
+        expected = ['dname'] if destinations == ['dname', 'dname'] else []
+        assert expected == started
+        assert expected == [destination._name for destination in sp._fan_out]
+        SendingProcess._logger.warning.assert_called_once_with(expected_warning)
+
+    async def test_stop_fan_out(self, event_loop):
+        """ Unit tests - stop - a destination that fails to stop does not prevent the others from being stopped """
+        with patch.object(sys, 'argv', ['pytest', '--address', 'corehost', '--port', '32333', '--name', 'sname']):
+            with patch.object(MicroserviceManagementClient, '__init__', return_value=None):
+                with patch.object(ReadingsStorageClientAsync, '__init__', return_value=None):
+                    with patch.object(StorageClientAsync, '__init__', return_value=None):
+                        with patch.object(asyncio, 'get_event_loop', return_value=event_loop):
+                            sp = SendingProcess()
+
+        SendingProcess._logger = MagicMock(spec=logging)
+        sp._fan_out = [MagicMock(spec=SendingProcess), MagicMock(spec=SendingProcess)]
+        sp._fan_out[0]._name = 'failed'
+        sp._fan_out[0].stop.side_effect = ValueError('shutdown')
+        sp._plugin = MagicMock()
+        sp._plugin_handle = 'handle'
+        sp.stop()
+
+        sp._fan_out[1].stop.assert_called_once_with()
+        sp._plugin.plugin_shutdown.assert_called_once_with('handle')
+        SendingProcess._logger.error.assert_called_once_with(
+            "Unable to stop the fan out destination failed | shutdown")
+
+    @pytest.mark.asyncio
+    async def test_send_data_buffer_statistics(self, event_loop):
+        """ Unit tests - send_data - the statistics of the memory buffers of all the destinations are updated while
+        the data is sent """
+        with patch.object(sys, 'argv', ['pytest', '--address', 'corehost', '--port', '32333', '--name', 'sname']):
+            with patch.object(MicroserviceManagementClient, '__init__', return_value=None):
+                with patch.object(ReadingsStorageClientAsync, '__init__', return_value=None):
+                    with patch.object(StorageClientAsync, '__init__', return_value=None):
+                        with patch.object(asyncio, 'get_event_loop', return_value=event_loop):
+                            sp = SendingProcess()
+
+        SendingProcess._stop_execution = False
+        sp._config = {'duration': 0.3, 'sleepInterval': 0.1, 'memory_buffer_size': 1}
+        sp._fan_out = [sp._destination('dname')]
+        updates = []
+
+        async def mock_update(self):
+            updates.append(self._name)
+
+        with patch.object(SendingProcess, 'BUFFER_STATISTICS_INTERVAL', 0):
+            with patch.object(SendingProcess, '_task_fetch_data', side_effect=mock_coro):
+                with patch.object(SendingProcess, '_task_send_data', side_effect=mock_coro):
+                    with patch.object(SendingProcess, '_update_buffer_statistics', mock_update):
+                        await sp.send_data()
+
+        # Updated periodically, and at the end, for each destination
+        assert 2 < updates.count('sname') == updates.count('dname')
+
     @pytest.mark.parametrize("plugin_file, plugin_type, plugin_name", [
         ("empty",      "north", "Empty North Plugin"),
         ("pi_server",  "north", "PI Server North"),
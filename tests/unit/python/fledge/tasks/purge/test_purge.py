@@ -5,6 +5,7 @@
 # FLEDGE_END
 
 
+import json
 import pytest
 import asyncio
 from unittest.mock import patch, call, MagicMock
@@ -296,3 +297,93 @@ class TestPurge:
                             await p.run()
                 # Test the negative case when function purge_data raise some exception
                 p._logger.exception.assert_called_once_with("")
+
+    @pytest.mark.parametrize("retain_unsent, last_id, expected_bounds, expected_return", [
+        ("False", 15, [10, 15, 20, 25, 30], (19, 9)),
+        ("True", 15, [10, 15], (10, 0)),
+        ("False", 7, [7, 12, 17, 22, 27, 32], (19, 17)),
+        ("True", 7, [7], (2, 0))
+    ])
+    async def test_purge_data_in_chunks(self, tmpdir, retain_unsent, last_id, expected_bounds, expected_return):
+        """Test that purge_data purges by age in inclusive id ranges of purgeBlockSize readings, up to the last sent
+        reading when retaining the unsent readings, and stops at the first chunk that removes no readings"""
+
+        @asyncio.coroutine
+        def mock_audit_info():
+            return ""
+
+        @asyncio.coroutine
+        def q_streams(*args):
+            return {"rows": [{"min_last_object": last_id}], "count": 1}
+
+        @asyncio.coroutine
+        def q_readings(payload):
+            return {"rows": [{"min_id": 6, "max_id": 40}], "count": 1}
+
+        @asyncio.coroutine
+        def store_purge(**kwargs):
+            # Readings 6 to 24 are older than the age, the retain flag removes them up to sent_id included
+            removed = max(0, min(kwargs['sent_id'], 24) - (bounds[-1] if bounds else 5))
+            bounds.append(kwargs['sent_id'])
+            return {"readings": 10, "removed": removed, "unsentPurged": 0, "unsentRetained": 3}
+
+        bounds = []
+        conf = {"retainUnsent": {"value": retain_unsent}, "age": {"value": "72"}, "size": {"value": "0"},
+                "purgeBlockSize": {"value": "5"}, "rowsPerSecond": {"value": "0"}}
+        mockStorageClientAsync = MagicMock(spec=StorageClientAsync)
+        mockAuditLogger = AuditLogger(mockStorageClientAsync)
+        with patch.object(FledgeProcess, '__init__'):
+            with patch.object(mockAuditLogger, "__init__", return_value=None):
+                p = Purge()
+                p._CHECKPOINT_FILE = str(tmpdir.join('checkpoint.json'))
+                p._storage_async = MagicMock(spec=StorageClientAsync)
+                p._readings_storage_async = MagicMock(spec=ReadingsStorageClientAsync)
+                with patch.object(p._storage_async, "query_tbl_with_payload", side_effect=q_streams):
+                    with patch.object(p._readings_storage_async, "query", side_effect=q_readings):
+                        with patch.object(p._readings_storage_async, 'purge', side_effect=store_purge) as purge:
+                            with patch.object(p._audit, 'information', return_value=mock_audit_info()) as audit:
+                                assert expected_return == await p.purge_data(conf)
+        assert expected_bounds == bounds
+        for _, kwargs in purge.call_args_list:
+            assert {'age', 'sent_id', 'flag'} == set(kwargs) and 'retain' == kwargs['flag']
+        args, kwargs = audit.call_args
+        assert len(expected_bounds) == args[1]['chunks']
+        assert not tmpdir.join('checkpoint.json').exists()
+
+    async def test_purge_data_resumes_from_checkpoint(self, tmpdir):
+        """Test that a purge killed after a chunk resumes from its checkpoint and reports the readings it purged"""
+
+        @asyncio.coroutine
+        def mock_audit_info():
+            return ""
+
+        @asyncio.coroutine
+        def store_purge(**kwargs):
+            return {"readings": 10, "removed": 0, "unsentPurged": 0, "unsentRetained": 0}
+
+        checkpoint = {"start_time": "2020-01-01 10:00:00.1577872800",
+                      "age": {"value": "72", "flag": "purge", "next_id": 11, "end_id": 40, "removed": 5,
+                              "unsentPurged": 0, "unsentRetained": 0, "chunks": 1, "chunkSeconds": 0.5,
+                              "chunkSecondsMax": 0.5, "done": False}}
+        tmpdir.join('checkpoint.json').write(json.dumps(checkpoint))
+        conf = {"retainUnsent": {"value": "False"}, "age": {"value": "72"}, "size": {"value": "0"},
+                "purgeBlockSize": {"value": "5"}, "rowsPerSecond": {"value": "100"}}
+        mockStorageClientAsync = MagicMock(spec=StorageClientAsync)
+        mockAuditLogger = AuditLogger(mockStorageClientAsync)
+        with patch.object(FledgeProcess, '__init__'):
+            with patch.object(mockAuditLogger, "__init__", return_value=None):
+                p = Purge()
+                p._CHECKPOINT_FILE = str(tmpdir.join('checkpoint.json'))
+                p._storage_async = MagicMock(spec=StorageClientAsync)
+                p._readings_storage_async = MagicMock(spec=ReadingsStorageClientAsync)
+                with patch.object(p._storage_async, "query_tbl_with_payload", return_value=q_result('streams')):
+                    with patch.object(p._readings_storage_async, "query") as query:
+                        with patch.object(p._readings_storage_async, 'purge', side_effect=store_purge) as purge:
+                            with patch.object(p._audit, 'information', return_value=mock_audit_info()) as audit:
+                                assert (5, 0) == await p.purge_data(conf)
+        query.assert_not_called()
+        purge.assert_called_once_with(age='72', sent_id=15, flag='retain')
+        args, kwargs = audit.call_args
+        assert checkpoint['start_time'] == args[1]['start_time']
+        assert 2 == args[1]['chunks']
+        assert not tmpdir.join('checkpoint.json').exists()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+# FLEDGE_BEGIN
+# See: http://fledge.readthedocs.io/
+# FLEDGE_END
+
+"""Test tasks/rollup/rollup.py"""
+
+import asyncio
+import json
+from unittest.mock import patch, MagicMock
+import pytest
+
+from fledge.common import logger
+from fledge.common.process import FledgeProcess
+from fledge.common.readings_rollup import MINUTE, HOUR, bucket_start, bucket_label
+from fledge.common.storage_client.storage_client import StorageClientAsync, ReadingsStorageClientAsync
+from fledge.tasks.rollup.rollup import ReadingsRollup
+
+__copyright__ = "Copyright (c) 2020 Dianomic Systems"
+__license__ = "Apache 2.0"
+__version__ = "${VERSION}"
+
+
+pytestmark = pytest.mark.asyncio
+
+CONFIG = {'blockSize': {'value': '2'}, 'blocksPerRun': {'value': '10'}, 'minuteRetention': {'value': '168'},
+          'hourRetention': {'value': '0'}}
+
+
+@asyncio.coroutine
+def mock_coro(*args, **kwargs):
+    if len(args) > 0:
+        return args[0]
+    else:
+        return ""
+
+
+def _reading(_id, user_ts, reading, asset_code='sinusoid'):
+    return {'id': _id, 'asset_code': asset_code, 'reading': reading, 'user_ts': user_ts}
+
+
+def _rollup():
+    with patch.object(FledgeProcess, '__init__'):
+        with patch.object(logger, "setup"):
+            rollup = ReadingsRollup()
+    rollup._storage_async = MagicMock(spec=StorageClientAsync)
+    rollup._readings_storage_async = MagicMock(spec=ReadingsStorageClientAsync)
+    return rollup
+
+
+@pytest.allure.feature("unit")
+@pytest.allure.story("tasks", "rollup")
+class TestReadingsRollup:
+
+    async def test_bucket_start(self):
+        assert '2020-01-01 10:05:00+00:00' == bucket_start('2020-01-01 10:05:31.123456+00:00', MINUTE)
+        assert '2020-01-01 10:00:00+00:00' == bucket_start('2020-01-01 10:05:31.123456+00:00', HOUR)
+        assert '2020-01-01 10:05' == bucket_label('2020-01-01 10:05:00+00:00', MINUTE)
+        assert '2020-01-01 10' == bucket_label('2020-01-01 10:00:00+00:00', HOUR)
+
+    async def test_aggregate(self):
+        rows = [_reading(1, '2020-01-01 10:05:01.000000+00:00', {'sine': 1, 'label': 'a', 'on': True}),
+                _reading(2, '2020-01-01 10:05:59.000000+00:00', {'sine': -2.5}),
+                _reading(3, '2020-01-01 10:06:00.000000+00:00', {'sine': 4})]
+        buckets = ReadingsRollup.aggregate(rows)
+        assert [-2.5, 1, -1.5, 2] == buckets[('sinusoid', 'sine', MINUTE, '2020-01-01 10:05:00+00:00')]
+        assert [4, 4, 4, 1] == buckets[('sinusoid', 'sine', MINUTE, '2020-01-01 10:06:00+00:00')]
+        assert [-2.5, 4, 2.5, 3] == buckets[('sinusoid', 'sine', HOUR, '2020-01-01 10:00:00+00:00')]
+        # Only the numeric datapoints are aggregated
+        assert 3 == len(buckets)
+
+    async def test_write_buckets_merges_stored_buckets(self):
+        rollup = _rollup()
+        buckets = {('sinusoid', 'sine', MINUTE, '2020-01-01 10:05:00+00:00'): [1, 3, 4, 2],
+                   ('sinusoid', 'sine', HOUR, '2020-01-01 10:00:00+00:00'): [1, 3, 4, 2]}
+        stored = {'count': 1, 'rows': [{'asset_code': 'sinusoid', 'datapoint': 'sine',
+                                        'bucket': '2020-01-01 10:00:00.000000+00:00', 'min_value': 0.5,
+                                        'max_value': 2, 'sum_value': 10, 'readings_count': 5}]}
+        with patch.object(rollup._storage_async, 'query_tbl_with_payload',
+                          side_effect=[mock_coro({'count': 0, 'rows': []}), mock_coro(stored)]) as query_patch:
+            with patch.object(rollup._storage_async, 'insert_into_tbl', return_value=mock_coro({})) as insert_patch:
+                with patch.object(rollup._storage_async, 'update_tbl', return_value=mock_coro({})) as update_patch:
+                    await rollup.write_buckets(buckets)
+        assert 2 == query_patch.call_count
+        args, kwargs = insert_patch.call_args
+        assert 'readings_rollup' == args[0]
+        assert [{"asset_code": "sinusoid", "datapoint": "sine", "granularity": MINUTE,
+                 "bucket": "2020-01-01 10:05:00+00:00", "min_value": 1, "max_value": 3, "sum_value": 4,
+                 "readings_count": 2}] == json.loads(args[1])['inserts']
+        args, kwargs = update_patch.call_args
+        updates = json.loads(args[1])['updates']
+        assert 1 == len(updates)
+        assert {'min_value': 0.5, 'max_value': 3, 'sum_value': 14, 'readings_count': 7} == updates[0]['values']
+
+    async def test_rollup_fetches_in_blocks_and_saves_position(self):
+        rollup = _rollup()
+        blocks = [{'count': 2, 'rows': [_reading(11, '2020-01-01 10:05:01.000000+00:00', {'sine': 1}),
+                                        _reading(12, '2020-01-01 10:05:02.000000+00:00', {'sine': 2})]},
+                  {'count': 1, 'rows': [_reading(13, '2020-01-01 10:06:02.000000+00:00', {'sine': 3})]}]
+        position = {'count': 1, 'rows': [{'data': {'last_object': 10, 'watermark': '2020-01-01 10:00:00+00:00'}}]}
+        with patch.object(rollup._storage_async, 'query_tbl_with_payload', return_value=mock_coro(position)):
+            with patch.object(rollup._readings_storage_async, 'fetch',
+                              side_effect=[mock_coro(blocks[0]), mock_coro(blocks[1])]) as fetch_patch:
+                with patch.object(rollup, 'write_buckets', side_effect=[mock_coro(None), mock_coro(None)]):
+                    with patch.object(rollup._storage_async, 'update_tbl', return_value=mock_coro({})) as update_patch:
+                        assert 3 == await rollup.rollup(CONFIG)
+        assert [((11, 2),), ((13, 2),)] == [(c[0],) for c in fetch_patch.call_args_list]
+        args, kwargs = update_patch.call_args
+        payload = json.loads(args[1])
+        assert 'plugin_data' == args[0]
+        assert {'last_object': 13, 'watermark': '2020-01-01 10:06:02.000000+00:00'} == payload['values']['data']
+
+    async def test_rollup_without_new_readings(self):
+        rollup = _rollup()
+        with patch.object(rollup._storage_async, 'query_tbl_with_payload',
+                          return_value=mock_coro({'count': 0, 'rows': []})):
+            with patch.object(rollup._readings_storage_async, 'fetch',
+                              return_value=mock_coro({'count': 0, 'rows': []})) as fetch_patch:
+                with patch.object(rollup._storage_async, 'insert_into_tbl') as insert_patch:
+                    assert 0 == await rollup.rollup(CONFIG)
+        fetch_patch.assert_called_once_with(1, 2)
+        insert_patch.assert_not_called()
+
+    async def test_purge(self):
+        rollup = _rollup()
+        with patch.object(rollup._storage_async, 'delete_from_tbl', return_value=mock_coro({})) as delete_patch:
+            await rollup.purge(CONFIG)
+        # hourRetention 0 keeps the hourly buckets forever
+        args, kwargs = delete_patch.call_args
+        assert 'readings_rollup' == args[0]
+        assert {'column': 'granularity', 'condition': '=', 'value': MINUTE,
+                'and': {'column': 'bucket', 'condition': 'older', 'value': 168 * 3600}} == json.loads(args[1])['where']
+        assert 1 == delete_patch.call_count
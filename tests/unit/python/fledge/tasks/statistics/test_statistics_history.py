@@ -7,13 +7,14 @@
 """Test tasks/statistics/statistics_history.py"""
 
 import asyncio
+import json
 from unittest.mock import patch, MagicMock
 import pytest
 
-import ast
 from fledge.common import logger
 from fledge.common.storage_client.storage_client import StorageClientAsync
-from fledge.tasks.statistics.statistics_history import StatisticsHistory
+from fledge.common.storage_client.utils import JsonPayload
+from fledge.tasks.statistics.statistics_history import StatisticsHistory, StatisticsSnapshot
 from fledge.common.process import FledgeProcess
 
 __author__ = "Vaibhav Singhal"
@@ -48,38 +49,69 @@ class TestStatisticsHistory:
             log.assert_called_once_with("StatisticsHistory")
         mock_process.assert_called_once_with()
 
-    async def test_update_previous_value(self):
-        with patch.object(FledgeProcess, '__init__'):
-            with patch.object(logger, "setup"):
-                sh = StatisticsHistory()
-                sh._storage_async = MagicMock(spec=StorageClientAsync)
-                payload = {'updates': [{'where': {'value': 'Bla', 'condition': '=', 'column': 'key'}, 'values': {'previous_value': 1}}]}
-                with patch.object(sh._storage_async, "update_tbl", return_value=mock_coro(None)) as patch_storage:
-                    await sh._bulk_update_previous_value(payload)
-                args, kwargs = patch_storage.call_args
-                assert "statistics" == args[0]
-                payload = ast.literal_eval(args[1])
-                assert "Bla" == payload["updates"][0]["where"]["value"]
-                assert 1 == payload["updates"][0]["values"]["previous_value"]
-
     async def test_run(self):
         with patch.object(FledgeProcess, '__init__'):
             with patch.object(logger, "setup"):
                 sh = StatisticsHistory()
                 sh._storage_async = MagicMock(spec=StorageClientAsync)
-                retval = {'count': 2,
-                          'rows': [{'description': 'Readings removed from the buffer by the purge process',
-                                    'value': 0, 'key': 'PURGED', 'previous_value': 0,
-                                    'ts': '2018-08-31 17:03:17.597055+05:30'},
-                                   {'description': 'Readings received by Fledge',
-                                    'value': 0, 'key': 'READINGS', 'previous_value': 0,
-                                    'ts': '2018-08-31 17:03:17.597055+05:30'
-                                    }]
-                          }
-                with patch.object(sh._storage_async, "query_tbl", return_value=mock_coro(retval)) as mock_keys:
-                    with patch.object(sh, "_bulk_update_previous_value", return_value=mock_coro(None)) as mock_update:
-                        with patch.object(sh._storage_async, "insert_into_tbl", return_value=mock_coro(None)) as mock_bulk_insert:
-                            await sh.run()
-                    assert 1 == mock_bulk_insert.call_count
-                    assert 1 == mock_update.call_count
-                mock_keys.assert_called_once_with('statistics')
+                with patch.object(StatisticsSnapshot, "take", return_value=mock_coro((2, 1))) as mock_take:
+                    await sh.run()
+                mock_take.assert_called_once_with()
+
+
+@pytest.allure.feature("unit")
+@pytest.allure.story("tasks", "statistics")
+class TestStatisticsSnapshot:
+
+    async def test_take(self):
+        storage = MagicMock(spec=StorageClientAsync)
+        retval = {'count': 3,
+                  'rows': [{'value': 0, 'key': 'PURGED', 'previous_value': 0},
+                           {'value': 12, 'key': 'READINGS', 'previous_value': 5},
+                           {'value': 3, 'key': 'SINUSOID', 'previous_value': 0}]
+                  }
+        with patch.object(storage, "query_tbl_with_payload", return_value=mock_coro(retval)) as mock_query:
+            with patch.object(storage, "insert_into_tbl", return_value=mock_coro(None)) as mock_insert:
+                with patch.object(storage, "update_tbl", return_value=mock_coro(None)) as mock_update:
+                    assert (3, 2) == await StatisticsSnapshot(storage).take('2020-01-01 10:00:00.000000+00:00')
+        mock_query.assert_called_once_with('statistics', '{"return": ["key", "value", "previous_value"]}')
+        args, kwargs = mock_insert.call_args
+        assert 'statistics_history' == args[0]
+        assert isinstance(args[1], JsonPayload)
+        assert {'inserts': [{'key': 'PURGED', 'value': 0, 'history_ts': '2020-01-01 10:00:00.000000+00:00'},
+                            {'key': 'READINGS', 'value': 7, 'history_ts': '2020-01-01 10:00:00.000000+00:00'},
+                            {'key': 'SINUSOID', 'value': 3, 'history_ts': '2020-01-01 10:00:00.000000+00:00'}]
+                } == json.loads(args[1])
+        args, kwargs = mock_update.call_args
+        assert 'statistics' == args[0]
+        # The statistics that did not change are not updated
+        assert {'updates': [{'values': {'previous_value': 12},
+                             'where': {'column': 'key', 'condition': '=', 'value': 'READINGS'}},
+                            {'values': {'previous_value': 3},
+                             'where': {'column': 'key', 'condition': '=', 'value': 'SINUSOID'}}]
+                } == json.loads(args[1])
+
+    async def test_take_unchanged(self):
+        storage = MagicMock(spec=StorageClientAsync)
+        retval = {'count': 1, 'rows': [{'value': 4, 'key': 'READINGS', 'previous_value': 4}]}
+        with patch.object(storage, "query_tbl_with_payload", return_value=mock_coro(retval)):
+            with patch.object(storage, "insert_into_tbl", return_value=mock_coro(None)) as mock_insert:
+                with patch.object(storage, "update_tbl") as mock_update:
+                    assert (1, 0) == await StatisticsSnapshot(storage).take()
+        assert 1 == mock_insert.call_count
+        mock_update.assert_not_called()
+
+    async def test_run_periodically(self):
+        stop_event = asyncio.Event()
+        snapshot = StatisticsSnapshot(MagicMock(spec=StorageClientAsync))
+
+        @asyncio.coroutine
+        def take():
+            if mock_take.call_count == 2:
+                stop_event.set()
+            raise RuntimeError("storage unavailable")
+
+        with patch.object(snapshot, "take", side_effect=take) as mock_take:
+            await asyncio.wait_for(snapshot.run(0.01, stop_event), 1)
+        # A failed snapshot does not stop the next ones
+        assert 2 == mock_take.call_count